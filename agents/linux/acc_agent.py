@@ -3,7 +3,7 @@
 """
 ACC Monitor - Linux Agent
 Collects server metrics, Docker container status, container error logs,
-and EAI log monitoring (real-time tail -F with log parsing).
+and EAI log monitoring (checkpointed in-process file following with log parsing).
 
 Phase 2: Added get_container_error_logs() for docker logs error extraction
 Phase 3: Added EaiLogWatcher for real-time EAI log monitoring (replaces
@@ -14,13 +14,22 @@ import re
 import sys
 import time
 import json
+import glob
+import calendar
 import socket
 import logging
 import subprocess
 import threading
+import gzip
 import queue
+import select
+import struct
+import http.client
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from typing import Optional, Dict, List, Tuple
@@ -31,7 +40,13 @@ CONFIG = {
     'server_id': '163',  # This server's ID (EAI)
     'report_interval': 30,  # Seconds between reports
     'containers': ['hulu-eai', 'redis', 'portainer', 'frpc'],
+    'docker_socket': '/var/run/docker.sock',  # Engine API; falls back to the docker CLI if unusable
+    'container_log_filter': None,  # regex; None reports every line (the backend classifies levels)
+    'container_log_max_pending': 2000,  # per container, while the backend is unreachable
+    'container_log_cursor_file': None,  # defaults to container_log_cursors.json next to this script
     'log_path': '/var/eai/logs',
+    'log_alerts_per_report': 200,  # the rest wait for the next report
+    'log_alert_max_pending': 2000,  # while the backend is unreachable
     'log_level': 'INFO',
     # EAI log monitoring config
     'eai_monitor_enabled': True,
@@ -50,9 +65,20 @@ CONFIG = {
         }
     },
     'eai_report_url': None,  # Will default to server_url + /api/agent/eai-logs
-    'eai_batch_size': 10,
-    'eai_batch_timeout': 5,  # seconds
-    'eai_catchup_lines': 1000  # lines to read on startup for catch-up
+    'eai_batch_size': 10,  # upload as soon as this many records are waiting
+    'eai_batch_timeout': 5,  # seconds; upper bound on how long a record waits for its batch
+    'eai_batch_linger': 0.2,  # seconds without a new record before a partial batch is uploaded
+    'eai_record_queue_size': 10000,  # parsed records buffered between the parse stage and the uploader
+    'eai_catchup_lines': 1000,  # lines to read the first time a file is seen (no checkpoint)
+    'eai_checkpoint_file': None,  # defaults to eai_checkpoints.json next to this script
+    'eai_checkpoint_interval': 5,  # seconds between checkpoint saves
+    'eai_read_chunk_size': 65536,  # bytes per read
+    'eai_poll_interval': 0.5,  # seconds between file polls when inotify is unavailable
+    'eai_spool_dir': None,  # defaults to eai_spool/ next to this script
+    'eai_spool_segment_bytes': 8 * 1024 * 1024,  # spool segment size before rolling to a new file
+    'eai_spool_fsync': 'interval',  # always | interval | never
+    'eai_spool_fsync_interval': 1.0,  # seconds between fsyncs with 'interval'
+    'eai_upload_max_records': 500  # records per upload request (all schemas together)
 }
 
 # Setup logging
@@ -159,6 +185,21 @@ class EaiLogParser:
     def __init__(self):
         self._trigger_queues: Dict[str, list] = {}
         self._current_request: Optional[Tuple[datetime, dict, str, str]] = None
+        # Consecutive lines usually share a second; skip the repeated strptime
+        self._last_time_str: Optional[str] = None
+        self._last_timestamp: Optional[datetime] = None
+
+    def _parse_timestamp(self, time_str: str) -> datetime:
+        """strptime with a one-entry cache; unparseable times fall back to now()"""
+        if time_str == self._last_time_str:
+            return self._last_timestamp
+        try:
+            timestamp = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return datetime.now()
+        self._last_time_str = time_str
+        self._last_timestamp = timestamp
+        return timestamp
 
     def parse_line(self, line: str) -> Optional[ReportRecord]:
         """Parse a single log line, return ReportRecord if a complete record is found"""
@@ -167,27 +208,38 @@ class EaiLogParser:
             if not line:
                 return None
 
+            # Fast path: every pattern below needs one of these keywords
+            # (all are case-insensitive), and most EAI lines contain none
+            lowered = line.lower()
+            maybe_lua = 'lua' in lowered
+            maybe_trigger = 'trigger' in lowered
+            maybe_kingdee = 'kingdee' in lowered
+            if not (maybe_lua or maybe_trigger or maybe_kingdee):
+                return None
+
             timestamp = None
             match = self.LOG_LINE_PATTERN.match(line)
             if match:
                 level, time_str, content = match.groups()
-                try:
-                    timestamp = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    timestamp = datetime.now()
+                timestamp = self._parse_timestamp(time_str)
             else:
                 content = line
                 timestamp = datetime.now()
 
             # Step 1: Check for Lua error (highest priority)
-            lua_error_match = self.LUA_ERROR_PATTERN.search(line)
-            if lua_error_match:
-                return self._handle_lua_error(timestamp, lua_error_match.group(1), line)
+            if maybe_lua:
+                lua_error_match = self.LUA_ERROR_PATTERN.search(line)
+                if lua_error_match:
+                    return self._handle_lua_error(timestamp, lua_error_match.group(1), line)
 
             # Step 2: Check for trigger data
-            trigger_match = self.TRIGGER_DATA_PATTERN.search(line)
-            if trigger_match:
-                self._handle_trigger_data(trigger_match.group(1))
+            if maybe_trigger:
+                trigger_match = self.TRIGGER_DATA_PATTERN.search(line)
+                if trigger_match:
+                    self._handle_trigger_data(trigger_match.group(1))
+                    return None
+
+            if not maybe_kingdee:
                 return None
 
             # Step 3: Check for kingdee request
@@ -695,141 +747,722 @@ class EaiLogParser:
 
 # =============================================================================
 # EAI Log File Watcher (replaces SSH-based SSHLogMonitor)
-# Reads local files directly using tail -F subprocess
+# Follows local files on one reader loop with persistent byte-offset checkpoints
 # =============================================================================
 
+class FileCheckpointStore:
+    """
+    Resume points of followed files ({path: {inode, offset}}), saved atomically
+    (write temp file, fsync, rename) so a crash never leaves a torn JSON file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"[EAI] Ignoring unreadable checkpoint file {self.path}: {e}")
+            return {}
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            return dict(entry) if entry else None
+
+    def update(self, key: str, inode: int, offset: int):
+        with self._lock:
+            self._data[key] = {'inode': inode, 'offset': offset, 'updated_at': time.time()}
+            tmp_path = self.path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._data, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"[EAI] Cannot save checkpoint file {self.path}: {e}")
+
+
 class EaiLogWatcher:
     """
-    Watches a single EAI log file using tail -F subprocess.
+    Follow state of a single EAI log file (no thread or subprocess of its own).
     Runs locally on the 163 server -- no SSH needed.
+
+    EaiLogReaderLoop reads every watched file on one thread and hands the
+    lines to one shared parse stage, which pushes (log_file, record) onto the
+    manager's bounded record queue. The checkpoint (inode + offset) only
+    moves past a record once the manager has it safely spooled, so a
+    restart resumes exactly after the last delivered record: no replayed
+    duplicates, no re-reading of old lines. Rotation (new inode) restarts at
+    the beginning of the new file; truncation (size < offset) rewinds to 0.
     """
 
-    def __init__(self, log_file: str, schema: str, description: str,
-                 log_dir: str, catchup_lines: int = 1000):
+    def __init__(self, log_file: str, schema: str, description: str, log_dir: str,
+                 checkpoints: FileCheckpointStore, record_queue: queue.Queue, catchup_lines: int = 1000):
         self.log_file = log_file
         self.schema = schema
         self.description = description
         self.full_path = os.path.join(log_dir, log_file)
+        # Only used the first time a file is seen (no checkpoint yet)
         self.catchup_lines = catchup_lines
 
         self._parser = EaiLogParser()
-        self._record_queue: queue.Queue = queue.Queue()
+        # Shared with every other watcher; put() blocks while the uploader is behind
+        self._record_queue = record_queue
+
+        # Reader-side state (EaiLogReaderLoop thread only)
+        self.file = None
+        self.inode: Optional[int] = None
+        self.read_offset = 0
+        self.pending = b''
+        self.missing_since: Optional[float] = None
+
+        # Parse-side state
+        self._checkpoints = checkpoints
+        self._lock = threading.Lock()
+        # (inode, offset) of the next unparsed byte
+        self._position: Optional[Tuple[int, int]] = None
+        # (inode, offset) just past the newest queued record / newest uploaded record
+        self._last_emitted: Optional[Tuple[int, int]] = None
+        self._acked: Optional[Tuple[int, int]] = None
+        self._saved: Optional[Tuple[int, int]] = None
+        # A (log_file, None) progress note is queued and save_checkpoint() hasn't run since
+        self._progress_noted = False
+
+    def mark_uploaded(self, mark: Tuple[int, int]):
+        """Every record up to and including the one with source_mark == mark is delivered (spooled)"""
+        with self._lock:
+            self._acked = mark
+
+    def save_checkpoint(self):
+        """Persist the resume point: the parsed position if nothing is awaiting upload"""
+        with self._lock:
+            if self._position is None:
+                return
+            if self._acked == self._last_emitted:
+                mark = self._position
+            elif self._acked is not None:
+                mark = self._acked
+            else:
+                # Records read but none uploaded yet - keep the previous checkpoint
+                return
+        self._progress_noted = False
+        if mark != self._saved:
+            self._checkpoints.update(self.full_path, mark[0], mark[1])
+            self._saved = mark
+
+    def open(self, read_size: int) -> bool:
+        """Open the file at its resume offset (reader thread). False if it doesn't exist."""
+        try:
+            f = open(self.full_path, 'rb')
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        offset = self._resume_offset(f, st, read_size)
+        f.seek(offset)
+        self.file, self.inode, self.read_offset, self.pending = f, st.st_ino, offset, b''
+        logger.info(f"[EAI] Following {self.description} (inode={st.st_ino}, offset={offset})")
+        return True
+
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+        self.file = None
+
+    def _resume_offset(self, f, st, read_size: int) -> int:
+        """Where to start reading a freshly opened file"""
+        inode, size = st.st_ino, st.st_size
+
+        # Reopened after an error, same file: continue where we were
+        if self.inode == inode:
+            return self.read_offset if self.read_offset <= size else 0
+
+        checkpoint = self._checkpoints.get(self.full_path)
+        if checkpoint and checkpoint.get('inode') == inode:
+            offset = checkpoint.get('offset', 0)
+            if offset <= size:
+                logger.info(f"[EAI] Resuming {self.description} at byte {offset} of {size}")
+                return offset
+            logger.warning(f"[EAI] {self.description} shrank below its checkpoint, reading from start")
+            return 0
+
+        if checkpoint or self.inode is not None:
+            # Rotated since we last read it: the whole new file is unread
+            return 0
+
+        # First run for this file: same catch-up window the old tail -n used
+        return self._tail_offset(f, size, self.catchup_lines, read_size)
+
+    @staticmethod
+    def _tail_offset(f, size: int, lines: int, read_size: int = 65536) -> int:
+        """Byte offset of the start of the last `lines` lines"""
+        if lines <= 0:
+            return size
+        position = size
+        newlines = 0
+        while position > 0:
+            step = min(read_size, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            # The file's own trailing newline doesn't start a new line
+            end = len(chunk) - 1 if position + len(chunk) == size and chunk.endswith(b'\n') else len(chunk)
+            index = end
+            while True:
+                index = chunk.rfind(b'\n', 0, index)
+                if index < 0:
+                    break
+                newlines += 1
+                if newlines >= lines:
+                    return position + index + 1
+        return 0
+
+    def _consume(self, inode: int, offset: int, lines: List[bytes]):
+        """Parse stage: parse complete lines that start at offset"""
+        records = []
+        for raw_line in lines:
+            offset += len(raw_line) + 1
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\r')
+            if line:
+                record = self._parser.parse_line(line)
+                if record:
+                    record.schema = self.schema
+                    record.source_mark = (inode, offset)
+                    records.append(record)
+
+        with self._lock:
+            if records:
+                self._last_emitted = records[-1].source_mark
+            self._position = (inode, offset)
+        for record in records:
+            self._record_queue.put((self.log_file, record))
+        if not records and lines and not self._progress_noted:
+            # Lines without records still move the checkpoint: ask for a save
+            self._progress_noted = True
+            self._record_queue.put((self.log_file, None))
+
+
+class Inotify:
+    """Minimal inotify binding (ctypes, no extra packages) for directory change wakeups"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._get_errno = ctypes.get_errno
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(self._get_errno(), 'inotify_add_watch failed', path)
+        return wd
+
+    def read_events(self) -> Tuple[List[Tuple[int, bytes]], bool]:
+        """Drain pending events -> ([(wd, name)], overflowed)"""
+        events = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not data:
+                break
+            pos = 0
+            while pos + self.EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, pos)
+                pos += self.EVENT_HEADER.size
+                name = data[pos:pos + length].rstrip(b'\0')
+                pos += length
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                events.append((wd, name))
+        return events, overflow
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class EaiLogReaderLoop:
+    """
+    Reads every watched EAI log on one thread and feeds one shared parse thread,
+    so agent thread count stays at two no matter how many FLOW_* logs are watched.
+    Wakes on inotify events for the files' directories (Linux); falls back to
+    polling every poll_interval when inotify isn't available.
+    """
+
+    def __init__(self, watchers: List[EaiLogWatcher], read_size: int = 65536,
+                 poll_interval: float = 0.5, max_bytes_per_turn: int = 4 * 1024 * 1024,
+                 parse_queue_size: int = 256):
+        self.watchers = watchers
+        self.read_size = read_size
+        self.poll_interval = poll_interval
+        # One busy file can't starve the others: read at most this much per turn
+        self.max_bytes_per_turn = max_bytes_per_turn
+        # Bounded so a multi-GB catch-up doesn't pile up in memory ahead of the parser
+        self._parse_queue: queue.Queue = queue.Queue(maxsize=parse_queue_size)
         self._running = False
-        self._thread: Optional[threading.Thread] = None
-        self._process: Optional[subprocess.Popen] = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self._parser_thread: Optional[threading.Thread] = None
+        # Self-pipe: stop() writes to it so the reader doesn't sit out its select/poll timeout
+        self._wake_fds: Optional[Tuple[int, int]] = None
+
+        self._inotify: Optional[Inotify] = None
+        # Key: watched directory, Value: watch descriptor
+        self._dir_watches: Dict[str, int] = {}
+        # Key: (wd, file name bytes), Value: watcher
+        self._by_event: Dict[Tuple[int, bytes], EaiLogWatcher] = {}
+        self._stats = {'wakeups': 0, 'full_sweeps': 0, 'bytes_read': 0, 'lines_read': 0}
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify is not None else 'polling'
 
     def start(self):
-        """Start watching the log file"""
         self._running = True
-        self._thread = threading.Thread(target=self._watch_loop, daemon=True)
-        self._thread.start()
-        logger.info(f"[EAI] Started watcher: {self.description} ({self.log_file})")
+        self._wake_fds = os.pipe()
+        try:
+            self._inotify = Inotify()
+        except (OSError, AttributeError) as e:
+            logger.info(f"[EAI] inotify unavailable ({e}), polling every {self.poll_interval}s")
+            self._inotify = None
+        self._add_dir_watches()
+
+        self._parser_thread = threading.Thread(target=self._parse_loop, name='eai-parse', daemon=True)
+        self._parser_thread.start()
+        self._reader_thread = threading.Thread(target=self._read_loop, name='eai-reader', daemon=True)
+        self._reader_thread.start()
+        logger.info(f"[EAI] Reader loop started for {len(self.watchers)} files ({self.mode})")
 
     def stop(self):
-        """Stop watching"""
         self._running = False
-        if self._process:
-            try:
-                self._process.terminate()
-                self._process.wait(timeout=5)
-            except Exception:
+        if self._wake_fds is not None:
+            os.write(self._wake_fds[1], b'x')
+        if self._reader_thread:
+            self._reader_thread.join(timeout=5)
+        if self._parser_thread:
+            self._parser_thread.join(timeout=10)
+        for watcher in self.watchers:
+            watcher.close()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._wake_fds is not None:
+            for fd in self._wake_fds:
+                os.close(fd)
+            self._wake_fds = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats['mode'] = self.mode
+        stats['files'] = len(self.watchers)
+        stats['open_files'] = sum(1 for w in self.watchers if w.file is not None)
+        stats['parse_queue'] = self._parse_queue.qsize()
+        return stats
+
+    def _add_dir_watches(self):
+        """Watch each file's directory (catches creation and rotation too); retried on sweeps"""
+        if self._inotify is None:
+            return
+        for watcher in self.watchers:
+            directory = os.path.dirname(watcher.full_path)
+            wd = self._dir_watches.get(directory)
+            if wd is None:
                 try:
-                    self._process.kill()
-                except Exception:
-                    pass
-        if self._thread:
-            self._thread.join(timeout=5)
-        logger.info(f"[EAI] Stopped watcher: {self.description}")
+                    wd = self._inotify.add_watch(directory)
+                except OSError:
+                    continue
+                self._dir_watches[directory] = wd
+            self._by_event[(wd, os.fsencode(os.path.basename(watcher.full_path)))] = watcher
 
-    def get_records(self) -> List[ReportRecord]:
-        """Get parsed records (non-blocking)"""
-        records = []
-        while True:
-            try:
-                record = self._record_queue.get_nowait()
-                records.append(record)
-            except queue.Empty:
-                break
-        return records
+    def _read_loop(self):
+        """Reader thread: wait for changes, read new bytes from the files that changed"""
+        # Fallback sweep over every file even with inotify (missed events, late directories)
+        sweep_interval = max(self.poll_interval, 5.0) if self._inotify is not None else self.poll_interval
+        last_sweep = 0.0
+        dirty = set(self.watchers)
 
-    def _watch_loop(self):
-        """Main watch loop with auto-reconnect on file rotation"""
         while self._running:
             try:
-                if not os.path.exists(self.full_path):
-                    logger.warning(f"[EAI] Log file not found: {self.full_path}, retrying in 10s...")
-                    time.sleep(10)
-                    continue
+                now = time.time()
+                if now - last_sweep >= sweep_interval:
+                    self._stats['full_sweeps'] += 1
+                    self._add_dir_watches()
+                    dirty.update(self.watchers)
+                    last_sweep = now
+
+                more = set()
+                for watcher in dirty:
+                    if self._service(watcher):
+                        more.add(watcher)
+                dirty = more
+
+                if not dirty:
+                    dirty = self._wait(min(sweep_interval, max(0.0, last_sweep + sweep_interval - time.time())))
+            except Exception as e:
+                logger.error(f"[EAI] Reader loop error: {e}")
+                time.sleep(1)
+        # Everything read so far is queued; tell the parse stage to finish
+        self._parse_queue.put(None)
+
+    def _wait(self, timeout: float) -> set:
+        """Block until inotify reports a change, stop() or timeout; returns watchers to service"""
+        fds = [self._wake_fds[0]]
+        if self._inotify is not None:
+            fds.append(self._inotify.fd)
+        readable, _, _ = select.select(fds, [], [], timeout)
+        if self._inotify is None or self._inotify.fd not in readable:
+            return set()
+        self._stats['wakeups'] += 1
+        events, overflow = self._inotify.read_events()
+        if overflow:
+            return set(self.watchers)
+        return {self._by_event[key] for key in events if key in self._by_event}
+
+    def _enqueue(self, item):
+        """Hand lines to the parse stage; blocks (backpressure) while it is behind"""
+        while self._running:
+            try:
+                self._parse_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
 
-                # Phase 1: Catch-up - read recent lines to avoid missing data
-                self._catchup()
+    def _service(self, watcher: EaiLogWatcher) -> bool:
+        """Read what's new in one file. Returns True if more data is waiting."""
+        if watcher.file is None:
+            if not watcher.open(self.read_size):
+                if watcher.missing_since is None:
+                    watcher.missing_since = time.time()
+                    logger.warning(f"[EAI] Log file not found: {watcher.full_path}, waiting for it...")
+                return False
+            watcher.missing_since = None
+            # Parse stage learns the starting position in order with the data
+            self._enqueue((watcher, watcher.inode, watcher.read_offset, []))
+
+        budget = self.max_bytes_per_turn
+        at_eof = False
+        while budget > 0:
+            chunk = watcher.file.read(self.read_size)
+            if not chunk:
+                at_eof = True
+                break
+            budget -= len(chunk)
+            self._stats['bytes_read'] += len(chunk)
+            lines = (watcher.pending + chunk).split(b'\n')
+            watcher.pending = lines.pop()
+            if lines:
+                start = watcher.read_offset
+                watcher.read_offset += sum(len(line) + 1 for line in lines)
+                self._stats['lines_read'] += len(lines)
+                self._enqueue((watcher, watcher.inode, start, lines))
+        if not at_eof:
+            # Turn budget used up; come back after the other files
+            return True
 
-                # Phase 2: Real-time tail -F
-                self._tail_follow()
+        # At EOF: check whether the path still points at this file
+        try:
+            path_st = os.stat(watcher.full_path)
+        except OSError:
+            path_st = None
+
+        if path_st is None or path_st.st_ino != watcher.inode:
+            # Old file fully drained (a final unterminated line counts as a line)
+            if watcher.pending:
+                self._enqueue((watcher, watcher.inode, watcher.read_offset, [watcher.pending]))
+                watcher.read_offset += len(watcher.pending) + 1
+                watcher.pending = b''
+            logger.info(f"[EAI] {watcher.description} was rotated, switching to the new file")
+            watcher.close()
+            return path_st is not None
+
+        if path_st.st_size < watcher.read_offset + len(watcher.pending):
+            logger.warning(f"[EAI] {watcher.description} was truncated, reading from start")
+            watcher.file.seek(0)
+            watcher.read_offset = 0
+            watcher.pending = b''
+            self._enqueue((watcher, watcher.inode, 0, []))
+            return True
+        return False
 
+    def _parse_loop(self):
+        """Shared parse stage for every watched file; blocks until lines (or the stop sentinel) arrive"""
+        while True:
+            item = self._parse_queue.get()
+            if item is None:
+                break
+            watcher, inode, offset, lines = item
+            try:
+                watcher._consume(inode, offset, lines)
             except Exception as e:
-                logger.error(f"[EAI] Watcher error for {self.description}: {e}")
+                logger.error(f"[EAI] Parse stage error for {watcher.description}: {e}")
 
-            if self._running:
-                logger.warning(f"[EAI] {self.description} tail process ended, reconnecting in 5s...")
-                time.sleep(5)
 
-    def _catchup(self):
-        """Read recent lines for catch-up after restart"""
-        try:
-            cmd = f'tail -n {self.catchup_lines} "{self.full_path}"'
-            result = subprocess.run(
-                cmd, shell=True, capture_output=True, text=True, timeout=30
-            )
-            if result.stdout:
-                count = 0
-                for line in result.stdout.splitlines():
-                    record = self._parser.parse_line(line)
-                    if record:
-                        record.schema = self.schema
-                        self._record_queue.put(record)
-                        count += 1
-                logger.info(f"[EAI] Catchup complete for {self.description}: {count} records from {self.catchup_lines} lines")
-        except Exception as e:
-            logger.warning(f"[EAI] Catchup error for {self.description}: {e}")
+# =============================================================================
+# EAI Upload Spool
+# Durable on-disk queue between the parser and the HTTP uploader
+# =============================================================================
 
-    def _tail_follow(self):
-        """Follow log file using tail -F (handles file rotation)"""
-        cmd = ['tail', '-F', self.full_path]
-        try:
-            self._process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1  # Line buffered
-            )
+class EaiSpool:
+    """
+    Append-only, segment-based spool of parsed EAI records awaiting upload.
 
-            logger.info(f"[EAI] tail -F started for {self.description} (pid={self._process.pid})")
+    Records are JSON lines ({seq, schema, record}) in segment files named by
+    their first sequence number (spool-<seq>.log). ack(seq) persists that the
+    center confirmed everything up to seq and deletes segments that are fully
+    confirmed, so disk use follows the unconfirmed backlog and memory holds
+    only one upload batch. Used from the manager's batch thread only.
 
-            for line in iter(self._process.stdout.readline, ''):
-                if not self._running:
-                    break
-                line = line.rstrip('\n')
-                if line:
-                    record = self._parser.parse_line(line)
-                    if record:
-                        record.schema = self.schema
-                        self._record_queue.put(record)
+    fsync policy: 'always' (every append), 'interval' (at most every
+    fsync_interval seconds, see sync()) or 'never' (leave it to the OS).
+    """
 
-        except Exception as e:
-            logger.error(f"[EAI] tail -F error for {self.description}: {e}")
-        finally:
-            if self._process:
+    SEGMENT_PREFIX = 'spool-'
+    SEGMENT_SUFFIX = '.log'
+
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024,
+                 fsync: str = 'interval', fsync_interval: float = 1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_policy = fsync
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+        self._ack_path = os.path.join(directory, 'ack.json')
+
+        # [first_seq, ...] of the segment files on disk, oldest first
+        self._segments: List[int] = []
+        self._active = None  # segment file open for appending
+        self._active_size = 0
+        self._last_sync = time.time()
+
+        self.acked_seq = self._load_ack()
+        self.next_seq = self._recover()
+        # Highest seq known to be on disk (fsynced, or flushed with fsync='never')
+        self.synced_seq = self.next_seq - 1
+        # (segment first_seq, byte offset) of the next entry to upload
+        self._cursor = (self._segments[0], 0) if self._segments else None
+        self._compact()
+
+    @property
+    def backlog(self) -> int:
+        """Records appended but not yet confirmed by the center"""
+        return self.next_seq - 1 - self.acked_seq
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"{self.SEGMENT_PREFIX}{first_seq:016d}{self.SEGMENT_SUFFIX}")
+
+    def _load_ack(self) -> int:
+        try:
+            with open(self._ack_path, 'r', encoding='utf-8') as f:
+                return int(json.load(f).get('seq', 0))
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"[EAI] Ignoring unreadable spool ack file {self._ack_path}: {e}")
+            return 0
+
+    def _recover(self) -> int:
+        """Find the segments on disk, cut a torn final line, return the next seq"""
+        for name in os.listdir(self.directory):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
                 try:
-                    self._process.terminate()
-                    self._process.wait(timeout=3)
-                except Exception:
-                    try:
-                        self._process.kill()
-                    except Exception:
-                        pass
-                self._process = None
+                    self._segments.append(int(name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        self._segments.sort()
+
+        while self._segments:
+            path = self._segment_path(self._segments[-1])
+            last_seq = self._repair_tail(path)
+            if last_seq is not None:
+                return last_seq + 1
+            # Empty (or only a torn line): nothing in it worth keeping
+            os.remove(path)
+            self._segments.pop()
+        return self.acked_seq + 1
+
+    @staticmethod
+    def _repair_tail(path: str) -> Optional[int]:
+        """Truncate an unterminated last line (crash mid-append); return the last seq"""
+        with open(path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                logger.warning(f"[EAI] Spool segment {path} ends with a partial record, truncating")
+                f.truncate(end)
+        if end == 0:
+            return None
+        start = data.rfind(b'\n', 0, end - 1) + 1
+        return json.loads(data[start:end].decode('utf-8'))['seq']
+
+    def append(self, entries: List[Tuple[str, dict]]) -> int:
+        """Append (schema, record) entries; returns the seq of the last one"""
+        if self._active is None or self._active_size >= self.segment_bytes:
+            self._roll()
+        lines = []
+        for schema, record in entries:
+            lines.append(json.dumps({'seq': self.next_seq, 'schema': schema, 'record': record},
+                                    ensure_ascii=False))
+            self.next_seq += 1
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        self._active.write(data)
+        self._active.flush()
+        self._active_size += len(data)
+        if self.fsync_policy == 'always':
+            self.sync()
+        elif self.fsync_policy != 'interval':
+            self.synced_seq = self.next_seq - 1
+        return self.next_seq - 1
+
+    @property
+    def sync_deadline(self) -> Optional[float]:
+        """When the next 'interval' fsync is due; None if everything appended is synced"""
+        if self._active is None or self.synced_seq == self.next_seq - 1:
+            return None
+        return self._last_sync + self.fsync_interval
+
+    def sync(self, force: bool = True):
+        """fsync the active segment (with force=False only once fsync_interval has passed)"""
+        if self._active is None or self.synced_seq == self.next_seq - 1:
+            return
+        now = time.time()
+        if not force and now - self._last_sync < self.fsync_interval:
+            return
+        os.fsync(self._active.fileno())
+        self._last_sync = now
+        self.synced_seq = self.next_seq - 1
+
+    def _roll(self):
+        """Close the active segment and start a new one at next_seq"""
+        self._close_active()
+        first_seq = self.next_seq
+        self._active = open(self._segment_path(first_seq), 'ab')
+        self._active_size = 0
+        self._segments.append(first_seq)
+        if self._cursor is None:
+            self._cursor = (first_seq, 0)
+        if self.fsync_policy != 'never':
+            # Make the new directory entry itself durable
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _close_active(self):
+        if self._active is not None:
+            self.sync()
+            self._active.close()
+            self._active = None
+            self._active_size = 0
+
+    def read_batch(self, max_records: int) -> Tuple[List[dict], Optional[tuple]]:
+        """
+        Up to max_records unconfirmed entries from the cursor on, plus the cursor
+        just past them (hand it to ack() once the center has them).
+        """
+        entries = []
+        cursor = self._cursor
+        if cursor is None:
+            return entries, cursor
+        first_seq, offset = cursor
+        while len(entries) < max_records:
+            index = self._segments.index(first_seq)
+            with open(self._segment_path(first_seq), 'rb') as f:
+                f.seek(offset)
+                for raw_line in f:
+                    if not raw_line.endswith(b'\n'):
+                        break
+                    offset += len(raw_line)
+                    entry = json.loads(raw_line.decode('utf-8'))
+                    if entry['seq'] > self.acked_seq:
+                        entries.append(entry)
+                        if len(entries) >= max_records:
+                            break
+            if len(entries) >= max_records or index + 1 >= len(self._segments):
+                break
+            first_seq, offset = self._segments[index + 1], 0
+        return entries, (first_seq, offset)
+
+    def ack(self, seq: int, cursor: tuple):
+        """The center has everything up to seq: persist that and drop confirmed segments"""
+        self.acked_seq = seq
+        self._cursor = cursor
+        tmp_path = self._ack_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': seq, 'updated_at': time.time()}, f)
+            f.flush()
+            if self.fsync_policy != 'never':
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self._ack_path)
+        self._compact()
+
+    def _compact(self):
+        """Delete segments whose records are all confirmed"""
+        while self._segments:
+            first_seq = self._segments[0]
+            last_seq = self._segments[1] - 1 if len(self._segments) > 1 else self.next_seq - 1
+            if last_seq > self.acked_seq:
+                break
+            if len(self._segments) == 1:
+                # Active segment fully confirmed: start a fresh one on the next append
+                self._close_active()
+            try:
+                os.remove(self._segment_path(first_seq))
+            except OSError as e:
+                logger.warning(f"[EAI] Cannot remove spool segment {first_seq}: {e}")
+                break
+            self._segments.pop(0)
+            if self._cursor is not None and self._cursor[0] == first_seq:
+                self._cursor = (self._segments[0], 0) if self._segments else None
+
+    def close(self):
+        self._close_active()
+
+    def get_stats(self) -> dict:
+        size = self._active_size
+        for first_seq in self._segments[:-1] if self._active is not None else self._segments:
+            try:
+                size += os.path.getsize(self._segment_path(first_seq))
+            except OSError:
+                pass
+        return {
+            'backlog': self.backlog,
+            'next_seq': self.next_seq,
+            'acked_seq': self.acked_seq,
+            'segments': len(self._segments),
+            'bytes': size,
+            'fsync': self.fsync_policy
+        }
 
 
 # =============================================================================
@@ -838,14 +1471,29 @@ class EaiLogWatcher:
 
 class EaiLogMonitorManager:
     """
-    Manages multiple EaiLogWatcher instances and batches records
-    for HTTP upload to the monitoring center.
+    Manages the EaiLogWatcher instances (read by one EaiLogReaderLoop),
+    spools their records to disk (EaiSpool) and uploads the spool to the
+    monitoring center in gzip-compressed multi-schema batches.
+
+    Watchers push records onto one bounded queue; the batch thread blocks on
+    it until a record arrives or the next flush/fsync/checkpoint deadline,
+    so an idle agent doesn't wake up and uploads overlap with parsing.
     """
 
+    # Record queue item asking the batch thread to upload what it has now
+    _FLUSH = object()
+
     def __init__(self, config: dict, report_url: str):
         self.config = config
         self.report_url = report_url
         self._watchers: Dict[str, EaiLogWatcher] = {}
+        self._checkpoints: Optional[FileCheckpointStore] = None
+        self._reader: Optional[EaiLogReaderLoop] = None
+        self._spool: Optional[EaiSpool] = None
+        # (log_file, record) from the parse stage; (log_file, None) = checkpoint progress only
+        self._record_queue: queue.Queue = queue.Queue(maxsize=config.get('eai_record_queue_size', 10000))
+        # (seq, log_file, source_mark) spooled but not yet fsynced
+        self._unsynced: List[Tuple[int, str, tuple]] = []
         self._running = False
         self._batch_thread: Optional[threading.Thread] = None
         self._stats = {
@@ -860,6 +1508,18 @@ class EaiLogMonitorManager:
         log_dir = self.config.get('log_path', '/var/eai/logs')
         eai_log_files = self.config.get('eai_log_files', {})
         catchup_lines = self.config.get('eai_catchup_lines', 1000)
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        checkpoint_file = self.config.get('eai_checkpoint_file') or os.path.join(
+            script_dir, 'eai_checkpoints.json')
+        self._checkpoints = FileCheckpointStore(checkpoint_file)
+        self._spool = EaiSpool(
+            self.config.get('eai_spool_dir') or os.path.join(script_dir, 'eai_spool'),
+            segment_bytes=self.config.get('eai_spool_segment_bytes', 8 * 1024 * 1024),
+            fsync=self.config.get('eai_spool_fsync', 'interval'),
+            fsync_interval=self.config.get('eai_spool_fsync_interval', 1.0)
+        )
+        if self._spool.backlog:
+            logger.info(f"[EAI] {self._spool.backlog} spooled records from the last run awaiting upload")
 
         for log_file, file_config in eai_log_files.items():
             watcher = EaiLogWatcher(
@@ -867,10 +1527,19 @@ class EaiLogMonitorManager:
                 schema=file_config['schema'],
                 description=file_config['description'],
                 log_dir=log_dir,
+                checkpoints=self._checkpoints,
+                record_queue=self._record_queue,
                 catchup_lines=catchup_lines
             )
             self._watchers[log_file] = watcher
-            watcher.start()
+
+        # One reader thread + one parse thread for all files
+        self._reader = EaiLogReaderLoop(
+            list(self._watchers.values()),
+            read_size=self.config.get('eai_read_chunk_size', 65536),
+            poll_interval=self.config.get('eai_poll_interval', 0.5)
+        )
+        self._reader.start()
 
         # Start batch upload thread
         self._batch_thread = threading.Thread(target=self._batch_upload_loop, daemon=True)
@@ -880,90 +1549,756 @@ class EaiLogMonitorManager:
     def stop(self):
         """Stop all watchers and the batch thread"""
         self._running = False
-        for watcher in self._watchers.values():
-            watcher.stop()
+        if self._reader:
+            self._reader.stop()
         if self._batch_thread:
+            # Queued after everything the parse stage produced
+            try:
+                self._record_queue.put(None, timeout=10)
+            except queue.Full:
+                pass
             self._batch_thread.join(timeout=10)
+        for watcher in self._watchers.values():
+            watcher.save_checkpoint()
         logger.info(f"[EAI] Monitor manager stopped. Stats: {self._stats}")
 
     def get_stats(self) -> dict:
         """Get monitoring statistics"""
-        return dict(self._stats)
+        stats = dict(self._stats)
+        if self._reader:
+            stats['reader'] = self._reader.get_stats()
+        if self._spool:
+            stats['spool'] = self._spool.get_stats()
+        stats['record_queue'] = self._record_queue.qsize()
+        return stats
+
+    def flush(self):
+        """Upload spooled records now instead of waiting for the batch to fill or linger out"""
+        try:
+            self._record_queue.put_nowait(self._FLUSH)
+        except queue.Full:
+            pass  # the batch thread is busy draining anyway
 
     def _batch_upload_loop(self):
-        """Collect records from all watchers and upload in batches"""
+        """
+        Consumer of the record queue: spool what arrives, upload when the batch
+        is full (eai_batch_size), no record arrived for eai_batch_linger, the
+        oldest waiting record is eai_batch_timeout old, or flush() was called.
+        """
         batch_size = self.config.get('eai_batch_size', 10)
         batch_timeout = self.config.get('eai_batch_timeout', 5)
-        # Per-schema batch buffers
-        batch_records: Dict[str, List[dict]] = {}
-        last_upload_time = time.time()
-
-        while self._running:
+        linger = self.config.get('eai_batch_linger', 0.2)
+        max_records = self.config.get('eai_upload_max_records', 500)
+        checkpoint_interval = self.config.get('eai_checkpoint_interval', 5)
+        # Arrival time of the oldest not-yet-uploaded record / of the newest record
+        pending_since = time.time() if self._spool.backlog else None
+        last_arrival = 0.0
+        flush_requested = False
+        retry_at = 0.0
+        retry_delay = batch_timeout
+        checkpoints_dirty = False
+        last_checkpoint_time = time.time()
+        stopping = False
+
+        while not stopping:
             try:
-                # Collect records from all watchers
-                for log_file, watcher in self._watchers.items():
-                    records = watcher.get_records()
-                    for record in records:
-                        schema = record.schema
-                        if schema not in batch_records:
-                            batch_records[schema] = []
-                        batch_records[schema].append(record.to_dict())
-                        self._stats['total_records'] += 1
-
-                # Check if we should upload
-                current_time = time.time()
-                should_upload = False
-
-                for records in batch_records.values():
-                    if len(records) >= batch_size:
-                        should_upload = True
-                        break
+                # Sleep until a record arrives or the next deadline (forever if nothing is pending)
+                deadlines = []
+                backlog = self._spool.backlog
+                if backlog:
+                    if flush_requested or backlog >= batch_size:
+                        due = retry_at
+                    else:
+                        due = max(retry_at, min(pending_since + batch_timeout, last_arrival + linger))
+                    deadlines.append(due)
+                if self._spool.sync_deadline is not None:
+                    deadlines.append(self._spool.sync_deadline)
+                if checkpoints_dirty:
+                    deadlines.append(last_checkpoint_time + checkpoint_interval)
+                timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+
+                items = []
+                try:
+                    items.append(self._record_queue.get(timeout=timeout))
+                    while len(items) < max_records:
+                        items.append(self._record_queue.get_nowait())
+                except queue.Empty:
+                    pass
 
-                if current_time - last_upload_time >= batch_timeout:
-                    should_upload = True
+                entries = []
+                marks: Dict[str, tuple] = {}
+                for item in items:
+                    if item is None:
+                        stopping = True
+                    elif item is self._FLUSH:
+                        flush_requested = True
+                    else:
+                        log_file, record = item
+                        if record is None:
+                            checkpoints_dirty = True
+                            continue
+                        entries.append((record.schema, record.to_dict()))
+                        marks[log_file] = record.source_mark
+                if entries:
+                    self._spool_entries(entries, marks)
+                    last_arrival = time.time()
+                    if pending_since is None:
+                        pending_since = last_arrival
+                self._spool.sync(force=False)
+                if self._release_marks():
+                    checkpoints_dirty = True
 
-                if should_upload and any(batch_records.values()):
-                    self._upload_records(batch_records)
-                    last_upload_time = current_time
+                current_time = time.time()
+                backlog = self._spool.backlog
+                if backlog and current_time >= retry_at and (
+                        flush_requested or backlog >= batch_size or
+                        current_time >= pending_since + batch_timeout or
+                        current_time >= last_arrival + linger):
+                    if self._upload_batch(max_records):
+                        retry_delay = batch_timeout
+                        pending_since = current_time if self._spool.backlog else None
+                        flush_requested = flush_requested and bool(self._spool.backlog)
+                    else:
+                        # Center unreachable: records stay on disk, back off
+                        retry_at = current_time + retry_delay
+                        retry_delay = min(retry_delay * 2, 60)
 
-                time.sleep(0.5)
+                if checkpoints_dirty and current_time - last_checkpoint_time >= checkpoint_interval:
+                    for watcher in self._watchers.values():
+                        watcher.save_checkpoint()
+                    checkpoints_dirty = False
+                    last_checkpoint_time = current_time
 
             except Exception as e:
                 logger.error(f"[EAI] Batch upload loop error: {e}")
                 time.sleep(1)
 
-    def _upload_records(self, batch_records: Dict[str, List[dict]]):
-        """Upload batched records to the monitoring center"""
-        for schema, records in list(batch_records.items()):
-            if not records:
+        try:
+            self._spool.close()
+            self._release_marks()
+        except Exception as e:
+            logger.error(f"[EAI] Spool shutdown error: {e}")
+
+    def _spool_entries(self, entries: List[Tuple[str, dict]], marks: Dict[str, tuple]):
+        """Append (schema, record) entries to the spool; marks = newest source_mark per log file"""
+        seq = self._spool.append(entries)
+        self._stats['total_records'] += len(entries)
+        for log_file, mark in marks.items():
+            self._unsynced.append((seq, log_file, mark))
+
+    def _release_marks(self) -> bool:
+        """Records safely on disk count as delivered: let the log checkpoints move past them"""
+        synced_seq = self._spool.synced_seq
+        released = False
+        while self._unsynced and self._unsynced[0][0] <= synced_seq:
+            _, log_file, mark = self._unsynced.pop(0)
+            self._watchers[log_file].mark_uploaded(mark)
+            released = True
+        return released
+
+    def _upload_batch(self, max_records: int) -> bool:
+        """Upload the oldest unconfirmed spool entries in one gzip request; True on success"""
+        entries, cursor = self._spool.read_batch(max_records)
+        if not entries:
+            return True
+
+        batches: Dict[str, List[dict]] = {}
+        for entry in entries:
+            batches.setdefault(entry['schema'], []).append(entry['record'])
+        payload = {
+            'server_id': self.config.get('server_id', '163'),
+            'batches': [{'schema': schema, 'records': records} for schema, records in batches.items()],
+            'first_seq': entries[0]['seq'],
+            'last_seq': entries[-1]['seq'],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        try:
+            response = requests.post(
+                self.report_url,
+                data=gzip.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8')),
+                headers={'Content-Type': 'application/json; charset=utf-8', 'Content-Encoding': 'gzip'},
+                timeout=30
+            )
+            response.raise_for_status()
+            resp_data = response.json().get('data', {})
+        except Exception as e:
+            self._stats['failed_uploads'] += 1
+            logger.error(f"[EAI] Upload of {len(entries)} spooled records failed: {e}")
+            return False
+
+        self._spool.ack(entries[-1]['seq'], cursor)
+        inserted = resp_data.get('inserted', 0)
+        self._stats['uploaded_records'] += inserted
+        for schema, result in resp_data.get('schemas', {}).items():
+            if result.get('error'):
+                logger.error(f"[EAI] Center rejected schema {schema}: {result['error']}")
+        logger.info(f"[EAI] Uploaded {len(entries)} records ({', '.join(batches)}), inserted: {inserted}, "
+                    f"backlog: {self._spool.backlog}")
+        return True
+
+
+# =============================================================================
+# System Metric Collectors
+# Read /proc and statvfs directly: no shell pipelines forked per report
+# =============================================================================
+
+class CpuCollector:
+    """
+    CPU usage from /proc/stat jiffy counters, averaged over the time since the
+    previous sample (the whole report interval, not top's single snapshot),
+    with user/system/iowait/steal shares and per-core usage.
+    """
+
+    # user nice system idle iowait irq softirq steal (guest time is already counted in user/nice)
+    FIELDS = 8
+
+    def __init__(self, stat_path: str = '/proc/stat'):
+        self.stat_path = stat_path
+        self._prev: Dict[str, List[int]] = {}
+        self._last: Dict = {}
+
+    def _read_stat(self) -> Dict[str, List[int]]:
+        """{'cpu': [...], 'cpu0': [...], ...}"""
+        counters = {}
+        with open(self.stat_path, 'r') as f:
+            for line in f:
+                if not line.startswith('cpu'):
+                    break
+                parts = line.split()
+                values = [int(v) for v in parts[1:self.FIELDS + 1]]
+                counters[parts[0]] = values + [0] * (self.FIELDS - len(values))
+        return counters
+
+    @staticmethod
+    def _shares(prev: List[int], current: List[int]) -> Optional[Dict[str, float]]:
+        # Some kernels let iowait step backwards; clamp so one glitch can't go negative
+        delta = [max(c - p, 0) for c, p in zip(current, prev)]
+        total = sum(delta)
+        if total <= 0:
+            return None
+        busy = total - delta[3] - delta[4]
+        return {
+            'usage': round(busy * 100.0 / total, 1),
+            'user': round((delta[0] + delta[1]) * 100.0 / total, 1),
+            'system': round((delta[2] + delta[5] + delta[6]) * 100.0 / total, 1),
+            'iowait': round(delta[4] * 100.0 / total, 1),
+            'steal': round(delta[7] * 100.0 / total, 1)
+        }
+
+    def sample(self) -> Dict:
+        """Shares since the previous call. The first call measures a short 0.2s window."""
+        try:
+            current = self._read_stat()
+            if not self._prev:
+                self._prev = current
+                time.sleep(0.2)
+                current = self._read_stat()
+        except (OSError, ValueError, IndexError) as e:
+            logger.error(f"Cannot read {self.stat_path}: {e}")
+            return dict(self._last)
+        prev, self._prev = self._prev, current
+
+        overall = self._shares(prev.get('cpu', current['cpu']), current['cpu'])
+        if overall is None:
+            # No tick elapsed since the previous sample
+            return dict(self._last)
+        per_core = []
+        for name in sorted((n for n in current if n != 'cpu'), key=lambda n: int(n[3:])):
+            core = self._shares(prev[name], current[name]) if name in prev else None
+            per_core.append(core['usage'] if core else 0.0)
+        overall['per_core'] = per_core
+        self._last = overall
+        return dict(overall)
+
+
+class MemoryCollector:
+    """Memory and swap usage from /proc/meminfo"""
+
+    def __init__(self, meminfo_path: str = '/proc/meminfo'):
+        self.meminfo_path = meminfo_path
+
+    def sample(self) -> Dict:
+        try:
+            info = {}
+            with open(self.meminfo_path, 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        info[parts[0].rstrip(':')] = int(parts[1])  # kB
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot read {self.meminfo_path}: {e}")
+            return {}
+
+        total = info.get('MemTotal', 0)
+        if total <= 0:
+            return {}
+        # MemAvailable needs kernel 3.14+; estimate it the way free(1) did before that
+        available = info.get('MemAvailable')
+        if available is None:
+            available = info.get('MemFree', 0) + info.get('Buffers', 0) + info.get('Cached', 0)
+        swap_total = info.get('SwapTotal', 0)
+        swap_used = swap_total - info.get('SwapFree', 0)
+        return {
+            'usage': round((total - available) * 100.0 / total, 1),
+            'total_mb': total // 1024,
+            'available_mb': available // 1024,
+            'swap_usage': round(swap_used * 100.0 / swap_total, 1) if swap_total else 0.0
+        }
+
+
+def disk_usage_percent(path: str = '/') -> float:
+    """Used share of a filesystem as df reports it (blocks reserved for root excluded)"""
+    st = os.statvfs(path)
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    if used + available <= 0:
+        return 0.0
+    return round(used * 100.0 / (used + available), 1)
+
+
+# =============================================================================
+# Docker Engine API Client
+# HTTP/1.1 over the daemon's unix socket: no docker CLI forked per container
+# =============================================================================
+
+class DockerError(Exception):
+    """Docker Engine API request failed (socket unreachable or error response)"""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection to a unix socket path instead of host:port"""
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except Exception:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def docker_time_ns(stamp: str) -> Optional[int]:
+    """RFC 3339 timestamp from the Docker API ('2026-10-17T01:02:03.123456789Z') -> ns since the epoch"""
+    try:
+        seconds, _, fraction = stamp.rstrip('Z').partition('.')
+        base = calendar.timegm(time.strptime(seconds, '%Y-%m-%dT%H:%M:%S'))
+        return base * 1_000_000_000 + int((fraction + '000000000')[:9])
+    except ValueError:
+        return None
+
+
+class DockerClient:
+    """
+    Minimal Docker Engine API client. One GET /containers/json lists every
+    container; inspect + stats for the monitored ones run concurrently.
+
+    Stats are taken one-shot (no 1-2s wait for the daemon's own second
+    sample) and CPU% is computed from the delta to the previous sample of the
+    same container, i.e. averaged over the report interval like CpuCollector.
+    Daemons older than API 1.41 ignore one-shot and fill precpu_stats, which is
+    used when there is no previous sample yet.
+    """
+
+    def __init__(self, socket_path: str = '/var/run/docker.sock', timeout: float = 5, max_workers: int = 8):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # container id -> (cpu total_usage, system_cpu_usage)
+        self._prev_cpu: Dict[str, Tuple[int, int]] = {}
+
+    def available(self) -> bool:
+        return os.path.exists(self.socket_path)
+
+    def _get(self, path: str):
+        """GET path and decode the JSON body. Returns None on 404."""
+        conn = UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            raise DockerError(f'GET {path}: {e}')
+        finally:
+            conn.close()
+        if resp.status == 404:
+            return None
+        if resp.status >= 300:
+            raise DockerError(f"GET {path} -> {resp.status} {body[:200].decode('utf-8', 'replace')}")
+        try:
+            return json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            raise DockerError(f'GET {path}: bad JSON: {e}')
+
+    def logs(self, container_id: str, since_ns: int = 0):
+        """
+        Yield (stream, timestamp_ns, text) for every log line written after
+        since_ns, read incrementally from /containers/<id>/logs?timestamps=1.
+        Handles the multiplexed stream of non-TTY containers (8-byte frame
+        headers) as well as the raw stream of TTY containers.
+        """
+        seconds, nanos = divmod(since_ns, 1_000_000_000)
+        path = f'/containers/{container_id}/logs?stdout=1&stderr=1&timestamps=1&since={seconds}.{nanos:09d}'
+        conn = UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            if resp.status == 404:
+                return
+            if resp.status >= 300:
+                raise DockerError(f"GET {path} -> {resp.status} {resp.read(200).decode('utf-8', 'replace')}")
+            head = resp.read(8)
+            if len(head) == 8 and head[0] in (0, 1, 2) and head[1:4] == b'\0\0\0':
+                partial: Dict[str, bytes] = {}
+                while len(head) == 8:
+                    stream = 'stderr' if head[0] == 2 else 'stdout'
+                    data = partial.pop(stream, b'') + resp.read(struct.unpack('>I', head[4:])[0])
+                    lines = data.split(b'\n')
+                    if lines[-1]:
+                        partial[stream] = lines[-1]
+                    for raw_line in lines[:-1]:
+                        line = self._log_line(stream, raw_line, since_ns)
+                        if line:
+                            yield line
+                    head = resp.read(8)
+            else:
+                raw_line = head + resp.readline()
+                while raw_line:
+                    line = self._log_line('stdout', raw_line.rstrip(b'\n'), since_ns)
+                    if line:
+                        yield line
+                    raw_line = resp.readline()
+        except (OSError, http.client.HTTPException) as e:
+            raise DockerError(f'GET {path}: {e}')
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _log_line(stream: str, raw_line: bytes, since_ns: int) -> Optional[Tuple[str, int, str]]:
+        text = raw_line.decode('utf-8', 'replace').rstrip('\r')
+        stamp, _, message = text.partition(' ')
+        ns = docker_time_ns(stamp)
+        # since is inclusive; the line at the cursor itself was read last time
+        if ns is None or ns <= since_ns:
+            return None
+        return stream, ns, message
+
+    def list_containers(self) -> List[Dict]:
+        """Every container, running or not (docker ps -a)"""
+        return self._get('/containers/json?all=1') or []
+
+    def inspect(self, container_id: str) -> Optional[Dict]:
+        return self._get(f'/containers/{container_id}/json')
+
+    def stats(self, container_id: str) -> Optional[Dict]:
+        return self._get(f'/containers/{container_id}/stats?stream=false&one-shot=true')
+
+    def _cpu_percent(self, container_id: str, stats: Dict) -> Optional[float]:
+        cpu_stats = stats.get('cpu_stats') or {}
+        total = (cpu_stats.get('cpu_usage') or {}).get('total_usage', 0)
+        system = cpu_stats.get('system_cpu_usage', 0)
+        with self._lock:
+            prev = self._prev_cpu.get(container_id)
+            self._prev_cpu[container_id] = (total, system)
+        if prev is None:
+            precpu = stats.get('precpu_stats') or {}
+            prev = ((precpu.get('cpu_usage') or {}).get('total_usage', 0), precpu.get('system_cpu_usage', 0))
+            if not prev[1]:
+                return None
+        cpu_delta = total - prev[0]
+        system_delta = system - prev[1]
+        if cpu_delta < 0 or system_delta <= 0:
+            return 0.0
+        online = cpu_stats.get('online_cpus') or len((cpu_stats.get('cpu_usage') or {}).get('percpu_usage') or []) or 1
+        return round(cpu_delta * 100 * online / system_delta, 2)
+
+    @staticmethod
+    def _memory_used(memory_stats: Dict) -> int:
+        """Usage minus reclaimable page cache, as docker stats shows it"""
+        usage = memory_stats.get('usage', 0)
+        details = memory_stats.get('stats') or {}
+        # cgroup v1 reports total_inactive_file, v2 inactive_file; older CLIs subtracted cache
+        for key in ('total_inactive_file', 'inactive_file', 'cache'):
+            if key in details:
+                if details[key] < usage:
+                    return usage - details[key]
+                break
+        return usage
+
+    def _sample(self, container_id: str) -> Dict:
+        """CPU/memory/network for one running container"""
+        stats = self.stats(container_id)
+        if not stats:
+            return {}
+        cpu = self._cpu_percent(container_id, stats)
+        if cpu is None:
+            # First sample from a one-shot daemon: measure a short 0.2s window
+            time.sleep(0.2)
+            stats = self.stats(container_id) or stats
+            cpu = self._cpu_percent(container_id, stats) or 0.0
+
+        memory_stats = stats.get('memory_stats') or {}
+        used = self._memory_used(memory_stats)
+        limit = memory_stats.get('limit', 0)
+        rx = tx = 0
+        for network in (stats.get('networks') or {}).values():
+            rx += network.get('rx_bytes', 0)
+            tx += network.get('tx_bytes', 0)
+        return {
+            'cpu_percent': cpu,
+            'memory_used_mb': round(used / 1048576, 2),
+            'memory_limit_mb': round(limit / 1048576, 2),
+            'memory_percent': round(used * 100 / limit, 2) if limit else 0.0,
+            'network_rx_mb': round(rx / 1048576, 2),
+            'network_tx_mb': round(tx / 1048576, 2)
+        }
+
+    def _container_info(self, name: str, summary: Dict) -> Dict:
+        info = {
+            'name': name,
+            'status': 'running' if summary.get('State') == 'running' else 'stopped',
+            'container_id': summary.get('Id', '')[:12],
+            'cpu_percent': 0,
+            'memory_usage': 0,
+            'memory_limit': 0,
+            'restart_count': 0
+        }
+        try:
+            detail = self.inspect(summary['Id'])
+            if detail:
+                state = detail.get('State') or {}
+                info['status'] = 'running' if state.get('Running') else 'stopped'
+                info['restart_count'] = detail.get('RestartCount', 0)
+            if info['status'] == 'running':
+                metrics = self._sample(summary['Id'])
+                if metrics:
+                    info['cpu_percent'] = metrics['cpu_percent']
+                    info['memory_usage'] = metrics['memory_used_mb']
+                    info['memory_limit'] = metrics['memory_limit_mb']
+                    info['metrics'] = metrics
+        except DockerError as e:
+            logger.error(f"Error getting container {name} status: {e}")
+        return info
+
+    def container_status(self, names: List[str]) -> List[Dict]:
+        """
+        Status and resource usage of the named containers, in the agent's
+        report format. Raises DockerError if the daemon cannot be listed.
+        """
+        by_name: Dict[str, Dict] = {}
+        for summary in self.list_containers():
+            for container_name in summary.get('Names') or []:
+                by_name[container_name.lstrip('/')] = summary
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {}
+        for name in names:
+            if name in by_name:
+                futures[name] = self._executor.submit(self._container_info, name, by_name[name])
+
+        containers = []
+        for name in names:
+            if name in futures:
+                containers.append(futures[name].result())
+            else:
+                containers.append({'name': name, 'status': 'not_found', 'container_id': '',
+                                   'cpu_percent': 0, 'memory_usage': 0, 'memory_limit': 0,
+                                   'restart_count': 0})
+
+        live = set(summary.get('Id') for summary in by_name.values())
+        with self._lock:
+            for container_id in list(self._prev_cpu):
+                if container_id not in live:
+                    del self._prev_cpu[container_id]
+        return containers
+
+
+class ContainerLogFollower:
+    """
+    Incremental container logs through the Docker API. Each container has a
+    since-cursor (timestamp of the last line read), so a line is read once
+    instead of once per overlapping 'docker logs --since 5m' window. New lines
+    wait in a bounded pending list until the report carrying them has been
+    accepted (ack); the cursors are saved to disk at that point.
+    """
+
+    def __init__(self, docker: DockerClient, cursor_file: str, initial_minutes: int = 5,
+                 max_pending: int = 2000, pattern: Optional[str] = None):
+        self._docker = docker
+        self.cursor_file = cursor_file
+        self.initial_minutes = initial_minutes
+        self.max_pending = max_pending
+        self._pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        # name -> {'container_id', 'since_ns'}: as of the last ack / as read so far
+        self._saved: Dict[str, Dict] = self._load()
+        self._cursors = dict(self._saved)
+        self._pending: Dict[str, deque] = {}
+        # name -> lines dropped because the pending list was full (backend unreachable or a burst)
+        self._dropped: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cursor_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable container log cursor file {self.cursor_file}: {e}")
+            return {}
+
+    def _save(self):
+        tmp_path = self.cursor_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._saved, f)
+            os.replace(tmp_path, self.cursor_file)
+        except OSError as e:
+            logger.warning(f"Cannot save container log cursor file {self.cursor_file}: {e}")
+
+    def collect(self, containers: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+        """
+        Read the lines written since each container's cursor (containers are
+        get_container_status() results). Returns ({name: entries}, {name: dropped})
+        covering everything not acked yet.
+        """
+        for container in containers:
+            name = container['name']
+            container_id = container.get('container_id')
+            if not container_id:
                 continue
+            cursor = self._cursors.get(name)
+            if cursor and cursor.get('container_id') == container_id:
+                since_ns = cursor['since_ns']
+            else:
+                # New or recreated container: start with the last few minutes, like the old window
+                since_ns = int((time.time() - self.initial_minutes * 60) * 1_000_000_000)
+
+            pending = self._pending.setdefault(name, deque())
+            last_ns = since_ns
             try:
-                payload = {
-                    'server_id': self.config.get('server_id', '163'),
-                    'schema': schema,
-                    'records': records,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-
-                response = requests.post(
-                    self.report_url,
-                    json=payload,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=15
-                )
-                response.raise_for_status()
+                for stream, ns, message in self._docker.logs(container_id, since_ns):
+                    last_ns = max(last_ns, ns)
+                    message = message.strip()
+                    if len(message) <= 10 or (self._pattern and not self._pattern.search(message)):
+                        continue
+                    if len(pending) >= self.max_pending:
+                        pending.popleft()
+                        self._dropped[name] = self._dropped.get(name, 0) + 1
+                    pending.append({
+                        'message': message[:300],
+                        'timestamp': datetime.fromtimestamp(ns / 1e9).isoformat(),
+                        'stream': stream
+                    })
+            except DockerError as e:
+                logger.error(f"Error reading logs of {name}: {e}")
+            self._cursors[name] = {'container_id': container_id, 'since_ns': last_ns}
+
+        logs = {name: list(entries) for name, entries in self._pending.items() if entries}
+        return logs, dict(self._dropped)
+
+    def ack(self):
+        """The last collected lines reached the backend: forget them and save the cursors"""
+        self._pending.clear()
+        self._dropped.clear()
+        if self._cursors != self._saved:
+            self._saved = dict(self._cursors)
+            self._save()
 
-                resp_data = response.json()
-                inserted = resp_data.get('data', {}).get('inserted', 0)
-                self._stats['uploaded_records'] += inserted
 
-                logger.info(f"[EAI] Uploaded {len(records)} records to schema {schema}, inserted: {inserted}")
-                batch_records[schema] = []  # Clear only on success
+# =============================================================================
+# Incremental Log Scanner
+# Reads only the bytes appended since the previous report, not whole files
+# =============================================================================
 
-            except Exception as e:
-                self._stats['failed_uploads'] += 1
-                logger.error(f"[EAI] Upload failed for schema {schema}: {e}")
-                # Keep records in buffer for retry next cycle
+class LogScanner:
+    """
+    Incremental scan of the *.log files in a directory. Remembers the inode
+    and byte offset of every file, reads only what was appended since the
+    previous scan (in chunk_size reads, at most max_read_bytes per file per
+    scan) and yields each complete line once. A rotated (new inode) or
+    truncated file is read from the start; a file seen for the first time
+    starts at its end, or initial_bytes before it if it was modified recently.
+    """
+
+    def __init__(self, directory: str, pattern: str = '*.log', encoding: str = 'utf-8',
+                 errors: str = 'replace', chunk_size: int = 65536, initial_bytes: int = 65536,
+                 max_read_bytes: int = 8 * 1024 * 1024):
+        self.directory = str(directory)
+        self.pattern = pattern
+        self.encoding = encoding
+        self.errors = errors
+        self.chunk_size = chunk_size
+        self.initial_bytes = initial_bytes
+        self.max_read_bytes = max_read_bytes
+        # path -> {'inode', 'offset', 'partial', 'skip_partial'}
+        self._files: Dict[str, Dict] = {}
+
+    def new_lines(self, recent_seconds: float = 300):
+        """Yield (file name, line) for every complete line appended since the previous call"""
+        seen = set()
+        cutoff = time.time() - recent_seconds
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            state = self._files.get(path)
+            if state is None:
+                start = st.st_size
+                if st.st_mtime >= cutoff:
+                    start = max(0, st.st_size - self.initial_bytes)
+                state = {'inode': st.st_ino, 'offset': start, 'partial': b'', 'skip_partial': start > 0}
+                self._files[path] = state
+            elif state['inode'] != st.st_ino or st.st_size < state['offset']:
+                # Rotated or truncated: everything in the file is new
+                state.update(inode=st.st_ino, offset=0, partial=b'', skip_partial=False)
+            if st.st_size <= state['offset']:
+                continue
+            try:
+                yield from self._read(path, state, st.st_size)
+            except OSError as e:
+                logger.debug(f"Error reading log file {path}: {e}")
+
+        for path in list(self._files):
+            if path not in seen:
+                del self._files[path]
+
+    def _read(self, path: str, state: Dict, size: int):
+        name = os.path.basename(path)
+        end = min(size, state['offset'] + self.max_read_bytes)
+        with open(path, 'rb') as f:
+            if state['skip_partial']:
+                # Started in the middle of the file: drop the line we landed in
+                state['skip_partial'] = False
+                f.seek(state['offset'] - 1)
+                if f.read(1) != b'\n':
+                    state['offset'] += len(f.readline())
+            f.seek(state['offset'])
+            while state['offset'] < end:
+                chunk = f.read(min(self.chunk_size, end - state['offset']))
+                if not chunk:
+                    break
+                state['offset'] += len(chunk)
+                lines = (state['partial'] + chunk).split(b'\n')
+                state['partial'] = lines.pop()
+                for raw_line in lines:
+                    line = raw_line.decode(self.encoding, self.errors).rstrip('\r')
+                    if line:
+                        yield name, line
+        if len(state['partial']) > self.max_read_bytes:
+            # A "line" this long is not a log line; don't keep buffering it
+            state['partial'] = b''
 
 
 # =============================================================================
@@ -978,6 +2313,20 @@ class AccLinuxAgent:
         self.server_url = config['server_url']
         self.server_id = config['server_id']
         self._eai_manager: Optional[EaiLogMonitorManager] = None
+        self._cpu = CpuCollector()
+        self._memory = MemoryCollector()
+        self._docker = DockerClient(config.get('docker_socket', '/var/run/docker.sock'))
+        self._docker_api = False
+        self._container_logs = ContainerLogFollower(
+            self._docker,
+            config.get('container_log_cursor_file') or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'container_log_cursors.json'),
+            max_pending=config.get('container_log_max_pending', 2000),
+            pattern=config.get('container_log_filter'))
+        self._log_scanner = LogScanner(config['log_path'])
+        # Log lines read but not yet accepted by the backend
+        self._pending_alerts: deque = deque()
+        self._alerts_dropped = 0
 
     def run_command(self, cmd):
         """Run shell command and return output"""
@@ -995,40 +2344,56 @@ class AccLinuxAgent:
             return ""
 
     def get_cpu_usage(self):
-        """Get CPU usage percentage"""
-        try:
-            output = self.run_command(
-                "top -bn1 | grep 'Cpu(s)' | awk '{print $2}'"
-            )
-            return float(output) if output else 0
-        except:
-            return 0
+        """Get CPU usage percentage since the previous sample (/proc/stat)"""
+        return self._cpu.sample().get('usage', 0)
 
     def get_memory_usage(self):
-        """Get memory usage percentage"""
-        try:
-            output = self.run_command(
-                "free | grep Mem | awk '{print $3/$2 * 100.0}'"
-            )
-            return round(float(output), 2) if output else 0
-        except:
-            return 0
+        """Get memory usage percentage (/proc/meminfo)"""
+        return self._memory.sample().get('usage', 0)
 
     def get_disk_usage(self, path='/'):
-        """Get disk usage percentage"""
+        """Get disk usage percentage (statvfs)"""
         try:
-            output = self.run_command(
-                f"df {path} | tail -1 | awk '{{print $5}}' | tr -d '%'"
-            )
-            return float(output) if output else 0
-        except:
+            return disk_usage_percent(path)
+        except OSError as e:
+            logger.error(f"Cannot stat filesystem {path}: {e}")
             return 0
 
+    def get_resources(self):
+        """CPU (with iowait/steal and per-core breakdown), memory, disk and load, without forking"""
+        cpu = self._cpu.sample()
+        memory = self._memory.sample()
+        return {
+            'cpu_usage': cpu.get('usage', 0),
+            'cpu_user': cpu.get('user', 0),
+            'cpu_system': cpu.get('system', 0),
+            'cpu_iowait': cpu.get('iowait', 0),
+            'cpu_steal': cpu.get('steal', 0),
+            'cpu_per_core': cpu.get('per_core', []),
+            'memory_usage': memory.get('usage', 0),
+            'memory_total_mb': memory.get('total_mb', 0),
+            'memory_available_mb': memory.get('available_mb', 0),
+            'swap_usage': memory.get('swap_usage', 0),
+            'disk_usage': self.get_disk_usage(),
+            'load_avg': [round(load, 2) for load in os.getloadavg()]
+        }
+
     def get_container_status(self):
-        """Get Docker container status"""
-        containers = []
+        """Get Docker container status from the Engine API socket, or the docker CLI if it is unusable"""
         monitored = self.config['containers']
-
+        if self._docker.available():
+            try:
+                containers = self._docker.container_status(monitored)
+                self._docker_api = True
+                return containers
+            except DockerError as e:
+                logger.warning(f"Docker API unavailable, falling back to docker CLI: {e}")
+        self._docker_api = False
+        return self._get_container_status_cli(monitored)
+
+    def _get_container_status_cli(self, monitored: List[str]):
+        """docker inspect + docker stats --no-stream per container (blocks ~2s each)"""
+        containers = []
         for container_name in monitored:
             container_info = {
                 'name': container_name,
@@ -1096,52 +2461,52 @@ class AccLinuxAgent:
             return 0
 
     def scan_recent_logs(self, minutes=5):
-        """Scan recent log files for today's logs (all levels).
+        """Scan the log files for today's lines written since the previous scan (all levels).
 
         EAI log format: [LEVEL][YYYY-MM-DD HH:MM:SS.mmm][source][...] content
         We collect all log lines from today (INFO/WARN/ERRO/ERROR/FATAL/CRITICAL)
         so the dashboard can display them with proper level coloring.
         Only date filtering is applied here; no level filtering.
+        LogScanner reads only the bytes appended since the previous report, so
+        each line is read once. New lines wait in a pending list until the
+        report carrying them is accepted (ack_alerts); each report carries the
+        oldest log_alerts_per_report of them, the rest go with the next one.
         """
-        alerts = []
-        log_path = Path(self.config['log_path'])
-
-        if not log_path.exists():
-            return alerts
-
-        cutoff_time = time.time() - (minutes * 60)
         today_str = datetime.now().strftime('%Y-%m-%d')
+        now = datetime.now().isoformat()
+        max_pending = self.config.get('log_alert_max_pending', 2000)
 
         try:
-            for log_file in log_path.glob('*.log'):
-                if log_file.stat().st_mtime < cutoff_time:
-                    continue
-
-                # grep for today's date only - collect ALL levels
-                cmd = (
-                    'grep "{today}" "{logfile}" | tail -50'
-                ).format(today=today_str, logfile=log_file)
-                output = self.run_command(cmd)
-
-                if output:
-                    for line in output.split('\n'):
-                        line = line.strip()
-                        if not line:
-                            continue
-                        alerts.append({
-                            'file': log_file.name,
+            for file_name, line in self._log_scanner.new_lines(minutes * 60):
+                if today_str in line:
+                    line = line.strip()
+                    if line:
+                        if len(self._pending_alerts) >= max_pending:
+                            self._pending_alerts.popleft()
+                            self._alerts_dropped += 1
+                        self._pending_alerts.append({
+                            'file': file_name,
                             'keyword': 'LOG',
                             'message': line[:200],
-                            'timestamp': datetime.now().isoformat()
+                            'timestamp': now
                         })
         except Exception as e:
             logger.error("Error scanning logs: {}".format(e))
 
-        return alerts
+        return list(islice(self._pending_alerts, self.config.get('log_alerts_per_report', 200)))
+
+    def ack_alerts(self, sent):
+        """The report carrying the oldest `sent` pending log lines was accepted"""
+        for _ in range(min(sent, len(self._pending_alerts))):
+            self._pending_alerts.popleft()
+        if self._alerts_dropped:
+            logger.warning(f"{self._alerts_dropped} log lines were dropped while reports were failing")
+            self._alerts_dropped = 0
 
     def get_container_error_logs(self, minutes=5):
         """
-        Get recent logs from Docker containers (all levels).
+        Get recent logs from Docker containers (all levels). docker CLI fallback
+        for ContainerLogFollower; the windows overlap, the backend replaces its copy.
         Phase 2: Added to eliminate SSH-based docker logs calls from backend.
         Uses 'timeout 10' to prevent docker logs from hanging.
         Collects all log lines (no level filtering) - level is determined by backend.
@@ -1171,20 +2536,24 @@ class AccLinuxAgent:
 
     def collect_metrics(self):
         """Collect all metrics including container error logs"""
+        containers = self.get_container_status()
         metrics = {
             'server_id': self.server_id,
             'hostname': socket.gethostname(),
             'timestamp': datetime.utcnow().isoformat(),
-            'resources': {
-                'cpu_usage': self.get_cpu_usage(),
-                'memory_usage': self.get_memory_usage(),
-                'disk_usage': self.get_disk_usage()
-            },
-            'containers': self.get_container_status(),
+            'resources': self.get_resources(),
+            'containers': containers,
             'alerts': self.scan_recent_logs(),
-            # Phase 2: Container error logs for backend _get_linux_error_logs
-            'container_error_logs': self.get_container_error_logs()
+            # alerts hold only lines appended since the previous scan
+            'log_scan': 'incremental'
         }
+        # Phase 2: Container logs for backend _get_linux_error_logs
+        if self._docker_api:
+            # Only lines new since the last accepted report
+            metrics['container_logs'], metrics['container_logs_dropped'] = \
+                self._container_logs.collect(containers)
+        else:
+            metrics['container_error_logs'] = self.get_container_error_logs()
 
         # Include EAI monitor stats if running
         if self._eai_manager:
@@ -1198,8 +2567,8 @@ class AccLinuxAgent:
             url = f"{self.server_url}/api/agent/report"
             response = requests.post(
                 url,
-                json=metrics,
-                headers={'Content-Type': 'application/json'},
+                data=gzip.compress(json.dumps(metrics, ensure_ascii=False).encode('utf-8')),
+                headers={'Content-Type': 'application/json; charset=utf-8', 'Content-Encoding': 'gzip'},
                 timeout=10
             )
             response.raise_for_status()
@@ -1247,7 +2616,10 @@ class AccLinuxAgent:
             while True:
                 try:
                     metrics = self.collect_metrics()
-                    self.report_metrics(metrics)
+                    if self.report_metrics(metrics):
+                        self.ack_alerts(len(metrics['alerts']))
+                        if 'container_logs' in metrics:
+                            self._container_logs.ack()
 
                     # Log summary
                     containers = metrics['containers']
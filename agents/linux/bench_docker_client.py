@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: DockerClient (Engine API over the unix socket, concurrent one-shot
+stats) vs. the per-container sequential inspect + stats the docker CLI path
+does, against a fake Docker daemon on a temporary unix socket. Also checks
+ContainerLogFollower against the daemon's /logs endpoint.
+
+The fake daemon serves /containers/json, /containers/<id>/json and
+/containers/<id>/stats. Like dockerd, a plain stream=false stats request
+waits --stats-delay seconds for a second sample to fill precpu_stats; a
+one-shot request answers at once with an empty precpu_stats. Each running
+container burns a fixed number of cores, so the expected CPU% is known and
+the client's delta computation is checked against it, together with memory
+(usage minus inactive_file), restart counts, stopped and missing containers.
+
+The log check writes timestamped lines into the fake containers (one TTY,
+long lines split over two frames like dockerd does) and verifies that every
+line is reported exactly once across cycles, that unacked lines are resent,
+that a burst beyond max_pending is counted as dropped and that a restarted
+follower resumes from its saved cursors.
+
+    python3 bench_docker_client.py
+    python3 bench_docker_client.py --containers 8 --stats-delay 2 --interval 3
+    python3 bench_docker_client.py --legacy-daemon    # daemon ignores one-shot
+
+Python 3.6 compatible (CentOS 7).
+"""
+import argparse
+import gzip
+import http.server
+import importlib.util
+import json
+import logging
+import os
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST_CPUS = 4
+MB = 1048576
+
+
+def load_agent(path):
+    spec = importlib.util.spec_from_file_location('acc_agent_bench', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger('acc_agent').setLevel(logging.ERROR)
+    return module
+
+
+# ---------------------------------------------------------------------------
+# Fake Docker daemon
+# ---------------------------------------------------------------------------
+
+class FakeContainer(object):
+    def __init__(self, index, name, running=True):
+        self.id = ('%02x' % index) * 32
+        self.name = name
+        self.running = running
+        self.cores = 0.25 * (index + 1)  # CPU cores this container keeps busy
+        self.usage = (64 + 32 * index) * MB
+        self.inactive_file = 16 * MB
+        self.limit = 1024 * MB
+        self.restart_count = index
+        self.tty = index == 1
+        self.log_lines = []  # (ns, stream, text)
+
+    def write_logs(self, count, start_ns, step_ns=1000000, length=60):
+        for i in range(count):
+            text = ('%s line %06d ' % (self.name, len(self.log_lines))).ljust(length, 'x')
+            stream = 2 if i % 3 == 0 and not self.tty else 1
+            self.log_lines.append((start_ns + i * step_ns, stream, text))
+
+    def cpu_sample(self, now_ns):
+        return {
+            'cpu_usage': {'total_usage': int(now_ns * self.cores) if self.running else 0},
+            'system_cpu_usage': now_ns * HOST_CPUS,
+            'online_cpus': HOST_CPUS
+        }
+
+
+class FakeDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, containers, stats_delay, legacy):
+        self.containers = dict((c.id, c) for c in containers)
+        self.stats_delay = stats_delay
+        self.legacy = legacy
+        self.requests_served = 0
+        self._count_lock = threading.Lock()
+        socketserver.UnixStreamServer.__init__(self, path, DaemonHandler)
+
+    def count(self):
+        with self._count_lock:
+            self.requests_served += 1
+
+
+class DaemonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.count()
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        if parts == ['containers', 'json']:
+            return self._send(200, [{
+                'Id': c.id, 'Names': ['/' + c.name], 'State': 'running' if c.running else 'exited',
+                'Status': 'Up 2 hours' if c.running else 'Exited (0) 5 minutes ago'
+            } for c in self.server.containers.values()])
+        # Like dockerd, accept a unique id prefix (the agent reports 12-char ids) or a name
+        matches = [c for c in self.server.containers.values()
+                   if len(parts) == 3 and (c.id.startswith(parts[1]) or c.name == parts[1])]
+        if parts[0] != 'containers' or len(matches) != 1:
+            return self._send(404, {'message': 'No such container'})
+        container = matches[0]
+        if parts[2] == 'json':
+            return self._send(200, {'Id': container.id, 'Name': '/' + container.name,
+                                    'RestartCount': container.restart_count,
+                                    'State': {'Running': container.running}})
+        if parts[2] == 'stats':
+            one_shot = 'one-shot=true' in query and not self.server.legacy
+            precpu = {'cpu_usage': {'total_usage': 0}}
+            if not one_shot:
+                precpu = container.cpu_sample(int(time.time() * 1e9))
+                time.sleep(self.server.stats_delay)
+            return self._send(200, {
+                'cpu_stats': container.cpu_sample(int(time.time() * 1e9)),
+                'precpu_stats': precpu,
+                'memory_stats': {'usage': container.usage, 'limit': container.limit,
+                                 'stats': {'inactive_file': container.inactive_file}},
+                'networks': {'eth0': {'rx_bytes': 3 * MB, 'tx_bytes': MB}}
+            })
+        if parts[2] == 'logs':
+            return self._send_logs(container, query)
+        return self._send(404, {'message': 'page not found'})
+
+    def _send_logs(self, container, query):
+        since = dict(item.partition('=')[::2] for item in query.split('&')).get('since', '0')
+        seconds, _, nanos = since.partition('.')
+        since_ns = int(seconds) * 1000000000 + int((nanos + '000000000')[:9])
+        body = []
+        for ns, stream, text in container.log_lines:
+            # dockerd's since is inclusive
+            if ns < since_ns:
+                continue
+            line = ('%s %s\n' % (rfc3339_nano(ns), text)).encode('utf-8')
+            if container.tty:
+                body.append(line)
+                continue
+            # Long lines arrive split over two frames
+            pieces = [line[:80], line[80:]] if len(line) > 80 else [line]
+            for piece in pieces:
+                body.append(struct.pack('>BxxxI', stream, len(piece)) + piece)
+        data = b''.join(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.docker.raw-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def rfc3339_nano(ns):
+    """Timestamp the way dockerd prints it: UTC, trailing zeros of the fraction trimmed"""
+    seconds, nanos = divmod(ns, 1000000000)
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+    fraction = ('%09d' % nanos).rstrip('0')
+    return stamp + ('.' + fraction if fraction else '') + 'Z'
+
+
+# ---------------------------------------------------------------------------
+# Sequential path (what docker inspect + docker stats --no-stream do per container)
+# ---------------------------------------------------------------------------
+
+def sequential_status(client, names):
+    by_name = {}
+    for summary in client.list_containers():
+        for name in summary.get('Names') or []:
+            by_name[name.lstrip('/')] = summary
+    results = []
+    for name in names:
+        if name not in by_name:
+            results.append({'name': name, 'status': 'not_found'})
+            continue
+        detail = client.inspect(by_name[name]['Id'])
+        info = {'name': name, 'status': 'running' if detail['State']['Running'] else 'stopped'}
+        if info['status'] == 'running':
+            client._get('/containers/%s/stats?stream=false' % by_name[name]['Id'])
+        results.append(info)
+    return results
+
+
+def check(containers, results):
+    """Compare client output with what the fake daemon was set up to report"""
+    problems = []
+    expected = dict((c.name, c) for c in containers)
+    for info in results:
+        container = expected.get(info['name'])
+        if container is None:
+            if info['status'] != 'not_found':
+                problems.append('%s: expected not_found, got %s' % (info['name'], info['status']))
+            continue
+        if info['status'] != ('running' if container.running else 'stopped'):
+            problems.append('%s: status %s' % (info['name'], info['status']))
+        if info['restart_count'] != container.restart_count:
+            problems.append('%s: restart_count %s' % (info['name'], info['restart_count']))
+        if not container.running:
+            continue
+        cpu = container.cores * 100
+        if abs(info['cpu_percent'] - cpu) > max(2.0, cpu * 0.05):
+            problems.append('%s: cpu %.2f%% (expected %.2f%%)' % (info['name'], info['cpu_percent'], cpu))
+        used = (container.usage - container.inactive_file) / float(MB)
+        if abs(info['memory_usage'] - used) > 0.01 or info['memory_limit'] != container.limit / MB:
+            problems.append('%s: memory %s/%s' % (info['name'], info['memory_usage'], info['memory_limit']))
+    return problems
+
+
+def check_logs(agent, containers, socket_path):
+    """Run ContainerLogFollower through report cycles; returns a list of problems"""
+    problems = []
+    running = [c for c in containers if c.running]
+    status = [{'name': c.name, 'container_id': c.id[:12]} for c in running]
+    cursor_file = os.path.join(os.path.dirname(socket_path), 'cursors.json')
+    client = agent.DockerClient(socket_path)
+    follower = agent.ContainerLogFollower(client, cursor_file, max_pending=2000)
+    now_ns = int(time.time() * 1e9)
+
+    def expect(step, logs, dropped, lines, drop_count=0):
+        for c in running:
+            got = [entry['message'] for entry in logs.get(c.name, [])]
+            want = [text for _, _, text in c.log_lines[len(c.log_lines) - lines:]] if lines else []
+            if got != want:
+                problems.append('%s %s: %d lines, expected %d' % (step, c.name, len(got), len(want)))
+            if dropped.get(c.name, 0) != drop_count:
+                problems.append('%s %s: dropped %s, expected %d' % (step, c.name, dropped.get(c.name), drop_count))
+
+    # Lines older than the initial window are not reported
+    for c in running:
+        c.write_logs(20, now_ns - 3600 * 1000000000)
+        c.write_logs(30, now_ns - 10 * 1000000000, length=150)
+    started = time.perf_counter()
+    logs, dropped = follower.collect(status)
+    elapsed = time.perf_counter() - started
+    expect('initial', logs, dropped, 30)
+    raw = json.dumps({'container_logs': logs}).encode('utf-8')
+    print('  %-34s %7.3fs  %d lines, %.1f KB json, %.1f KB gzip'
+          % ('log follower first cycle', elapsed, sum(len(v) for v in logs.values()),
+             len(raw) / 1024.0, len(gzip.compress(raw)) / 1024.0))
+    follower.ack()
+
+    logs, dropped = follower.collect(status)
+    expect('idle', logs, dropped, 0)
+
+    # Report fails: the next cycle resends the unacked lines plus the new ones
+    for c in running:
+        c.write_logs(5, now_ns)
+    follower.collect(status)
+    for c in running:
+        c.write_logs(3, now_ns + 10 * 1000000)
+    logs, dropped = follower.collect(status)
+    expect('unacked', logs, dropped, 8)
+    follower.ack()
+
+    # Burst larger than max_pending: newest lines kept, the rest counted
+    for c in running:
+        c.write_logs(5000, now_ns + 20 * 1000000, step_ns=1000)
+    started = time.perf_counter()
+    logs, dropped = follower.collect(status)
+    elapsed = time.perf_counter() - started
+    expect('burst', logs, dropped, 2000, drop_count=3000)
+    print('  %-34s %7.3fs  %d lines read' % ('log follower 5000-line burst', elapsed, 5000 * len(running)))
+    follower.ack()
+
+    # A restarted agent resumes from the saved cursors
+    restarted = agent.ContainerLogFollower(client, cursor_file)
+    logs, dropped = restarted.collect(status)
+    expect('restart', logs, dropped, 0)
+    for c in running:
+        c.write_logs(2, now_ns + 30 * 1000000)
+    logs, dropped = restarted.collect(status)
+    expect('restart+new', logs, dropped, 2)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agent', default=os.path.join(SCRIPT_DIR, 'acc_agent_163.py'))
+    parser.add_argument('--containers', type=int, default=4)
+    parser.add_argument('--stats-delay', type=float, default=2.0,
+                        help='seconds the fake daemon waits for precpu on stream=false stats')
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between the two timed cycles')
+    parser.add_argument('--legacy-daemon', action='store_true', help='daemon ignores one-shot=true')
+    args = parser.parse_args()
+
+    agent = load_agent(args.agent)
+
+    containers = [FakeContainer(i, 'app-%d' % i) for i in range(args.containers)]
+    containers.append(FakeContainer(args.containers, 'stopped-job', running=False))
+    names = [c.name for c in containers] + ['missing']
+
+    socket_path = os.path.join(tempfile.mkdtemp(prefix='acc-docker-'), 'docker.sock')
+    daemon = FakeDaemon(socket_path, containers, args.stats_delay, args.legacy_daemon)
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    print('fake daemon on %s: %d running, 1 stopped, 1 missing, stats delay %.1fs%s'
+          % (socket_path, args.containers, args.stats_delay, ', legacy' if args.legacy_daemon else ''))
+
+    legacy_client = agent.DockerClient(socket_path)
+    started = time.perf_counter()
+    sequential_status(legacy_client, names)
+    sequential = time.perf_counter() - started
+    print('  %-34s %7.3fs' % ('sequential inspect + stats', sequential))
+
+    client = agent.DockerClient(socket_path)
+    problems = []
+    for cycle in range(2):
+        if cycle:
+            time.sleep(args.interval)
+        served = daemon.requests_served
+        started = time.perf_counter()
+        results = client.container_status(names)
+        elapsed = time.perf_counter() - started
+        print('  %-34s %7.3fs  requests=%d' % ('DockerClient cycle %d%s' % (cycle + 1, ' (first sample)' if not cycle else ''),
+                                             elapsed, daemon.requests_served - served))
+        problems.extend('cycle %d %s' % (cycle + 1, p) for p in check(containers, results))
+
+    for info in results:
+        print('    %-12s %-9s cpu=%6.2f%% mem=%7.2f/%.0f MB restarts=%d'
+              % (info['name'], info['status'], info['cpu_percent'], info['memory_usage'],
+                 info['memory_limit'], info['restart_count']))
+
+    speedup = sequential / elapsed
+    problems.extend(check_logs(agent, containers, socket_path))
+
+    daemon.shutdown()
+    daemon.server_close()
+    print('\nspeedup: %.1fx (steady-state cycle)' % speedup)
+    print('results match the fake daemon: %s' % (not problems))
+    for problem in problems:
+        print('  ' + problem)
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: EaiLogParser.parse_line keyword prefilter vs. the original
+regex-on-every-line version, over a synthetic EAI log.
+
+The log mixes realistic noise (SQL, HTTP, heartbeat and JSON payload lines,
+some with Chinese text) with trigger -> request -> response sequences and
+occasional Lua errors. Both parsers must produce identical records; the
+catch-up pass reads the file the way EaiLogReaderLoop does (64 KiB chunks,
+split on newlines, decode, parse).
+
+    python3 bench_eai_parser.py --size-mb 256
+    python3 bench_eai_parser.py --size-mb 4096 --skip-legacy   # multi-GB catch-up
+    python3 bench_eai_parser.py --file /var/eai/logs/xxx.log    # real log
+
+Python 3.6 compatible (CentOS 7).
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+READ_SIZE = 65536
+
+
+def load_agent(path):
+    spec = importlib.util.spec_from_file_location('acc_agent_bench', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger('acc_agent').setLevel(logging.ERROR)
+    return module
+
+
+def legacy_parse_line(parser, line):
+    """parse_line as it was before the prefilter: every regex on every line"""
+    try:
+        line = line.strip()
+        if not line:
+            return None
+
+        match = parser.LOG_LINE_PATTERN.match(line)
+        if match:
+            level, time_str, content = match.groups()
+            try:
+                timestamp = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                timestamp = datetime.now()
+        else:
+            content = line
+            timestamp = datetime.now()
+
+        lua_error_match = parser.LUA_ERROR_PATTERN.search(line)
+        if lua_error_match:
+            return parser._handle_lua_error(timestamp, lua_error_match.group(1), line)
+
+        trigger_match = parser.TRIGGER_DATA_PATTERN.search(line)
+        if trigger_match:
+            parser._handle_trigger_data(trigger_match.group(1))
+            return None
+
+        req_match = parser.KINGDEE_REQUEST_PATTERN.search(content)
+        if req_match:
+            parser._handle_request(timestamp, req_match.group(1))
+            return None
+
+        resp_match = parser.KINGDEE_RESPONSE_PATTERN.search(content)
+        if resp_match:
+            return parser._handle_response(timestamp, resp_match.group(1))
+
+        return None
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Synthetic log
+# ---------------------------------------------------------------------------
+
+NOISE_TEMPLATES = [
+    '[INFO][{ts}][eai-engine][worker-3] heartbeat ok, queue=0, elapsed=12ms',
+    '[INFO][{ts}][eai-engine][flow] exec sql: SELECT WONO, PACKID, PARTNO, CNT, LINE FROM '
+    'IPLANT_SMT2.ACC_PACK_INFO WHERE STATUS = 0 AND ROWNUM <= 50 ORDER BY CREATE_TIME',
+    '[DEBUG][{ts}][http][client] POST http://172.17.10.20/K3Cloud/api response 200 in 341ms',
+    '[INFO][{ts}][flow][MES报工接口] 报工任务开始执行, 批次数量: 12, 产线: SMT-2',
+    '[WARN][{ts}][redis][pool] connection idle timeout, reconnecting to 127.0.0.1:6379',
+    '[INFO][{ts}][flow][step] data transform result: {payload}',
+    '[ERRO][{ts}][flow][step] step failed, will retry in 30s: dial tcp 172.17.10.20:80: i/o timeout',
+]
+
+
+def _payload(rng):
+    return json.dumps({'rows': [{'ID': rng.randint(1, 99999), 'NAME': '物料-%d' % rng.randint(1, 999),
+                                 'QTY': rng.randint(1, 500), 'REMARK': 'x' * rng.randint(0, 300)}
+                                for _ in range(rng.randint(1, 6))]}, ensure_ascii=False)
+
+
+def _sequence(rng, ts, index):
+    wono = 'SMT-%08d' % index
+    trigger = [{'LINE': 'SMT-2', 'PACKID': '20260101A%07d' % index, 'WONO': wono,
+                'CNT': rng.randint(1, 500), 'PARTNO': 'P%05d' % rng.randint(1, 999)}]
+    inner = {'Model': {'FMoBillNo': wono, 'FSrcBillNo': wono, 'FFinishQty': 5, 'FQuaQty': 5,
+                       'FMaterialId': {'FNumber': 'P00001'}, 'FLot': {'FNumber': '20260101A%07d' % index},
+                       'FDate': '2026-01-01'}}
+    ok = rng.random() > 0.1
+    response = {'Result': {'ResponseStatus': {'IsSuccess': ok, 'Errors': [] if ok else [{'Message': '库存不足'}]},
+                           'Number': 'SCHB%08d' % index}}
+    lines = [
+        '[INFO][%s][flow][trigger] db trigger get data: %s' % (ts, json.dumps(trigger)),
+        '[INFO][%s][flow][kingdee] kingdee request json: %s' % (ts, json.dumps({'data': json.dumps(inner)})),
+        '[INFO][%s][flow][kingdee] kingdee response json: %s' % (ts, json.dumps(response, ensure_ascii=False)),
+    ]
+    if rng.random() < 0.02:
+        lines.append('[ERRO][%s][flow][lua] run error: call lua error: {"Message":"nil value","WONO":"%s"}'
+                     % (ts, wono))
+    return lines
+
+
+def generate_log(path, size_mb, seed=7):
+    """Write ~size_mb of synthetic EAI log; ~3% of lines belong to report sequences"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    index = 0
+    clock = datetime(2026, 10, 1, 8, 0, 0)
+    with open(path, 'wb') as f:
+        while written < target:
+            block = []
+            for _ in range(200):
+                clock += timedelta(milliseconds=rng.randint(5, 400))
+                ts = clock.strftime('%Y-%m-%d %H:%M:%S.') + '%03d' % (clock.microsecond // 1000)
+                if rng.random() < 0.01:
+                    block.extend(_sequence(rng, ts, index))
+                    index += 1
+                else:
+                    template = rng.choice(NOISE_TEMPLATES)
+                    block.append(template.format(ts=ts, payload=_payload(rng) if '{payload}' in template else ''))
+            data = ('\n'.join(block) + '\n').encode('utf-8')
+            f.write(data)
+            written += len(data)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Catch-up pass (same read path as EaiLogReaderLoop._service + EaiLogWatcher._consume)
+# ---------------------------------------------------------------------------
+
+def catchup(path, parse, limit_bytes=None):
+    records = []
+    lines_seen = 0
+    bytes_read = 0
+    pending = b''
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for raw_line in lines:
+                lines_seen += 1
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r')
+                if line:
+                    record = parse(line)
+                    if record:
+                        records.append(record)
+            if limit_bytes and bytes_read >= limit_bytes:
+                break
+    return records, lines_seen, bytes_read, time.perf_counter() - started
+
+
+def report(name, lines_seen, bytes_read, elapsed, records):
+    print('  %-22s %8.2fs  %10.0f lines/s  %7.1f MB/s  records=%d'
+          % (name, elapsed, lines_seen / elapsed, bytes_read / elapsed / 1048576, len(records)))
+
+
+def comparable(records):
+    """Record dicts minus fields that legitimately differ between runs"""
+    result = []
+    for record in records:
+        data = record.to_dict()
+        data.pop('report_time', None)
+        # Failure records are numbered FAIL_<now>
+        if str(data.get('schb_number', '')).startswith('FAIL_'):
+            data['schb_number'] = 'FAIL_'
+        result.append(data)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agent', default=os.path.join(SCRIPT_DIR, 'acc_agent_163.py'))
+    parser.add_argument('--file', help='existing EAI log to parse instead of a synthetic one')
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the prefiltered parser')
+    parser.add_argument('--legacy-mb', type=int, default=0,
+                        help='limit the legacy pass to the first N MB (0 = whole file)')
+    args = parser.parse_args()
+
+    agent = load_agent(args.agent)
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(prefix='acc-eai-parser-'), 'synthetic.log')
+        started = time.perf_counter()
+        size = generate_log(path, args.size_mb)
+        print('generated %s (%.1f MB) in %.1fs' % (path, size / 1048576.0, time.perf_counter() - started))
+    print('file: %s (%.1f MB)' % (path, os.path.getsize(path) / 1048576.0))
+
+    new_parser = agent.EaiLogParser()
+    new_records, lines_seen, bytes_read, elapsed = catchup(path, new_parser.parse_line)
+    report('prefiltered parse_line', lines_seen, bytes_read, elapsed, new_records)
+
+    if not args.skip_legacy:
+        limit = args.legacy_mb * 1048576 if args.legacy_mb else None
+        old_parser = agent.EaiLogParser()
+        old_records, old_lines, old_bytes, old_elapsed = catchup(
+            path, lambda line: legacy_parse_line(old_parser, line), limit)
+        report('legacy parse_line', old_lines, old_bytes, old_elapsed, old_records)
+
+        new_rate = lines_seen / elapsed
+        old_rate = old_lines / old_elapsed
+        print('\nspeedup: %.1fx lines/s' % (new_rate / old_rate))
+        compared = comparable(new_records[:len(old_records)]) == comparable(old_records) if limit else \
+            comparable(new_records) == comparable(old_records)
+        print('identical records: %s' % compared)
+        if not compared:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
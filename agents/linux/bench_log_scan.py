@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: LogScanner (per-file inode + offset, reads only appended bytes)
+vs. the old scan_recent_logs implementations, on a large log that grows by a
+few lines per report cycle:
+
+  grep      Linux agent: grep "<today>" <file> | tail -50 on every cycle
+  readlines Windows agent: f.readlines()[-100:] on every cycle
+
+Every cycle appends --append-lines lines (one of them written in two halves,
+the second half only in the next cycle). The scanner must report each
+complete line exactly once; the run ends with a rotation (rename + new file)
+and a truncation, which must be picked up from offset 0.
+
+    python3 bench_log_scan.py --size-mb 512 --cycles 20
+
+Python 3.6 compatible (CentOS 7).
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_agent(path):
+    spec = importlib.util.spec_from_file_location('acc_agent_bench', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger('acc_agent').setLevel(logging.ERROR)
+    return module
+
+
+class Log(object):
+    """Synthetic EAI-style log; remembers every complete line written"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.lines = []
+        self.today = datetime.now().strftime('%Y-%m-%d')
+
+    def line(self):
+        self.count += 1
+        level = 'ERRO' if self.count % 7 == 0 else 'INFO'
+        return '[%s][%s 08:00:00.000][flow][step] line %09d %s' % (
+            level, self.today, self.count, 'x' * (self.count % 120))
+
+    def fill(self, size_mb):
+        block = '\n'.join(self.line() for _ in range(5000)) + '\n'
+        with open(self.path, 'w') as f:
+            while f.tell() < size_mb * 1048576:
+                f.write(block)
+        self.lines = []  # history is not reported (file is old when first seen)
+
+    def append(self, count, split=False):
+        with open(self.path, 'a') as f:
+            for _ in range(count):
+                line = self.line()
+                f.write(line + '\n')
+                self.lines.append(line)
+            if split:
+                line = self.line()
+                f.write(line[:30])
+                f.flush()
+                return line
+        return None
+
+    def finish(self, rest):
+        with open(self.path, 'a') as f:
+            f.write(rest[30:] + '\n')
+        self.lines.append(rest)
+
+
+def grep_scan(path, today):
+    output = subprocess.run('grep "%s" "%s" | tail -50' % (today, path), shell=True,
+                            stdout=subprocess.PIPE).stdout
+    return output.decode('utf-8', 'replace').splitlines()
+
+
+def readlines_scan(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.readlines()[-100:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agent', default=os.path.join(SCRIPT_DIR, 'acc_agent.py'))
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--append-lines', type=int, default=40)
+    args = parser.parse_args()
+
+    agent = load_agent(args.agent)
+    directory = tempfile.mkdtemp(prefix='acc-log-scan-')
+    log = Log(os.path.join(directory, 'acc.log'))
+    started = time.perf_counter()
+    log.fill(args.size_mb)
+    # Old enough that the scanner starts at the end instead of initial_bytes before it
+    os.utime(log.path, (time.time() - 3600, time.time() - 3600))
+    print('generated %s (%.1f MB) in %.1fs' % (log.path, os.path.getsize(log.path) / 1048576.0,
+                                               time.perf_counter() - started))
+
+    scanner = agent.LogScanner(directory)
+    list(scanner.new_lines())
+    reported = []
+    timings = {'grep': 0.0, 'readlines': 0.0, 'LogScanner': 0.0}
+    pending = None
+    for _ in range(args.cycles):
+        if pending:
+            log.finish(pending)
+        pending = log.append(args.append_lines, split=True)
+
+        t = time.perf_counter()
+        grep_scan(log.path, log.today)
+        timings['grep'] += time.perf_counter() - t
+        t = time.perf_counter()
+        readlines_scan(log.path)
+        timings['readlines'] += time.perf_counter() - t
+        t = time.perf_counter()
+        reported.extend(line for _, line in scanner.new_lines())
+        timings['LogScanner'] += time.perf_counter() - t
+    log.finish(pending)
+    reported.extend(line for _, line in scanner.new_lines())
+
+    file_bytes = os.path.getsize(log.path)
+    print('%d cycles, %d lines appended per cycle' % (args.cycles, args.append_lines))
+    for name, total in timings.items():
+        print('  %-12s %9.2f ms/cycle' % (name, total * 1000 / args.cycles))
+    print('  old paths read %.1f MB per cycle; LogScanner read %.1f KB in total'
+          % (file_bytes / 1048576.0, sum(len(l) + 1 for l in log.lines) / 1024.0))
+    ok = reported == log.lines
+    print('every appended line reported exactly once: %s (%d lines)' % (ok, len(reported)))
+
+    # Rotation: the old file is renamed away and a new one starts
+    os.rename(log.path, log.path + '.1')
+    log.lines = []
+    log.append(5)
+    rotated = [line for _, line in scanner.new_lines()]
+    # Truncation in place
+    with open(log.path, 'w'):
+        pass
+    log.lines = []
+    log.append(3)
+    truncated = [line for _, line in scanner.new_lines()]
+    rotation_ok = len(rotated) == 5 and truncated == log.lines
+    print('rotation and truncation picked up from offset 0: %s' % rotation_ok)
+    return 0 if ok and rotation_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
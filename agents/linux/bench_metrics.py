@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: agent resource collection via /proc + statvfs (CpuCollector,
+MemoryCollector, disk_usage_percent) vs. the original shell pipelines
+(top -bn1 | grep | awk, free | grep | awk, df | tail | awk | tr).
+
+Runs N collection cycles of each and reports the CPU time spent by the
+agent process and by the children it forked, plus the number of forks.
+
+    python3 bench_metrics.py --cycles 200
+
+Python 3.6 compatible (CentOS 7).
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_agent(path):
+    spec = importlib.util.spec_from_file_location('acc_agent_bench', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger('acc_agent').setLevel(logging.ERROR)
+    return module
+
+
+def run_command(cmd):
+    result = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30)
+    return result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def _number(output):
+    # The old methods swallowed parse errors the same way (top's layout varies by procps version)
+    try:
+        return float(output) if output else 0
+    except ValueError:
+        return 0
+
+
+def legacy_resources():
+    """get_cpu_usage/get_memory_usage/get_disk_usage as they were: one shell pipeline each"""
+    cpu = run_command("top -bn1 | grep 'Cpu(s)' | awk '{print $2}'")
+    memory = run_command("free | grep Mem | awk '{print $3/$2 * 100.0}'")
+    disk = run_command("df / | tail -1 | awk '{print $5}' | tr -d '%'")
+    return {'cpu_usage': _number(cpu), 'memory_usage': round(_number(memory), 2), 'disk_usage': _number(disk)}
+
+
+class ForkCounter(object):
+    """Counts subprocess.Popen constructions while active"""
+
+    def __init__(self):
+        self.count = 0
+        self._original = subprocess.Popen.__init__
+
+    def __enter__(self):
+        original = self._original
+        counter = self
+
+        def counting_init(popen, *args, **kwargs):
+            counter.count += 1
+            original(popen, *args, **kwargs)
+
+        subprocess.Popen.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.Popen.__init__ = self._original
+
+
+def measure(name, collect, cycles):
+    collect()  # warm up (the first CPU sample primes the collector)
+    before = os.times()
+    started = time.perf_counter()
+    with ForkCounter() as forks:
+        for _ in range(cycles):
+            sample = collect()
+    elapsed = time.perf_counter() - started
+    after = os.times()
+    own = (after.user - before.user) + (after.system - before.system)
+    children = (after.children_user - before.children_user) + (after.children_system - before.children_system)
+    print('  %-20s %8.2f ms/cycle wall  %7.2f ms/cycle agent CPU  %7.2f ms/cycle child CPU  %5.1f forks/cycle'
+          % (name, elapsed * 1000 / cycles, own * 1000 / cycles, children * 1000 / cycles,
+             float(forks.count) / cycles))
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agent', default=os.path.join(SCRIPT_DIR, 'acc_agent_163.py'))
+    parser.add_argument('--cycles', type=int, default=100)
+    args = parser.parse_args()
+
+    module = load_agent(args.agent)
+    agent = module.AccLinuxAgent(module.CONFIG)
+    print('%d collection cycles' % args.cycles)
+    old = measure('shell pipelines', legacy_resources, args.cycles)
+    new = measure('/proc + statvfs', agent.get_resources, args.cycles)
+    print('\nlast sample  pipelines: cpu=%s mem=%s disk=%s' % (old['cpu_usage'], old['memory_usage'], old['disk_usage']))
+    print('             /proc:     cpu=%s mem=%s disk=%s iowait=%s cores=%d'
+          % (new['cpu_usage'], new['memory_usage'], new['disk_usage'], new['cpu_iowait'], len(new['cpu_per_core'])))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
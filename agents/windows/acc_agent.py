@@ -12,15 +12,19 @@ Usage:
     For production, install as Windows Service using NSSM or similar
 """
 import os
+import re
 import sys
 import time
 import json
+import glob
 import socket
 import logging
 import subprocess
 import requests
 import psutil
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -39,6 +43,8 @@ DEFAULT_CONFIG = {
     'oracle_service': 'OracleServiceXE',  # Oracle Windows service name
     'log_path': 'E:\\ACC\\ACC\\Log',
     'log_level': 'INFO',
+    'alerts_per_report': 10,  # the rest wait for the next report
+    'alert_max_pending': 1000,  # while the monitoring center is unreachable
     'auto_restart': False,  # Enable auto restart of stopped processes
     'restart_cooldown': 300,  # Seconds between restarts of same process
     'restart_commands': {}  # Custom restart commands per process
@@ -47,6 +53,8 @@ DEFAULT_CONFIG = {
 # Get script directory for relative paths
 SCRIPT_DIR = Path(__file__).parent.absolute()
 
+logger = logging.getLogger(__name__)
+
 
 def setup_logging(log_level: str = 'INFO'):
     """Setup logging configuration"""
@@ -63,9 +71,95 @@ def setup_logging(log_level: str = 'INFO'):
     return logging.getLogger(__name__)
 
 
+class LogScanner:
+    """
+    Incremental scan of the *.log files in a directory. Remembers the inode
+    and byte offset of every file, reads only what was appended since the
+    previous scan (in chunk_size reads, at most max_read_bytes per file per
+    scan) and yields each complete line once. A rotated (new inode) or
+    truncated file is read from the start; a file seen for the first time
+    starts at its end, or initial_bytes before it if it was modified recently.
+    """
+
+    def __init__(self, directory: str, pattern: str = '*.log', encoding: str = 'utf-8',
+                 errors: str = 'replace', chunk_size: int = 65536, initial_bytes: int = 65536,
+                 max_read_bytes: int = 8 * 1024 * 1024):
+        self.directory = str(directory)
+        self.pattern = pattern
+        self.encoding = encoding
+        self.errors = errors
+        self.chunk_size = chunk_size
+        self.initial_bytes = initial_bytes
+        self.max_read_bytes = max_read_bytes
+        # path -> {'inode', 'offset', 'partial', 'skip_partial'}
+        self._files: Dict[str, Dict] = {}
+
+    def new_lines(self, recent_seconds: float = 300):
+        """Yield (file name, line) for every complete line appended since the previous call"""
+        seen = set()
+        cutoff = time.time() - recent_seconds
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            state = self._files.get(path)
+            if state is None:
+                start = st.st_size
+                if st.st_mtime >= cutoff:
+                    start = max(0, st.st_size - self.initial_bytes)
+                state = {'inode': st.st_ino, 'offset': start, 'partial': b'', 'skip_partial': start > 0}
+                self._files[path] = state
+            elif state['inode'] != st.st_ino or st.st_size < state['offset']:
+                # Rotated or truncated: everything in the file is new
+                state.update(inode=st.st_ino, offset=0, partial=b'', skip_partial=False)
+            if st.st_size <= state['offset']:
+                continue
+            try:
+                yield from self._read(path, state, st.st_size)
+            except OSError as e:
+                logger.debug(f"Error reading log file {path}: {e}")
+
+        for path in list(self._files):
+            if path not in seen:
+                del self._files[path]
+
+    def _read(self, path: str, state: Dict, size: int):
+        name = os.path.basename(path)
+        end = min(size, state['offset'] + self.max_read_bytes)
+        with open(path, 'rb') as f:
+            if state['skip_partial']:
+                # Started in the middle of the file: drop the line we landed in
+                state['skip_partial'] = False
+                f.seek(state['offset'] - 1)
+                if f.read(1) != b'\n':
+                    state['offset'] += len(f.readline())
+            f.seek(state['offset'])
+            while state['offset'] < end:
+                chunk = f.read(min(self.chunk_size, end - state['offset']))
+                if not chunk:
+                    break
+                state['offset'] += len(chunk)
+                lines = (state['partial'] + chunk).split(b'\n')
+                state['partial'] = lines.pop()
+                for raw_line in lines:
+                    line = raw_line.decode(self.encoding, self.errors).rstrip('\r')
+                    if line:
+                        yield name, line
+        if len(state['partial']) > self.max_read_bytes:
+            # A "line" this long is not a log line; don't keep buffering it
+            state['partial'] = b''
+
+
 class AccAgent:
     """Windows monitoring agent for ACC services"""
 
+    # Alert keywords, first one wins; one lookahead alternation = one regex pass per line
+    ALERT_KEYWORDS = ['Exception', 'Error', 'ORA-', 'Failed', 'Critical']
+    ALERT_PATTERN = re.compile('(?=(?:%s))' % '|'.join('(%s)' % re.escape(k) for k in ALERT_KEYWORDS),
+                               re.IGNORECASE)
+
     def __init__(self, config: Dict):
         self.config = config
         self.server_url = config['server_url']
@@ -83,6 +177,11 @@ class AccAgent:
             self.has_wmi = False
             self.logger.warning("WMI module not available, Oracle service check disabled")
 
+        self.log_scanner = LogScanner(config.get('log_path', ''), errors='ignore')
+        # Alerts read from the logs but not yet accepted by the monitoring center
+        self._pending_alerts: deque = deque()
+        self._alerts_dropped = 0
+
     def get_cpu_usage(self) -> float:
         """Get CPU usage percentage"""
         try:
@@ -224,43 +323,38 @@ class AccAgent:
         }
 
     def scan_recent_logs(self, minutes: int = 5) -> List[Dict]:
-        """Scan recent log files for errors"""
-        alerts = []
-        log_path = Path(self.config.get('log_path', ''))
-
-        if not log_path.exists():
-            return alerts
-
-        error_keywords = ['Exception', 'Error', 'ORA-', 'Failed', 'Critical']
-        cutoff_time = time.time() - (minutes * 60)
-
+        """
+        Scan log lines written since the previous scan for errors (only appended
+        bytes are read). New alerts wait in a pending list until the report
+        carrying them is accepted (ack_alerts); each report carries the oldest
+        alerts_per_report of them, the rest go with the next one.
+        """
+        max_pending = self.config.get('alert_max_pending', 1000)
         try:
-            for log_file in log_path.glob('*.log'):
-                try:
-                    if log_file.stat().st_mtime < cutoff_time:
-                        continue
-
-                    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        # Read last 100 lines
-                        lines = f.readlines()[-100:]
-
-                        for line in lines:
-                            for keyword in error_keywords:
-                                if keyword.lower() in line.lower():
-                                    alerts.append({
-                                        'file': log_file.name,
-                                        'keyword': keyword,
-                                        'message': line.strip()[:200],
-                                        'timestamp': datetime.now().isoformat()
-                                    })
-                                    break
-                except Exception as e:
-                    self.logger.debug(f"Error reading log file {log_file}: {e}")
-
+            for file_name, line in self.log_scanner.new_lines(minutes * 60):
+                ranks = [found.lastindex for found in self.ALERT_PATTERN.finditer(line)]
+                if ranks:
+                    if len(self._pending_alerts) >= max_pending:
+                        self._pending_alerts.popleft()
+                        self._alerts_dropped += 1
+                    self._pending_alerts.append({
+                        'file': file_name,
+                        'keyword': self.ALERT_KEYWORDS[min(ranks) - 1],
+                        'message': line.strip()[:200],
+                        'timestamp': datetime.now().isoformat()
+                    })
         except Exception as e:
             self.logger.error(f"Error scanning logs: {e}")
 
-        return alerts[:10]  # Limit to 10 alerts
+        return list(islice(self._pending_alerts, self.config.get('alerts_per_report', 10)))
+
+    def ack_alerts(self, sent: int):
+        """The report carrying the oldest `sent` pending alerts was accepted"""
+        for _ in range(min(sent, len(self._pending_alerts))):
+            self._pending_alerts.popleft()
+        if self._alerts_dropped:
+            self.logger.warning(f"{self._alerts_dropped} log alerts were dropped while reports were failing")
+            self._alerts_dropped = 0
 
     def restart_process(self, process_name: str) -> bool:
         """Attempt to restart a stopped process"""
@@ -345,7 +439,9 @@ class AccAgent:
                 'disk_usage': self.get_disk_usage()
             },
             'processes': processes,
-            'alerts': alerts
+            'alerts': alerts,
+            # alerts hold only lines appended since the previous scan
+            'log_scan': 'incremental'
         }
 
     def report_metrics(self, metrics: Dict) -> bool:
@@ -391,6 +487,7 @@ class AccAgent:
                 success = self.report_metrics(metrics)
 
                 if success:
+                    self.ack_alerts(len(metrics['alerts']))
                     consecutive_failures = 0
                 else:
                     consecutive_failures += 1
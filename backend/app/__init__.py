@@ -71,18 +71,29 @@ def create_app(config_name=None):
     # Create database tables (import oracle_ops_models to register them)
     from app.models import oracle_ops_models  # noqa: F401
     with app.app_context():
+        # WAL + pragmas + serialized writes (SQLite only)
+        from app.utils.sqlite_tuning import sqlite_tuning
+        sqlite_tuning.init_app(app, db)
         db.create_all()
         # Migrate: add current_file columns to ops_tablespace_data if missing
         _migrate_tablespace_columns(app)
         # Ensure performance indexes exist on Oracle Ops tables
         from app.services.oracle_ops_service import oracle_ops_service
         oracle_ops_service.ensure_indexes()
+        # Build current-state rows and trend buckets from existing raw rows
+        # (first run only, before cleanup drops raw rows older than 7 days)
+        oracle_ops_service.backfill_tablespace_latest()
+        oracle_ops_service.backfill_tablespace_trends()
         # Clean up old data to prevent database bloat (keep 7 days tablespace, 30 days alerts)
         oracle_ops_service.cleanup_old_data(days=7)
 
     # Register WebSocket handlers
     from app.api import websocket
 
+    # Start the background writer that persists agent reports
+    from app.services.report_writer import report_writer
+    report_writer.init_app(app)
+
     # Serve frontend static files from ../frontend/dist
     frontend_dist = os.path.join(os.path.dirname(app.root_path), '..', 'frontend', 'dist')
     frontend_dist = os.path.abspath(frontend_dist)
@@ -99,13 +99,14 @@ def get_tablespaces():
 def get_tablespace_trends():
     """
     Get tablespace usage trend data for ECharts.
-    Query params: server_id (optional), days (default 7)
+    Query params: server_id (optional), days (default 7), points (max points per tablespace)
     """
     server_id = request.args.get('server_id')
     days = request.args.get('days', 7, type=int)
+    points = request.args.get('points', type=int)
 
     try:
-        data = oracle_ops_service.get_tablespace_trends(server_id=server_id, days=days)
+        data = oracle_ops_service.get_tablespace_trends(server_id=server_id, days=days, points=points)
         return jsonify({
             'code': 200,
             'data': data,
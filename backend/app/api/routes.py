@@ -2,19 +2,31 @@
 """
 ACC Monitor - REST API Routes
 """
+import json
+import time
+import zlib
 from datetime import datetime
-from flask import request, jsonify
+from flask import request, jsonify, current_app
+from sqlalchemy import func
 from app.api import api_bp
-from app.services.monitor_service import MonitorService
+from app.services.monitor_service import monitor_service
 from app.services.database_service import DatabaseService
 from app.services.restart_service import RestartService
 from app.services.log_service import LogService
-from app.models import Server, Alert, RestartLog, StationAlert
+from app.services.status_cache import status_cache
+from app.services.status_stream import status_stream
+from app.services.report_writer import report_writer
+from app.services.metrics_store import metrics_store
+from app.services.log_index import log_index
+from app.services.eai_ingest_service import eai_ingest_service
+from app.services.oracle_pool import oracle_pools
+from app.models import Alert, RestartLog, StationAlert
 from app import db
-from config.settings import SERVERS, ORACLE_CONFIGS
+from app.utils.scheduler import scheduler
+from app.utils.sqlite_tuning import sqlite_tuning
+from config.settings import SERVERS, ORACLE_CONFIGS, Config
 
-# Initialize services
-monitor_service = MonitorService()
+# Initialize services (monitor_service is the shared process-wide instance)
 database_service = DatabaseService()
 restart_service = RestartService()
 log_service = LogService()
@@ -25,47 +37,64 @@ from app.services.agent_data_service import agent_data_service
 
 # ============ Dashboard API ============
 
+def _not_modified(etag):
+    """Return a 304 response if the client already holds this ETag, else None"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    # Let browsers cache but always revalidate (If-None-Match -> 304)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @api_bp.route('/dashboard/overview', methods=['GET'])
 def get_dashboard_overview():
-    """Get dashboard overview data"""
-    # Get all server status
-    servers = monitor_service.get_all_servers_status()
+    """Get dashboard overview data (served from the status snapshot, no SSH)"""
+    snapshot = status_cache.get_snapshot()
 
-    # Count by status
-    total = len(servers)
-    online = sum(1 for s in servers if s['status'] == 'normal')
-    warning = sum(1 for s in servers if s['status'] == 'warning')
-    critical = sum(1 for s in servers if s['status'] == 'error')
+    # ETag covers both the server snapshot and the newest alert
+    latest_alert_id = db.session.query(func.max(Alert.id)).scalar() or 0
+    etag = f"overview-{snapshot['version']}-{latest_alert_id}"
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
 
     # Get recent alerts
     recent_alerts = Alert.query.order_by(Alert.created_at.desc()).limit(20).all()
 
-    return jsonify({
+    return _with_etag(jsonify({
         'code': 200,
         'data': {
-            'stats': {
-                'total_servers': total,
-                'online': online,
-                'warning': warning,
-                'critical': critical
-            },
-            'servers': servers,
+            'stats': snapshot['stats'],
+            'servers': snapshot['servers'],
             'recent_alerts': [a.to_dict() for a in recent_alerts],
-            'last_update': datetime.utcnow().isoformat()
+            'last_update': snapshot['updated_at'],
+            'version': snapshot['version']
         }
-    })
+    }), etag)
 
 
 # ============ Server API ============
 
 @api_bp.route('/servers', methods=['GET'])
 def get_servers():
-    """Get all servers list"""
-    servers = monitor_service.get_all_servers_status()
-    return jsonify({
-        'code': 200,
-        'data': servers
-    })
+    """Get all servers list (served from the status snapshot, no SSH)"""
+    etag = status_cache.get_snapshot()['etag']
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = current_app.response_class(
+        status_cache.get_servers_json(), mimetype='application/json'
+    )
+    return _with_etag(response, etag)
 
 
 @api_bp.route('/servers/<server_id>', methods=['GET'])
@@ -409,8 +438,7 @@ def search_logs():
     servers = data.get('servers')
     start_time = data.get('start_time')
     end_time = data.get('end_time')
-    page = data.get('page', 1)
-    page_size = data.get('page_size', 50)
+    cursor = data.get('cursor')
 
     if not keyword:
         return jsonify({
@@ -418,18 +446,36 @@ def search_logs():
             'message': 'Keyword is required'
         }), 400
 
+    try:
+        page = max(int(data.get('page', 1)), 1)
+        page_size = min(max(int(data.get('page_size', 50)), 1), 1000)
+    except (TypeError, ValueError):
+        return jsonify({
+            'code': 400,
+            'message': 'page and page_size must be integers'
+        }), 400
+
     # Parse time filters
     start_dt = datetime.fromisoformat(start_time) if start_time else None
     end_dt = datetime.fromisoformat(end_time) if end_time else None
 
-    results = log_service.search_logs(
-        keyword=keyword,
-        server_ids=servers,
-        start_time=start_dt,
-        end_time=end_dt,
-        page=page,
-        page_size=page_size
-    )
+    try:
+        results = log_service.search_logs(
+            keyword=keyword,
+            server_ids=servers,
+            start_time=start_dt,
+            end_time=end_dt,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            levels=data.get('levels'),
+            sources=data.get('sources')
+        )
+    except ValueError:
+        return jsonify({
+            'code': 400,
+            'message': 'Invalid cursor'
+        }), 400
 
     return jsonify({
         'code': 200,
@@ -451,12 +497,115 @@ def get_log_statistics():
     })
 
 
+@api_bp.route('/logs/system', methods=['GET'])
+def get_system_logs_by_date():
+    """Get one page of a day's system logs (newest first)"""
+    date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = min(max(request.args.get('page_size', 100, type=int), 1), 1000)
+    level = request.args.get('level')
+    until = request.args.get('until')
+
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({
+            'code': 400,
+            'message': 'Invalid date, expected YYYY-MM-DD'
+        }), 400
+
+    results = log_service.get_system_logs_by_date(date_str, page, page_size, level, until)
+
+    return jsonify({
+        'code': 200,
+        'data': results
+    })
+
+
+# ============ Metrics History API ============
+
+def _metrics_time_range():
+    """(start, end) epoch seconds from ?start=&end= or ?hours= (default 1h)"""
+    end = request.args.get('end', type=int) or int(time.time())
+    start = request.args.get('start', type=int)
+    if start is None:
+        hours = request.args.get('hours', 1, type=float)
+        start = end - int(hours * 3600)
+    return start, end
+
+
+@api_bp.route('/metrics/<server_id>', methods=['GET'])
+def get_server_metrics(server_id):
+    """
+    Resource history for a server.
+    ?metrics=cpu_usage,memory_usage  ?hours=1 | ?start=&end= (epoch seconds)
+    ?resolution=auto|raw|1m|5m|1h  ?points=300 (max points per series)
+    """
+    if server_id not in SERVERS:
+        return jsonify({
+            'code': 404,
+            'message': f'Server {server_id} not found'
+        }), 404
+
+    metrics = request.args.get('metrics', 'cpu_usage,memory_usage,disk_usage').split(',')
+    resolution = request.args.get('resolution', 'auto')
+    max_points = request.args.get('points', 300, type=int)
+    start, end = _metrics_time_range()
+
+    try:
+        series = {
+            name: metrics_store.query(server_id, name, start, end, resolution, max_points)
+            for name in metrics if name
+        }
+    except ValueError as e:
+        return jsonify({
+            'code': 400,
+            'message': str(e)
+        }), 400
+
+    return jsonify({
+        'code': 200,
+        'data': series
+    })
+
+
+@api_bp.route('/metrics/<server_id>/series', methods=['GET'])
+def get_server_metric_series(server_id):
+    """Metric names recorded for a server"""
+    return jsonify({
+        'code': 200,
+        'data': metrics_store.list_series(server_id)
+    })
+
+
+@api_bp.route('/metrics/sparklines', methods=['GET'])
+def get_metric_sparklines():
+    """One metric for every configured server (dashboard sparklines)"""
+    metric = request.args.get('metric', 'cpu_usage')
+    max_points = request.args.get('points', 60, type=int)
+    start, end = _metrics_time_range()
+
+    data = {}
+    for server_id in SERVERS:
+        result = metrics_store.query(server_id, metric, start, end, 'auto', max_points)
+        data[server_id] = {
+            'resolution': result['resolution'],
+            'points': [point[:2] for point in result['points']]
+        }
+
+    return jsonify({
+        'code': 200,
+        'metric': metric,
+        'data': data
+    })
+
+
 # ============ Agent API ============
 
 @api_bp.route('/agent/report', methods=['POST'])
 def agent_report():
-    """Receive metrics report from agent"""
-    data = request.get_json()
+    """Receive metrics report from agent (body optionally gzip-compressed)"""
+    data = _agent_json()
 
     if not data:
         return jsonify({
@@ -474,115 +623,24 @@ def agent_report():
     # Store in agent data service (in-memory for real-time access)
     agent_data_service.update_agent_data(server_id, data)
 
-    # Update or create server record in database
-    server = Server.query.get(server_id)
-    if not server:
-        server_config = SERVERS.get(server_id, {})
-        server = Server(
-            id=server_id,
-            name=server_config.get('name', f'Server {server_id}'),
-            name_cn=server_config.get('name_cn', ''),
-            ip=server_config.get('ip', ''),
-            os_type=server_config.get('os', 'windows')
-        )
-        db.session.add(server)
-
-    # Update server metrics
-    resources = data.get('resources', {})
-    server.cpu_usage = resources.get('cpu_usage', 0)
-    server.memory_usage = resources.get('memory_usage', 0)
-    server.disk_usage = resources.get('disk_usage', 0)
-    server.last_check = datetime.utcnow()
-
-    # Determine server status based on processes/containers
-    processes = data.get('processes', [])
-    containers = data.get('containers', [])
-    items = processes + containers
-
-    stopped_count = sum(1 for p in items if p.get('status') == 'stopped')
-    if stopped_count > 0:
-        server.status = 'error'
-    elif resources.get('cpu_usage', 0) > 90 or resources.get('memory_usage', 0) > 90:
-        server.status = 'warning'
-    else:
-        server.status = 'normal'
-
-    # Process alerts from agent (limit to avoid spam)
-    # Only date filter: skip log lines whose embedded date is not today.
-    # All levels (INFO/WARN/ERROR/FATAL/CRITICAL) are accepted and displayed
-    # with their real level extracted from the log message.
-    import re
-    today_str = datetime.utcnow().strftime('%Y-%m-%d')
-    date_pattern = re.compile(r'\d{4}-\d{2}-\d{2}')
-    # Pattern to extract log level tag from EAI format: [INFO], [WARN], [ERRO], [ERROR], [FATAL], [CRITICAL]
-    level_tag_pattern = re.compile(r'\[(INFO|WARN|WARNING|ERRO|ERROR|FATAL|CRITICAL)\]', re.IGNORECASE)
-
-    alerts = data.get('alerts', [])[:50]
-    for alert_data in alerts:
-        msg = alert_data.get('message', '')
-
-        # Date filter: only today's log lines
-        date_match = date_pattern.search(msg)
-        if date_match:
-            log_date = date_match.group(0)
-            if log_date != today_str:
-                continue
-
-        # Extract real log level from message content
-        level_match = level_tag_pattern.search(msg)
-        if level_match:
-            raw_level = level_match.group(1).upper()
-            if raw_level in ('ERRO', 'ERROR'):
-                log_level = 'error'
-            elif raw_level in ('WARN', 'WARNING'):
-                log_level = 'warning'
-            elif raw_level in ('FATAL', 'CRITICAL'):
-                log_level = 'critical'
-            else:
-                log_level = 'info'
-        else:
-            log_level = 'info'
-
-        # Only persist error/critical level alerts to the Alert table
-        if log_level in ('error', 'critical'):
-            alert = Alert(
-                server_id=server_id,
-                level=log_level,
-                source='agent',
-                message=msg[:500]
-            )
-            db.session.add(alert)
-
-        # Write ALL levels into the system log buffer for the EAI System Log panel
-        from app.api.websocket import ingest_agent_alert
-        ingest_agent_alert(server_id, msg, log_level)
-
-    db.session.commit()
-
-    # Broadcast status update via WebSocket
-    from app.api.websocket import broadcast_server_status
-    broadcast_server_status({
-        'id': server_id,
-        'name': server.name,
-        'name_cn': server.name_cn,
-        'ip': server.ip,
-        'status': server.status,
-        'cpu_usage': server.cpu_usage,
-        'memory_usage': server.memory_usage,
-        'disk_usage': server.disk_usage,
-        'processes': processes,
-        'containers': containers,
-        'agent_online': True,
-        'data_source': 'agent',
-        'last_check': server.last_check.isoformat()
-    })
+    # Persistence (Server row, alerts, system log, status snapshot) happens in
+    # the background report writer, which group-commits reports in batches
+    if not report_writer.submit(server_id, data):
+        response = jsonify({
+            'code': 503,
+            'message': 'Report queue full, retry later',
+            'server_id': server_id,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        response.headers['Retry-After'] = str(Config.REPORT_RETRY_AFTER)
+        return response, 503
 
     return jsonify({
-        'code': 200,
-        'message': 'Report received',
+        'code': 202,
+        'message': 'Report queued',
         'server_id': server_id,
         'timestamp': datetime.utcnow().isoformat()
-    })
+    }), 202
 
 
 @api_bp.route('/agent/status', methods=['GET'])
@@ -610,21 +668,47 @@ def get_agents_status():
     })
 
 
+def _agent_json():
+    """
+    JSON body of an agent upload; bodies sent with Content-Encoding: gzip are
+    decompressed (up to Config.EAI_MAX_UPLOAD_BYTES). None if missing/invalid.
+    """
+    if request.content_encoding != 'gzip':
+        return request.get_json(silent=True)
+    try:
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = inflater.decompress(request.get_data(), Config.EAI_MAX_UPLOAD_BYTES)
+        if inflater.unconsumed_tail:
+            return None
+        return json.loads(body.decode('utf-8'))
+    except (zlib.error, ValueError):
+        return None
+
+
 @api_bp.route('/agent/eai-logs', methods=['POST'])
 def agent_eai_logs():
     """
     Receive EAI log parsing results from the Linux Agent (Phase 3).
-    The Agent on 163 monitors EAI log files locally via tail -F,
-    parses report records, and uploads them here for Oracle insertion.
+    The Agent on 163 follows EAI log files locally, parses report records,
+    spools them and uploads them here for Oracle insertion.
     This replaces the standalone eai_log_monitor SSH-based service on 165.
+
+    Body (optionally gzip-compressed):
+      {server_id, schema, records}                        single schema
+      {server_id, batches: [{schema, records}], last_seq}  spooled multi-schema batch
+    A multi-schema batch answers 500 if any schema hit a database error so the
+    agent retries the whole batch (already inserted rows come back as duplicates).
     """
     import logging
     eai_logger = logging.getLogger('eai_logs')
 
-    data = request.get_json()
+    data = _agent_json()
     if not data:
         return jsonify({'code': 400, 'message': 'No data provided'}), 400
 
+    if 'batches' in data:
+        return _agent_eai_batches(data, eai_logger)
+
     server_id = data.get('server_id')
     schema = data.get('schema')
     records = data.get('records', [])
@@ -639,120 +723,73 @@ def agent_eai_logs():
             'data': {'inserted': 0, 'duplicates': 0}
         })
 
-    # Database configuration for EAI schemas
-    # These match the original eai_log_monitor config.py ACC_DATABASE settings
-    EAI_DB_CONFIG = {
-        'host': '172.17.10.165',
-        'port': 1521,
-        'service': 'orcl.ecdag.com',
-        'schemas': {
-            'dpepp1': {'user': 'iplant_dpepp1', 'password': 'acc'},
-            'smt2': {'user': 'iplant_smt2', 'password': 'acc'},
-            'dpeps1': {'user': 'iplant_dpeps1', 'password': 'acc'}
-        }
-    }
-
-    schema_config = EAI_DB_CONFIG['schemas'].get(schema)
-    if not schema_config:
-        return jsonify({'code': 400, 'message': f'Unknown schema: {schema}'}), 400
-
-    inserted = 0
-    duplicates = 0
-    errors_list = []
-
     try:
-        import cx_Oracle
-        dsn = f"{EAI_DB_CONFIG['host']}:{EAI_DB_CONFIG['port']}/{EAI_DB_CONFIG['service']}"
-        conn = cx_Oracle.connect(
-            user=schema_config['user'],
-            password=schema_config['password'],
-            dsn=dsn,
-            encoding='UTF-8'
-        )
-        cursor = conn.cursor()
-
-        for record in records:
-            try:
-                schb_number = record.get('schb_number', '')
-                if not schb_number:
-                    continue
-
-                is_success = record.get('is_success', True)
-                error_message = (record.get('error_message', '') or '')[:2000]
-                source_bill_no = record.get('source_bill_no', '') or 'UNKNOWN'
-
-                # MERGE INTO (upsert) - matches original db_handler.py logic exactly
-                sql = """
-                MERGE INTO ACC_ERP_REPORT_SUCCESS t
-                USING (SELECT :schb_number AS SCHB_NUMBER FROM DUAL) s
-                ON (t.SCHB_NUMBER = s.SCHB_NUMBER)
-                WHEN NOT MATCHED THEN
-                INSERT (ID, WONO, PACKID, PARTNO, CNT, LINE, SCHB_NUMBER,
-                        SOURCE_BILL_NO, REPORT_TIME, IS_SUCCESS, ERROR_MESSAGE)
-                VALUES (ACC_ERP_REPT_SUCC_SEQ.NEXTVAL, :wono, :packid, :partno,
-                        :cnt, :line, :schb_number, :source_bill_no,
-                        :report_time, :is_success, :error_message)
-                """
-
-                # Parse report_time
-                report_time_str = record.get('report_time', '')
-                report_time = None
-                if report_time_str:
-                    try:
-                        report_time = datetime.fromisoformat(report_time_str)
-                    except (ValueError, TypeError):
-                        report_time = datetime.utcnow()
-                else:
-                    report_time = datetime.utcnow()
-
-                cursor.execute(sql, {
-                    'schb_number': schb_number,
-                    'wono': source_bill_no,
-                    'packid': record.get('lot_number', '') or '',
-                    'source_bill_no': source_bill_no,
-                    'cnt': record.get('qty', 0) or 0,
-                    'partno': record.get('product_code', '') or 'UNKNOWN',
-                    'line': record.get('line', '') or '',
-                    'report_time': report_time,
-                    'is_success': 1 if is_success else 0,
-                    'error_message': error_message
-                })
-
-                if cursor.rowcount > 0:
-                    inserted += 1
-                else:
-                    duplicates += 1
-
-            except cx_Oracle.IntegrityError:
-                duplicates += 1
-            except cx_Oracle.Error as e:
-                errors_list.append(f"{schb_number}: {str(e)[:100]}")
-                eai_logger.warning(f"EAI record insert error: {e}, schb={schb_number}")
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
+        result = eai_ingest_service.insert_records(schema, records)
+    except ValueError as e:
+        return jsonify({'code': 400, 'message': str(e)}), 400
     except Exception as e:
         eai_logger.error(f"EAI database connection error for schema {schema}: {e}")
         return jsonify({
             'code': 500,
             'message': f'Database error: {str(e)[:200]}',
-            'data': {'inserted': inserted, 'duplicates': duplicates}
+            'data': {'inserted': 0, 'duplicates': 0}
         }), 500
 
     eai_logger.info(f"EAI logs received: schema={schema}, total={len(records)}, "
-                    f"inserted={inserted}, duplicates={duplicates}")
+                    f"inserted={result['inserted']}, duplicates={result['duplicates']}, "
+                    f"failed={result['failed']}")
 
+    # rows: per-row duplicates/failures ({index, schb_number, status, error})
     return jsonify({
         'code': 200,
         'message': 'EAI logs processed',
-        'data': {
-            'inserted': inserted,
-            'duplicates': duplicates,
-            'total': len(records),
-            'errors': errors_list[:5] if errors_list else []
-        }
+        'data': result
+    })
+
+
+def _agent_eai_batches(data, eai_logger):
+    """Insert a spooled multi-schema upload; per-schema results under data.schemas"""
+    totals = {'inserted': 0, 'duplicates': 0, 'failed': 0, 'skipped': 0, 'total': 0}
+    schemas = {}
+    database_error = None
+
+    for batch in data.get('batches') or []:
+        schema = batch.get('schema')
+        records = batch.get('records') or []
+        if not schema or not records:
+            continue
+        try:
+            result = eai_ingest_service.insert_records(schema, records)
+        except ValueError as e:
+            # Unknown schema: retrying won't help, report it instead of failing the batch
+            schemas[schema] = {'error': str(e), 'total': len(records)}
+            continue
+        except Exception as e:
+            eai_logger.error(f"EAI database connection error for schema {schema}: {e}")
+            schemas[schema] = {'error': f'Database error: {str(e)[:200]}', 'total': len(records)}
+            database_error = database_error or str(e)[:200]
+            continue
+        schemas[schema] = result
+        for key in totals:
+            totals[key] += result[key]
+
+    eai_logger.info(f"EAI logs received: server={data.get('server_id')}, schemas={list(schemas)}, "
+                    f"total={totals['total']}, inserted={totals['inserted']}, "
+                    f"duplicates={totals['duplicates']}, failed={totals['failed']}, "
+                    f"last_seq={data.get('last_seq')}")
+
+    totals['schemas'] = schemas
+    totals['last_seq'] = data.get('last_seq')
+    if database_error:
+        return jsonify({
+            'code': 500,
+            'message': f'Database error: {database_error}',
+            'data': totals
+        }), 500
+    return jsonify({
+        'code': 200,
+        'message': 'EAI logs processed',
+        'data': totals
     })
 
 
@@ -804,5 +841,13 @@ def health_check():
     return jsonify({
         'code': 200,
         'status': 'healthy',
+        'ssh_pool': monitor_service.get_ssh_pool_stats(),
+        'process_check': scheduler.get_last_cycle_stats(),
+        'status_stream': status_stream.get_stats(),
+        'report_writer': report_writer.get_stats(),
+        'sqlite': sqlite_tuning.get_stats(),
+        'metrics_store': metrics_store.get_stats(),
+        'log_index': log_index.get_stats(),
+        'oracle_pools': oracle_pools.get_stats(),
         'timestamp': datetime.utcnow().isoformat()
     })
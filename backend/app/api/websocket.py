@@ -5,12 +5,12 @@ ACC Monitor - WebSocket Handlers
 from datetime import datetime
 from flask_socketio import emit, join_room, leave_room
 from app import socketio
-from app.services.monitor_service import MonitorService
 from app.services.database_service import DatabaseService
 from app.services.log_service import LogService, initialize_system_logs
+from app.services.status_cache import status_cache
+from app.services.status_stream import status_stream
 
 # Initialize services
-monitor_service = MonitorService()
 database_service = DatabaseService()
 log_service = LogService()
 
@@ -56,6 +56,17 @@ def handle_join(data):
         'timestamp': datetime.utcnow().isoformat()
     })
 
+    if room == status_stream.room:
+        # Baseline for the delta stream; later updates arrive as status_delta
+        status_stream.start(socketio)
+        status_stream.send_snapshot(emit)
+
+
+@socketio.on('request_resync')
+def handle_resync(data=None):
+    """Client detected a status_delta seq gap - resend the full snapshot"""
+    status_stream.send_snapshot(emit)
+
 
 @socketio.on('leave')
 def handle_leave(data):
@@ -69,21 +80,19 @@ def handle_status_request(data=None):
     """Handle request for server status"""
     server_id = data.get('server_id') if data else None
 
+    # Served from the status snapshot - never triggers an SSH sweep
     if server_id:
         # Get specific server status
-        status = monitor_service.get_all_servers_status()
-        server_status = next(
-            (s for s in status if s['id'] == server_id), None
-        )
         emit('server_status', {
-            'server': server_status,
+            'server': status_cache.get_server(server_id),
             'timestamp': datetime.utcnow().isoformat()
         })
     else:
         # Get all servers status
-        status = monitor_service.get_all_servers_status()
+        snapshot = status_cache.get_snapshot()
         emit('all_servers_status', {
-            'servers': status,
+            'servers': snapshot['servers'],
+            'version': snapshot['version'],
             'timestamp': datetime.utcnow().isoformat()
         })
 
@@ -128,11 +137,11 @@ def handle_alerts_request(data=None):
 # These can be called from background tasks to push updates
 
 def broadcast_server_status(server_status):
-    """Broadcast server status update to all clients"""
-    socketio.emit('server_status_update', {
-        'server': server_status,
-        'timestamp': datetime.utcnow().isoformat()
-    }, room='status')
+    """Publish a server status update.
+    Merged into the status snapshot; clients in the 'status' room receive only
+    the changed fields in the next coalesced status_delta frame."""
+    fields = {k: v for k, v in server_status.items() if k not in ('id', 'processes')}
+    status_cache.merge_server(server_status['id'], fields, server_status.get('processes'))
 
 
 def broadcast_alert(alert):
@@ -230,18 +239,22 @@ def broadcast_system_logs_batch(logs):
     })
 
 
-def ingest_agent_alert(server_id, message, level='info'):
+def ingest_agent_alerts(entries):
     """
-    Write an agent-reported log entry into the system log buffer and broadcast it.
-    Called from the /agent/report route so agent logs appear in the EAI System Log panel.
-    Level is extracted from the log message content by the caller (info/warning/error/critical).
+    Write agent-reported log entries into the system log buffer and broadcast them.
+    Called by the report writer so agent logs appear in the EAI System Log panel.
+    entries: [(server_id, message, level)], level already extracted from the
+    message content (info/warning/error/critical).
     """
     from config.settings import SERVERS
-    server_config = SERVERS.get(server_id, {})
-    server_name = server_config.get('name_cn', server_config.get('name', server_id))
-    short_msg = message[:100] + '...' if len(message) > 100 else message
-    log_entry = log_service.add_system_log(level, server_id, f"{server_name}: {short_msg}")
-    broadcast_system_log(log_entry)
+    lines = []
+    for server_id, message, level in entries:
+        server_config = SERVERS.get(server_id, {})
+        server_name = server_config.get('name_cn', server_config.get('name', server_id))
+        short_msg = message[:100] + '...' if len(message) > 100 else message
+        lines.append((level, server_id, f"{server_name}: {short_msg}"))
+    for log_entry in log_service.add_system_logs(lines):
+        broadcast_system_log(log_entry)
 
 
 @socketio.on('request_system_logs')
@@ -204,3 +204,28 @@ class StationAlert(db.Model):
             'resolved': self.resolved,
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
         }
+
+
+class MetricChunk(db.Model):
+    """
+    Time-series chunk: one metric series at one resolution for a fixed span.
+    Columns hold packed arrays (see app/services/metrics_store.py).
+    """
+    __tablename__ = 'metric_chunks'
+    __table_args__ = (
+        db.UniqueConstraint('server_id', 'metric', 'resolution', 'chunk_start', name='uq_metric_chunk'),
+        db.Index('ix_metric_chunks_resolution_start', 'resolution', 'chunk_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.String(10), nullable=False)
+    metric = db.Column(db.String(100), nullable=False)  # cpu_usage, container:<name>:cpu_percent, ...
+    resolution = db.Column(db.String(4), nullable=False)  # raw, 1m, 5m, 1h
+    chunk_start = db.Column(db.Integer, nullable=False)  # epoch seconds
+    points = db.Column(db.Integer, default=0)
+    ts_data = db.Column(db.LargeBinary)  # uint32 offsets from chunk_start
+    val_data = db.Column(db.LargeBinary)  # float32 value / average
+    min_data = db.Column(db.LargeBinary)  # float32 (rollups only)
+    max_data = db.Column(db.LargeBinary)  # float32 (rollups only)
+    count_data = db.Column(db.LargeBinary)  # uint32 samples per bucket (rollups only)
+    updated_at = db.Column(db.Integer)  # epoch seconds
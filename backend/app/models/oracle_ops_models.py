@@ -41,6 +41,84 @@ class OpsTablespaceData(db.Model):
         }
 
 
+class OpsTablespaceLatest(db.Model):
+    """
+    Newest sample per server+tablespace (current state).
+    Upserted by OracleOpsService.store_report_data so overview/listing reads
+    don't depend on the size of ops_tablespace_data.
+    """
+    __tablename__ = 'ops_tablespace_latest'
+    __table_args__ = (
+        db.UniqueConstraint('server_id', 'tablespace_name', name='uq_ts_latest'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.String(20), nullable=False, index=True)
+    server_name = db.Column(db.String(50))
+    tablespace_name = db.Column(db.String(100), nullable=False)
+    used_mb = db.Column(db.Float)
+    max_mb = db.Column(db.Float)
+    usage_pct = db.Column(db.Float)
+    collected_at = db.Column(db.DateTime)
+    reported_at = db.Column(db.DateTime, default=datetime.now)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'server_id': self.server_id,
+            'server_name': self.server_name,
+            'tablespace_name': self.tablespace_name,
+            'used_mb': self.used_mb,
+            'max_mb': self.max_mb,
+            'usage_pct': self.usage_pct,
+            'collected_at': self.collected_at.isoformat() if self.collected_at else None,
+            'reported_at': self.reported_at.isoformat() if self.reported_at else None
+        }
+
+
+class OpsTablespaceTrend(db.Model):
+    """
+    Pre-aggregated tablespace usage per hour/day bucket.
+    Maintained by OracleOpsService.store_report_data as reports arrive so
+    trend queries never scan ops_tablespace_data.
+    """
+    __tablename__ = 'ops_tablespace_trends'
+    __table_args__ = (
+        db.UniqueConstraint('server_id', 'tablespace_name', 'granularity', 'bucket_start',
+                            name='uq_ts_trend_bucket'),
+        db.Index('idx_ts_trend_lookup', 'granularity', 'server_id', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    server_id = db.Column(db.String(20), nullable=False)
+    server_name = db.Column(db.String(50))
+    tablespace_name = db.Column(db.String(100), nullable=False)
+    granularity = db.Column(db.String(5), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    min_pct = db.Column(db.Float)
+    max_pct = db.Column(db.Float)
+    last_pct = db.Column(db.Float)
+    last_used_mb = db.Column(db.Float)
+    last_max_mb = db.Column(db.Float)
+    last_collected_at = db.Column(db.DateTime)
+    samples = db.Column(db.Integer, default=0)
+
+    def add_sample(self, usage_pct, used_mb, max_mb, collected_at):
+        """Fold one tablespace sample into the bucket"""
+        usage_pct = usage_pct or 0
+        if not self.samples:
+            self.min_pct = self.max_pct = usage_pct
+        else:
+            self.min_pct = min(self.min_pct, usage_pct)
+            self.max_pct = max(self.max_pct, usage_pct)
+        if self.last_collected_at is None or collected_at >= self.last_collected_at:
+            self.last_pct = usage_pct
+            self.last_used_mb = used_mb
+            self.last_max_mb = max_mb
+            self.last_collected_at = collected_at
+        self.samples = (self.samples or 0) + 1
+
+
 class OpsBackupRecord(db.Model):
     """Backup execution records reported by execution agents"""
     __tablename__ = 'ops_backup_records'
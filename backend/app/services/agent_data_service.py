@@ -5,8 +5,9 @@ Manages real-time data from monitoring agents, handles offline detection
 Supports reconnection detection and state recovery
 """
 import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable
+from typing import Deque, Dict, List, Optional, Callable, Tuple
 import logging
 
 # Configure logging
@@ -41,6 +42,14 @@ class AgentDataService:
         # Key: server_id, Value: list of process status
         self._process_data: Dict[str, List[Dict]] = {}
 
+        # Recent container log lines per (server_id, container), newest last.
+        # Agents send only lines that are new since their last report.
+        self._container_logs: Dict[Tuple[str, str], Deque[Dict]] = {}
+        self.container_log_buffer_size = 500
+        # Timestamp of the newest line stored per (server_id, container). A report
+        # answered with 503 (or whose response got lost) is re-sent unchanged.
+        self._container_log_last: Dict[Tuple[str, str], str] = {}
+
         # Timeout for considering agent offline (seconds)
         self.offline_timeout = 30
 
@@ -125,6 +134,8 @@ class AgentDataService:
             if processes:
                 self._process_data[server_id] = processes
 
+            self._store_container_logs(server_id, data)
+
             # Clear SSH fallback cache since we have fresh agent data
             if server_id in self._ssh_fallback_cache:
                 del self._ssh_fallback_cache[server_id]
@@ -133,6 +144,32 @@ class AgentDataService:
         if was_offline and offline_duration > 0:
             self._notify_reconnection(server_id, offline_duration)
 
+    def _store_container_logs(self, server_id: str, data: Dict) -> None:
+        """Append reported container log lines to the per-container ring buffers"""
+        for name, entries in (data.get('container_logs') or {}).items():
+            key = (server_id, name)
+            if key not in self._container_logs:
+                self._container_logs[key] = deque(maxlen=self.container_log_buffer_size)
+            # Skip lines already stored from a re-sent report (ISO timestamps sort as text)
+            last = self._container_log_last.get(key, '')
+            fresh = [e for e in entries if not e.get('timestamp') or e['timestamp'] > last]
+            self._container_logs[key].extend(fresh)
+            newest = max((e['timestamp'] for e in fresh if e.get('timestamp')), default='')
+            if newest > last:
+                self._container_log_last[key] = newest
+        dropped = data.get('container_logs_dropped') or {}
+        for name, count in dropped.items():
+            logger.warning(f"[AgentLogs] {server_id}/{name}: agent dropped {count} log lines")
+
+        # Older agents send a 'docker logs --since 5m' snapshot instead; it replaces the buffer
+        for name, entries in (data.get('container_error_logs') or {}).items():
+            self._container_logs[(server_id, name)] = deque(entries, maxlen=self.container_log_buffer_size)
+
+    def get_container_logs(self, server_id: str, container_name: str) -> List[Dict]:
+        """Buffered log lines of a container, oldest first"""
+        with self._lock:
+            return list(self._container_logs.get((server_id, container_name), ()))
+
     def get_agent_data(self, server_id: str) -> Optional[Dict]:
         """Get latest agent data for a server"""
         data = self._agent_data.get(server_id)
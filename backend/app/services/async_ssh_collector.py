@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Async SSH Collector (asyncssh backend)
+Multiplexes SSH sessions for all servers on a single asyncio event loop
+running in one background OS thread. Commands get real cancellation: on
+timeout the remote channel is closed instead of leaving a thread blocked on
+read(). run_many() sends a whole status sweep through the loop in one call.
+
+Under eventlet (run.py monkey patches on Python < 3.12) the loop still runs on
+a real OS thread with the unpatched threading/selectors modules, and callers
+wait for results through eventlet.tpool so the hub keeps serving other
+greenthreads.
+
+Selected with Config.SSH_BACKEND = 'asyncssh'. Falls back to the paramiko
+pool when asyncssh is not installed.
+"""
+import asyncio
+import importlib
+import math
+import sys
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import asyncssh
+    HAS_ASYNCSSH = True
+except ImportError:
+    HAS_ASYNCSSH = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# asyncssh logs every channel open/close at INFO
+logging.getLogger('asyncssh').setLevel(logging.WARNING)
+
+
+def eventlet_patched() -> bool:
+    """True when eventlet has green-patched sockets (asyncio can't share that hub)"""
+    try:
+        from eventlet import patcher
+        return patcher.is_monkey_patched('socket')
+    except ImportError:
+        return False
+
+
+# patcher.original() re-imports only the module itself; selectors must also
+# see the unpatched select (eventlet strips epoll from the shared one)
+_ORIGINAL_DEPS = {'selectors': 'select'}
+
+
+def _original(name: str):
+    """Stdlib module as it was before eventlet's monkey patching"""
+    if not eventlet_patched():
+        return importlib.import_module(name)
+
+    from eventlet import patcher
+    dependency = _ORIGINAL_DEPS.get(name)
+    if dependency is None:
+        return patcher.original(name)
+
+    saver = patcher.SysModulesSaver((name, dependency))
+    try:
+        sys.modules.pop(name, None)
+        sys.modules[dependency] = patcher.original(dependency)
+        return importlib.import_module(name)
+    finally:
+        saver.restore()
+
+
+class AsyncSSHCollector:
+    """Runs SSH commands for many servers on one event loop thread"""
+
+    def __init__(self, keepalive_interval: int = 30, max_concurrency: int = 64,
+                 connect_timeout: int = 10, sessions_per_host: int = 4):
+        if not HAS_ASYNCSSH:
+            raise RuntimeError("asyncssh is not installed")
+
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.max_concurrency = max_concurrency
+        # Channels open at once on one connection (sshd MaxSessions defaults to 10)
+        self.sessions_per_host = sessions_per_host
+
+        # Key: server_id, Value: asyncssh.SSHClientConnection
+        self._connections: Dict[str, 'asyncssh.SSHClientConnection'] = {}
+        # Created/used on the loop thread only
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self._stats = {
+            'commands': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'hits': 0,
+            'misses': 0,
+            'reconnects': 0,
+            'connect_failures': 0,
+        }
+
+        # Real OS thread and selector even when eventlet has patched the stdlib
+        self._green = eventlet_patched()
+        self._threading = _original('threading')
+        self._loop = asyncio.SelectorEventLoop(_original('selectors').DefaultSelector())
+        self._ready = self._threading.Event()
+        self._thread = self._threading.Thread(target=self._run_loop, name='async-ssh', daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        self._loop.run_forever()
+
+    # ---- coroutines (event loop thread only) ----
+
+    async def _get_connection(self, server_id: str, params: Dict):
+        lock = self._connect_locks.get(server_id)
+        if lock is None:
+            lock = self._connect_locks[server_id] = asyncio.Lock()
+
+        async with lock:
+            conn = self._connections.get(server_id)
+            if conn is not None:
+                if not conn.is_closed():
+                    self._stats['hits'] += 1
+                    return conn
+                self._connections.pop(server_id, None)
+                self._stats['reconnects'] += 1
+            else:
+                self._stats['misses'] += 1
+
+            try:
+                conn = await asyncio.wait_for(
+                    asyncssh.connect(
+                        params['host'],
+                        port=params['port'],
+                        username=params['username'],
+                        client_keys=[params['key_file']],
+                        known_hosts=None,
+                        keepalive_interval=self.keepalive_interval,
+                    ),
+                    timeout=self.connect_timeout
+                )
+            except Exception as e:
+                self._stats['connect_failures'] += 1
+                raise ConnectionError(f"connect to {params['host']}:{params['port']} failed: {e}")
+
+            self._connections[server_id] = conn
+            return conn
+
+    async def _drop_connection(self, server_id: str):
+        conn = self._connections.pop(server_id, None)
+        if conn is not None:
+            conn.close()
+
+    async def _run(self, server_id: str, params: Dict, command: str, timeout: float) -> Optional[str]:
+        host_semaphore = self._host_semaphores.get(server_id)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[server_id] = asyncio.Semaphore(self.sessions_per_host)
+
+        async with host_semaphore, self._semaphore:
+            self._stats['commands'] += 1
+            conn = await self._get_connection(server_id, params)
+            try:
+                # wait_for cancels the session (closes the channel) on timeout
+                result = await asyncio.wait_for(conn.run(command, check=False), timeout=timeout)
+            except asyncio.TimeoutError:
+                self._stats['timeouts'] += 1
+                raise
+            except (asyncssh.Error, OSError):
+                self._stats['errors'] += 1
+                await self._drop_connection(server_id)
+                raise
+
+            output = result.stdout
+            if isinstance(output, bytes):
+                output = output.decode('utf-8', errors='ignore')
+            output = (output or '').strip()
+            return output or None
+
+    # ---- thread-safe API (called from worker threads or greenthreads) ----
+
+    def _submit(self, coro, timeout: float):
+        """
+        Run coro on the loop thread and wait for its result. Only unpatched
+        primitives cross threads: eventlet's green locks can't be woken from
+        another OS thread, so greenthreads wait in eventlet.tpool.
+        """
+        done = self._threading.Event()
+        holder = {}
+
+        def _start():
+            task = holder['task'] = self._loop.create_task(coro)
+            task.add_done_callback(lambda _: done.set())
+
+        self._loop.call_soon_threadsafe(_start)
+        if self._green:
+            from eventlet import tpool
+            finished = tpool.execute(done.wait, timeout)
+        else:
+            finished = done.wait(timeout)
+        if not finished:
+            self._loop.call_soon_threadsafe(lambda: holder.get('task') and holder['task'].cancel())
+            raise TimeoutError(f"async SSH call did not finish within {timeout:.0f}s")
+        return holder['task'].result()
+
+    def run(self, server_id: str, params: Dict, command: str, timeout: float = 5) -> Optional[str]:
+        """
+        Run a command on server_id and block the caller until done.
+        Raises on connection failure or timeout (the remote command is cancelled).
+        """
+        # Connect + command budget; the coroutine enforces its own timeouts
+        return self._submit(self._run(server_id, params, command, timeout),
+                            self.connect_timeout + timeout + 5)
+
+    def run_many(self, jobs: List[Tuple[str, Dict, str, float]]) -> List[Union[Optional[str], BaseException]]:
+        """
+        Run many commands (any number per server) concurrently on the loop and
+        wait once for all of them.
+        jobs: [(server_id, params, command, timeout)]. Returns results in job
+        order; a failed or timed-out command's exception takes its place (as
+        asyncio.gather(return_exceptions=True) does).
+        """
+        if not jobs:
+            return []
+
+        async def _gather():
+            coros = [self._run(sid, params, cmd, timeout) for sid, params, cmd, timeout in jobs]
+            return await asyncio.gather(*coros, return_exceptions=True)
+
+        # A host's commands queue behind sessions_per_host channels
+        per_host: Dict[str, List[float]] = {}
+        for server_id, _, _, timeout in jobs:
+            per_host.setdefault(server_id, []).append(timeout)
+        budget = max(
+            self.connect_timeout + math.ceil(len(timeouts) / self.sessions_per_host) * max(timeouts)
+            for timeouts in per_host.values()
+        )
+        return self._submit(_gather(), budget + 5)
+
+    def size(self) -> int:
+        return len(self._connections)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats['open_connections'] = len(self._connections)
+        stats['max_concurrency'] = self.max_concurrency
+        return stats
+
+    def close_all(self, timeout: float = 5) -> None:
+        """Close every connection (loop keeps running for later reconnects)"""
+        async def _close():
+            for server_id in list(self._connections.keys()):
+                await self._drop_connection(server_id)
+
+        try:
+            self._submit(_close(), timeout)
+        except Exception as e:
+            logger.debug(f"[AsyncSSH] close_all error: {e}")
+
+    def shutdown(self) -> None:
+        self.close_all()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_collector: Optional[AsyncSSHCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_async_ssh_collector(keepalive_interval: int = 30, max_concurrency: int = 64,
+                            sessions_per_host: int = 4) -> Optional[AsyncSSHCollector]:
+    """Return the process-wide collector, or None if asyncssh is not installed"""
+    global _collector
+    if not HAS_ASYNCSSH:
+        return None
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                _collector = AsyncSSHCollector(
+                    keepalive_interval=keepalive_interval,
+                    max_concurrency=max_concurrency,
+                    sessions_per_host=sessions_per_host
+                )
+    return _collector
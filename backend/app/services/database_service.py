@@ -3,9 +3,13 @@
 ACC Monitor - Database Monitoring Service
 """
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from config.settings import ORACLE_CONFIGS, Config
+from app.services.oracle_pool import oracle_pools, is_dead_session_error
 
 # Try to import cx_Oracle, handle if not available
 try:
@@ -17,27 +21,38 @@ except ImportError:
 
 
 class DatabaseService:
-    """Service for Oracle database monitoring"""
+    """
+    Service for Oracle database monitoring.
+    Status is cached per database for DATABASE_STATUS_CACHE_TTL; the scheduler
+    refreshes every database concurrently, REST/WebSocket readers get the
+    cached snapshot. Concurrent refreshes of one database share one query.
+    """
+
+    # Singleton instance (routes, websocket and scheduler share the cache)
+    _instance = None
+    _lock = threading.Lock()
 
     # Tablespace names that should be excluded from display
     # Only business data tablespaces and SYSTEM are shown
     EXCLUDED_TABLESPACES = {'USERS', 'TEMP', 'SYSAUX', 'UNDOTBS1', 'UNDOTBS2', 'UNDOTBS'}
 
-    # SQL queries for monitoring
-    TABLESPACE_QUERY = """
+    # SQL query for monitoring: tablespaces and session counts in one round trip
+    STATUS_QUERY = """
         SELECT
+            'TABLESPACE' AS kind,
             tablespace_name,
             ROUND(used_space * 8192 / 1024 / 1024, 2) AS used_mb,
             ROUND(tablespace_size * 8192 / 1024 / 1024, 2) AS total_mb,
             ROUND(used_percent, 2) AS used_percent
         FROM dba_tablespace_usage_metrics
         WHERE tablespace_name IN ({tablespaces})
-    """
-
-    CONNECTION_QUERY = """
+        UNION ALL
         SELECT
-            COUNT(*) AS total_connections,
-            SUM(CASE WHEN status = 'ACTIVE' THEN 1 ELSE 0 END) AS active_connections
+            'SESSIONS',
+            NULL,
+            COUNT(*),
+            SUM(CASE WHEN status = 'ACTIVE' THEN 1 ELSE 0 END),
+            NULL
         FROM v$session
         WHERE username IS NOT NULL
     """
@@ -55,11 +70,29 @@ class DatabaseService:
         """
     }
 
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
+        if self._initialized:
+            return
+
         self._connections: Dict[str, any] = {}
+        # Key: server_id, Value: {'tablespaces', 'connections', 'last_check', 'fetched_at'}
+        self._status_cache: Dict[str, Dict] = {}
+        # Key: server_id, Value: Future of the refresh currently running
+        self._inflight: Dict[str, Future] = {}
+        self._cache_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._initialized = True
 
     def get_connection(self, server_id: str) -> Optional[any]:
-        """Get or create Oracle connection for a server"""
+        """Check out a pooled Oracle session for a server (hand it back with release_connection)"""
         if not HAS_ORACLE:
             return None
 
@@ -78,62 +111,83 @@ class DatabaseService:
                 service_name=config['service_name']
             )
 
-            connection = cx_Oracle.connect(
-                user=config['username'],
-                password=password,
-                dsn=dsn
-            )
-
-            return connection
+            conn = oracle_pools.acquire(server_id, config['username'], password, dsn)
+            if conn is not None:
+                # Don't let a hung query hold a sweep worker (and the session) forever
+                try:
+                    conn.call_timeout = Config.DATABASE_CALL_TIMEOUT_MS
+                except Exception:
+                    pass
+            return conn
         except Exception as e:
             print(f"Oracle connection error for {server_id}: {e}")
             return None
 
-    def get_tablespace_status(self, server_id: str) -> List[Dict]:
-        """Get tablespace usage for a server"""
+    def release_connection(self, server_id: str, conn, error: Exception = None) -> None:
+        """Return a session to the server's pool; drop it if error says it is dead"""
+        broken = error is not None and is_dead_session_error(error)
+        oracle_pools.release(server_id, conn, broken=broken)
+
+    @staticmethod
+    def _tablespace_entry(ts_name: str, used_mb, total_mb, used_percent, last_check: str) -> Dict:
+        """Tablespace dict with status determined from the configured thresholds"""
+        if used_percent >= Config.TABLESPACE_CRITICAL_THRESHOLD:
+            status = 'critical'
+        elif used_percent >= Config.TABLESPACE_WARNING_THRESHOLD:
+            status = 'warning'
+        else:
+            status = 'normal'
+
+        return {
+            'name': ts_name,
+            'total_mb': total_mb,
+            'used_mb': used_mb,
+            'used_percent': used_percent,
+            'status': status,
+            'last_check': last_check
+        }
+
+    def _query_database(self, server_id: str) -> Tuple[List[Dict], Dict]:
+        """Fetch tablespace usage and session counts for a server in one round trip"""
+        last_check = datetime.utcnow().isoformat()
+        connections = {
+            'total_connections': 0,
+            'active_connections': 0,
+            'last_check': last_check
+        }
         if server_id not in ORACLE_CONFIGS:
-            return []
+            return [], connections
 
         config = ORACLE_CONFIGS[server_id]
         tablespaces = config.get('tablespaces', [])
 
         # Format tablespace names for SQL
         ts_list = ','.join([f"'{ts}'" for ts in tablespaces])
-        query = self.TABLESPACE_QUERY.format(tablespaces=ts_list)
+        query = self.STATUS_QUERY.format(tablespaces=ts_list)
 
         conn = self.get_connection(server_id)
         results = []
 
         if conn:
+            error = None
             try:
                 cursor = conn.cursor()
                 cursor.execute(query)
 
-                for row in cursor.fetchall():
-                    ts_name, used_mb, total_mb, used_percent = row
-
-                    # Determine status based on thresholds
-                    if used_percent >= Config.TABLESPACE_CRITICAL_THRESHOLD:
-                        status = 'critical'
-                    elif used_percent >= Config.TABLESPACE_WARNING_THRESHOLD:
-                        status = 'warning'
+                for kind, ts_name, used_mb, total_mb, used_percent in cursor.fetchall():
+                    if kind == 'SESSIONS':
+                        connections['total_connections'] = used_mb
+                        connections['active_connections'] = total_mb
                     else:
-                        status = 'normal'
-
-                    results.append({
-                        'name': ts_name,
-                        'total_mb': total_mb,
-                        'used_mb': used_mb,
-                        'used_percent': used_percent,
-                        'status': status,
-                        'last_check': datetime.utcnow().isoformat()
-                    })
+                        results.append(self._tablespace_entry(ts_name, used_mb, total_mb,
+                                                               used_percent, last_check))
 
                 cursor.close()
             except Exception as e:
-                print(f"Error querying tablespace for {server_id}: {e}")
+                error = e
+                print(f"Error querying database status for {server_id}: {e}")
             finally:
-                conn.close()
+                self.release_connection(server_id, conn, error)
         else:
             # Return simulated data if cannot connect
             for ts in tablespaces:
@@ -143,59 +197,133 @@ class DatabaseService:
                     'used_mb': 5120,
                     'used_percent': 50.0,
                     'status': 'normal',
-                    'last_check': datetime.utcnow().isoformat()
+                    'last_check': last_check
                 })
 
-        return results
-
-    def get_connection_count(self, server_id: str) -> Dict:
-        """Get active connection count for a database"""
-        conn = self.get_connection(server_id)
-        result = {
-            'total_connections': 0,
-            'active_connections': 0,
-            'last_check': datetime.utcnow().isoformat()
-        }
-
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute(self.CONNECTION_QUERY)
-                row = cursor.fetchone()
+        return results, connections
 
-                if row:
-                    result['total_connections'] = row[0]
-                    result['active_connections'] = row[1]
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Long-lived bounded worker pool for database refreshes"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=Config.DATABASE_CHECK_WORKERS,
+                thread_name_prefix='db-check'
+            )
+        return self._executor
 
-                cursor.close()
-            except Exception as e:
-                print(f"Error querying connections for {server_id}: {e}")
-            finally:
-                conn.close()
+    def _refresh(self, server_id: str) -> Dict:
+        """Query one database and store the snapshot in the cache"""
+        tablespaces, connections = self._query_database(server_id)
+        snapshot = {
+            'tablespaces': tablespaces,
+            'connections': connections,
+            'last_check': connections['last_check'],
+            'fetched_at': time.time()
+        }
+        with self._cache_lock:
+            self._status_cache[server_id] = snapshot
+        return snapshot
+
+    def _refresh_async(self, server_id: str) -> Future:
+        """Start a refresh, or join the one already running for this database"""
+        with self._cache_lock:
+            future = self._inflight.get(server_id)
+            if future is None or future.done():
+                future = self._get_executor().submit(self._refresh, server_id)
+                self._inflight[server_id] = future
+            return future
+
+    def _get_snapshots(self, server_ids: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Cached snapshots younger than max_age (default DATABASE_STATUS_CACHE_TTL);
+        everything else is refreshed concurrently. A database that misses
+        DATABASE_CHECK_DEADLINE keeps its last snapshot, flagged stale.
+        """
+        ttl = Config.DATABASE_STATUS_CACHE_TTL if max_age is None else max_age
+        now = time.time()
+        snapshots: Dict[str, Dict] = {}
+        pending: Dict[str, Future] = {}
+
+        for server_id in server_ids:
+            cached = self._status_cache.get(server_id)
+            if cached is not None and now - cached['fetched_at'] < ttl:
+                snapshots[server_id] = cached
+            else:
+                pending[server_id] = self._refresh_async(server_id)
+
+        if pending:
+            done, _ = wait(list(pending.values()), timeout=Config.DATABASE_CHECK_DEADLINE)
+            for server_id, future in pending.items():
+                if future in done and future.exception() is None:
+                    snapshots[server_id] = future.result()
+                    continue
+                # Can't interrupt a blocking logon; it finishes in the background
+                # and fills the cache for the next caller
+                print(f"Database check for {server_id} missed the {Config.DATABASE_CHECK_DEADLINE}s deadline")
+                cached = self._status_cache.get(server_id)
+                if cached is not None:
+                    snapshots[server_id] = dict(cached, stale=True)
+                else:
+                    last_check = datetime.utcnow().isoformat()
+                    snapshots[server_id] = {
+                        'tablespaces': [],
+                        'connections': {'total_connections': 0, 'active_connections': 0,
+                                        'last_check': last_check},
+                        'last_check': last_check,
+                        'stale': True
+                    }
+
+        return snapshots
+
+    def invalidate(self, server_id: str = None) -> None:
+        """Drop cached status (one database or all) so the next read re-queries"""
+        with self._cache_lock:
+            if server_id is None:
+                self._status_cache.clear()
+            else:
+                self._status_cache.pop(server_id, None)
 
-        return result
+    def get_tablespace_status(self, server_id: str) -> List[Dict]:
+        """Get tablespace usage for a server"""
+        if server_id not in ORACLE_CONFIGS:
+            return []
+        return self._get_snapshots([server_id])[server_id]['tablespaces']
 
-    def get_database_status(self, server_id: str) -> Dict:
-        """Get comprehensive database status"""
-        tablespaces = self.get_tablespace_status(server_id)
-        connections = self.get_connection_count(server_id)
+    def get_connection_count(self, server_id: str) -> Dict:
+        """Get active connection count for a database"""
+        if server_id not in ORACLE_CONFIGS:
+            return self._query_database(server_id)[1]
+        return self._get_snapshots([server_id])[server_id]['connections']
 
-        # Determine overall status
+    @staticmethod
+    def _worst_status(tablespaces: List[Dict]) -> str:
         status = 'normal'
         for ts in tablespaces:
             if ts['status'] == 'critical':
-                status = 'critical'
-                break
-            elif ts['status'] == 'warning' and status != 'critical':
+                return 'critical'
+            elif ts['status'] == 'warning':
                 status = 'warning'
+        return status
 
-        return {
+    def get_database_status(self, server_id: str, max_age: Optional[float] = None) -> Dict:
+        """Get comprehensive database status (cached, see _get_snapshots)"""
+        if server_id in ORACLE_CONFIGS:
+            snapshot = self._get_snapshots([server_id], max_age)[server_id]
+        else:
+            tablespaces, connections = self._query_database(server_id)
+            snapshot = {'tablespaces': tablespaces, 'connections': connections,
+                        'last_check': connections['last_check']}
+
+        result = {
             'server_id': server_id,
-            'status': status,
-            'tablespaces': tablespaces,
-            'connections': connections,
-            'last_check': datetime.utcnow().isoformat()
+            'status': self._worst_status(snapshot['tablespaces']),
+            'tablespaces': snapshot['tablespaces'],
+            'connections': snapshot['connections'],
+            'last_check': snapshot['last_check']
         }
+        if snapshot.get('stale'):
+            result['stale'] = True
+        return result
 
     @classmethod
     def is_business_tablespace(cls, ts_name: str) -> bool:
@@ -260,14 +388,17 @@ class DatabaseService:
             'filtered_count': filtered_count
         }
 
-    def get_all_databases_status(self) -> List[Dict]:
-        """Get status of all monitored databases with filtered tablespace data"""
+    def get_all_databases_status(self, max_age: Optional[float] = None) -> List[Dict]:
+        """
+        Get status of all monitored databases with filtered tablespace data.
+        Databases whose cache is older than max_age are queried concurrently.
+        """
+        snapshots = self._get_snapshots(list(ORACLE_CONFIGS.keys()), max_age)
         results = []
 
         for server_id in ORACLE_CONFIGS.keys():
-            # Get raw tablespace data and connections (single query per server)
-            all_tablespaces = self.get_tablespace_status(server_id)
-            connections = self.get_connection_count(server_id)
+            snapshot = snapshots[server_id]
+            all_tablespaces = snapshot['tablespaces']
 
             # Filter tablespaces for display
             filtered = self.filter_tablespaces(all_tablespaces)
@@ -277,25 +408,20 @@ class DatabaseService:
             if filtered['system_tablespace']:
                 display_tablespaces.append(filtered['system_tablespace'])
 
-            status = 'normal'
-            for ts in display_tablespaces:
-                if ts['status'] == 'critical':
-                    status = 'critical'
-                    break
-                elif ts['status'] == 'warning' and status != 'critical':
-                    status = 'warning'
-
-            results.append({
+            item = {
                 'server_id': server_id,
-                'status': status,
+                'status': self._worst_status(display_tablespaces),
                 'tablespaces': all_tablespaces,
                 'business_tablespaces': filtered['business_tablespaces'],
                 'primary_business': filtered['primary_business'],
                 'system_tablespace': filtered['system_tablespace'],
                 'filtered_tablespace_count': filtered['filtered_count'],
-                'connections': connections,
-                'last_check': datetime.utcnow().isoformat()
-            })
+                'connections': snapshot['connections'],
+                'last_check': snapshot['last_check']
+            }
+            if snapshot.get('stale'):
+                item['stale'] = True
+            results.append(item)
 
         return results
 
@@ -330,7 +456,7 @@ class DatabaseService:
             rows_affected = cursor.rowcount
 
             cursor.close()
-            conn.close()
+            self.release_connection(server_id, conn)
 
             return {
                 'success': True,
@@ -339,6 +465,7 @@ class DatabaseService:
                 'executed_at': datetime.utcnow().isoformat()
             }
         except Exception as e:
+            self.release_connection(server_id, conn, e)
             return {
                 'success': False,
                 'error': str(e)
@@ -360,6 +487,8 @@ class DatabaseService:
         # Note: This requires specific privileges
 
         success = all(r.get('success', False) for r in results)
+        # Usage changed; don't serve the pre-cleanup numbers until the next check
+        self.invalidate(server_id)
 
         return {
             'success': success,
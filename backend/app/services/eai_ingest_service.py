@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - EAI Record Ingestion Service
+Upserts EAI report records uploaded by the Linux Agent into the
+ACC_ERP_REPORT_SUCCESS table of each EAI schema on 165.
+
+Two insertion modes (Config.EAI_INSERT_MODE):
+  bulk  executemany() with batcherrors + arraydmlrowcounts: one round trip
+        per EAI_BATCH_SIZE records; duplicates and failures are reported
+        per row without aborting the batch
+  row   one MERGE per record (original behaviour)
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.settings import Config
+# Same driver as the pools: cx_Oracle, else python-oracledb
+from app.services.oracle_pool import oracle_pools, oracle_driver, HAS_ORACLE
+
+logger = logging.getLogger('eai_logs')
+
+# Database configuration for EAI schemas
+# These match the original eai_log_monitor config.py ACC_DATABASE settings
+EAI_DB_CONFIG = {
+    'host': '172.17.10.165',
+    'port': 1521,
+    'service': 'orcl.ecdag.com',
+    'schemas': {
+        'dpepp1': {'user': 'iplant_dpepp1', 'password': 'acc'},
+        'smt2': {'user': 'iplant_smt2', 'password': 'acc'},
+        'dpeps1': {'user': 'iplant_dpeps1', 'password': 'acc'}
+    }
+}
+
+# MERGE INTO (upsert) - matches original db_handler.py logic exactly
+MERGE_SQL = """
+MERGE INTO ACC_ERP_REPORT_SUCCESS t
+USING (SELECT :schb_number AS SCHB_NUMBER FROM DUAL) s
+ON (t.SCHB_NUMBER = s.SCHB_NUMBER)
+WHEN NOT MATCHED THEN
+INSERT (ID, WONO, PACKID, PARTNO, CNT, LINE, SCHB_NUMBER,
+        SOURCE_BILL_NO, REPORT_TIME, IS_SUCCESS, ERROR_MESSAGE)
+VALUES (ACC_ERP_REPT_SUCC_SEQ.NEXTVAL, :wono, :packid, :partno,
+        :cnt, :line, :schb_number, :source_bill_no,
+        :report_time, :is_success, :error_message)
+"""
+
+# ORA-00001: unique constraint violated (concurrent insert of the same SCHB_NUMBER)
+DUPLICATE_KEY_CODE = 1
+
+# Per-row problems echoed back to the agent
+MAX_ROW_RESULTS = 200
+
+
+def build_merge_params(record: Dict) -> Optional[Dict]:
+    """Bind variables for one uploaded record, or None if it has no SCHB_NUMBER"""
+    schb_number = record.get('schb_number', '')
+    if not schb_number:
+        return None
+
+    source_bill_no = record.get('source_bill_no', '') or 'UNKNOWN'
+
+    # Parse report_time
+    report_time_str = record.get('report_time', '')
+    report_time = None
+    if report_time_str:
+        try:
+            report_time = datetime.fromisoformat(report_time_str)
+        except (ValueError, TypeError):
+            report_time = datetime.utcnow()
+    else:
+        report_time = datetime.utcnow()
+
+    return {
+        'schb_number': schb_number,
+        'wono': source_bill_no,
+        'packid': record.get('lot_number', '') or '',
+        'source_bill_no': source_bill_no,
+        'cnt': record.get('qty', 0) or 0,
+        'partno': record.get('product_code', '') or 'UNKNOWN',
+        'line': record.get('line', '') or '',
+        'report_time': report_time,
+        'is_success': 1 if record.get('is_success', True) else 0,
+        'error_message': (record.get('error_message', '') or '')[:2000]
+    }
+
+
+def _is_duplicate_error(exc: Exception) -> bool:
+    """True for unique-key violations (driver IntegrityError / ORA-00001)"""
+    if HAS_ORACLE and isinstance(exc, oracle_driver.IntegrityError):
+        return True
+    error = exc.args[0] if exc.args else None
+    return getattr(error, 'code', None) == DUPLICATE_KEY_CODE or type(exc).__name__ == 'IntegrityError'
+
+
+class EAIIngestService:
+    """Writes EAI report records into the per-schema Oracle tables"""
+
+    def __init__(self, mode: str = 'bulk', batch_size: int = 500):
+        self.mode = mode
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _pool_args(schema: str) -> Dict:
+        """oracle_pools key and logon for an EAI schema. Raises ValueError for unknown schemas."""
+        schema_config = EAI_DB_CONFIG['schemas'].get(schema)
+        if not schema_config:
+            raise ValueError(f'Unknown schema: {schema}')
+        return {
+            'key': f'eai:{schema}',
+            'user': schema_config['user'],
+            'password': schema_config['password'],
+            'dsn': f"{EAI_DB_CONFIG['host']}:{EAI_DB_CONFIG['port']}/{EAI_DB_CONFIG['service']}",
+            'max_sessions': Config.EAI_POOL_MAX
+        }
+
+    def insert_records(self, schema: str, records: List[Dict]) -> Dict:
+        """Upsert records into a schema using the configured mode, on a pooled session"""
+        pool_args = self._pool_args(schema)
+        if not HAS_ORACLE:
+            raise RuntimeError('No Oracle driver installed (cx_Oracle or oracledb)')
+        with oracle_pools.connection(**pool_args) as conn:
+            if conn is None:
+                raise RuntimeError(f'No Oracle session available for {schema}')
+            if self.mode == 'row':
+                return self.merge_rowwise(conn, records)
+            return self.merge_bulk(conn, records)
+
+    @staticmethod
+    def _new_result(total: int) -> Dict:
+        return {'inserted': 0, 'duplicates': 0, 'failed': 0, 'skipped': 0,
+                'total': total, 'errors': [], 'rows': []}
+
+    @staticmethod
+    def _row_problem(result: Dict, index: int, schb_number: str, status: str, error: str = None) -> None:
+        if status == 'duplicate':
+            result['duplicates'] += 1
+        else:
+            result['failed'] += 1
+            result['errors'].append(f"{schb_number}: {error[:100]}")
+            logger.warning(f"EAI record insert error: {error}, schb={schb_number}")
+        if len(result['rows']) < MAX_ROW_RESULTS:
+            row = {'index': index, 'schb_number': schb_number, 'status': status}
+            if error:
+                row['error'] = error[:200]
+            result['rows'].append(row)
+
+    def merge_bulk(self, conn, records: List[Dict], batch_size: int = None) -> Dict:
+        """
+        Array-DML upsert: one executemany round trip per batch.
+        batcherrors keeps failed rows from aborting the batch; arraydmlrowcounts
+        tells inserted (1) from already-present (0) rows.
+        """
+        batch_size = batch_size or self.batch_size
+        result = self._new_result(len(records))
+
+        rows = []  # (original index, bind params)
+        for index, record in enumerate(records):
+            params = build_merge_params(record)
+            if params is None:
+                result['skipped'] += 1
+            else:
+                rows.append((index, params))
+
+        cursor = conn.cursor()
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.executemany(MERGE_SQL, [params for _, params in batch],
+                                   batcherrors=True, arraydmlrowcounts=True)
+                batch_errors = {error.offset: error for error in cursor.getbatcherrors()}
+                row_counts = cursor.getarraydmlrowcounts()
+
+                for offset, (index, params) in enumerate(batch):
+                    error = batch_errors.get(offset)
+                    if error is not None:
+                        if getattr(error, 'code', None) == DUPLICATE_KEY_CODE:
+                            self._row_problem(result, index, params['schb_number'], 'duplicate')
+                        else:
+                            self._row_problem(result, index, params['schb_number'], 'error', str(error.message))
+                    elif row_counts[offset] > 0:
+                        result['inserted'] += 1
+                    else:
+                        self._row_problem(result, index, params['schb_number'], 'duplicate')
+
+                # Commit per batch so a long catch-up doesn't build one huge transaction
+                conn.commit()
+        finally:
+            cursor.close()
+
+        result['errors'] = result['errors'][:5]
+        return result
+
+    def merge_rowwise(self, conn, records: List[Dict]) -> Dict:
+        """One MERGE round trip per record (original behaviour)"""
+        result = self._new_result(len(records))
+
+        cursor = conn.cursor()
+        try:
+            for index, record in enumerate(records):
+                params = build_merge_params(record)
+                if params is None:
+                    result['skipped'] += 1
+                    continue
+                try:
+                    cursor.execute(MERGE_SQL, params)
+                    if cursor.rowcount > 0:
+                        result['inserted'] += 1
+                    else:
+                        self._row_problem(result, index, params['schb_number'], 'duplicate')
+                except Exception as e:
+                    if _is_duplicate_error(e):
+                        self._row_problem(result, index, params['schb_number'], 'duplicate')
+                    else:
+                        self._row_problem(result, index, params['schb_number'], 'error', str(e))
+            conn.commit()
+        finally:
+            cursor.close()
+
+        result['errors'] = result['errors'][:5]
+        return result
+
+
+# Global instance
+eai_ingest_service = EAIIngestService(mode=Config.EAI_INSERT_MODE, batch_size=Config.EAI_BATCH_SIZE)
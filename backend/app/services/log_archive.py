@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - System Log Archives
+A finished day of system logs (system_<date>.log, JSON Lines) is archived as
+system_<date>.log.gz made of independent gzip members of
+SYSTEM_LOG_BLOCK_LINES lines each, next to a sidecar system_<date>.log.idx
+(JSON). The sidecar lists each block's byte offset, length, time range and
+per-level counts.
+
+The archive is still one valid gzip file, so zcat and gzip.open read it,
+and it decompresses to the original bytes. Readers seek to and inflate only
+the blocks a page needs, so paging, level filters and tail reads on a
+historical day cost O(page) instead of O(file).
+"""
+import gzip
+import json
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from config.settings import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def index_path(gz_path: str) -> str:
+    """system_<date>.log.gz -> system_<date>.log.idx"""
+    return gz_path[:-3] + '.idx'
+
+
+def _compress_block(data: bytes) -> bytes:
+    """One complete gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def write_archive(lines: Iterable[bytes], gz_path: str, block_lines: int = None) -> Dict:
+    """
+    Block-compress raw JSON lines into gz_path and write its index. Lines are
+    stored byte for byte (invalid ones too, they are just not counted). Both
+    files are written to temporaries and renamed, the index last.
+    """
+    block_lines = block_lines or Config.SYSTEM_LOG_BLOCK_LINES
+    blocks = []
+    totals: Dict[str, int] = {}
+    tmp_path = gz_path + '.tmp'
+
+    with open(tmp_path, 'wb') as out:
+        buffer: List[bytes] = []
+        block = None
+
+        def close_block():
+            data = _compress_block(b''.join(buffer))
+            block['offset'] = out.tell()
+            block['length'] = len(data)
+            out.write(data)
+            blocks.append(block)
+
+        for raw in lines:
+            if block is None:
+                block = {'entries': 0, 'first': None, 'last': None, 'levels': {}}
+            buffer.append(raw)
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict):
+                level = entry.get('level', 'info')
+                timestamp = entry.get('timestamp')
+                block['entries'] += 1
+                block['levels'][level] = block['levels'].get(level, 0) + 1
+                totals[level] = totals.get(level, 0) + 1
+                if timestamp:
+                    block['first'] = block['first'] or timestamp
+                    block['last'] = timestamp
+            if len(buffer) >= block_lines:
+                close_block()
+                buffer, block = [], None
+        if buffer:
+            close_block()
+
+    index = {
+        'version': INDEX_VERSION,
+        'entries': sum(b['entries'] for b in blocks),
+        'levels': totals,
+        'blocks': blocks
+    }
+    idx_path = index_path(gz_path)
+    with open(idx_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, gz_path)
+    os.replace(idx_path + '.tmp', idx_path)
+    return index
+
+
+def archive_file(file_path: str) -> str:
+    """
+    Archive a plain system_<date>.log, or re-block a legacy single-member
+    .log.gz without an index. Returns the archive path.
+    """
+    if file_path.endswith('.gz'):
+        gz_path = file_path
+        with gzip.open(file_path, 'rb') as src:
+            write_archive(src, gz_path)
+    else:
+        gz_path = file_path + '.gz'
+        with open(file_path, 'rb') as src:
+            write_archive(src, gz_path)
+        os.remove(file_path)
+    return gz_path
+
+
+class LogArchive:
+    """Random-access reader for one archived day"""
+
+    def __init__(self, gz_path: str):
+        self.path = gz_path
+        with open(index_path(gz_path), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.blocks = self.index['blocks']
+
+    def count(self, level: str = None, until: str = None) -> int:
+        """
+        Entries (of one level) at or before until. Whole blocks are counted
+        from the index; only the block straddling until is inflated.
+        """
+        if not until:
+            if level:
+                return self.index['levels'].get(level, 0)
+            return self.index['entries']
+
+        total = 0
+        with open(self.path, 'rb') as f:
+            for block in self.blocks:
+                if block['first'] and block['first'] > until:
+                    continue  # entirely newer than the requested point
+                count = self._block_count(block, level)
+                if not block['last'] or block['last'] <= until:
+                    total += count
+                elif count:
+                    total += sum(1 for entry in self._read_block(f, block)
+                                 if (not level or entry.get('level', 'info') == level)
+                                 and entry.get('timestamp', '') <= until)
+        return total
+
+    def _block_count(self, block: Dict, level: Optional[str]) -> int:
+        return block['levels'].get(level, 0) if level else block['entries']
+
+    def _read_block(self, f, block: Dict) -> List[Dict]:
+        f.seek(block['offset'])
+        data = gzip.decompress(f.read(block['length']))
+        entries = []
+        for raw in data.splitlines():
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries
+
+    def read(self, offset: int = 0, limit: int = None, level: str = None,
+             until: str = None) -> List[Dict]:
+        """
+        Entries newest first, skipping `offset` matches, at most `limit`.
+        level keeps one level; until (ISO timestamp) starts the listing at
+        the newest entry at or before that time.
+        """
+        result: List[Dict] = []
+        with open(self.path, 'rb') as f:
+            for block in reversed(self.blocks):
+                if limit is not None and len(result) >= limit:
+                    break
+                if until and block['first'] and block['first'] > until:
+                    continue  # entirely newer than the requested point
+                whole = not until or not block['last'] or block['last'] <= until
+                count = self._block_count(block, level)
+                if whole and offset >= count:
+                    offset -= count  # skipped without inflating
+                    continue
+                if count == 0:
+                    continue
+                entries = self._read_block(f, block)
+                entries.reverse()
+                for entry in entries:
+                    if level and entry.get('level', 'info') != level:
+                        continue
+                    if until and entry.get('timestamp', '') > until:
+                        continue
+                    if offset:
+                        offset -= 1
+                        continue
+                    result.append(entry)
+                    if limit is not None and len(result) >= limit:
+                        break
+        return result
+
+
+# Readers keyed by archive path, dropped when the index file changes
+_readers: Dict[str, tuple] = {}
+_readers_lock = threading.Lock()
+
+
+def open_archive(gz_path: str) -> Optional[LogArchive]:
+    """Reader for an archive with a current index, or None (legacy or missing)"""
+    idx_path = index_path(gz_path)
+    try:
+        mtime = os.path.getmtime(idx_path)
+    except OSError:
+        return None
+    with _readers_lock:
+        cached = _readers.get(gz_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        reader = LogArchive(gz_path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"[LogArchive] Unreadable index for {gz_path}: {e}")
+        return None
+    if reader.index.get('version') != INDEX_VERSION:
+        return None
+    with _readers_lock:
+        _readers[gz_path] = (mtime, reader)
+    return reader
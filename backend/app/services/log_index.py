@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Full-Text Log Index
+Log lines the backend sees go into a local SQLite FTS5 index in a file of its
+own (Config.LOG_INDEX_PATH). The sources are agent-reported log lines,
+container logs, the scheduler's log scan and the system log files. With the
+index, /api/logs/search answers from disk instead of tailing every server
+over SSH.
+
+Row ids encode the line's time: id = epoch_seconds << 20 | sequence. Newest
+first is descending id order, a time range is an id range, and the
+pagination cursor is the last id returned. The FTS query therefore walks the
+doclist backwards from the cursor and stops after one page.
+
+The FTS table uses the trigram tokenizer when SQLite has it (3.34+). MATCH is
+then a case-insensitive substring search, like the old '.*keyword.*' regex,
+and it works for Chinese text. Older SQLite falls back to unicode61, which
+matches whole words. Without FTS5 the index is disabled and search falls
+back to SSH.
+
+add()/add_tail() only touch memory. The scheduler writes buffered lines and
+new system log bytes every LOG_INDEX_FLUSH_INTERVAL seconds.
+"""
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from config.settings import Config
+from app.utils.log_classifier import alert_classifier, level_from_tag
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# id = ts << SEQ_BITS | sequence within that second
+SEQ_BITS = 20
+SEQ_MASK = (1 << SEQ_BITS) - 1
+
+# Embedded time of a log line: 2026-10-17 08:00:00 or 2026-10-17T08:00:00
+LINE_TIME_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})')
+
+# Lines of the previously seen tail kept per (server, source)
+TAIL_KEEP = 200
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS log_lines (
+        id INTEGER PRIMARY KEY,
+        server_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        level TEXT NOT NULL,
+        message TEXT NOT NULL
+    )""",
+    # Last tail per (server, source) for sources that re-send overlapping windows
+    "CREATE TABLE IF NOT EXISTS log_tails (key TEXT PRIMARY KEY, lines TEXT NOT NULL)",
+    # Bytes of each system_<date>.log already indexed; -1 once its .gz is done
+    "CREATE TABLE IF NOT EXISTS log_files (name TEXT PRIMARY KEY, offset INTEGER NOT NULL)",
+]
+# External-content FTS table over log_lines.message. It is written next to
+# log_lines in the same statement batch rather than by triggers: a trigger
+# makes FTS5 flush its pending terms once per row, ~3x slower.
+FTS_SQL = ("CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5("
+           "message, content='log_lines', content_rowid='id', tokenize='{tokenizer}')")
+
+
+def line_time(message: str) -> Optional[int]:
+    """Epoch seconds of the timestamp embedded in a log line (local time), or None"""
+    match = LINE_TIME_PATTERN.search(message)
+    if not match:
+        return None
+    try:
+        return int(datetime.strptime(f'{match.group(1)} {match.group(2)}', '%Y-%m-%d %H:%M:%S').timestamp())
+    except ValueError:
+        return None
+
+
+def _epoch(value) -> Optional[int]:
+    """Epoch seconds from a number or an ISO timestamp string"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp())
+    except ValueError:
+        return None
+
+
+def new_tail_lines(previous: List[str], lines: List[str]) -> List[str]:
+    """Lines of a re-read tail that come after the previously seen tail"""
+    for k in range(min(len(previous), len(lines)), 0, -1):
+        if lines[:k] == previous[-k:]:
+            return lines[k:]
+    return lines
+
+
+class LogIndex:
+    """SQLite FTS5 index over every collected log line"""
+
+    # Singleton instance
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.path = Config.LOG_INDEX_PATH
+        self.tokenizer = None
+        self._conn: Optional[sqlite3.Connection] = None       # writer (scheduler)
+        self._read_conn: Optional[sqlite3.Connection] = None  # searches; WAL lets them run during writes
+        self._disabled = False
+        self._connect_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        # (ts, server_id, source, level, message) waiting for the next flush
+        self._pending = deque(maxlen=Config.LOG_INDEX_MAX_PENDING)
+        self._tails: Dict[str, List[str]] = {}
+        self._dirty_tails = set()
+        self._file_offsets: Dict[str, int] = {}
+        # Key: ts, Value: next free sequence number in that second
+        self._next_seq: Dict[int, int] = {}
+        self._stats = {
+            'lines_indexed': 0,
+            'lines_dropped': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0,
+            'searches': 0,
+            'last_search_ms': 0.0,
+        }
+
+        self._initialized = True
+
+    # ---- connection ----
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=15, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Writer connection, creating the schema on first use; None if FTS5 is unavailable"""
+        if self._conn is not None or self._disabled:
+            return self._conn
+        with self._connect_lock:
+            if self._conn is None and not self._disabled:
+                self._create()
+        return self._conn
+
+    def _create(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = self._open()
+            try:
+                conn.execute(FTS_SQL.format(tokenizer='trigram'))
+            except sqlite3.OperationalError as e:
+                if 'tokenizer' not in str(e):
+                    raise
+                conn.execute(FTS_SQL.format(tokenizer='unicode61'))
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'log_fts'").fetchone()[0]
+            self.tokenizer = 'trigram' if 'trigram' in sql else 'unicode61'
+            self._tails = {key: json.loads(lines) for key, lines in conn.execute('SELECT key, lines FROM log_tails')}
+            self._file_offsets = dict(conn.execute('SELECT name, offset FROM log_files'))
+            self._conn = conn
+            logger.info(f"[LogIndex] Opened {self.path} (tokenizer={self.tokenizer})")
+        except sqlite3.Error as e:
+            self._disabled = True
+            logger.warning(f"[LogIndex] Disabled, searches use SSH: {e}")
+
+    @property
+    def available(self) -> bool:
+        return self._connect() is not None
+
+    # ---- ingestion (memory only) ----
+
+    def _queue(self, rows: List[Tuple[int, str, str, str, str]]) -> None:
+        if self._disabled:
+            return
+        with self._pending_lock:
+            overflow = len(self._pending) + len(rows) - self._pending.maxlen
+            if overflow > 0:
+                self._stats['lines_dropped'] += overflow
+            self._pending.extend(rows)
+
+    @staticmethod
+    def _row(server_id: str, source: str, message: str, ts: Optional[int], level: str = None):
+        message = message.strip()[:Config.LOG_INDEX_MESSAGE_MAX]
+        level = level or level_from_tag(message) or alert_classifier.classify(message)
+        return ts, server_id, source, level, message
+
+    def add(self, server_id: str, source: str, lines: Iterable[Tuple[str, object]]) -> None:
+        """
+        Index (message, timestamp) pairs. timestamp may be epoch seconds, an ISO
+        string or None (then the time embedded in the line, else now).
+        """
+        now = int(time.time())
+        rows = []
+        for message, ts in lines:
+            if message and message.strip():
+                rows.append(self._row(server_id, source, message, _epoch(ts) or line_time(message) or now))
+        if rows:
+            self._queue(rows)
+
+    def add_tail(self, server_id: str, source: str, lines: List[str], default_ts: float = None) -> int:
+        """
+        Index the last lines of a log that is re-read as a sliding window (tail -n,
+        grep | tail, docker logs --since). Lines already seen in the previous
+        window are skipped. Returns the number of new lines.
+        """
+        lines = [line.rstrip('\r') for line in lines if line.strip()]
+        key = f'{server_id}:{source}'
+        self._connect()
+        with self._pending_lock:
+            fresh = new_tail_lines(self._tails.get(key, []), lines)
+            self._tails[key] = lines[-TAIL_KEEP:]
+            self._dirty_tails.add(key)
+        default_ts = int(default_ts or time.time())
+        self._queue([self._row(server_id, source, line, line_time(line) or default_ts) for line in fresh])
+        return len(fresh)
+
+    def record_agent_report(self, server_id: str, data: Dict, ts: float = None) -> None:
+        """Agent log lines and container logs from an agent report"""
+        alerts = [a.get('message', '') for a in data.get('alerts', [])]
+        if data.get('log_scan') == 'incremental':
+            # Each line is sent once, so identical consecutive lines are real repeats
+            self.add(server_id, 'agent', [(message, line_time(message) or ts) for message in alerts])
+        else:
+            # Older agents re-send a 'tail -n' window every report
+            self.add_tail(server_id, 'agent', alerts, ts)
+        for name, entries in (data.get('container_logs') or {}).items():
+            self.add(server_id, f'container:{name}', [(e.get('message', ''), e.get('timestamp')) for e in entries])
+        # Older agents re-send a 'docker logs --since 5m' window every report
+        for name, entries in (data.get('container_error_logs') or {}).items():
+            self.add_tail(server_id, f'container:{name}', [e.get('message', '') for e in entries], ts)
+
+    # ---- persistence (scheduler) ----
+
+    def _assign_ids(self, conn: sqlite3.Connection, rows) -> List[Tuple]:
+        if len(self._next_seq) > 100000:
+            self._next_seq.clear()
+        # Seconds not seen since startup may already hold rows: one grouped lookup per write
+        unknown = {row[0] for row in rows} - self._next_seq.keys()
+        if unknown:
+            for second, last in conn.execute(
+                    f'SELECT id >> {SEQ_BITS}, MAX(id) FROM log_lines WHERE id BETWEEN ? AND ? '
+                    f'GROUP BY id >> {SEQ_BITS}', (min(unknown) << SEQ_BITS, (max(unknown) << SEQ_BITS) | SEQ_MASK)):
+                if second in unknown:
+                    self._next_seq[second] = (last & SEQ_MASK) + 1
+        result = []
+        for ts, server_id, source, level, message in rows:
+            seq = self._next_seq.get(ts, 0)
+            if seq > SEQ_MASK:
+                self._stats['lines_dropped'] += 1
+                continue
+            self._next_seq[ts] = seq + 1
+            result.append(((ts << SEQ_BITS) | seq, server_id, source, level, message))
+        return result
+
+    def _insert(self, conn: sqlite3.Connection, rows) -> int:
+        rows = self._assign_ids(conn, rows)
+        conn.executemany('INSERT INTO log_lines (id, server_id, source, level, message) VALUES (?, ?, ?, ?, ?)',
+                         rows)
+        conn.executemany('INSERT INTO log_fts (rowid, message) VALUES (?, ?)', [(row[0], row[4]) for row in rows])
+        return len(rows)
+
+    def flush(self) -> int:
+        """Write buffered lines in one transaction. Returns the number of lines written."""
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            with self._pending_lock:
+                rows = list(self._pending)
+                self._pending.clear()
+                tails = {key: self._tails[key] for key in self._dirty_tails}
+                self._dirty_tails.clear()
+            if not rows and not tails:
+                return 0
+
+            started = time.time()
+            try:
+                with conn:
+                    written = self._insert(conn, rows)
+                    conn.executemany('INSERT OR REPLACE INTO log_tails (key, lines) VALUES (?, ?)',
+                                     [(key, json.dumps(lines, ensure_ascii=False)) for key, lines in tails.items()])
+            except sqlite3.Error:
+                self._next_seq.clear()
+                self._stats['flush_errors'] += 1
+                with self._pending_lock:
+                    self._pending.extendleft(reversed(rows))
+                    self._dirty_tails.update(tails)
+                raise
+            self._stats['lines_indexed'] += written
+            self._stats['flushes'] += 1
+            self._stats['last_flush_ms'] = round((time.time() - started) * 1000, 2)
+            return written
+
+    def index_system_logs(self, log_dir: str) -> int:
+        """
+        Index lines appended to system_<date>.log files (and archives not yet
+        indexed) since the last call. Each file's lines and its new offset are
+        committed together, so a restart neither skips nor repeats lines.
+        """
+        if not os.path.isdir(log_dir):
+            return 0
+        total = 0
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            cutoff = int(time.time()) - Config.LOG_INDEX_RETENTION_DAYS * 86400
+            for filename in sorted(os.listdir(log_dir)):
+                if not filename.startswith('system_'):
+                    continue
+                compressed = filename.endswith('.log.gz')
+                if not compressed and not filename.endswith('.log'):
+                    continue
+                name = filename[:-3] if compressed else filename
+                offset = self._file_offsets.get(name, 0)
+                path = os.path.join(log_dir, filename)
+                try:
+                    if offset < 0 or (not compressed and os.path.getsize(path) == offset):
+                        continue
+                    if not compressed and os.path.getsize(path) < offset:
+                        offset = 0  # recreated
+                    rows, new_offset = self._read_system_log(path, compressed, offset, cutoff)
+                    with conn:
+                        total += self._insert(conn, rows)
+                        conn.execute('INSERT OR REPLACE INTO log_files (name, offset) VALUES (?, ?)',
+                                     (name, new_offset))
+                    self._file_offsets[name] = new_offset
+                except (OSError, sqlite3.Error) as e:
+                    self._next_seq.clear()
+                    logger.error(f"[LogIndex] Error indexing {filename}: {e}")
+            self._stats['lines_indexed'] += total
+        return total
+
+    def _read_system_log(self, path: str, compressed: bool, offset: int,
+                         cutoff: int) -> Tuple[List[Tuple], int]:
+        """Rows from the complete JSON lines after offset, and the offset to resume from"""
+        rows = []
+        opener = gzip.open if compressed else open
+        with opener(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # still being written
+                offset += len(raw)
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                ts = _epoch(entry.get('timestamp'))
+                message = entry.get('message') or ''
+                if ts is None or ts < cutoff or not message:
+                    continue
+                rows.append(self._row(entry.get('server_id') or 'SYSTEM', 'system', message, ts,
+                                      entry.get('level') or 'info'))
+        # A compressed day never grows again
+        return rows, -1 if compressed else offset
+
+    def prune(self) -> int:
+        """Delete lines older than LOG_INDEX_RETENTION_DAYS. Returns rows deleted."""
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            cutoff = int(time.time()) - Config.LOG_INDEX_RETENTION_DAYS * 86400
+            with conn:
+                # External content: FTS5 needs the old values to remove a row's terms
+                conn.execute("INSERT INTO log_fts (log_fts, rowid, message) "
+                             "SELECT 'delete', id, message FROM log_lines WHERE id < ?", (cutoff << SEQ_BITS,))
+                deleted = conn.execute('DELETE FROM log_lines WHERE id < ?', (cutoff << SEQ_BITS,)).rowcount
+            self._next_seq.clear()
+            return deleted
+
+    # ---- queries ----
+
+    def _reader(self) -> Optional[sqlite3.Connection]:
+        if self._read_conn is None and self._connect() is not None:
+            self._read_conn = self._open()
+        return self._read_conn
+
+    def search(self, keyword: str = '', server_ids: List[str] = None, start: float = None,
+               end: float = None, levels: List[str] = None, sources: List[str] = None,
+               cursor: str = None, limit: int = 50, offset: int = 0) -> Dict:
+        """
+        Newest-first lines containing keyword (case-insensitive), filtered by
+        server, time range [start, end] (epoch seconds), level and source.
+        Pass the returned next_cursor to get the following page; offset skips
+        matches (page-number paging, cost grows with the offset).
+        """
+        started = time.time()
+        limit = max(1, min(int(limit), 1000))
+        offset = max(0, int(offset))
+        low = int(start) << SEQ_BITS if start is not None else None
+        high = (int(end) << SEQ_BITS) | SEQ_MASK if end is not None else None
+        if cursor:
+            before = int(cursor) - 1  # ValueError for a malformed cursor
+            high = before if high is None else min(high, before)
+
+        keyword = (keyword or '').strip()
+        use_fts = bool(keyword) and (self.tokenizer != 'trigram' or len(keyword) >= 3)
+        if use_fts:
+            sql = ['SELECT l.id, l.server_id, l.source, l.level, l.message '
+                   'FROM log_fts JOIN log_lines l ON l.id = log_fts.rowid WHERE log_fts MATCH ?']
+            params: List = ['"' + keyword.replace('"', '""') + '"']
+            id_column = 'log_fts.rowid'
+        else:
+            # Keywords shorter than a trigram (or none): scan newest-first with LIKE
+            sql = ['SELECT l.id, l.server_id, l.source, l.level, l.message FROM log_lines l WHERE 1']
+            params = []
+            id_column = 'l.id'
+            if keyword:
+                escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                sql.append("AND l.message LIKE ? ESCAPE '\\'")
+                params.append(f'%{escaped}%')
+        if low is not None:
+            sql.append(f'AND {id_column} >= ?')
+            params.append(low)
+        if high is not None:
+            sql.append(f'AND {id_column} <= ?')
+            params.append(high)
+        for column, values in (('server_id', server_ids), ('level', levels), ('source', sources)):
+            if values:
+                sql.append(f"AND l.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        sql.append(f'ORDER BY {id_column} DESC LIMIT ? OFFSET ?')
+        params.extend((limit + 1, offset))
+
+        with self._read_lock:
+            reader = self._reader()
+            if reader is None:
+                raise RuntimeError('log index unavailable')
+            rows = reader.execute(' '.join(sql), params).fetchall()
+
+        logs = [{
+            'id': row[0],
+            'timestamp': datetime.fromtimestamp(row[0] >> SEQ_BITS).isoformat(),
+            'server_id': row[1],
+            'source': row[2],
+            'level': row[3],
+            'message': row[4]
+        } for row in rows[:limit]]
+        took_ms = round((time.time() - started) * 1000, 2)
+        self._stats['searches'] += 1
+        self._stats['last_search_ms'] = took_ms
+        return {
+            'logs': logs,
+            'next_cursor': str(rows[limit - 1][0]) if len(rows) > limit else None,
+            'page_size': limit,
+            'took_ms': took_ms
+        }
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        with self._pending_lock:
+            stats['pending'] = len(self._pending)
+        stats['available'] = self._conn is not None
+        stats['tokenizer'] = self.tokenizer
+        try:
+            stats['size_mb'] = round(os.path.getsize(self.path) / 1048576, 1)
+        except OSError:
+            stats['size_mb'] = 0
+        return stats
+
+
+# Global singleton instance
+log_index = LogIndex()
@@ -6,14 +6,15 @@ Supports persistent file-based logging with daily rotation and gzip compression.
 import os
 import re
 import json
-import gzip
-import shutil
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from collections import deque
-from config.settings import SERVERS, LOG_ALERT_KEYWORDS
-from app.services.monitor_service import MonitorService
+from config.settings import SERVERS
+from app.utils.log_classifier import alert_classifier
+from app.services.monitor_service import monitor_service
+from app.services.log_index import log_index
+from app.services.log_archive import LogArchive, archive_file, open_archive
 
 # Log file directory (absolute path based on backend root)
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs')
@@ -24,7 +25,7 @@ class SystemLogBuffer:
     Thread-safe circular buffer for system logs with file persistence.
     - In-memory deque for real-time WebSocket push
     - Daily log files in JSON Lines format
-    - Automatic gzip compression on day rollover
+    - Block-compressed, indexed archive on day rollover (see log_archive)
     """
     _instance = None
 
@@ -40,6 +41,7 @@ class SystemLogBuffer:
             self._initialized = True
             self._current_date = datetime.now().strftime('%Y-%m-%d')
             self._file_lock = threading.Lock()
+            self._archive_lock = threading.Lock()
             # Ensure logs directory exists
             os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -62,24 +64,25 @@ class SystemLogBuffer:
                 self._compress_log_file(old_file)
 
     def _compress_log_file(self, file_path: str):
-        """Compress a log file to .gz and remove the original"""
+        """Archive a log file (or re-block a legacy .gz) as indexed gzip blocks"""
         try:
-            gz_path = file_path + '.gz'
-            with open(file_path, 'rb') as f_in:
-                with gzip.open(gz_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            os.remove(file_path)
+            with self._archive_lock:
+                archive_file(file_path)
         except Exception as e:
             print(f"[LogService] Error compressing {file_path}: {e}")
 
     def _write_to_file(self, log_entry: Dict):
         """Append a log entry to the current day's log file (thread-safe)"""
+        self._write_entries_to_file([log_entry])
+
+    def _write_entries_to_file(self, log_entries: List[Dict]):
+        """Append several log entries with one open/write (thread-safe)"""
         with self._file_lock:
             self._check_day_rollover()
             file_path = self._get_log_file_path(self._current_date)
             try:
                 with open(file_path, 'a', encoding='utf-8') as f:
-                    f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+                    f.write(''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in log_entries))
             except Exception as e:
                 print(f"[LogService] Error writing log to file: {e}")
 
@@ -102,36 +105,96 @@ class SystemLogBuffer:
         self._write_to_file(log_entry)
         return log_entry
 
+    def add_logs(self, entries: List[Tuple[str, str, str]]) -> List[Dict]:
+        """
+        Add several (level, server_id, message) entries at once.
+        Same as add_log but the log file is appended in one write.
+        """
+        if not entries:
+            return []
+        now = datetime.now()
+        log_entries = [{
+            'time': now.strftime('%H:%M:%S'),
+            'timestamp': now.isoformat(),
+            'level': level.lower(),
+            'server_id': server_id,
+            'message': message
+        } for level, server_id, message in entries]
+        self._logs.extendleft(log_entries)
+        self._write_entries_to_file(log_entries)
+        return log_entries
+
     def get_recent_logs(self, count: int = 50) -> List[Dict]:
         """Get most recent logs from memory"""
         return list(self._logs)[:count]
 
-    def get_logs_by_date(self, date_str: str) -> List[Dict]:
+    def get_logs_by_date(self, date_str: str, offset: int = 0, limit: int = None,
+                         level: str = None, until: str = None) -> List[Dict]:
         """
         Get logs for a specific date.
         - If date is today, return from memory.
-        - If historical, read from .log or .log.gz file.
+        - If historical, inflate only the archive blocks the page needs
+          (or read the whole .log if it hasn't been archived yet).
         Args:
             date_str: Date in YYYY-MM-DD format
+            offset, limit: page of matching entries
+            level: keep only this level
+            until: ISO timestamp; start at the newest entry at or before it
         Returns:
             List of log entries (newest first)
         """
         today = datetime.now().strftime('%Y-%m-%d')
         if date_str == today:
-            return list(self._logs)
+            return self._filter_entries(list(self._logs), offset, limit, level, until)
 
-        # Try plain log file first
+        # Plain log file: day not archived yet
         log_file = self._get_log_file_path(date_str)
         if os.path.exists(log_file):
-            return self._read_log_file(log_file)
+            return self._filter_entries(self._read_log_file(log_file), offset, limit, level, until)
 
-        # Try gzipped file
-        gz_file = log_file + '.gz'
-        if os.path.exists(gz_file):
-            return self._read_gz_log_file(gz_file)
+        archive = self._get_archive(date_str)
+        if archive is not None:
+            return archive.read(offset, limit, level, until)
 
         return []
 
+    def count_logs_by_date(self, date_str: str, level: str = None, until: str = None) -> int:
+        """Number of entries (of one level, at or before until) for a date; archives answer from their index"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        log_file = self._get_log_file_path(date_str)
+        if date_str != today and not os.path.exists(log_file):
+            archive = self._get_archive(date_str)
+            return archive.count(level, until) if archive is not None else 0
+        return len(self.get_logs_by_date(date_str, level=level, until=until))
+
+    @staticmethod
+    def _filter_entries(logs: List[Dict], offset: int, limit: Optional[int],
+                        level: Optional[str], until: Optional[str]) -> List[Dict]:
+        """Level/until/page selection over newest-first entries already in memory"""
+        if level:
+            logs = [e for e in logs if e.get('level', 'info') == level]
+        if until:
+            logs = [e for e in logs if e.get('timestamp', '') <= until]
+        return logs[offset:offset + limit] if limit is not None else logs[offset:]
+
+    def _get_archive(self, date_str: str) -> Optional[LogArchive]:
+        """Reader for a day's archive; a legacy whole-file .gz is re-blocked once"""
+        gz_file = self._get_log_file_path(date_str) + '.gz'
+        if not os.path.exists(gz_file):
+            return None
+        archive = open_archive(gz_file)
+        if archive is None:
+            with self._archive_lock:
+                archive = open_archive(gz_file)
+                if archive is None:
+                    try:
+                        archive_file(gz_file)
+                    except Exception as e:
+                        print(f"[LogService] Error indexing archive {gz_file}: {e}")
+                        return None
+                    archive = open_archive(gz_file)
+        return archive
+
     def _read_log_file(self, file_path: str) -> List[Dict]:
         """Read log entries from a plain log file"""
         logs = []
@@ -150,23 +213,6 @@ class SystemLogBuffer:
         logs.reverse()
         return logs
 
-    def _read_gz_log_file(self, gz_path: str) -> List[Dict]:
-        """Read log entries from a gzipped log file"""
-        logs = []
-        try:
-            with gzip.open(gz_path, 'rt', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            logs.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            print(f"[LogService] Error reading gzip log file {gz_path}: {e}")
-        logs.reverse()
-        return logs
-
     def load_today_from_file(self):
         """
         Load today's logs from file into memory deque.
@@ -187,7 +233,8 @@ class SystemLogBuffer:
 
     def compress_old_logs(self):
         """
-        Compress all non-today .log files in the logs directory.
+        Compress all non-today .log files in the logs directory, and index
+        legacy whole-file .log.gz archives.
         Called by the scheduler daily at 00:05.
         """
         today = datetime.now().strftime('%Y-%m-%d')
@@ -200,6 +247,11 @@ class SystemLogBuffer:
                         file_path = os.path.join(LOG_DIR, filename)
                         self._compress_log_file(file_path)
                         print(f"[LogService] Compressed old log: {filename}")
+                elif filename.startswith('system_') and filename.endswith('.log.gz'):
+                    file_path = os.path.join(LOG_DIR, filename)
+                    if open_archive(file_path) is None:
+                        self._compress_log_file(file_path)
+                        print(f"[LogService] Indexed legacy archive: {filename}")
         except Exception as e:
             print(f"[LogService] Error during old log compression: {e}")
 
@@ -233,7 +285,7 @@ class LogService:
     """Service for log monitoring and analysis"""
 
     def __init__(self):
-        self.monitor_service = MonitorService()
+        self.monitor_service = monitor_service
         self.log_buffer = system_log_buffer
 
     def add_system_log(self, level: str, server_id: str, message: str) -> Dict:
@@ -243,10 +295,25 @@ class LogService:
         """
         return self.log_buffer.add_log(level, server_id, message)
 
+    def add_system_logs(self, entries: List[Tuple[str, str, str]]) -> List[Dict]:
+        """Add several (level, server_id, message) system logs with one file write"""
+        return self.log_buffer.add_logs(entries)
+
     def get_system_logs(self, count: int = 50) -> List[Dict]:
         """Get recent system logs for display"""
         return self.log_buffer.get_recent_logs(count)
 
+    def get_system_logs_by_date(self, date_str: str, page: int = 1, page_size: int = 100,
+                                level: str = None, until: str = None) -> Dict:
+        """One page of a day's system logs, newest first"""
+        return {
+            'date': date_str,
+            'total': self.log_buffer.count_logs_by_date(date_str, level, until),
+            'page': page,
+            'page_size': page_size,
+            'logs': self.log_buffer.get_logs_by_date(date_str, (page - 1) * page_size, page_size, level, until)
+        }
+
     def get_log_path(self, server_id: str) -> Optional[str]:
         """Get log path for a server"""
         if server_id not in SERVERS:
@@ -309,24 +376,13 @@ class LogService:
         if log_content is None:
             log_content = self.get_recent_logs(server_id)
 
-        alerts = []
-
-        for level, keywords in LOG_ALERT_KEYWORDS.items():
-            for keyword in keywords:
-                # Find lines containing the keyword
-                pattern = re.compile(rf'.*{re.escape(keyword)}.*', re.IGNORECASE)
-                matches = pattern.findall(log_content)
-
-                for match in matches:
-                    alerts.append({
-                        'server_id': server_id,
-                        'level': level,
-                        'keyword': keyword,
-                        'message': match.strip()[:500],  # Limit message length
-                        'detected_at': datetime.utcnow().isoformat()
-                    })
-
-        return alerts
+        return [{
+            'server_id': server_id,
+            'level': level,
+            'keyword': keyword,
+            'message': line.strip()[:500],  # Limit message length
+            'detected_at': datetime.utcnow().isoformat()
+        } for line, level, keyword in alert_classifier.scan(log_content)]
 
     def get_device_logs(self, server_id: str) -> List[Dict]:
         """Get device/station logs from Device directory"""
@@ -363,12 +419,41 @@ class LogService:
 
     def search_logs(self, keyword: str, server_ids: List[str] = None,
                     start_time: datetime = None, end_time: datetime = None,
-                    page: int = 1, page_size: int = 50) -> Dict:
-        """Search logs across servers"""
+                    page: int = 1, page_size: int = 50, cursor: str = None,
+                    levels: List[str] = None, sources: List[str] = None) -> Dict:
+        """
+        Search logs across servers. Served from the local full-text index
+        (newest first) when it is available, otherwise by tailing each
+        server's logs over SSH. Both return total, page, page_size,
+        next_cursor and logs. The index pages by cursor (a cursor takes
+        precedence over page) and does not count matches, so its total is None;
+        the SSH path pages by number and has no cursor.
+        """
+        if log_index.available:
+            result = log_index.search(
+                keyword, server_ids=server_ids,
+                start=start_time.timestamp() if start_time else None,
+                end=end_time.timestamp() if end_time else None,
+                levels=levels, sources=sources, cursor=cursor, limit=page_size,
+                offset=0 if cursor else (page - 1) * page_size
+            )
+            for entry in result['logs']:
+                server = SERVERS.get(entry['server_id'], {})
+                entry['server_name'] = server.get('name', '')
+                entry['server_ip'] = server.get('ip', '')
+            return {
+                'total': None,
+                'page': page,
+                'page_size': result['page_size'],
+                'next_cursor': result['next_cursor'],
+                'logs': result['logs']
+            }
+
         if server_ids is None:
             server_ids = list(SERVERS.keys())
 
         all_results = []
+        pattern = re.compile(rf'.*{re.escape(keyword)}.*', re.IGNORECASE)
 
         for server_id in server_ids:
             if server_id not in SERVERS:
@@ -378,7 +463,6 @@ class LogService:
             log_content = self.get_recent_logs(server_id, lines=1000)
 
             # Search for keyword
-            pattern = re.compile(rf'.*{re.escape(keyword)}.*', re.IGNORECASE)
             matches = pattern.findall(log_content)
 
             for match in matches:
@@ -400,26 +484,13 @@ class LogService:
             'total': total,
             'page': page,
             'page_size': page_size,
+            'next_cursor': None,
             'logs': paginated_results
         }
 
     def _classify_log_level(self, message: str) -> str:
         """Classify log message level based on keywords"""
-        message_lower = message.lower()
-
-        for keyword in LOG_ALERT_KEYWORDS['critical']:
-            if keyword.lower() in message_lower:
-                return 'critical'
-
-        for keyword in LOG_ALERT_KEYWORDS['error']:
-            if keyword.lower() in message_lower:
-                return 'error'
-
-        for keyword in LOG_ALERT_KEYWORDS['warning']:
-            if keyword.lower() in message_lower:
-                return 'warning'
-
-        return 'info'
+        return alert_classifier.classify(message)
 
     def get_log_statistics(self, server_id: str = None,
                            hours: int = 24) -> Dict:
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Time-Series Metrics Store
+Resource history (server CPU/memory/disk and per-container metrics) kept as
+columnar chunks in the metric_chunks table: each row holds one series at one
+resolution for a fixed time span, with timestamps and values packed into
+arrays (uint32 offsets from chunk_start, float32 values).
+
+Resolutions:
+  raw  every sample, 1h chunks, kept METRICS_RETENTION['raw'] seconds (24h)
+  1m   avg/min/max per minute, 1 day chunks
+  5m   avg/min/max per 5 minutes, 7 day chunks
+  1h   avg/min/max per hour, 30 day chunks
+
+record() only touches memory (safe from any thread); the scheduler flushes
+dirty chunks in one transaction and prunes expired ones. Queries read a
+handful of blobs whatever the time range, so sparklines stay fast.
+"""
+import threading
+import time
+from array import array
+from typing import Dict, List, Tuple
+import logging
+
+from config.settings import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# resolution -> (bucket seconds, chunk span seconds); raw has no bucket
+RESOLUTIONS = {
+    'raw': (0, 3600),
+    '1m': (60, 86400),
+    '5m': (300, 7 * 86400),
+    '1h': (3600, 30 * 86400),
+}
+ROLLUPS = ('1m', '5m', '1h')
+
+# Server-level metrics taken from agent reports
+SERVER_METRICS = ('cpu_usage', 'memory_usage', 'disk_usage')
+
+
+def container_metric_name(container: str, field: str) -> str:
+    return f'container:{container}:{field}'
+
+
+class _Chunk:
+    """In-memory column arrays for one (server, metric, resolution, chunk_start)"""
+
+    __slots__ = ('ts', 'val', 'min', 'max', 'count', 'loaded', 'dirty')
+
+    def __init__(self, rollup: bool, loaded: bool = False):
+        self.ts = array('I')       # seconds since chunk_start
+        self.val = array('f')      # value (raw) or average (rollup)
+        self.min = array('f') if rollup else None
+        self.max = array('f') if rollup else None
+        self.count = array('I') if rollup else None
+        self.loaded = loaded       # True once merged with the persisted row
+        self.dirty = False
+
+    def append(self, offset: int, value: float, vmin: float = None, vmax: float = None, count: int = 1):
+        self.ts.append(offset)
+        self.val.append(value)
+        if self.min is not None:
+            self.min.append(vmin)
+            self.max.append(vmax)
+            self.count.append(count)
+        self.dirty = True
+
+
+def _pack(chunk: _Chunk) -> Dict:
+    return {
+        'ts_data': chunk.ts.tobytes(),
+        'val_data': chunk.val.tobytes(),
+        'min_data': chunk.min.tobytes() if chunk.min is not None else None,
+        'max_data': chunk.max.tobytes() if chunk.max is not None else None,
+        'count_data': chunk.count.tobytes() if chunk.count is not None else None,
+        'points': len(chunk.ts),
+    }
+
+
+def _unpack(row, rollup: bool) -> _Chunk:
+    chunk = _Chunk(rollup, loaded=True)
+    chunk.ts.frombytes(row.ts_data or b'')
+    chunk.val.frombytes(row.val_data or b'')
+    if rollup:
+        chunk.min.frombytes(row.min_data or b'')
+        chunk.max.frombytes(row.max_data or b'')
+        chunk.count.frombytes(row.count_data or b'')
+    return chunk
+
+
+def _columns(chunk: _Chunk) -> List[array]:
+    if chunk.min is None:
+        return [chunk.ts, chunk.val]
+    return [chunk.ts, chunk.val, chunk.min, chunk.max, chunk.count]
+
+
+def _merge_chunks(persisted: _Chunk, fresh: _Chunk, rollup: bool) -> _Chunk:
+    """Combine a persisted chunk with samples recorded before it was loaded"""
+    merged = _Chunk(rollup, loaded=True)
+    rows = list(zip(*_columns(persisted))) + list(zip(*_columns(fresh)))
+    rows.sort(key=lambda r: r[0])
+    for r in rows:
+        merged.append(*r)
+    return merged
+
+
+class _Bucket:
+    """Running aggregate for the open bucket of one rollup series"""
+
+    __slots__ = ('start', 'total', 'count', 'min', 'max')
+
+    def __init__(self, start: int, value: float):
+        self.start = start
+        self.total = value
+        self.count = 1
+        self.min = value
+        self.max = value
+
+    def add(self, value: float):
+        self.total += value
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+class MetricsStore:
+    """Embedded time-series store with raw samples and downsampled rollups"""
+
+    # Singleton instance
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._data_lock = threading.Lock()
+        # Key: (server_id, metric, resolution, chunk_start), Value: _Chunk
+        self._chunks: Dict[Tuple[str, str, str, int], _Chunk] = {}
+        # Key: (server_id, metric, resolution), Value: open _Bucket
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        self._stats = {
+            'samples': 0,
+            'flushes': 0,
+            'chunks_written': 0,
+            'chunks_pruned': 0,
+            'last_flush_ms': 0.0,
+        }
+
+        self._initialized = True
+
+    # ---- ingestion (memory only) ----
+
+    def _append(self, key: Tuple[str, str, str, int], rollup: bool, offset: int, *values) -> None:
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = _Chunk(rollup)
+        chunk.append(offset, *values)
+
+    def _close_bucket(self, server_id: str, metric: str, resolution: str, bucket: _Bucket) -> None:
+        span = RESOLUTIONS[resolution][1]
+        chunk_start = bucket.start - bucket.start % span
+        self._append((server_id, metric, resolution, chunk_start), True, bucket.start - chunk_start,
+                     bucket.total / bucket.count, bucket.min, bucket.max, bucket.count)
+
+    def record(self, server_id: str, metrics: Dict[str, float], ts: float = None) -> None:
+        """Record one sample per metric for a server at ts (epoch seconds, default now)"""
+        ts = int(ts if ts is not None else time.time())
+        with self._data_lock:
+            for metric, value in metrics.items():
+                if value is None:
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+
+                raw_start = ts - ts % RESOLUTIONS['raw'][1]
+                self._append((server_id, metric, 'raw', raw_start), False, ts - raw_start, value)
+
+                for resolution in ROLLUPS:
+                    step = RESOLUTIONS[resolution][0]
+                    bucket_start = ts - ts % step
+                    bucket_key = (server_id, metric, resolution)
+                    bucket = self._buckets.get(bucket_key)
+                    if bucket is None:
+                        self._buckets[bucket_key] = _Bucket(bucket_start, value)
+                    elif bucket.start == bucket_start:
+                        bucket.add(value)
+                    elif bucket_start > bucket.start:
+                        self._close_bucket(server_id, metric, resolution, bucket)
+                        self._buckets[bucket_key] = _Bucket(bucket_start, value)
+                    # Late samples for an already closed bucket only go to raw
+                self._stats['samples'] += 1
+
+    def record_agent_report(self, server_id: str, data: Dict, ts: float = None) -> None:
+        """Server resources and container metrics from an agent report"""
+        resources = data.get('resources', {})
+        metrics = {name: resources.get(name) for name in SERVER_METRICS}
+        for container in data.get('containers', []):
+            metrics.update(self._container_samples(container.get('name', ''), container))
+        self.record(server_id, metrics, ts)
+
+    def record_container_metrics(self, server_id: str, container_metrics: Dict[str, Dict],
+                                 ts: float = None) -> None:
+        """Metrics parsed from docker stats ({container: {cpu_percent, memory_percent, ...}})"""
+        metrics = {}
+        for name, values in container_metrics.items():
+            metrics.update(self._container_samples(name, values))
+        if metrics:
+            self.record(server_id, metrics, ts)
+
+    @staticmethod
+    def _container_samples(name: str, container: Dict) -> Dict[str, float]:
+        if not name:
+            return {}
+        source = container.get('metrics', container)
+        samples = {}
+        if 'cpu_percent' in source:
+            samples[container_metric_name(name, 'cpu_percent')] = source.get('cpu_percent')
+        if 'memory_percent' in source:
+            samples[container_metric_name(name, 'memory_percent')] = source.get('memory_percent')
+        elif source.get('memory_limit'):
+            # Agent reports raw usage/limit instead of a percentage
+            samples[container_metric_name(name, 'memory_percent')] = \
+                round(source.get('memory_usage', 0) / source['memory_limit'] * 100, 2)
+        return samples
+
+    # ---- persistence (scheduler, inside an app context) ----
+
+    def flush(self) -> int:
+        """Write dirty chunks in one transaction. Returns the number of chunks written."""
+        from app import db
+        from app.models import MetricChunk
+
+        started = time.time()
+        with self._data_lock:
+            dirty_keys = [key for key, chunk in self._chunks.items() if chunk.dirty]
+        if not dirty_keys:
+            return 0
+
+        rows = {}
+        for row in MetricChunk.query.filter(
+                MetricChunk.server_id.in_({key[0] for key in dirty_keys}),
+                MetricChunk.chunk_start.in_({key[3] for key in dirty_keys})).all():
+            rows[(row.server_id, row.metric, row.resolution, row.chunk_start)] = row
+
+        with self._data_lock:
+            pending = {}
+            for key in dirty_keys:
+                chunk = self._chunks[key]
+                if not chunk.loaded:
+                    row = rows.get(key)
+                    if row is not None:
+                        # First write after a restart: keep what was already persisted
+                        rollup = key[2] != 'raw'
+                        chunk = self._chunks[key] = _merge_chunks(_unpack(row, rollup), chunk, rollup)
+                    chunk.loaded = True
+                pending[key] = _pack(chunk)
+                chunk.dirty = False
+
+        updated_at = int(time.time())
+        for key, columns in pending.items():
+            row = rows.get(key)
+            if row is None:
+                row = MetricChunk(server_id=key[0], metric=key[1], resolution=key[2], chunk_start=key[3])
+                db.session.add(row)
+            for column, value in columns.items():
+                setattr(row, column, value)
+            row.updated_at = updated_at
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._data_lock:
+                for key in pending:
+                    if key in self._chunks:
+                        self._chunks[key].dirty = True
+            raise
+
+        now = int(time.time())
+        with self._data_lock:
+            for key in pending:
+                chunk = self._chunks.get(key)
+                step, span = RESOLUTIONS[key[2]]
+                # Closed chunks are persisted; drop them from memory (late points
+                # start a new in-memory chunk that is merged on the next flush)
+                if chunk is not None and not chunk.dirty and key[3] + span + step < now:
+                    del self._chunks[key]
+            self._stats['flushes'] += 1
+            self._stats['chunks_written'] += len(pending)
+            self._stats['last_flush_ms'] = round((time.time() - started) * 1000, 2)
+        return len(pending)
+
+    def prune(self) -> int:
+        """Delete chunks past their resolution's retention. Returns rows deleted."""
+        from app import db
+        from app.models import MetricChunk
+
+        now = int(time.time())
+        deleted = 0
+        for resolution, (_, span) in RESOLUTIONS.items():
+            retention = Config.METRICS_RETENTION[resolution]
+            # A chunk expires once its newest possible point is older than retention
+            cutoff = now - retention - span
+            deleted += MetricChunk.query.filter(
+                MetricChunk.resolution == resolution,
+                MetricChunk.chunk_start < cutoff
+            ).delete(synchronize_session=False)
+        db.session.commit()
+        with self._data_lock:
+            self._stats['chunks_pruned'] += deleted
+        return deleted
+
+    # ---- queries ----
+
+    def _pick_resolution(self, start: int, end: int, max_points: int) -> str:
+        now = int(time.time())
+        for resolution in ('raw',) + ROLLUPS:
+            step = RESOLUTIONS[resolution][0] or Config.METRICS_RAW_STEP
+            if start < now - Config.METRICS_RETENTION[resolution]:
+                continue
+            if (end - start) / step <= max_points:
+                return resolution
+        return '1h'
+
+    def query(self, server_id: str, metric: str, start: int, end: int,
+              resolution: str = 'auto', max_points: int = 300) -> Dict:
+        """
+        Points for one series in [start, end] (epoch seconds).
+        raw:    points = [[ts, value], ...]
+        rollup: points = [[ts, avg, min, max], ...]
+        'auto' picks the finest resolution that fits max_points.
+        """
+        from app.models import MetricChunk
+
+        if resolution == 'auto':
+            resolution = self._pick_resolution(start, end, max_points)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f'unknown resolution: {resolution}')
+        rollup = resolution != 'raw'
+        step, span = RESOLUTIONS[resolution]
+        first_chunk = start - start % span
+
+        chunks: Dict[int, _Chunk] = {}
+        for row in MetricChunk.query.filter(
+                MetricChunk.server_id == server_id,
+                MetricChunk.metric == metric,
+                MetricChunk.resolution == resolution,
+                MetricChunk.chunk_start >= first_chunk,
+                MetricChunk.chunk_start <= end).all():
+            chunks[row.chunk_start] = _unpack(row, rollup)
+
+        with self._data_lock:
+            for (sid, name, res, chunk_start), chunk in self._chunks.items():
+                if sid != server_id or name != metric or res != resolution \
+                        or chunk_start < first_chunk or chunk_start > end:
+                    continue
+                if chunk.loaded or chunk_start not in chunks:
+                    chunks[chunk_start] = chunk
+                else:
+                    chunks[chunk_start] = _merge_chunks(chunks[chunk_start], chunk, rollup)
+            open_bucket = self._buckets.get((server_id, metric, resolution)) if rollup else None
+            points = []
+            for chunk_start in sorted(chunks):
+                chunk = chunks[chunk_start]
+                for r in zip(*_columns(chunk)):
+                    ts = chunk_start + r[0]
+                    if start <= ts <= end:
+                        if rollup:
+                            points.append([ts, round(r[1], 2), round(r[2], 2), round(r[3], 2), r[4]])
+                        else:
+                            points.append([ts, round(r[1], 2)])
+            # Include the partially filled current bucket so rollups stay fresh
+            if open_bucket is not None and start <= open_bucket.start <= end:
+                points.append([open_bucket.start, round(open_bucket.total / open_bucket.count, 2),
+                               round(open_bucket.min, 2), round(open_bucket.max, 2), open_bucket.count])
+
+        points.sort(key=lambda p: p[0])
+        points = self._downsample(points, max_points, rollup)
+        if rollup:
+            points = [p[:4] for p in points]
+        return {
+            'server_id': server_id,
+            'metric': metric,
+            'resolution': resolution,
+            'step': step or None,
+            'start': start,
+            'end': end,
+            'points': points,
+        }
+
+    @staticmethod
+    def _downsample(points: List[List], max_points: int, rollup: bool) -> List[List]:
+        """Merge consecutive points so at most max_points are returned"""
+        if max_points <= 0 or len(points) <= max_points:
+            return points
+        group = -(-len(points) // max_points)
+        result = []
+        for i in range(0, len(points), group):
+            part = points[i:i + group]
+            if rollup:
+                total = sum(p[4] for p in part) or 1
+                result.append([part[0][0],
+                               round(sum(p[1] * p[4] for p in part) / total, 2),
+                               min(p[2] for p in part), max(p[3] for p in part), total])
+            else:
+                values = [p[1] for p in part]
+                result.append([part[0][0], round(sum(values) / len(values), 2)])
+        return result
+
+    def list_series(self, server_id: str) -> List[str]:
+        """Metric names with data for a server"""
+        from app import db
+        from app.models import MetricChunk
+
+        names = {row[0] for row in db.session.query(MetricChunk.metric).filter(
+            MetricChunk.server_id == server_id).distinct().all()}
+        with self._data_lock:
+            names.update(key[1] for key in self._chunks if key[0] == server_id)
+        return sorted(names)
+
+    def get_stats(self) -> Dict:
+        with self._data_lock:
+            stats = dict(self._stats)
+            stats['open_chunks'] = len(self._chunks)
+            stats['dirty_chunks'] = sum(1 for c in self._chunks.values() if c.dirty)
+        return stats
+
+
+# Global singleton instance
+metrics_store = MetricsStore()
@@ -9,17 +9,32 @@ import socket
 import paramiko
 import re
 import subprocess
+import threading
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Callable
 from config.settings import SERVERS, SSH_CREDENTIALS, SSH_PORTS, Config
 from app.services.agent_data_service import agent_data_service
+from app.services.ssh_pool import SSHConnectionPool
+from app.services.async_ssh_collector import get_async_ssh_collector
+from app.services.metrics_store import metrics_store
+from app.utils.log_classifier import KeywordClassifier
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Level keywords for process error logs (checked in this order)
+ERROR_LEVEL_CLASSIFIER = KeywordClassifier({
+    'critical': ['ora-00600', 'ora-04031', 'outofmemoryexception', 'crash', 'fatal'],
+    'error': ['exception', 'error', 'ora-', 'failed'],
+    'warning': ['warning', 'timeout', 'retry']
+})
+
+# All Windows processes in one SSH call
+WINDOWS_TASKLIST_COMMAND = 'tasklist /FO CSV /NH'
+
 
 class MonitorService:
     """Service for monitoring servers and processes with reconnection support"""
@@ -33,8 +48,45 @@ class MonitorService:
     # Consecutive SSH failures required before marking server OFFLINE
     SSH_FAILURE_THRESHOLD = 3
 
+    # Singleton instance - one monitoring engine (and SSH pool) per process
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
-        self._ssh_clients: Dict[str, paramiko.SSHClient] = {}
+        if self._initialized:
+            return
+
+        # Persistent SSH connections shared by every caller
+        self.ssh_pool = SSHConnectionPool(
+            keepalive_interval=Config.SSH_KEEPALIVE_INTERVAL,
+            idle_timeout=Config.SSH_POOL_IDLE_TIMEOUT,
+            validate_after=Config.SSH_POOL_VALIDATE_AFTER
+        )
+        # Optional asyncio backend for exec_ssh_command (None = paramiko pool)
+        self.async_ssh = None
+        if Config.SSH_BACKEND == 'asyncssh':
+            self.async_ssh = get_async_ssh_collector(
+                keepalive_interval=Config.SSH_KEEPALIVE_INTERVAL,
+                max_concurrency=Config.ASYNC_SSH_MAX_CONCURRENCY,
+                sessions_per_host=Config.ASYNC_SSH_SESSIONS_PER_HOST
+            )
+            if self.async_ssh is None:
+                logger.warning("[MonitorService] asyncssh backend unavailable, using paramiko pool")
+        # Outputs fetched ahead by a batched sweep: {server_id: {command: output or exception}}
+        # (per thread/greenthread, see collect_servers_status)
+        self._prefetch = threading.local()
+        # Long-lived worker pool for get_all_servers_status (was one per call)
+        self._status_executor = ThreadPoolExecutor(
+            max_workers=Config.STATUS_WORKERS, thread_name_prefix='server-status'
+        )
         self.agent_data = agent_data_service
         # Track restart history and alerts
         self._restart_history: Dict[str, Dict] = {}  # {server_id_process: {last_restart, result, ...}}
@@ -65,6 +117,8 @@ class MonitorService:
         # Register reconnection callback
         self.agent_data.register_reconnection_callback(self._on_server_reconnected)
 
+        self._initialized = True
+
     def _get_local_ips(self) -> set:
         """Detect all local IP addresses on this machine.
         Works in environments without internet access (e.g., factory servers).
@@ -101,17 +155,26 @@ class MonitorService:
 
     def cleanup_ssh_connections(self):
         """Close all cached SSH connections. Call on shutdown."""
-        for server_id, client in list(self._ssh_clients.items()):
-            try:
-                client.close()
-            except Exception:
-                pass
-        self._ssh_clients.clear()
+        self.ssh_pool.close_all()
+        if self.async_ssh is not None:
+            self.async_ssh.close_all()
         logger.info("[MonitorService] All SSH connections cleaned up")
 
     def get_ssh_connection_count(self) -> int:
         """Return the number of cached SSH connections (for monitoring)"""
-        return len(self._ssh_clients)
+        return self.ssh_pool.size()
+
+    def get_ssh_pool_stats(self) -> Dict:
+        """Return SSH pool hit/miss/reconnect counters (for monitoring)"""
+        stats = self.ssh_pool.get_stats()
+        stats['backend'] = 'asyncssh' if self.async_ssh is not None else 'paramiko'
+        if self.async_ssh is not None:
+            stats['async'] = self.async_ssh.get_stats()
+        return stats
+
+    def maintain_ssh_pool(self) -> int:
+        """Close idle or dead pooled SSH connections"""
+        return self.ssh_pool.prune()
 
     def _on_server_reconnected(self, server_id: str, offline_duration: float) -> None:
         """Callback when a server reconnects after being offline"""
@@ -123,25 +186,13 @@ class MonitorService:
             del self._ssh_connection_status[server_id]
 
     def _get_or_create_ssh_client(self, server_id: str) -> Optional[paramiko.SSHClient]:
-        """Get cached SSH client or create new one with connection pooling"""
-        # Check if we have a cached client that's still valid
-        if server_id in self._ssh_clients:
-            client = self._ssh_clients[server_id]
-            try:
-                # Test if connection is still alive
-                transport = client.get_transport()
-                if transport and transport.is_active():
-                    return client
-            except:
-                pass
-            # Connection dead, remove from cache
-            try:
-                client.close()
-            except:
-                pass
-            del self._ssh_clients[server_id]
+        """Get pooled SSH client or create new one with connection pooling"""
+        if server_id not in SERVERS:
+            return None
+        return self.ssh_pool.acquire(server_id, lambda: self._open_ssh_client(server_id))
 
-        # Create new connection
+    def _ssh_connect_params(self, server_id: str) -> Optional[Dict]:
+        """Resolve host/port/user/key for a server (shared by both SSH backends)"""
         if server_id not in SERVERS:
             return None
 
@@ -149,7 +200,10 @@ class MonitorService:
         ip = server['ip']
         os_type = server.get('os', 'windows')
         creds = SSH_CREDENTIALS.get(os_type, SSH_CREDENTIALS['windows'])
-        ssh_port = SSH_PORTS.get(server_id, 22)
+
+        key_file = creds.get('key_file')
+        if not key_file or not os.path.exists(key_file):
+            return None
 
         # Use localhost for self-connections to avoid network loopback issues
         connect_host = ip
@@ -157,14 +211,28 @@ class MonitorService:
             connect_host = 'localhost'
             logger.debug(f"Using localhost for self-connection to {server_id} ({ip})")
 
+        return {
+            'host': connect_host,
+            'ip': ip,
+            'port': SSH_PORTS.get(server_id, 22),
+            'username': creds['username'],
+            'key_file': key_file
+        }
+
+    def _open_ssh_client(self, server_id: str) -> Optional[paramiko.SSHClient]:
+        """Open a new SSH connection (handshake + auth). Called by the pool on a miss."""
+        params = self._ssh_connect_params(server_id)
+        if not params:
+            return None
+
+        connect_host = params['host']
+        ip = params['ip']
+        key_file = params['key_file']
+
         try:
             client = paramiko.SSHClient()
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
-            key_file = creds.get('key_file')
-            if not key_file or not os.path.exists(key_file):
-                return None
-
             # Load private key
             private_key = None
             try:
@@ -180,16 +248,14 @@ class MonitorService:
 
             client.connect(
                 hostname=connect_host,
-                port=ssh_port,
-                username=creds['username'],
+                port=params['port'],
+                username=params['username'],
                 pkey=private_key,
                 timeout=10,
                 banner_timeout=15,
                 auth_timeout=10
             )
 
-            # Cache the client
-            self._ssh_clients[server_id] = client
             self._update_ssh_connection_status(server_id, True)
             return client
         except Exception as e:
@@ -239,17 +305,21 @@ class MonitorService:
             return output
 
         # Skip if server has multiple recent failures (avoid repeated connection attempts)
-        # Require 3+ failures before applying backoff to match SSH_FAILURE_THRESHOLD
-        ssh_status = self._ssh_connection_status.get(server_id, {})
-        if not ssh_status.get('connected', True):
-            consecutive_failures = ssh_status.get('consecutive_failures', 0)
-            last_check = ssh_status.get('last_check')
-            if consecutive_failures >= self.SSH_FAILURE_THRESHOLD and last_check:
-                elapsed = (datetime.utcnow() - last_check).total_seconds()
-                # Back off: 30s after 2nd fail, 60s after 3rd, up to 120s
-                backoff_time = min(120, 30 * (consecutive_failures - 1))
-                if elapsed < backoff_time:
-                    return None
+        if self._ssh_backing_off(server_id):
+            return None
+
+        # Output already fetched by a batched sweep (collect_servers_status)
+        prefetched = getattr(self._prefetch, 'outputs', None)
+        if prefetched is not None and command in prefetched.get(server_id, {}):
+            output = prefetched[server_id][command]
+            if isinstance(output, BaseException):
+                self._update_ssh_connection_status(server_id, False, str(output) or repr(output))
+                return None
+            self._update_ssh_connection_status(server_id, True)
+            return output
+
+        if self.async_ssh is not None:
+            return self._exec_async_ssh_command(server_id, command, timeout, max_retries)
 
         import time
         last_error = None
@@ -281,13 +351,8 @@ class MonitorService:
             except Exception as e:
                 last_error = e
                 logger.debug(f"SSH command attempt {attempt+1} failed for {ip}: {e}")
-                # Remove failed client from cache
-                if server_id in self._ssh_clients:
-                    try:
-                        self._ssh_clients[server_id].close()
-                    except:
-                        pass
-                    del self._ssh_clients[server_id]
+                # Remove failed client from pool
+                self.ssh_pool.discard(server_id)
 
                 # Wait before retry (exponential backoff)
                 if attempt < max_retries - 1:
@@ -297,6 +362,49 @@ class MonitorService:
         self._update_ssh_connection_status(server_id, False, str(last_error) if last_error else "unknown")
         return None
 
+    def _ssh_backing_off(self, server_id: str) -> bool:
+        """True while exec_ssh_command skips a server after repeated failures"""
+        # Require 3+ failures before applying backoff to match SSH_FAILURE_THRESHOLD
+        ssh_status = self._ssh_connection_status.get(server_id, {})
+        if not ssh_status.get('connected', True):
+            consecutive_failures = ssh_status.get('consecutive_failures', 0)
+            last_check = ssh_status.get('last_check')
+            if consecutive_failures >= self.SSH_FAILURE_THRESHOLD and last_check:
+                elapsed = (datetime.utcnow() - last_check).total_seconds()
+                # Back off: 30s after 2nd fail, 60s after 3rd, up to 120s
+                backoff_time = min(120, 30 * (consecutive_failures - 1))
+                if elapsed < backoff_time:
+                    return True
+        return False
+
+    def _ssh_blocked(self, server_id: str) -> bool:
+        """True when status collection should skip SSH (consecutive failures >= threshold)"""
+        if SERVERS[server_id].get('ip', '') in self._local_ips:
+            return False
+        ssh_status = self._ssh_connection_status.get(server_id, {})
+        consecutive_failures = ssh_status.get('consecutive_failures', 0)
+        return not ssh_status.get('connected', True) and consecutive_failures >= self.SSH_FAILURE_THRESHOLD
+
+    def _exec_async_ssh_command(self, server_id: str, command: str, timeout: int = 5,
+                                max_retries: int = 1) -> Optional[str]:
+        """exec_ssh_command via the asyncssh backend (commands are cancelled on timeout)"""
+        params = self._ssh_connect_params(server_id)
+        if not params:
+            return None
+
+        last_error = None
+        for attempt in range(max_retries):
+            try:
+                output = self.async_ssh.run(server_id, params, command, timeout=timeout)
+                self._update_ssh_connection_status(server_id, True)
+                return output
+            except Exception as e:
+                last_error = e
+                logger.debug(f"Async SSH command attempt {attempt+1} failed for {params['ip']}: {e!r}")
+
+        self._update_ssh_connection_status(server_id, False, str(last_error) if last_error else "unknown")
+        return None
+
     def _update_ssh_connection_status(self, server_id: str, success: bool, error: str = None) -> None:
         """Update SSH connection status cache and failure counter"""
         now = datetime.utcnow()
@@ -415,6 +523,143 @@ class MonitorService:
         """
         return self._get_or_create_ssh_client(server_id)
 
+    # ============ SSH Command Builders ============
+    # Shared by the checks below and by the batched sweep's command plan, so a
+    # prefetched output is found under exactly the command the check runs.
+
+    def _windows_services_command(self, service_names: List[str]) -> str:
+        """Use powershell to query multiple services efficiently"""
+        service_filter = ','.join([f'"{s}"' for s in service_names])
+        return f'powershell -Command "Get-Service -Name {service_filter} -ErrorAction SilentlyContinue | Select-Object Name,Status | ConvertTo-Csv -NoTypeInformation"'
+
+    def _windows_resource_commands(self, server_id: str) -> List[Tuple[str, int]]:
+        """(command, timeout) for CPU, memory and disk usage, in that order"""
+        acc_drive = SERVERS.get(server_id, {}).get('acc_drive', 'D')
+        # Use WMIC commands for reliable CPU/Memory/Disk retrieval
+        # WMIC is more reliable than PowerShell when executed via SSH as it avoids shell variable parsing issues
+        # Note: WMIC CPU query takes ~1 second per core, so 15s timeout needed for servers with 6+ cores
+        return [
+            ("wmic cpu get loadpercentage /format:value", 15),
+            ("wmic OS get FreePhysicalMemory,TotalVisibleMemorySize /format:value", 5),
+            (f"wmic logicaldisk where DeviceID='{acc_drive}:' get Size,FreeSpace /format:value", 5),
+        ]
+
+    def _linux_containers_command(self, server_id: str) -> Tuple[str, int]:
+        """docker ps (plus docker stats when container_metrics is on) as one command"""
+        if SERVERS.get(server_id, {}).get('container_metrics', False):
+            # Combined command: docker ps output, then separator, then docker stats output
+            # Use Linux 'timeout' to prevent docker stats from hanging
+            return (
+                'docker ps -a --format "{{.Names}}|{{.Status}}|{{.ID}}" && '
+                'echo "===DOCKER_SEPARATOR===" && '
+                'timeout 5 docker stats --no-stream --format "{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}"'
+            ), 12
+        # No metrics needed, just docker ps
+        return 'docker ps -a --format "{{.Names}}|{{.Status}}|{{.ID}}"', 10
+
+    def _linux_resources_command(self, server_id: str) -> Tuple[str, int]:
+        """
+        Merge top + free + df into a single SSH call to reduce 3 round-trips to 1.
+        This is critical for high-load servers (e.g. 163) where serial SSH commands
+        accumulate latency and cause ThreadPool timeouts.
+        Output sections are separated by "---SEPARATOR---" markers.
+        """
+        if server_id == '163':
+            # For EAI server (163), monitor /home partition (Docker data location)
+            disk_part = "df /home | tail -1 | awk '{print $5}' | tr -d '%'"
+        else:
+            # Standard disk usage for other Linux servers
+            disk_part = "df / | tail -1 | awk '{print $5}' | tr -d '%'"
+
+        return (
+            "top -bn1 | grep 'Cpu(s)' | awk '{print $2+$4}' && "
+            "echo '---SEPARATOR---' && "
+            "free | grep Mem | awk '{print $3/$2 * 100.0}' && "
+            "echo '---SEPARATOR---' && "
+            f"{disk_part}"
+        ), 10
+
+    def _windows_error_log_commands(self, log_path: str, service_name: str, date_str: str) -> List[str]:
+        """findstr over today's log file, then the undated one (first with output wins)"""
+        if service_name:
+            # Service-specific log: ServiceName_YYYY-MM-DD.log or ServiceName.log
+            log_patterns = [
+                f'{log_path}\\{service_name}_{date_str}.log',
+                f'{log_path}\\{service_name}.log'
+            ]
+        else:
+            # General ACC log
+            log_patterns = [
+                f'{log_path}\\ACC.Server_{date_str}.log',
+                f'{log_path}\\ACC.Server.log'
+            ]
+        # Use findstr to search for errors in log file
+        return [
+            f'findstr /I /C:"Error" /C:"Exception" /C:"Failed" /C:"ORA-" "{log_file}" 2>nul | more +0'
+            for log_file in log_patterns
+        ]
+
+    def _linux_error_log_command(self, log_path: str, container_name: str, date_str: str) -> str:
+        if container_name:
+            return f'timeout 10 docker logs {container_name} --since {date_str}T00:00:00 2>&1 | grep -iE "error|exception|failed" | tail -20'
+        return f'timeout 10 grep -iE "error|exception|failed" {log_path}/*.log 2>/dev/null | tail -20'
+
+    def _status_ssh_commands(self, server_id: str) -> List[Tuple[str, int]]:
+        """
+        (command, timeout) for every SSH command one _get_single_server_status
+        call on server_id will run, following the same agent-first branches.
+        Anything missed here still works - it just runs on its own.
+        """
+        server = SERVERS[server_id]
+        if server['ip'] in self._local_ips or self._ssh_backing_off(server_id):
+            return []  # local subprocess, or exec_ssh_command would skip it anyway
+
+        os_type = server.get('os', 'windows')
+        log_path = server.get('log_path', '')
+        today = datetime.now().strftime('%Y-%m-%d')
+        agent_data = self.agent_data.get_agent_data(server_id) if self._has_fresh_agent_data(server_id) else None
+        ssh_collect = agent_data is None and not self._ssh_blocked(server_id)
+        commands: List[Tuple[str, int]] = []
+
+        if os_type == 'windows':
+            if agent_data is not None:
+                names = [p.get('name', '') for p in self.normalize_agent_processes(agent_data)]
+            elif ssh_collect:
+                commands.append((WINDOWS_TASKLIST_COMMAND, 5))
+                service_names = [svc.get('service_name', '') for svc in server.get('services', [])
+                                 if svc.get('service_name')]
+                if service_names:
+                    commands.append((self._windows_services_command(service_names), 5))
+                commands.extend(self._windows_resource_commands(server_id))
+                # Processes are named by display name, or by process name when tasklist fails
+                display_names = server.get('process_display_names', {})
+                names = [display_names.get(p, p) for p in server.get('processes', [])]
+                names += server.get('processes', [])
+                names += [svc.get('display_name', svc.get('service_name', '')) for svc in server.get('services', [])]
+            else:
+                names = []
+            for name in dict.fromkeys(names):
+                commands.extend((cmd, 15) for cmd in self._windows_error_log_commands(log_path, name, today))
+        else:
+            if agent_data is not None:
+                # Containers without agent-reported logs fall back to docker logs over SSH
+                if 'container_logs' in agent_data:
+                    names = []
+                else:
+                    agent_logs = agent_data.get('container_error_logs', {})
+                    names = [p.get('name', '') for p in self.normalize_agent_processes(agent_data)
+                             if p.get('name') not in agent_logs]
+            elif ssh_collect:
+                commands.append(self._linux_containers_command(server_id))
+                commands.append(self._linux_resources_command(server_id))
+                names = server.get('containers', [])
+            else:
+                names = []
+            for name in dict.fromkeys(names):
+                commands.append((self._linux_error_log_command(log_path, name, today), 20))
+
+        return commands
+
     def check_windows_services(self, server_id: str, ssh_client=None) -> List[Dict]:
         """
         Check Windows service status via SSH - OPTIMIZED: single command for all services
@@ -434,10 +679,7 @@ class MonitorService:
             return []
 
         # Single SSH command to get all services at once
-        # Use powershell to query multiple services efficiently
-        service_filter = ','.join([f'"{s}"' for s in service_names])
-        cmd = f'powershell -Command "Get-Service -Name {service_filter} -ErrorAction SilentlyContinue | Select-Object Name,Status | ConvertTo-Csv -NoTypeInformation"'
-        output = self.exec_ssh_command(server_id, cmd, timeout=5)
+        output = self.exec_ssh_command(server_id, self._windows_services_command(service_names), timeout=5)
 
         # Parse output and build results
         service_status_map = {}
@@ -496,8 +738,7 @@ class MonitorService:
         results = []
 
         # Get all processes at once with a single SSH command
-        cmd = 'tasklist /FO CSV /NH'
-        output = self.exec_ssh_command(server_id, cmd, timeout=5)
+        output = self.exec_ssh_command(server_id, WINDOWS_TASKLIST_COMMAND, timeout=5)
 
         # Determine if server is reachable (Agent online OR SSH output available)
         server_reachable = (self.agent_data.is_agent_online(server_id)) or (output is not None)
@@ -600,25 +841,20 @@ class MonitorService:
         server = SERVERS[server_id]
         containers_to_monitor = server.get('containers', [])
         container_metrics_enabled = server.get('container_metrics', False)
+
+        # The agent reads the Docker Engine API locally every report; use that instead of SSH
+        agent_results = self._containers_from_agent(server_id, containers_to_monitor)
+        if agent_results is not None:
+            return agent_results
+
         results = []
 
         # OPTIMIZED: Combine docker ps and docker stats into one SSH call
         # Previously these were 2 separate SSH connections, each with connection overhead.
         # For 163 server under high CPU load, each SSH handshake can take 3-5 seconds,
         # so merging saves significant time.
-        if container_metrics_enabled:
-            # Combined command: docker ps output, then separator, then docker stats output
-            # Use Linux 'timeout' to prevent docker stats from hanging
-            combined_docker_cmd = (
-                'docker ps -a --format "{{.Names}}|{{.Status}}|{{.ID}}" && '
-                'echo "===DOCKER_SEPARATOR===" && '
-                'timeout 5 docker stats --no-stream --format "{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}"'
-            )
-            combined_output = self.exec_ssh_command(server_id, combined_docker_cmd, timeout=12)
-        else:
-            # No metrics needed, just docker ps
-            docker_cmd = 'docker ps -a --format "{{.Names}}|{{.Status}}|{{.ID}}"'
-            combined_output = self.exec_ssh_command(server_id, docker_cmd, timeout=10)
+        docker_cmd, docker_timeout = self._linux_containers_command(server_id)
+        combined_output = self.exec_ssh_command(server_id, docker_cmd, timeout=docker_timeout)
 
         if combined_output:
             # Split combined output into docker ps and docker stats sections
@@ -650,6 +886,7 @@ class MonitorService:
             container_metrics = {}
             if container_metrics_enabled and stats_output:
                 container_metrics = self._parse_container_metrics_output(stats_output, containers_to_monitor)
+                metrics_store.record_container_metrics(server_id, container_metrics)
 
             # Only return containers that are in the monitor list
             for container_name in containers_to_monitor:
@@ -701,6 +938,31 @@ class MonitorService:
 
         return results
 
+    def _containers_from_agent(self, server_id: str, containers_to_monitor: List[str]) -> Optional[List[Dict]]:
+        """Monitored containers from a fresh agent report, or None if SSH is needed
+        (no fresh report, or the agent does not watch every monitored container).
+        Container metrics were already recorded when the report arrived."""
+        agent_data = self.agent_data.get_agent_data(server_id)
+        if not agent_data or not agent_data.get('received_at'):
+            return None
+        if (datetime.utcnow() - agent_data['received_at']).total_seconds() >= self.AGENT_FRESHNESS_THRESHOLD:
+            return None
+
+        reported = {c.get('name'): c for c in agent_data.get('containers', [])}
+        if not containers_to_monitor or any(name not in reported for name in containers_to_monitor):
+            return None
+
+        entries = {p['name']: p for p in self.normalize_agent_processes(
+            {'containers': [reported[name] for name in containers_to_monitor]})}
+        results = []
+        for name in containers_to_monitor:
+            entry = entries[name]
+            if entry['status'] == 'not_found':
+                # Same as the docker ps path: a missing container is reported as stopped
+                entry['status'] = 'stopped'
+            results.append(entry)
+        return results
+
     def _get_container_metrics_safe(self, server_id: str, containers: List[str]) -> Dict[str, Dict]:
         """Get CPU, memory, and network I/O metrics for Docker containers.
         Uses exec_ssh_command for backoff protection and timeout safety.
@@ -834,14 +1096,9 @@ class MonitorService:
             'data_source': 'none'
         }
 
-        server_config = SERVERS.get(server_id, {})
-        acc_drive = server_config.get('acc_drive', 'D')
-
-        # Use WMIC commands for reliable CPU/Memory/Disk retrieval
-        # WMIC is more reliable than PowerShell when executed via SSH as it avoids shell variable parsing issues
-        # Note: WMIC CPU query takes ~1 second per core, so 15s timeout needed for servers with 6+ cores
-        cpu_cmd = "wmic cpu get loadpercentage /format:value"
-        cpu_output = self.exec_ssh_command(server_id, cpu_cmd, timeout=15)
+        (cpu_cmd, cpu_timeout), (mem_cmd, mem_timeout), (disk_cmd, disk_timeout) = \
+            self._windows_resource_commands(server_id)
+        cpu_output = self.exec_ssh_command(server_id, cpu_cmd, timeout=cpu_timeout)
         if cpu_output:
             try:
                 cpu_values = []
@@ -857,8 +1114,7 @@ class MonitorService:
                 pass
 
         # Get Memory usage via WMIC
-        mem_cmd = "wmic OS get FreePhysicalMemory,TotalVisibleMemorySize /format:value"
-        mem_output = self.exec_ssh_command(server_id, mem_cmd, timeout=5)
+        mem_output = self.exec_ssh_command(server_id, mem_cmd, timeout=mem_timeout)
         if mem_output:
             try:
                 free_mem = 0
@@ -880,8 +1136,7 @@ class MonitorService:
                 pass
 
         # Get Disk usage via WMIC
-        disk_cmd = f"wmic logicaldisk where DeviceID='{acc_drive}:' get Size,FreeSpace /format:value"
-        disk_output = self.exec_ssh_command(server_id, disk_cmd, timeout=5)
+        disk_output = self.exec_ssh_command(server_id, disk_cmd, timeout=disk_timeout)
         if disk_output:
             try:
                 free_space = 0
@@ -996,25 +1251,8 @@ class MonitorService:
             'data_source': 'none'
         }
 
-        # Merge top + free + df into a single SSH call to reduce 3 round-trips to 1.
-        # This is critical for high-load servers (e.g. 163) where serial SSH commands
-        # accumulate latency and cause ThreadPool timeouts.
-        # Output sections are separated by "---SEPARATOR---" markers.
-        if server_id == '163':
-            # For EAI server (163), monitor /home partition (Docker data location)
-            disk_part = "df /home | tail -1 | awk '{print $5}' | tr -d '%'"
-        else:
-            # Standard disk usage for other Linux servers
-            disk_part = "df / | tail -1 | awk '{print $5}' | tr -d '%'"
-
-        combined_cmd = (
-            "top -bn1 | grep 'Cpu(s)' | awk '{print $2+$4}' && "
-            "echo '---SEPARATOR---' && "
-            "free | grep Mem | awk '{print $3/$2 * 100.0}' && "
-            "echo '---SEPARATOR---' && "
-            f"{disk_part}"
-        )
-        combined_output = self.exec_ssh_command(server_id, combined_cmd, timeout=10)
+        combined_cmd, combined_timeout = self._linux_resources_command(server_id)
+        combined_output = self.exec_ssh_command(server_id, combined_cmd, timeout=combined_timeout)
 
         if combined_output:
             sections = combined_output.split('---SEPARATOR---')
@@ -1119,15 +1357,17 @@ class MonitorService:
 
         return 'normal'
 
-    def _get_single_server_status(self, server_id: str) -> Dict:
+    def _get_single_server_status(self, server_id: str, auto_restart: bool = True) -> Dict:
         """Get status of a single server (for parallel execution).
         Wrapped in try/except to guarantee a result is always returned,
-        preventing the server from disappearing from the dashboard."""
+        preventing the server from disappearing from the dashboard.
+        auto_restart=False only annotates stopped items (the scheduler's
+        process-check pipeline runs restarts in its own stage)."""
         server_config = SERVERS[server_id]
         os_type = server_config.get('os', 'windows')
 
         try:
-            return self._get_single_server_status_inner(server_id, server_config, os_type)
+            return self._get_single_server_status_inner(server_id, server_config, os_type, auto_restart)
         except Exception as e:
             # Catch ALL exceptions to ensure this server always appears in results
             logger.error(f"[Safety] _get_single_server_status failed for {server_id}: {e}")
@@ -1147,22 +1387,9 @@ class MonitorService:
         elapsed = (datetime.utcnow() - received_at).total_seconds()
         return elapsed < self.AGENT_FRESHNESS_THRESHOLD
 
-    def _build_result_from_agent_data(self, server_id: str, server_config: Dict, os_type: str) -> Optional[Dict]:
-        """Build a full status dict purely from Agent-pushed data.
-        Returns None if no fresh Agent data is available."""
-        agent_data = self.agent_data.get_agent_data(server_id)
-        if not agent_data:
-            return None
-
-        received_at = agent_data.get('received_at')
-        if not received_at:
-            return None
-        elapsed = (datetime.utcnow() - received_at).total_seconds()
-        if elapsed >= self.AGENT_FRESHNESS_THRESHOLD:
-            return None
-
+    def normalize_agent_processes(self, agent_data: Dict) -> List[Dict]:
+        """Convert an agent report's processes/containers into the UI process format"""
         processes = list(agent_data.get('processes', []))
-        resources = agent_data.get('resources', {})
 
         # For Linux servers, the agent reports containers separately.
         # Merge them into the processes list so they appear in the UI.
@@ -1190,15 +1417,35 @@ class MonitorService:
                 if 'metrics' in container:
                     proc_entry['metrics'] = container['metrics']
                 processes.append(proc_entry)
-            logger.debug(f"[AgentData] {server_id}: merged {len(containers)} containers into processes list")
+            logger.debug(f"[AgentData] merged {len(containers)} containers into processes list")
 
         # Mark every process with data_source='agent'
         for proc in processes:
             proc['data_source'] = 'agent'
             proc['last_check'] = datetime.utcnow().isoformat()
 
+        return processes
+
+    def _build_result_from_agent_data(self, server_id: str, server_config: Dict, os_type: str,
+                                      auto_restart: bool = True) -> Optional[Dict]:
+        """Build a full status dict purely from Agent-pushed data.
+        Returns None if no fresh Agent data is available."""
+        agent_data = self.agent_data.get_agent_data(server_id)
+        if not agent_data:
+            return None
+
+        received_at = agent_data.get('received_at')
+        if not received_at:
+            return None
+        elapsed = (datetime.utcnow() - received_at).total_seconds()
+        if elapsed >= self.AGENT_FRESHNESS_THRESHOLD:
+            return None
+
+        processes = self.normalize_agent_processes(agent_data)
+        resources = agent_data.get('resources', {})
+
         # Add alert info (does NOT trigger SSH)
-        processes = self.check_and_auto_restart(server_id, processes)
+        processes = self.check_and_auto_restart(server_id, processes, auto_restart)
 
         # Determine status
         stopped_count = sum(1 for p in processes if p.get('status') == 'stopped')
@@ -1255,7 +1502,8 @@ class MonitorService:
         self._failure_counts[server_id] = 0  # reset failure counter
         return result
 
-    def _get_single_server_status_inner(self, server_id: str, server_config: Dict, os_type: str) -> Dict:
+    def _get_single_server_status_inner(self, server_id: str, server_config: Dict, os_type: str,
+                                        auto_restart: bool = True) -> Dict:
         """Inner implementation of single server status check.
 
         Priority order:
@@ -1267,7 +1515,7 @@ class MonitorService:
         # ------------------------------------------------------------------
         # Priority 1: Use fresh Agent data if available (no SSH needed)
         # ------------------------------------------------------------------
-        agent_result = self._build_result_from_agent_data(server_id, server_config, os_type)
+        agent_result = self._build_result_from_agent_data(server_id, server_config, os_type, auto_restart)
         if agent_result is not None:
             logger.debug(f"[AgentFirst] {server_id}: using fresh Agent data, skipping SSH")
             return agent_result
@@ -1275,17 +1523,8 @@ class MonitorService:
         # ------------------------------------------------------------------
         # Priority 2: SSH collection (Agent data stale or absent)
         # ------------------------------------------------------------------
-        is_local = server_config.get('ip', '') in self._local_ips
-
         # Check if SSH is in heavy backoff (consecutive failures >= threshold)
-        ssh_blocked = False
-        if not is_local:
-            ssh_status = self._ssh_connection_status.get(server_id, {})
-            consecutive_failures = ssh_status.get('consecutive_failures', 0)
-            if not ssh_status.get('connected', True) and consecutive_failures >= self.SSH_FAILURE_THRESHOLD:
-                ssh_blocked = True
-
-        if not ssh_blocked:
+        if not self._ssh_blocked(server_id):
             # Attempt SSH collection
             agent_online = self.agent_data.is_agent_online(server_id)
 
@@ -1302,7 +1541,7 @@ class MonitorService:
             resources = self.check_server_resources(server_id)
 
             # Check for stopped processes and auto restart, also add alert info
-            processes = self.check_and_auto_restart(server_id, processes)
+            processes = self.check_and_auto_restart(server_id, processes, auto_restart)
 
             # Determine status based on processes
             stopped_count = sum(1 for p in processes if p.get('status') == 'stopped')
@@ -1405,58 +1644,52 @@ class MonitorService:
             reason=f'ssh_failed (failures: {failure_count})'
         )
 
-    def get_all_servers_status(self) -> List[Dict]:
-        """Get status of all monitored servers using parallel execution.
-        Guarantees ALL servers from SERVERS config appear in the result,
-        even if ThreadPoolExecutor or eventlet causes issues."""
-        # Pre-populate results dict keyed by server_id to guarantee all servers are present
-        # This replaces the old safety net approach with a more robust pattern
-        results_dict: Dict[str, Dict] = {}
+    def collect_servers_status(self, server_ids: List[str], auto_restart: bool = True) -> Dict[str, Dict]:
+        """
+        Full status of several servers with the asyncssh backend: every SSH
+        command the sweep needs goes out in one run_many call (all hosts on the
+        event loop, each command cancelled at its own timeout), then each
+        status is built from the prefetched outputs in this thread.
+        """
+        plan = []  # [(server_id, params, command, timeout)]
+        for server_id in server_ids:
+            params = self._ssh_connect_params(server_id)
+            if params:
+                plan.extend((server_id, params, command, timeout)
+                            for command, timeout in self._status_ssh_commands(server_id))
 
-        # Use ThreadPoolExecutor for parallel checking
         try:
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                future_to_server = {
-                    executor.submit(self._get_single_server_status, server_id): server_id
-                    for server_id in SERVERS.keys()
-                }
-
-                try:
-                    for future in as_completed(future_to_server, timeout=40):
-                        server_id = future_to_server[future]
-                        try:
-                            result = future.result(timeout=30)
-                            results_dict[server_id] = result
-                        except Exception as e:
-                            error_msg = str(e).encode('ascii', errors='replace').decode('ascii')
-                            logger.warning(f"[ThreadPool] future.result() error for {server_id}: {error_msg}")
-                            if server_id not in results_dict:
-                                results_dict[server_id] = self._create_offline_result(
-                                    server_id, SERVERS[server_id],
-                                    SERVERS[server_id].get('os', 'windows'),
-                                    reason=f'future_error: {error_msg[:80]}'
-                                )
-                except (TimeoutError, Exception) as e:
-                    # Some futures didn't complete within 40s, mark them as offline
-                    # Note: catch both TimeoutError and generic Exception for eventlet compatibility
-                    unfinished_ids = [
-                        server_id for future, server_id in future_to_server.items()
-                        if not future.done()
-                    ]
-                    if unfinished_ids:
-                        logger.warning(f"[ThreadPool] timeout: {len(unfinished_ids)} futures unfinished ({unfinished_ids}) - {e}")
-                    for future, server_id in future_to_server.items():
-                        if not future.done():
-                            future.cancel()
-                        # Add offline result for any server not yet in results_dict
-                        if server_id not in results_dict:
-                            results_dict[server_id] = self._create_offline_result(
-                                server_id, SERVERS[server_id],
-                                SERVERS[server_id].get('os', 'windows'),
-                                reason=f'threadpool_timeout'
-                            )
+            outputs = self.async_ssh.run_many(plan)
         except Exception as e:
-            logger.error(f"[ThreadPool] executor error: {e}")
+            logger.warning(f"[AsyncSSH] Batched sweep failed: {e!r}")
+            outputs = [e] * len(plan)
+
+        prefetched: Dict[str, Dict] = {}
+        for (server_id, _, command, _), output in zip(plan, outputs):
+            prefetched.setdefault(server_id, {})[command] = output
+
+        self._prefetch.outputs = prefetched
+        try:
+            return {
+                server_id: self._get_single_server_status(server_id, auto_restart)
+                for server_id in server_ids
+            }
+        finally:
+            self._prefetch.outputs = None
+
+    def get_all_servers_status(self, auto_restart: bool = True) -> List[Dict]:
+        """Get status of all monitored servers using parallel execution.
+        Guarantees ALL servers from SERVERS config appear in the result,
+        even if ThreadPoolExecutor or eventlet causes issues."""
+        if self.async_ssh is not None:
+            # One event loop for every host instead of STATUS_WORKERS threads
+            try:
+                results_dict = self.collect_servers_status(list(SERVERS.keys()), auto_restart)
+            except Exception as e:
+                logger.error(f"[AsyncSSH] collect_servers_status error: {e}")
+                results_dict = {}
+        else:
+            results_dict = self._get_servers_status_threaded(auto_restart)
 
         # Final safety net: ensure ALL servers from config are in results
         # This is the absolute last line of defense against server disappearance
@@ -1474,6 +1707,59 @@ class MonitorService:
         results.sort(key=lambda x: SERVERS.get(x['id'], {}).get('sort_order', 99))
         return results
 
+    def _get_servers_status_threaded(self, auto_restart: bool = True) -> Dict[str, Dict]:
+        """get_all_servers_status on the paramiko pool: one server per STATUS_WORKERS thread"""
+        # Pre-populate results dict keyed by server_id to guarantee all servers are present
+        # This replaces the old safety net approach with a more robust pattern
+        results_dict: Dict[str, Dict] = {}
+
+        # Use the shared long-lived executor for parallel checking
+        try:
+            executor = self._status_executor
+            future_to_server = {
+                executor.submit(self._get_single_server_status, server_id, auto_restart): server_id
+                for server_id in SERVERS.keys()
+            }
+
+            try:
+                for future in as_completed(future_to_server, timeout=40):
+                    server_id = future_to_server[future]
+                    try:
+                        result = future.result(timeout=30)
+                        results_dict[server_id] = result
+                    except Exception as e:
+                        error_msg = str(e).encode('ascii', errors='replace').decode('ascii')
+                        logger.warning(f"[ThreadPool] future.result() error for {server_id}: {error_msg}")
+                        if server_id not in results_dict:
+                            results_dict[server_id] = self._create_offline_result(
+                                server_id, SERVERS[server_id],
+                                SERVERS[server_id].get('os', 'windows'),
+                                reason=f'future_error: {error_msg[:80]}'
+                            )
+            except (TimeoutError, Exception) as e:
+                # Some futures didn't complete within 40s, mark them as offline
+                # Note: catch both TimeoutError and generic Exception for eventlet compatibility
+                unfinished_ids = [
+                    server_id for future, server_id in future_to_server.items()
+                    if not future.done()
+                ]
+                if unfinished_ids:
+                    logger.warning(f"[ThreadPool] timeout: {len(unfinished_ids)} futures unfinished ({unfinished_ids}) - {e}")
+                for future, server_id in future_to_server.items():
+                    if not future.done():
+                        future.cancel()
+                    # Add offline result for any server not yet in results_dict
+                    if server_id not in results_dict:
+                        results_dict[server_id] = self._create_offline_result(
+                            server_id, SERVERS[server_id],
+                            SERVERS[server_id].get('os', 'windows'),
+                            reason=f'threadpool_timeout'
+                        )
+        except Exception as e:
+            logger.error(f"[ThreadPool] executor error: {e}")
+
+        return results_dict
+
     def _create_offline_result(self, server_id: str, server_config: Dict, os_type: str, reason: str = 'unknown') -> Dict:
         """Create offline status result for a server"""
         return {
@@ -1736,23 +2022,7 @@ class MonitorService:
         """Get error logs from Windows server for today"""
         errors = []
 
-        # Build log file pattern
-        if service_name:
-            # Service-specific log: ServiceName_YYYY-MM-DD.log or ServiceName.log
-            log_patterns = [
-                f'{log_path}\\{service_name}_{date_str}.log',
-                f'{log_path}\\{service_name}.log'
-            ]
-        else:
-            # General ACC log
-            log_patterns = [
-                f'{log_path}\\ACC.Server_{date_str}.log',
-                f'{log_path}\\ACC.Server.log'
-            ]
-
-        for log_file in log_patterns:
-            # Use findstr to search for errors in log file
-            cmd = f'findstr /I /C:"Error" /C:"Exception" /C:"Failed" /C:"ORA-" "{log_file}" 2>nul | more +0'
+        for cmd in self._windows_error_log_commands(log_path, service_name, date_str):
             output = self.exec_ssh_command(server_id, cmd, timeout=15)
 
             if output:
@@ -1777,7 +2047,7 @@ class MonitorService:
         """Get error logs from Linux server for today.
 
         Priority:
-          1. Agent-reported container_error_logs (Phase 2) -- instant, no SSH
+          1. Agent-reported container logs (Phase 2) -- instant, no SSH
           2. SSH fallback with timeout protection (Phase 1)
 
         Uses exec_ssh_command (not raw client.exec_command) to leverage
@@ -1787,41 +2057,37 @@ class MonitorService:
 
         try:
             # -----------------------------------------------------------
-            # Priority 1: Use Agent-reported container error logs if fresh
-            # Agent collects these locally via 'docker logs' on the server,
-            # eliminating the need for SSH remote docker logs calls.
+            # Priority 1: Use Agent-reported container logs if fresh
+            # The agent follows container logs locally through the Docker
+            # API and reports new lines; agent_data keeps a per-container
+            # ring buffer of them, so nothing is re-scanned here.
             # -----------------------------------------------------------
             if container_name and self._has_fresh_agent_data(server_id):
                 agent_data = self.agent_data.get_agent_data(server_id)
-                if agent_data:
-                    container_logs = agent_data.get('container_error_logs', {})
-                    if container_name in container_logs:
-                        agent_errors = container_logs[container_name]
-                        for err in agent_errors:
-                            msg = err.get('message', '')
-                            if msg and len(msg) > 10:
-                                errors.append({
-                                    'message': msg[:300],
-                                    'level': self._classify_error_level(msg),
-                                    'timestamp': err.get('timestamp', date_str),
-                                    'source': container_name,
-                                    'data_source': 'agent'
-                                })
-                        if errors:
-                            logger.debug(f"[AgentLogs] {server_id}/{container_name}: "
-                                         f"got {len(errors)} errors from agent data")
-                            return errors
-                        # Agent data exists but no errors -- that is a valid result
-                        return errors
+                if agent_data and ('container_logs' in agent_data or
+                                   container_name in agent_data.get('container_error_logs', {})):
+                    for err in self.agent_data.get_container_logs(server_id, container_name):
+                        msg = err.get('message', '')
+                        timestamp = err.get('timestamp', date_str)
+                        if msg and len(msg) > 10 and timestamp.startswith(date_str):
+                            errors.append({
+                                'message': msg[:300],
+                                'level': self._classify_error_level(msg),
+                                'timestamp': timestamp,
+                                'source': container_name,
+                                'data_source': 'agent'
+                            })
+                    # Same size as the old 'docker logs ... | tail -50' window
+                    errors = errors[-50:]
+                    logger.debug(f"[AgentLogs] {server_id}/{container_name}: "
+                                 f"got {len(errors)} lines from agent data")
+                    # Agent data exists but no errors -- that is a valid result
+                    return errors
 
             # -----------------------------------------------------------
             # Priority 2: SSH fallback with timeout protection
             # -----------------------------------------------------------
-            if container_name:
-                cmd = f'timeout 10 docker logs {container_name} --since {date_str}T00:00:00 2>&1 | grep -iE "error|exception|failed" | tail -20'
-            else:
-                cmd = f'timeout 10 grep -iE "error|exception|failed" {log_path}/*.log 2>/dev/null | tail -20'
-
+            cmd = self._linux_error_log_command(log_path, container_name, date_str)
             output = self.exec_ssh_command(server_id, cmd, timeout=20)
 
             if output:
@@ -1860,25 +2126,7 @@ class MonitorService:
 
     def _classify_error_level(self, message: str) -> str:
         """Classify error level based on message content"""
-        message_lower = message.lower()
-
-        critical_keywords = ['ora-00600', 'ora-04031', 'outofmemoryexception', 'crash', 'fatal']
-        error_keywords = ['exception', 'error', 'ora-', 'failed']
-        warning_keywords = ['warning', 'timeout', 'retry']
-
-        for keyword in critical_keywords:
-            if keyword in message_lower:
-                return 'critical'
-
-        for keyword in error_keywords:
-            if keyword in message_lower:
-                return 'error'
-
-        for keyword in warning_keywords:
-            if keyword in message_lower:
-                return 'warning'
-
-        return 'info'
+        return ERROR_LEVEL_CLASSIFIER.classify(message)
 
     # ============ Alert Info Methods ============
 
@@ -1911,8 +2159,10 @@ class MonitorService:
 
         return alert_info
 
-    def check_and_auto_restart(self, server_id: str, processes: List[Dict]) -> List[Dict]:
-        """Check processes and auto restart stopped ones, return updated list with alerts"""
+    def check_and_auto_restart(self, server_id: str, processes: List[Dict],
+                               auto_restart: bool = True) -> List[Dict]:
+        """Check processes and auto restart stopped ones, return updated list with alerts.
+        With auto_restart=False only the alert info is added."""
         updated_processes = []
 
         for proc in processes:
@@ -1926,7 +2176,7 @@ class MonitorService:
             proc['alert_info'] = alert_info
 
             # Auto restart if stopped
-            if proc_status == 'stopped' and Config.AUTO_RESTART_ENABLED:
+            if auto_restart and proc_status == 'stopped' and Config.AUTO_RESTART_ENABLED:
                 # Skip Oracle - it's a database, not a restartable process
                 if proc_name.lower() == 'oracle':
                     updated_processes.append(proc)
@@ -1956,3 +2206,7 @@ class MonitorService:
             updated_processes.append(proc)
 
         return updated_processes
+
+
+# Global singleton instance - shared by routes, websocket handlers and the scheduler
+monitor_service = MonitorService()
@@ -9,8 +9,11 @@ import logging
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
 from app import db
+from config.settings import Config
 from app.models.oracle_ops_models import (
     OpsTablespaceData,
+    OpsTablespaceLatest,
+    OpsTablespaceTrend,
     OpsBackupRecord,
     OpsCleanupRecord,
     OpsAlertRecord
@@ -30,6 +33,15 @@ ORACLE_SERVERS = {
 
 AGENT_API_PORT = 5005
 
+TREND_GRANULARITIES = ('hour', 'day')
+
+
+def _bucket_start(dt, granularity):
+    """Truncate a datetime to the start of its hour/day bucket"""
+    if granularity == 'hour':
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
 
 class OracleOpsService:
     """Oracle Ops business logic service"""
@@ -59,6 +71,7 @@ class OracleOpsService:
         # usage_pct is now uniformly maxsize-based (used / maxsize)
         # Filter out invalid records: empty name, 'UNKNOWN', or zero max_mb
         tablespaces = data.get('tablespaces', [])
+        trend_samples = []
         for ts in tablespaces:
             ts_name = (ts.get('tablespace_name') or '').strip()
             if not ts_name or ts_name.upper() == 'UNKNOWN':
@@ -77,8 +90,14 @@ class OracleOpsService:
                 collected_at=collected_at or datetime.now()
             )
             db.session.add(record)
+            trend_samples.append(record)
             stored['tablespaces'] += 1
 
+        # Keep the current-state table and hourly/daily trend buckets in step (same transaction)
+        if trend_samples:
+            self._update_tablespace_latest(server_id, server_name, trend_samples)
+            self._update_tablespace_trends(server_id, server_name, trend_samples)
+
         # Store backup records
         # Note: Backup records are primarily submitted via /api/oracle-ops/backup/register
         # by the backup operator after each backup completes. This section handles any
@@ -175,6 +194,11 @@ class OracleOpsService:
         ).all()
         latest_backups_map = {b.server_id: b for b in latest_backups_query}
 
+        # Batch query: current tablespace state for every server (single indexed read)
+        latest_ts_map = {}
+        for row in OpsTablespaceLatest.query.all():
+            latest_ts_map.setdefault(row.server_id, []).append(row)
+
         for server_id, info in ORACLE_SERVERS.items():
             server_data = {
                 'server_id': server_id,
@@ -195,15 +219,11 @@ class OracleOpsService:
             }
 
             # Get the latest tablespace data for this server
-            latest_ts = OpsTablespaceData.query.filter_by(
-                server_id=server_id
-            ).order_by(
-                OpsTablespaceData.collected_at.desc()
-            ).limit(50).all()
+            latest_ts = latest_ts_map.get(server_id, [])
 
             if latest_ts:
                 # Get the most recent collection timestamp
-                latest_time = latest_ts[0].collected_at
+                latest_time = max((t.collected_at for t in latest_ts if t.collected_at), default=None)
                 server_data['last_report_time'] = latest_time.isoformat() if latest_time else None
 
                 # Filter to only the most recent collection batch
@@ -269,77 +289,254 @@ class OracleOpsService:
 
     def get_tablespaces(self, server_id=None):
         """Get tablespace details, optionally filtered by server_id"""
-        query = OpsTablespaceData.query
+        # Current-state table holds only the latest collection per server+tablespace
+        query = OpsTablespaceLatest.query
 
         if server_id:
             query = query.filter_by(server_id=server_id)
 
-        # Get the latest collection for each server+tablespace combination
-        subquery = db.session.query(
-            OpsTablespaceData.server_id,
-            OpsTablespaceData.tablespace_name,
-            func.max(OpsTablespaceData.collected_at).label('max_collected')
-        ).group_by(
-            OpsTablespaceData.server_id,
-            OpsTablespaceData.tablespace_name
-        )
-
-        if server_id:
-            subquery = subquery.filter(OpsTablespaceData.server_id == server_id)
-
-        subquery = subquery.subquery()
-
-        results = OpsTablespaceData.query.join(
-            subquery,
-            db.and_(
-                OpsTablespaceData.server_id == subquery.c.server_id,
-                OpsTablespaceData.tablespace_name == subquery.c.tablespace_name,
-                OpsTablespaceData.collected_at == subquery.c.max_collected
-            )
-        ).order_by(
-            OpsTablespaceData.server_id,
-            OpsTablespaceData.usage_pct.desc()
+        results = query.order_by(
+            OpsTablespaceLatest.server_id,
+            OpsTablespaceLatest.usage_pct.desc()
         ).all()
 
         return [r.to_dict() for r in results]
 
-    def get_tablespace_trends(self, server_id=None, days=7):
+    def get_tablespace_trends(self, server_id=None, days=7, points=None):
         """
         Get tablespace usage trends for ECharts.
-        Returns data grouped by tablespace name with time series.
+        Returns data grouped by tablespace name with time series, read from the
+        hourly (short ranges) or daily trend buckets and downsampled to at most
+        `points` points per tablespace, so cost doesn't grow with the range.
         """
-        since = datetime.now() - timedelta(days=days)
-        query = OpsTablespaceData.query.filter(
-            OpsTablespaceData.collected_at >= since
+        points = points or Config.TABLESPACE_TREND_POINTS
+        granularity = 'hour' if days <= Config.TABLESPACE_TREND_HOURLY_DAYS else 'day'
+        since = _bucket_start(datetime.now() - timedelta(days=days), granularity)
+
+        query = db.session.query(
+            OpsTablespaceTrend.server_id,
+            OpsTablespaceTrend.server_name,
+            OpsTablespaceTrend.tablespace_name,
+            OpsTablespaceTrend.bucket_start,
+            OpsTablespaceTrend.min_pct,
+            OpsTablespaceTrend.max_pct,
+            OpsTablespaceTrend.last_pct,
+            OpsTablespaceTrend.last_used_mb,
+            OpsTablespaceTrend.last_max_mb,
+        ).filter(
+            OpsTablespaceTrend.granularity == granularity,
+            OpsTablespaceTrend.bucket_start >= since
         )
 
         if server_id:
-            query = query.filter_by(server_id=server_id)
+            query = query.filter(OpsTablespaceTrend.server_id == server_id)
 
-        data = query.order_by(OpsTablespaceData.collected_at.asc()).all()
+        rows = query.order_by(OpsTablespaceTrend.bucket_start.asc()).all()
 
-        # Group by tablespace_name
+        # Group by tablespace_name (tuple unpacking: Row attribute access is slow at this volume)
         trends = {}
-        for record in data:
-            key = f"{record.server_id}_{record.tablespace_name}"
-            if key not in trends:
-                trends[key] = {
-                    'server_id': record.server_id,
-                    'server_name': record.server_name,
-                    'tablespace_name': record.tablespace_name,
+        times = {}
+        for sid, sname, ts_name, bucket_start, min_pct, max_pct, last_pct, used_mb, max_mb in rows:
+            key = f"{sid}_{ts_name}"
+            trend = trends.get(key)
+            if trend is None:
+                trend = trends[key] = {
+                    'server_id': sid,
+                    'server_name': sname,
+                    'tablespace_name': ts_name,
+                    'granularity': granularity,
                     'data_points': []
                 }
 
-            # usage_pct is now uniformly maxsize-based (used / maxsize)
-            trends[key]['data_points'].append({
-                'time': record.collected_at.isoformat() if record.collected_at else None,
-                'usage_pct': record.usage_pct,
-                'used_mb': record.used_mb,
-                'max_mb': record.max_mb,
+            # Buckets are shared by every tablespace; format each timestamp once
+            time_str = times.get(bucket_start)
+            if time_str is None:
+                time_str = times[bucket_start] = bucket_start.isoformat()
+
+            # usage_pct is the last sample in the bucket (maxsize-based)
+            trend['data_points'].append({
+                'time': time_str,
+                'usage_pct': last_pct,
+                'min_pct': min_pct,
+                'max_pct': max_pct,
+                'used_mb': used_mb,
+                'max_mb': max_mb,
             })
 
+        for trend in trends.values():
+            trend['data_points'] = self._downsample_trend(trend['data_points'], points)
+
         return list(trends.values())
 
+    @staticmethod
+    def _downsample_trend(data_points, points):
+        """Merge consecutive buckets: min of mins, max of maxes, last of lasts"""
+        if points <= 0 or len(data_points) <= points:
+            return data_points
+        group = -(-len(data_points) // points)
+        merged = []
+        for i in range(0, len(data_points), group):
+            part = data_points[i:i + group]
+            last = part[-1]
+            merged.append({
+                'time': last['time'],
+                'usage_pct': last['usage_pct'],
+                'min_pct': min(p['min_pct'] for p in part),
+                'max_pct': max(p['max_pct'] for p in part),
+                'used_mb': last['used_mb'],
+                'max_mb': last['max_mb'],
+            })
+        return merged
+
+    def _update_tablespace_latest(self, server_id, server_name, records):
+        """Upsert the newest sample per tablespace into ops_tablespace_latest"""
+        existing = {
+            row.tablespace_name: row
+            for row in OpsTablespaceLatest.query.filter_by(server_id=server_id).all()
+        }
+        for record in records:
+            row = existing.get(record.tablespace_name)
+            if row is None:
+                row = existing[record.tablespace_name] = OpsTablespaceLatest(
+                    server_id=server_id,
+                    tablespace_name=record.tablespace_name
+                )
+                db.session.add(row)
+            elif row.collected_at and record.collected_at < row.collected_at:
+                # Late/out-of-order report: keep the newer state
+                continue
+            row.server_name = server_name
+            row.used_mb = record.used_mb
+            row.max_mb = record.max_mb
+            row.usage_pct = record.usage_pct
+            row.collected_at = record.collected_at
+            row.reported_at = datetime.now()
+
+    def _update_tablespace_trends(self, server_id, server_name, records):
+        """Fold new OpsTablespaceData records into their hour/day trend buckets"""
+        keys = {
+            (record.tablespace_name, granularity, _bucket_start(record.collected_at, granularity))
+            for record in records for granularity in TREND_GRANULARITIES
+        }
+        existing = {
+            (row.tablespace_name, row.granularity, row.bucket_start): row
+            for row in OpsTablespaceTrend.query.filter(
+                OpsTablespaceTrend.server_id == server_id,
+                OpsTablespaceTrend.tablespace_name.in_({k[0] for k in keys}),
+                OpsTablespaceTrend.bucket_start.in_({k[2] for k in keys})
+            ).all()
+        }
+
+        for record in records:
+            for granularity in TREND_GRANULARITIES:
+                key = (record.tablespace_name, granularity, _bucket_start(record.collected_at, granularity))
+                bucket = existing.get(key)
+                if bucket is None:
+                    bucket = existing[key] = OpsTablespaceTrend(
+                        server_id=server_id,
+                        server_name=server_name,
+                        tablespace_name=record.tablespace_name,
+                        granularity=granularity,
+                        bucket_start=key[2],
+                        samples=0
+                    )
+                    db.session.add(bucket)
+                bucket.add_sample(record.usage_pct, record.used_mb, record.max_mb, record.collected_at)
+
+    def backfill_tablespace_latest(self):
+        """
+        Fill ops_tablespace_latest from ops_tablespace_data.
+        Runs once on startup when the current-state table is still empty.
+        """
+        try:
+            if OpsTablespaceLatest.query.first() is not None:
+                return 0
+
+            subquery = db.session.query(
+                OpsTablespaceData.server_id,
+                OpsTablespaceData.tablespace_name,
+                func.max(OpsTablespaceData.collected_at).label('max_collected')
+            ).group_by(
+                OpsTablespaceData.server_id,
+                OpsTablespaceData.tablespace_name
+            ).subquery()
+
+            rows = OpsTablespaceData.query.join(
+                subquery,
+                db.and_(
+                    OpsTablespaceData.server_id == subquery.c.server_id,
+                    OpsTablespaceData.tablespace_name == subquery.c.tablespace_name,
+                    OpsTablespaceData.collected_at == subquery.c.max_collected
+                )
+            ).all()
+
+            latest = {}
+            for row in rows:
+                latest[(row.server_id, row.tablespace_name)] = OpsTablespaceLatest(
+                    server_id=row.server_id,
+                    server_name=row.server_name,
+                    tablespace_name=row.tablespace_name,
+                    used_mb=row.used_mb,
+                    max_mb=row.max_mb,
+                    usage_pct=row.usage_pct,
+                    collected_at=row.collected_at,
+                    reported_at=row.reported_at
+                )
+            db.session.add_all(latest.values())
+            db.session.commit()
+            if latest:
+                logger.info("Backfilled %d latest tablespace rows", len(latest))
+            return len(latest)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Latest tablespace backfill failed (non-critical): %s", e)
+            return 0
+
+    def backfill_tablespace_trends(self):
+        """
+        Build trend buckets from existing ops_tablespace_data rows.
+        Runs once on startup when the trend table is still empty.
+        """
+        try:
+            if OpsTablespaceTrend.query.first() is not None:
+                return 0
+            rows = db.session.query(
+                OpsTablespaceData.server_id,
+                OpsTablespaceData.server_name,
+                OpsTablespaceData.tablespace_name,
+                OpsTablespaceData.usage_pct,
+                OpsTablespaceData.used_mb,
+                OpsTablespaceData.max_mb,
+                OpsTablespaceData.collected_at,
+            ).filter(OpsTablespaceData.collected_at.isnot(None)).yield_per(5000)
+
+            buckets = {}
+            for row in rows:
+                for granularity in TREND_GRANULARITIES:
+                    start = _bucket_start(row.collected_at, granularity)
+                    key = (row.server_id, row.tablespace_name, granularity, start)
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        bucket = buckets[key] = OpsTablespaceTrend(
+                            server_id=row.server_id,
+                            server_name=row.server_name,
+                            tablespace_name=row.tablespace_name,
+                            granularity=granularity,
+                            bucket_start=start,
+                            samples=0
+                        )
+                    bucket.add_sample(row.usage_pct, row.used_mb, row.max_mb, row.collected_at)
+
+            db.session.add_all(buckets.values())
+            db.session.commit()
+            if buckets:
+                logger.info("Backfilled %d tablespace trend buckets", len(buckets))
+            return len(buckets)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Tablespace trend backfill failed (non-critical): %s", e)
+            return 0
+
     def get_backups(self, server_id=None, status=None, page=1, page_size=20):
         """Get backup execution records with pagination and filters"""
         query = OpsBackupRecord.query
@@ -533,6 +730,10 @@ class OracleOpsService:
                 ts_deleted = OpsTablespaceData.query.filter(
                     OpsTablespaceData.collected_at < cutoff
                 ).delete(synchronize_session=False)
+                # Tablespaces not reported for N days drop out of the current state too
+                OpsTablespaceLatest.query.filter(
+                    OpsTablespaceLatest.collected_at < cutoff
+                ).delete(synchronize_session=False)
             else:
                 # No recent data would survive - skip cleanup to preserve display
                 total_count = OpsTablespaceData.query.count()
@@ -544,6 +745,16 @@ class OracleOpsService:
                         total_count, days
                     )
 
+            # Trend buckets outlive the raw rows (hourly/daily retention)
+            trend_deleted = 0
+            for granularity, keep_days in (
+                    ('hour', Config.TABLESPACE_TREND_HOURLY_RETENTION_DAYS),
+                    ('day', Config.TABLESPACE_TREND_DAILY_RETENTION_DAYS)):
+                trend_deleted += OpsTablespaceTrend.query.filter(
+                    OpsTablespaceTrend.granularity == granularity,
+                    OpsTablespaceTrend.bucket_start < datetime.now() - timedelta(days=keep_days)
+                ).delete(synchronize_session=False)
+
             # Delete old alert records (keep 30 days)
             alert_cutoff = datetime.now() - timedelta(days=30)
             alert_deleted = OpsAlertRecord.query.filter(
@@ -558,7 +769,8 @@ class OracleOpsService:
                     "%d alert records (>30 days)",
                     ts_deleted, days, alert_deleted
                 )
-            return {'tablespaces_deleted': ts_deleted, 'alerts_deleted': alert_deleted}
+            return {'tablespaces_deleted': ts_deleted, 'alerts_deleted': alert_deleted,
+                    'trend_buckets_deleted': trend_deleted}
         except Exception as e:
             db.session.rollback()
             logger.error("Data cleanup failed: %s", e)
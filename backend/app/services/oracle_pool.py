@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Oracle Session Pools
+One driver-side session pool per DSN/user (monitored databases keyed by
+server_id, EAI schemas keyed by 'eai:<schema>'), created lazily on first use.
+Pools keep min..max sessions open, ping sessions that sat idle longer than
+ORACLE_POOL_PING_INTERVAL on checkout and cache prepared statements, so a
+tablespace check is a checkout instead of a full logon.
+"""
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config.settings import Config
+
+# Prefer cx_Oracle (what the rest of the backend uses); python-oracledb has the same pool API
+try:
+    import cx_Oracle as oracle_driver
+    HAS_ORACLE = True
+except ImportError:
+    try:
+        import oracledb as oracle_driver
+        HAS_ORACLE = True
+    except ImportError:
+        oracle_driver = None
+        HAS_ORACLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ORA- codes meaning the session itself is unusable and must not go back to the pool
+DEAD_SESSION_CODES = {28, 1012, 3113, 3114, 3135, 12153, 12537, 12547, 12570, 12571}
+
+
+def is_dead_session_error(exc: Exception) -> bool:
+    """True if a driver error means the connection is broken (drop it, don't release it)"""
+    error = exc.args[0] if exc.args else None
+    if getattr(error, 'isrecoverable', False):
+        return True
+    return getattr(error, 'code', None) in DEAD_SESSION_CODES
+
+
+class OraclePoolManager:
+    """Thread-safe registry of Oracle session pools keyed by a logical name"""
+
+    def __init__(self, min_sessions: int = 1, max_sessions: int = 4, increment: int = 1,
+                 wait_timeout_ms: int = 5000, ping_interval: int = 60,
+                 stmt_cache_size: int = 20, idle_timeout: int = 300):
+        self.min_sessions = min_sessions
+        self.max_sessions = max_sessions
+        self.increment = increment
+        # How long acquire() waits for a free session when the pool is at max
+        self.wait_timeout_ms = wait_timeout_ms
+        # Sessions idle longer than this are pinged by the driver on checkout
+        self.ping_interval = ping_interval
+        self.stmt_cache_size = stmt_cache_size
+        # Sessions above min idle longer than this are closed by the driver
+        self.idle_timeout = idle_timeout
+
+        # Key: pool key, Value: {'pool', 'signature', 'created_at', 'stats'}
+        self._pools: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Per-key locks so one slow pool creation doesn't block other databases
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._key_locks[key] = lock
+            return lock
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {
+            'acquires': 0,
+            'acquire_failures': 0,
+            'acquire_wait_total': 0.0,
+            'acquire_wait_max': 0.0,
+            'drops': 0,
+            'create_failures': 0,
+        }
+
+    def _create_pool(self, user: str, password: str, dsn: str, max_sessions: int):
+        """Create a driver pool (cx_Oracle.SessionPool or oracledb.create_pool)"""
+        getmode = getattr(oracle_driver, 'SPOOL_ATTRVAL_TIMEDWAIT', None)
+        if getmode is None:
+            getmode = getattr(oracle_driver, 'POOL_GETMODE_TIMEDWAIT')
+        kwargs = {
+            'user': user,
+            'password': password,
+            'dsn': dsn,
+            'min': min(self.min_sessions, max_sessions),
+            'max': max_sessions,
+            'increment': self.increment,
+            'getmode': getmode,
+            'wait_timeout': self.wait_timeout_ms,
+            'timeout': self.idle_timeout,
+            'ping_interval': self.ping_interval,
+        }
+        create = getattr(oracle_driver, 'create_pool', None)
+        if create is not None:
+            pool = create(**kwargs)
+        else:
+            pool = oracle_driver.SessionPool(threaded=True, encoding='UTF-8', **kwargs)
+        pool.stmtcachesize = self.stmt_cache_size
+        return pool
+
+    def _get_pool(self, key: str, user: str, password: str, dsn: str,
+                  max_sessions: Optional[int]) -> Optional[Dict]:
+        """Return the pool entry for key, (re)creating it if missing or its DSN/user changed"""
+        signature = (dsn, user, password)
+        entry = self._pools.get(key)
+        if entry is not None and entry['signature'] == signature:
+            return entry
+
+        with self._key_lock(key):
+            entry = self._pools.get(key)
+            if entry is not None and entry['signature'] == signature:
+                return entry
+            stats = entry['stats'] if entry is not None else self._new_stats()
+            if entry is not None:
+                # servers.json was reloaded with a different database for this key
+                logger.info(f"[OraclePool] Connection settings for {key} changed, recreating pool")
+                self._close_pool(key, entry['pool'])
+
+            try:
+                pool = self._create_pool(user, password, dsn, max_sessions or self.max_sessions)
+            except Exception as e:
+                stats['create_failures'] += 1
+                with self._lock:
+                    self._pools.pop(key, None)
+                logger.warning(f"[OraclePool] Cannot create pool for {key} ({dsn}): {e}")
+                return None
+
+            entry = {'pool': pool, 'signature': signature, 'dsn': dsn,
+                     'created_at': time.time(), 'stats': stats}
+            with self._lock:
+                self._pools[key] = entry
+            logger.info(f"[OraclePool] Created pool {key} -> {dsn} (max {pool.max})")
+            return entry
+
+    def acquire(self, key: str, user: str, password: str, dsn: str,
+                max_sessions: Optional[int] = None):
+        """
+        Check a session out of the pool for key, creating the pool on first use.
+        Returns None if the driver is missing or no session could be obtained.
+        Callers must hand the connection back with release().
+        """
+        if not HAS_ORACLE:
+            return None
+        entry = self._get_pool(key, user, password, dsn, max_sessions)
+        if entry is None:
+            return None
+
+        stats = entry['stats']
+        started = time.perf_counter()
+        try:
+            conn = entry['pool'].acquire()
+        except Exception as e:
+            stats['acquire_failures'] += 1
+            logger.warning(f"[OraclePool] Acquire from {key} failed: {e}")
+            return None
+        waited = time.perf_counter() - started
+        with self._lock:
+            stats['acquires'] += 1
+            stats['acquire_wait_total'] += waited
+            if waited > stats['acquire_wait_max']:
+                stats['acquire_wait_max'] = waited
+        return conn
+
+    def release(self, key: str, conn, broken: bool = False) -> None:
+        """Return a session to its pool; broken sessions are dropped instead"""
+        if conn is None:
+            return
+        entry = self._pools.get(key)
+        try:
+            if entry is None:
+                conn.close()
+            elif broken:
+                entry['stats']['drops'] += 1
+                entry['pool'].drop(conn)
+            else:
+                entry['pool'].release(conn)
+        except Exception as e:
+            logger.debug(f"[OraclePool] Release to {key} failed: {e}")
+
+    @contextmanager
+    def connection(self, key: str, user: str, password: str, dsn: str,
+                   max_sessions: Optional[int] = None):
+        """
+        with oracle_pools.connection(...) as conn: - conn is None when unavailable.
+        Sessions that fail with a dead-session error are dropped from the pool.
+        """
+        conn = self.acquire(key, user, password, dsn, max_sessions)
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = is_dead_session_error(e)
+            raise
+        finally:
+            self.release(key, conn, broken=broken)
+
+    @staticmethod
+    def _close_pool(key: str, pool) -> None:
+        try:
+            pool.close(force=True)
+        except Exception as e:
+            logger.debug(f"[OraclePool] Close {key} error: {e}")
+
+    def close_all(self) -> None:
+        """Close every pool. Call on shutdown."""
+        with self._lock:
+            entries = list(self._pools.items())
+            self._pools.clear()
+        for key, entry in entries:
+            self._close_pool(key, entry['pool'])
+
+    def get_stats(self) -> Dict:
+        """Per-pool acquire wait / busy / opened counters for the health endpoint"""
+        pools = {}
+        for key, entry in list(self._pools.items()):
+            stats = entry['stats']
+            pool = entry['pool']
+            acquires = stats['acquires']
+            info = {
+                'dsn': entry['dsn'],
+                'age_seconds': int(time.time() - entry['created_at']),
+                'acquires': acquires,
+                'acquire_failures': stats['acquire_failures'],
+                'acquire_wait_ms_avg': round(stats['acquire_wait_total'] * 1000 / acquires, 2) if acquires else 0.0,
+                'acquire_wait_ms_max': round(stats['acquire_wait_max'] * 1000, 2),
+                'drops': stats['drops'],
+                'create_failures': stats['create_failures'],
+            }
+            try:
+                info.update({'busy': pool.busy, 'opened': pool.opened,
+                             'min': pool.min, 'max': pool.max})
+            except Exception:
+                pass
+            pools[key] = info
+        return {
+            'driver': getattr(oracle_driver, '__name__', None),
+            'pool_count': len(pools),
+            'pools': pools,
+        }
+
+
+# Global instance
+oracle_pools = OraclePoolManager(
+    min_sessions=Config.ORACLE_POOL_MIN,
+    max_sessions=Config.ORACLE_POOL_MAX,
+    increment=Config.ORACLE_POOL_INCREMENT,
+    wait_timeout_ms=Config.ORACLE_POOL_WAIT_TIMEOUT_MS,
+    ping_interval=Config.ORACLE_POOL_PING_INTERVAL,
+    stmt_cache_size=Config.ORACLE_STMT_CACHE_SIZE,
+    idle_timeout=Config.ORACLE_POOL_IDLE_TIMEOUT
+)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Agent Report Writer
+/api/agent/report validates and enqueues; this background writer drains the
+queue in batches and group-commits Server upserts and Alert rows in one
+transaction per batch, then updates the status snapshot and system log.
+The queue is bounded: when it is full the endpoint answers 503 + Retry-After
+so agents back off instead of piling up request threads.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from config.settings import SERVERS, Config
+from app.utils.log_classifier import is_today, level_from_tag
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def classify_agent_alert(msg: str, today_str: str) -> Optional[str]:
+    """
+    Level of an agent-reported log line, or None if it isn't from today.
+    Only date filter: lines whose embedded date is not today are skipped.
+    """
+    if not is_today(msg, today_str):
+        return None
+    return level_from_tag(msg) or 'info'
+
+
+def server_status_from_report(data: Dict) -> str:
+    """Determine server status based on reported processes/containers and resources"""
+    resources = data.get('resources', {})
+    items = data.get('processes', []) + data.get('containers', [])
+    if any(p.get('status') == 'stopped' for p in items):
+        return 'error'
+    if resources.get('cpu_usage', 0) > 90 or resources.get('memory_usage', 0) > 90:
+        return 'warning'
+    return 'normal'
+
+
+class AgentReportWriter:
+    """Bounded queue + background group-commit writer for agent reports"""
+
+    def __init__(self, max_queue: int = 1000, batch_size: int = 100, linger: float = 0.2):
+        self.app = None
+        self.batch_size = batch_size
+        self.linger = linger
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._latencies = deque(maxlen=500)  # recent commit latencies (seconds)
+        self._stats = {
+            'enqueued': 0,
+            'rejected': 0,
+            'batches': 0,
+            'reports_written': 0,
+            'alerts_written': 0,
+            'commit_errors': 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Bind to the Flask app and start the writer thread"""
+        self.app = app
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='report-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, server_id: str, data: Dict) -> bool:
+        """Enqueue a report. Returns False when the queue is full (caller should 503)."""
+        try:
+            self._queue.put_nowait((server_id, data, datetime.utcnow()))
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            return False
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+        return True
+
+    def _next_batch(self) -> List[Tuple[str, Dict, datetime]]:
+        """Block for the first report, then gather more for up to `linger` seconds"""
+        batch = [self._queue.get()]
+        deadline = time.time() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"[ReportWriter] Batch of {len(batch)} reports failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, Dict, datetime]]) -> None:
+        from app import db
+        from app.models import Server, Alert
+        from app.services.monitor_service import monitor_service
+        from app.services.metrics_store import metrics_store
+        from app.services.log_index import log_index
+        from app.api.websocket import broadcast_server_status, ingest_agent_alerts
+
+        today_str = datetime.utcnow().strftime('%Y-%m-%d')
+
+        # Latest report per server wins for the Server row
+        latest: Dict[str, Tuple[Dict, datetime]] = {}
+        alerts: List[Alert] = []
+        log_lines: List[Tuple[str, str, str]] = []
+
+        for server_id, data, received_at in batch:
+            latest[server_id] = (data, received_at)
+
+            # Process alerts from agent (limit to avoid spam).
+            # All levels are written to the system log; error/critical go to the Alert table.
+            for alert_data in data.get('alerts', [])[:50]:
+                msg = alert_data.get('message', '')
+                log_level = classify_agent_alert(msg, today_str)
+                if log_level is None:
+                    continue
+                if log_level in ('error', 'critical'):
+                    alerts.append(Alert(
+                        server_id=server_id,
+                        level=log_level,
+                        source='agent',
+                        message=msg[:500]
+                    ))
+                log_lines.append((server_id, msg, log_level))
+
+        # One SELECT for every server in the batch, then upsert
+        existing = {
+            s.id: s for s in Server.query.filter(Server.id.in_(list(latest.keys()))).all()
+        }
+        statuses = {}
+        for server_id, (data, received_at) in latest.items():
+            server = existing.get(server_id)
+            if server is None:
+                server_config = SERVERS.get(server_id, {})
+                server = Server(
+                    id=server_id,
+                    name=server_config.get('name', f'Server {server_id}'),
+                    name_cn=server_config.get('name_cn', ''),
+                    ip=server_config.get('ip', ''),
+                    os_type=server_config.get('os', 'windows')
+                )
+                db.session.add(server)
+            resources = data.get('resources', {})
+            server.cpu_usage = resources.get('cpu_usage', 0)
+            server.memory_usage = resources.get('memory_usage', 0)
+            server.disk_usage = resources.get('disk_usage', 0)
+            server.last_check = received_at
+            server.status = server_status_from_report(data)
+            statuses[server_id] = server.status
+
+        if alerts:
+            db.session.add_all(alerts)
+
+        started = time.time()
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._stats_lock:
+                self._stats['commit_errors'] += 1
+            raise
+        latency = time.time() - started
+
+        with self._stats_lock:
+            self._latencies.append(latency)
+            self._stats['batches'] += 1
+            self._stats['reports_written'] += len(batch)
+            self._stats['alerts_written'] += len(alerts)
+
+        # System log: one file append for the whole batch, then push to clients
+        if log_lines:
+            ingest_agent_alerts(log_lines)
+
+        # Resource history and log index (memory only; flushed by the scheduler)
+        for server_id, data, received_at in batch:
+            received_ts = received_at.replace(tzinfo=timezone.utc).timestamp()
+            metrics_store.record_agent_report(server_id, data, received_ts)
+            log_index.record_agent_report(server_id, data, received_ts)
+
+        # Merge into the status snapshot (clients get a coalesced delta)
+        for server_id, (data, received_at) in latest.items():
+            resources = data.get('resources', {})
+            broadcast_server_status({
+                'id': server_id,
+                'status': statuses[server_id],
+                'cpu_usage': resources.get('cpu_usage', 0),
+                'memory_usage': resources.get('memory_usage', 0),
+                'disk_usage': resources.get('disk_usage', 0),
+                'processes': monitor_service.normalize_agent_processes(data),
+                'agent_online': True,
+                'data_source': 'agent',
+                'last_check': received_at.isoformat()
+            })
+
+    def get_stats(self) -> Dict:
+        """Queue depth and commit latency metrics for the health endpoint"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_max'] = self._queue.maxsize
+        if latencies:
+            stats['commit_ms_avg'] = round(sum(latencies) / len(latencies) * 1000, 2)
+            stats['commit_ms_p99'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2)
+            stats['commit_ms_max'] = round(latencies[-1] * 1000, 2)
+        return stats
+
+
+# Global singleton instance
+report_writer = AgentReportWriter(
+    max_queue=Config.REPORT_QUEUE_MAX,
+    batch_size=Config.REPORT_BATCH_SIZE,
+    linger=Config.REPORT_BATCH_LINGER
+)
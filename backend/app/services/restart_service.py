@@ -6,7 +6,7 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from config.settings import SERVERS, PROCESS_RESTART_COMMANDS, Config
-from app.services.monitor_service import MonitorService
+from app.services.monitor_service import monitor_service
 from app.services.log_service import LogService
 
 
@@ -14,7 +14,7 @@ class RestartService:
     """Service for automatic process restart"""
 
     def __init__(self):
-        self.monitor_service = MonitorService()
+        self.monitor_service = monitor_service
         self.log_service = LogService()
         self._last_restart_times: Dict[str, datetime] = {}
 
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - SSH Connection Pool
+Keeps one long-lived paramiko connection per server, shared by all callers.
+Connections get transport keepalives, a liveness check on checkout and
+idle pruning; hit/miss/reconnect counters show how often we handshake.
+"""
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+import paramiko
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SSHConnectionPool:
+    """Thread-safe pool of persistent SSH clients keyed by server_id"""
+
+    def __init__(self, keepalive_interval: int = 30, idle_timeout: int = 600,
+                 validate_after: int = 60):
+        # Seconds between transport-level keepalive packets (0 disables)
+        self.keepalive_interval = keepalive_interval
+        # Connections unused for this long are closed by prune()
+        self.idle_timeout = idle_timeout
+        # Connections idle longer than this are actively pinged on checkout
+        self.validate_after = validate_after
+
+        # Key: server_id, Value: {'client', 'created_at', 'last_used', 'uses'}
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Per-server locks so one slow handshake doesn't block other servers
+        self._server_locks: Dict[str, threading.Lock] = {}
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'reconnects': 0,
+            'connect_failures': 0,
+            'evictions': 0,
+            'handshake_time_total': 0.0,
+        }
+
+    def _bump(self, key: str, amount=1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def _server_lock(self, server_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._server_locks.get(server_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._server_locks[server_id] = lock
+            return lock
+
+    def _is_alive(self, entry: Dict) -> bool:
+        """Check transport liveness; ping it if the connection has sat idle"""
+        try:
+            transport = entry['client'].get_transport()
+            if not transport or not transport.is_active():
+                return False
+            if time.time() - entry['last_used'] > self.validate_after:
+                # Raises if the peer is gone (half-open TCP, NAT timeout, ...)
+                transport.send_ignore()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_client(client: paramiko.SSHClient) -> None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def acquire(self, server_id: str,
+                connect: Callable[[], Optional[paramiko.SSHClient]]) -> Optional[paramiko.SSHClient]:
+        """
+        Return a live client for server_id, creating one with connect() if needed.
+        The client stays in the pool; callers must not close it.
+        """
+        with self._server_lock(server_id):
+            entry = self._entries.get(server_id)
+            if entry is not None:
+                if self._is_alive(entry):
+                    entry['last_used'] = time.time()
+                    entry['uses'] += 1
+                    self._bump('hits')
+                    return entry['client']
+                # Stale connection - drop it and reconnect below
+                logger.info(f"[SSHPool] Connection to {server_id} is dead, reconnecting")
+                self._close_client(entry['client'])
+                with self._lock:
+                    self._entries.pop(server_id, None)
+                self._bump('reconnects')
+            else:
+                self._bump('misses')
+
+            started = time.time()
+            client = connect()
+            elapsed = time.time() - started
+
+            if client is None:
+                self._bump('connect_failures')
+                return None
+
+            self._bump('handshake_time_total', elapsed)
+            if self.keepalive_interval:
+                try:
+                    client.get_transport().set_keepalive(self.keepalive_interval)
+                except Exception:
+                    pass
+
+            now = time.time()
+            with self._lock:
+                self._entries[server_id] = {
+                    'client': client,
+                    'created_at': now,
+                    'last_used': now,
+                    'uses': 1,
+                }
+            logger.debug(f"[SSHPool] Opened connection to {server_id} in {elapsed:.2f}s")
+            return client
+
+    def discard(self, server_id: str) -> None:
+        """Close and forget the pooled connection after a command failure"""
+        with self._lock:
+            entry = self._entries.pop(server_id, None)
+        if entry:
+            self._close_client(entry['client'])
+            self._bump('evictions')
+
+    def prune(self) -> int:
+        """Close idle or dead connections. Returns the number closed."""
+        now = time.time()
+        closed = 0
+        for server_id in list(self._entries.keys()):
+            lock = self._server_lock(server_id)
+            # Skip servers currently being used/connected
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                entry = self._entries.get(server_id)
+                if entry is None:
+                    continue
+                idle = now - entry['last_used']
+                if idle > self.idle_timeout or not self._is_alive(entry):
+                    with self._lock:
+                        self._entries.pop(server_id, None)
+                    self._close_client(entry['client'])
+                    self._bump('evictions')
+                    closed += 1
+            finally:
+                lock.release()
+        if closed:
+            logger.info(f"[SSHPool] Pruned {closed} idle/dead connections")
+        return closed
+
+    def close_all(self) -> None:
+        """Close every pooled connection. Call on shutdown."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._close_client(entry['client'])
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        """Pool counters for the health endpoint"""
+        stats = dict(self._stats)
+        handshakes = stats['misses'] + stats['reconnects'] - stats['connect_failures']
+        lookups = stats['hits'] + stats['misses'] + stats['reconnects']
+        stats['handshakes'] = max(handshakes, 0)
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['avg_handshake_seconds'] = (
+            round(stats['handshake_time_total'] / handshakes, 3) if handshakes > 0 else 0.0
+        )
+        stats['handshake_time_total'] = round(stats['handshake_time_total'], 3)
+        stats['open_connections'] = len(self._entries)
+        now = time.time()
+        stats['connections'] = {
+            server_id: {
+                'age_seconds': int(now - entry['created_at']),
+                'idle_seconds': int(now - entry['last_used']),
+                'uses': entry['uses'],
+            }
+            for server_id, entry in list(self._entries.items())
+        }
+        return stats
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Server Status Snapshot Cache
+Materialized view of every server's status. Written by the scheduler's
+process-check cycle and the agent-report path; read by REST/WebSocket handlers
+in O(1) without ever triggering SSH. A version counter (exposed as ETag)
+only moves when something other than timestamps changes.
+"""
+import json
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import logging
+from config.settings import SERVERS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keys that change on every refresh and shouldn't invalidate client caches
+VOLATILE_KEYS = ('last_check', 'cache_age_seconds', 'timestamp')
+
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def fingerprint(server: Dict) -> str:
+    """Stable content hash input for change detection (timestamps ignored)"""
+    return json.dumps(_strip_volatile(server), sort_keys=True, default=str)
+
+
+class StatusSnapshotCache:
+    """Versioned in-memory snapshot of all server statuses"""
+
+    # Singleton instance
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        # Key: server_id, Value: full server status dict (as get_all_servers_status returns)
+        self._servers: Dict[str, Dict] = {}
+        # Key: server_id, Value: fingerprint of the stored dict
+        self._fingerprints: Dict[str, str] = {}
+        self._write_lock = threading.Lock()
+        # Called with (changed_ids, removed_ids) after every content change
+        self._listeners: List[Callable] = []
+
+        # Published snapshot - rebuilt on write and swapped atomically; readers
+        # only ever add the memoized 'servers_json' key
+        self._version = 0
+        self._snapshot: Dict = self._build_snapshot()
+
+        self._initialized = True
+
+    # ---- writes ----
+
+    def _store(self, server_id: str, server: Dict) -> bool:
+        """Store one server (caller holds _write_lock). Returns True if content changed."""
+        fp = fingerprint(server)
+        self._servers[server_id] = server
+        if self._fingerprints.get(server_id) == fp:
+            return False
+        self._fingerprints[server_id] = fp
+        return True
+
+    def _publish(self, changed: bool) -> None:
+        if changed:
+            self._version += 1
+        self._snapshot = self._build_snapshot()
+
+    def register_listener(self, callback: Callable) -> None:
+        """Register callback(changed_ids, removed_ids) for content changes"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self, changed_ids: List[str], removed_ids: List[str] = None) -> None:
+        if not changed_ids and not removed_ids:
+            return
+        for callback in self._listeners:
+            try:
+                callback(changed_ids, removed_ids or [])
+            except Exception as e:
+                logger.error(f"[StatusCache] Listener error: {e}")
+
+    def _build_snapshot(self) -> Dict:
+        servers = sorted(self._servers.values(),
+                         key=lambda s: SERVERS.get(s['id'], {}).get('sort_order', 99))
+        return {
+            'version': self._version,
+            'etag': f'status-{self._version}',
+            'servers': servers,
+            'by_id': {s['id']: s for s in servers},
+            'stats': {
+                'total_servers': len(servers),
+                'online': sum(1 for s in servers if s.get('status') == 'normal'),
+                'warning': sum(1 for s in servers if s.get('status') == 'warning'),
+                'critical': sum(1 for s in servers if s.get('status') == 'error')
+            },
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    def update_server(self, server_id: str, server: Dict) -> bool:
+        """Replace one server's status. Returns True if the version moved."""
+        with self._write_lock:
+            changed = self._store(server_id, server)
+            self._publish(changed)
+        if changed:
+            self._notify([server_id])
+        return changed
+
+    def replace_all(self, servers: List[Dict]) -> bool:
+        """Replace the whole snapshot (full refresh). Servers not listed are dropped."""
+        with self._write_lock:
+            incoming = {s['id']: s for s in servers}
+            removed_ids = [sid for sid in self._servers if sid not in incoming]
+            for server_id in removed_ids:
+                del self._servers[server_id]
+                self._fingerprints.pop(server_id, None)
+            changed_ids = [sid for sid, server in incoming.items() if self._store(sid, server)]
+            changed = bool(changed_ids or removed_ids)
+            self._publish(changed)
+        self._notify(changed_ids, removed_ids)
+        return changed
+
+    def seed(self, servers: List[Dict]) -> None:
+        """Insert placeholders for servers that have no status yet"""
+        with self._write_lock:
+            changed_ids = [
+                server['id'] for server in servers
+                if server['id'] not in self._servers and self._store(server['id'], server)
+            ]
+            self._publish(bool(changed_ids))
+        self._notify(changed_ids)
+
+    def merge_server(self, server_id: str, fields: Dict, processes: Optional[List[Dict]] = None) -> bool:
+        """
+        Merge a partial update (e.g. an agent report) into the stored status.
+        Processes are matched by name so fields the report doesn't carry
+        (alert_info, display_name, ...) survive from the last full refresh.
+        """
+        with self._write_lock:
+            current = self._servers.get(server_id)
+            if current is None:
+                return False
+            merged = dict(current)
+            merged.update(fields)
+            if processes is not None:
+                existing = {p.get('name'): p for p in current.get('processes', [])}
+                merged_processes = []
+                for proc in processes:
+                    entry = dict(existing.get(proc.get('name'), {}))
+                    entry.update(proc)
+                    merged_processes.append(entry)
+                merged['processes'] = merged_processes
+            changed = self._store(server_id, merged)
+            self._publish(changed)
+        if changed:
+            self._notify([server_id])
+        return changed
+
+    # ---- reads (lock-free, O(1)) ----
+
+    def get_snapshot(self) -> Dict:
+        """Current snapshot: {version, etag, servers, by_id, stats, updated_at}. Treat as read-only."""
+        return self._snapshot
+
+    def get_servers_json(self) -> str:
+        """JSON body for GET /api/servers, encoded once per published snapshot"""
+        snapshot = self._snapshot
+        body = snapshot.get('servers_json')
+        if body is None:
+            body = json.dumps({'code': 200, 'data': snapshot['servers']}, ensure_ascii=False, default=str)
+            snapshot['servers_json'] = body
+        return body
+
+    def get_server(self, server_id: str) -> Optional[Dict]:
+        return self._snapshot['by_id'].get(server_id)
+
+    def get_version(self) -> int:
+        return self._snapshot['version']
+
+    def is_empty(self) -> bool:
+        return not self._snapshot['servers']
+
+
+# Global singleton instance
+status_cache = StatusSnapshotCache()
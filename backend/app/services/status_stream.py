@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Delta-encoded status stream for the WebSocket 'status' room
+
+Protocol (server -> client):
+  status_snapshot {seq, servers: [server, ...]}
+      Sent on join and on request_resync. Baseline for later deltas.
+  status_delta {seq, servers: {server_id: patch}, removed_servers: [id, ...]}
+      patch = {'set': {field: value}, 'unset': [field, ...],
+               'processes': {name: {field: value}},
+               'removed_processes': [name, ...]}   or   {'full': server}
+      seq increases by exactly 1 per frame; on a gap the client sends
+      request_resync and gets a fresh status_snapshot.
+
+Bursts are coalesced: changes mark a server dirty and a background loop
+flushes at most one frame per STATUS_DELTA_INTERVAL containing only what
+changed since the last frame.
+"""
+import copy
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from app.services.status_cache import status_cache, VOLATILE_KEYS
+from config.settings import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def diff_server(old: Dict, new: Dict) -> Optional[Dict]:
+    """Field-level patch turning old into new (timestamps ignored). None if equal."""
+    patch = {}
+
+    set_fields = {
+        key: value for key, value in new.items()
+        if key != 'processes' and key not in VOLATILE_KEYS and old.get(key) != value
+    }
+    unset_fields = [
+        key for key in old
+        if key not in new and key != 'processes' and key not in VOLATILE_KEYS
+    ]
+
+    old_procs = {p.get('name'): p for p in old.get('processes', [])}
+    new_procs = {p.get('name'): p for p in new.get('processes', [])}
+    proc_patches = {}
+    for name, proc in new_procs.items():
+        previous = old_procs.get(name)
+        if previous is None:
+            proc_patches[name] = proc
+            continue
+        changed = {
+            key: value for key, value in proc.items()
+            if key not in VOLATILE_KEYS and previous.get(key) != value
+        }
+        if changed:
+            proc_patches[name] = changed
+    removed = [name for name in old_procs if name not in new_procs]
+
+    if not set_fields and not unset_fields and not proc_patches and not removed:
+        return None
+
+    # Timestamp rides along with real changes only
+    set_fields['last_check'] = new.get('last_check')
+    patch['set'] = set_fields
+    if unset_fields:
+        patch['unset'] = unset_fields
+    if proc_patches:
+        patch['processes'] = proc_patches
+    if removed:
+        patch['removed_processes'] = removed
+    return patch
+
+
+class StatusDeltaStream:
+    """Tracks what the status room has seen and emits coalesced patches"""
+
+    def __init__(self, status_cache, interval: float = 1.0, room: str = 'status'):
+        self.status_cache = status_cache
+        self.interval = interval
+        self.room = room
+        self.socketio = None
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Last state sent to the room, per server (deep copies)
+        self._baseline: Dict[str, Dict] = {}
+        self._baseline_ready = False
+        self._dirty: set = set()
+        self._removed: set = set()
+        self._started = False
+
+        self._stats = {
+            'frames': 0,
+            'server_patches': 0,
+            'delta_bytes': 0,
+            'full_bytes': 0,  # what full-server payloads would have cost
+        }
+
+        status_cache.register_listener(self._on_cache_change)
+
+    def _on_cache_change(self, changed_ids: List[str], removed_ids: List[str]) -> None:
+        with self._lock:
+            self._dirty.update(changed_ids)
+            self._removed.update(removed_ids)
+
+    def _ensure_baseline(self) -> None:
+        """Initialize baseline from the cache (caller holds _lock)"""
+        if not self._baseline_ready:
+            for server in self.status_cache.get_snapshot()['servers']:
+                self._baseline[server['id']] = copy.deepcopy(server)
+            self._dirty.clear()
+            self._baseline_ready = True
+
+    def start(self, socketio) -> None:
+        """Start the background flush loop (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self.socketio = socketio
+        socketio.start_background_task(self._flush_loop)
+        logger.info(f"[StatusStream] Delta stream started (interval={self.interval}s)")
+
+    def snapshot_payload(self) -> Dict:
+        """status_snapshot frame consistent with the current seq"""
+        with self._lock:
+            return self._snapshot_payload_locked()
+
+    def _snapshot_payload_locked(self) -> Dict:
+        self._ensure_baseline()
+        # Keep the dashboard's configured sort order
+        ordered_ids = [s['id'] for s in self.status_cache.get_snapshot()['servers']]
+        servers = [self._baseline[sid] for sid in ordered_ids if sid in self._baseline]
+        return {
+            'seq': self._seq,
+            'servers': servers,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def send_snapshot(self, emit_fn) -> None:
+        """Send the snapshot via emit_fn while holding the lock so no delta can overtake it"""
+        with self._lock:
+            emit_fn('status_snapshot', self._snapshot_payload_locked())
+
+    def flush(self) -> Optional[Dict]:
+        """Build and emit one delta frame for everything dirty. Returns the frame."""
+        with self._lock:
+            self._ensure_baseline()
+            if not self._dirty and not self._removed:
+                return None
+
+            patches = {}
+            full_bytes = 0
+            for server_id in self._dirty:
+                current = self.status_cache.get_server(server_id)
+                if current is None:
+                    continue
+                previous = self._baseline.get(server_id)
+                if previous is None:
+                    patch = {'full': current}
+                else:
+                    patch = diff_server(previous, current)
+                if patch is not None:
+                    patches[server_id] = patch
+                    self._baseline[server_id] = copy.deepcopy(current)
+                    full_bytes += len(json.dumps(current, default=str))
+
+            removed = [sid for sid in self._removed if sid in self._baseline]
+            for server_id in removed:
+                del self._baseline[server_id]
+            self._dirty.clear()
+            self._removed.clear()
+
+            if not patches and not removed:
+                return None
+
+            self._seq += 1
+            frame = {
+                'seq': self._seq,
+                'servers': patches,
+                'removed_servers': removed,
+                'timestamp': datetime.utcnow().isoformat()
+            }
+            self._stats['frames'] += 1
+            self._stats['server_patches'] += len(patches)
+            self._stats['delta_bytes'] += len(json.dumps(frame, default=str))
+            self._stats['full_bytes'] += full_bytes
+
+            if self.socketio is not None:
+                self.socketio.emit('status_delta', frame, room=self.room)
+            return frame
+
+    def _flush_loop(self) -> None:
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"[StatusStream] Flush error: {e}")
+            self.socketio.sleep(self.interval)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats['seq'] = self._seq
+        stats['interval'] = self.interval
+        return stats
+
+
+# Global singleton instance
+status_stream = StatusDeltaStream(status_cache, interval=Config.STATUS_DELTA_INTERVAL)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - Log Level Classifier
+Keyword tables such as LOG_ALERT_KEYWORDS are flattened once into precedence
+order (level order, then keyword order) with the keywords lowercased, so a
+single message costs one lower() and substring checks up to the first hit -
+the same answer as the nested "for keyword in ...: if keyword.lower() in
+message_lower" loops without re-lowering every keyword.
+
+Whole log texts go through scan(): the keywords are compiled into a single
+alternation in the same order, the text is lowercased once and searched
+case-sensitively, which keeps the regex engine's first-character skip
+(capturing groups would disable it, so the hit's rank is looked up from the
+matched text, always one of the lowercased keywords). After each hit the
+search resumes one character later, so overlapping keywords are all seen and
+the best-ranked one wins; the text is split into alert lines in one pass.
+"""
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import LOG_ALERT_KEYWORDS
+
+# Embedded date in a log line
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+# Level tag of the EAI log format: [INFO], [WARN], [ERRO], [ERROR], [FATAL], [CRITICAL]
+LEVEL_TAG_PATTERN = re.compile(r'\[(INFO|WARN|WARNING|ERRO|ERROR|FATAL|CRITICAL)\]', re.IGNORECASE)
+LEVEL_TAGS = {
+    'INFO': 'info',
+    'WARN': 'warning',
+    'WARNING': 'warning',
+    'ERRO': 'error',
+    'ERROR': 'error',
+    'FATAL': 'critical',
+    'CRITICAL': 'critical',
+}
+
+
+class KeywordClassifier:
+    """Precedence-ordered keyword table: substring checks per message, one regex pass per text"""
+
+    def __init__(self, levels: Dict[str, List[str]], default: str = 'info'):
+        self.default = default
+        # Rank = position in this list (lower wins)
+        self._rules: List[Tuple[str, str]] = [
+            (level, keyword) for level, keywords in levels.items() for keyword in keywords
+        ]
+        self._ranks: Dict[str, int] = {}
+        for rank, (_, keyword) in enumerate(self._rules):
+            self._ranks.setdefault(keyword.lower(), rank)
+        # (lowercased keyword, level) in rank order for single messages
+        self._levels: Tuple[Tuple[str, str], ...] = tuple(
+            (keyword.lower(), level) for level, keyword in self._rules)
+        # Alternatives in rank order: at any position the best-ranked keyword matches first
+        alternatives = '|'.join(re.escape(keyword.lower()) for _, keyword in self._rules)
+        self._pattern = re.compile(alternatives) if self._rules else None
+
+    def match(self, message: str) -> Optional[Tuple[str, str]]:
+        """(level, keyword) of the highest-precedence keyword in message, or None"""
+        lowered = message.lower()
+        for rank, (keyword, _) in enumerate(self._levels):
+            if keyword in lowered:
+                return self._rules[rank]
+        return None
+
+    def classify(self, message: str) -> str:
+        """Level of message, or the default level when no keyword occurs"""
+        lowered = message.lower()
+        for keyword, level in self._levels:
+            if keyword in lowered:
+                return level
+        return self.default
+
+    def scan(self, text: str) -> Iterator[Tuple[str, str, str]]:
+        """
+        (line, level, keyword) for every line of text containing a keyword,
+        in text order, from a single pass of the pattern over the whole text.
+        """
+        if self._pattern is None:
+            return
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lowercasing grew the text (e.g. 'İ' -> 'i̇'), so offsets no longer
+            # line up with the original; fall back to one line at a time
+            for line in text.split('\n'):
+                rule = self.match(line)
+                if rule:
+                    yield (line, *rule)
+            return
+
+        line_start = line_end = -1
+        best = None
+        found = self._pattern.search(lowered)
+        while found:
+            pos = found.start()
+            rank = self._ranks[found.group()]
+            if pos > line_end:
+                if best is not None:
+                    yield (text[line_start:line_end], *self._rules[best])
+                line_start = text.rfind('\n', 0, pos) + 1
+                line_end = text.find('\n', pos)
+                if line_end < 0:
+                    line_end = len(text)
+                best = rank
+            elif rank < best:
+                best = rank
+            # Nothing on this line can outrank the first rule
+            found = self._pattern.search(lowered, line_end if best == 0 else pos + 1)
+        if best is not None:
+            yield (text[line_start:line_end], *self._rules[best])
+
+
+def level_from_tag(message: str) -> Optional[str]:
+    """Level from an EAI-style [ERRO]/[WARN]/... tag, or None for untagged lines"""
+    tag = LEVEL_TAG_PATTERN.search(message)
+    return LEVEL_TAGS[tag.group(1).upper()] if tag else None
+
+
+def is_today(message: str, today_str: str) -> bool:
+    """False only when the line carries an embedded date other than today"""
+    date_match = DATE_PATTERN.search(message)
+    return not date_match or date_match.group(0) == today_str
+
+
+# Compiled LOG_ALERT_KEYWORDS (critical > error > warning, else info)
+alert_classifier = KeywordClassifier(LOG_ALERT_KEYWORDS)
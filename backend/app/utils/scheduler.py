@@ -3,8 +3,11 @@
 ACC Monitor - Background Task Scheduler
 Includes offline server probing for reconnection detection
 """
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from datetime import datetime
+from typing import Dict, List, Tuple
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
@@ -25,6 +28,13 @@ class MonitorScheduler:
         # Key: server_id, Value: check count since last info log
         self._health_check_counter = {}
 
+        # Process-check pipeline state
+        self._collect_executor = None  # created lazily, reused across cycles
+        self._inflight: Dict[str, Future] = {}  # {server_id: collection future}
+        self._collect_started: Dict[str, float] = {}  # {server_id: worker start time}
+        self._restart_service = None
+        self._last_cycle_stats: Dict = {}
+
         if app:
             self.init_app(app)
 
@@ -36,13 +46,19 @@ class MonitorScheduler:
         self._local_collectors = {}
 
         # Add jobs
+        # The process check is the only full status sweep: it also rebuilds the
+        # status snapshot that REST/WebSocket readers serve. Seed placeholders
+        # and run it once immediately so the first read has data.
+        self._seed_status_snapshot()
         self.scheduler.add_job(
             func=self._check_processes,
             trigger=IntervalTrigger(seconds=Config.PROCESS_CHECK_INTERVAL),
             id='check_processes',
             name='Check server processes',
             replace_existing=True,
-            max_instances=2  # Allow overlap to avoid skipped checks
+            max_instances=1,  # Cycle is bounded by per-server deadlines, no overlap needed
+            coalesce=True,
+            next_run_time=datetime.now()
         )
 
         # Local metrics collection - runs every 25 seconds (slightly before
@@ -92,6 +108,54 @@ class MonitorScheduler:
             replace_existing=True
         )
 
+        # Close idle/dead pooled SSH connections and ping the rest
+        self.scheduler.add_job(
+            func=self._maintain_ssh_pool,
+            trigger=IntervalTrigger(seconds=Config.SSH_POOL_MAINTENANCE_INTERVAL),
+            id='maintain_ssh_pool',
+            name='Maintain SSH connection pool',
+            replace_existing=True,
+            max_instances=1
+        )
+
+        # Persist resource history chunks and drop expired ones
+        self.scheduler.add_job(
+            func=self._flush_metrics,
+            trigger=IntervalTrigger(seconds=Config.METRICS_FLUSH_INTERVAL),
+            id='flush_metrics',
+            name='Flush resource metrics',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        self.scheduler.add_job(
+            func=self._prune_metrics,
+            trigger=CronTrigger(minute=17),
+            id='prune_metrics',
+            name='Prune expired resource metrics',
+            replace_existing=True
+        )
+
+        # Full-text log index: buffered lines and new system log file bytes
+        self.scheduler.add_job(
+            func=self._index_logs,
+            trigger=IntervalTrigger(seconds=Config.LOG_INDEX_FLUSH_INTERVAL),
+            id='index_logs',
+            name='Write log search index',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        self.scheduler.add_job(
+            func=self._prune_log_index,
+            trigger=CronTrigger(hour=0, minute=35),
+            id='prune_log_index',
+            name='Prune expired log index lines',
+            replace_existing=True
+        )
+
         # Daily log compression at 00:05 - compress previous day's log files
         self.scheduler.add_job(
             func=self._compress_old_logs,
@@ -111,16 +175,96 @@ class MonitorScheduler:
         """Stop the scheduler"""
         if self.scheduler.running:
             self.scheduler.shutdown()
+            # Don't lose up to a flush interval of metrics or log lines on shutdown
+            self._flush_metrics()
+            self._index_logs()
+            from app.services.oracle_pool import oracle_pools
+            oracle_pools.close_all()
+            if self._collect_executor is not None:
+                self._collect_executor.shutdown(wait=False)
+                self._collect_executor = None
             print(f"Scheduler stopped at {datetime.utcnow()}")
 
+    def _get_collect_executor(self) -> ThreadPoolExecutor:
+        """Long-lived bounded worker pool for per-server collection"""
+        if self._collect_executor is None:
+            self._collect_executor = ThreadPoolExecutor(
+                max_workers=Config.PROCESS_CHECK_WORKERS,
+                thread_name_prefix='process-check'
+            )
+        return self._collect_executor
+
+    def _collect_server_status(self, server_id: str) -> Dict:
+        """
+        Collection stage task: full status of one server (agent data first, else
+        SSH processes, Windows services merged in, resources and alert info).
+        Nothing is restarted here - stage 2 owns restarts.
+        """
+        from app.services.monitor_service import monitor_service
+
+        self._collect_started[server_id] = time.time()
+        return monitor_service._get_single_server_status(server_id, auto_restart=False)
+
+    def _run_with_deadline(self, tasks: Dict[str, Future], started: Dict[str, float],
+                           deadline: float) -> Tuple[Dict[str, Future], List[str]]:
+        """
+        Wait for per-server futures, giving each one `deadline` seconds from
+        the moment a worker actually picked it up (queued time doesn't count).
+        Returns (finished futures, server_ids that missed their deadline).
+        """
+        pending = {future: server_id for server_id, future in tasks.items()}
+        finished: Dict[str, Future] = {}
+        missed: List[str] = []
+        # Hard cap in case tasks never get a worker at all
+        hard_limit = time.time() + deadline * (len(tasks) // Config.PROCESS_CHECK_WORKERS + 1)
+
+        while pending:
+            done, _ = wait(list(pending.keys()), timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future
+
+            now = time.time()
+            for future, server_id in list(pending.items()):
+                task_started = started.get(server_id)
+                if (task_started and now - task_started > deadline) or now > hard_limit:
+                    # Can't interrupt a blocking SSH read; leave it running and
+                    # skip the server this cycle (see _inflight in _check_processes)
+                    pending.pop(future)
+                    missed.append(server_id)
+
+        return finished, missed
+
+    def _restart_stopped(self, restart_service, server_id: str, stopped: List[Dict]) -> List[Tuple[str, Dict]]:
+        """Restart stage task: restart each stopped process on one server"""
+        results = []
+        for process in stopped:
+            result = restart_service.restart_process(
+                server_id,
+                process['name'],
+                reason="Auto restart - process stopped"
+            )
+            results.append((process['name'], result))
+        return results
+
+    def get_last_cycle_stats(self) -> Dict:
+        """Timing of the most recent process-check cycle (for the health endpoint)"""
+        return dict(self._last_cycle_stats)
+
     def _check_processes(self):
-        """Check all server processes"""
+        """
+        Check all server processes.
+        Runs as a pipeline: (1) collect every server's full status concurrently
+        on a bounded worker pool with a per-server deadline, (2) decide and run
+        restarts for stopped processes, (3) persist alerts in a single commit
+        and publish the status snapshot.
+        Cycle wall time is bounded by the slowest server, not the sum.
+        """
         with self.app.app_context():
-            from app.services.monitor_service import MonitorService
+            from app.services.monitor_service import monitor_service
             from app.services.restart_service import RestartService
             from app.services.log_service import LogService
+            from app.services.status_cache import status_cache
             from app.api.websocket import (
-                broadcast_server_status,
                 broadcast_process_stopped,
                 broadcast_process_restarted,
                 broadcast_system_log
@@ -128,66 +272,93 @@ class MonitorScheduler:
             from app.models import Alert
             from app import db
 
-            monitor_service = MonitorService()
-            restart_service = RestartService()
+            cycle_start = time.time()
+            deadline = Config.PROCESS_CHECK_SERVER_DEADLINE
+            executor = self._get_collect_executor()
+            if self._restart_service is None:
+                # Keep one instance so restart cooldowns survive across cycles
+                self._restart_service = RestartService()
+            restart_service = self._restart_service
             log_service = LogService()
 
-            for server_id in SERVERS.keys():
+            # ---- Stage 1: concurrent collection ----
+            collected: Dict[str, Dict] = {}
+            missed: List[str] = []
+            if monitor_service.async_ssh is not None:
+                # asyncssh backend: one run_many call for every server's SSH
+                # commands; each command is cancelled at its own timeout, so
+                # no worker can get stuck and no deadline tracking is needed
+                try:
+                    collected = monitor_service.collect_servers_status(list(SERVERS.keys()), auto_restart=False)
+                except Exception as e:
+                    logger.error(f"[Scheduler] Batched collection failed: {e}")
+            else:
+                tasks: Dict[str, Future] = {}
+                still_running: List[str] = []
+                for server_id in SERVERS.keys():
+                    previous = self._inflight.get(server_id)
+                    if previous is not None and not previous.done():
+                        # Last cycle's collection for this host is still stuck
+                        still_running.append(server_id)
+                        continue
+                    self._collect_started.pop(server_id, None)
+                    future = executor.submit(self._collect_server_status, server_id)
+                    self._inflight[server_id] = future
+                    tasks[server_id] = future
+
+                finished, missed = self._run_with_deadline(tasks, self._collect_started, deadline)
+                missed.extend(still_running)
+
+                for server_id, future in finished.items():
+                    try:
+                        collected[server_id] = future.result()
+                    except Exception as e:
+                        logger.error(f"[Scheduler] Process collection failed for {server_id}: {e}")
+            collect_duration = time.time() - cycle_start
+
+            for server_id in missed:
+                server_config = SERVERS.get(server_id, {})
+                server_name = server_config.get('name_cn', server_config.get('name', server_id))
+                logger.warning(f"[Scheduler] {server_id} missed the {deadline}s collection deadline")
+                log_entry = log_service.add_system_log(
+                    'warning',
+                    server_id,
+                    f"{server_name}: Process check exceeded {deadline}s, skipped this cycle"
+                )
+                broadcast_system_log(log_entry)
+
+            # ---- Stage 2: restart decisions ----
+            stopped_by_server: Dict[str, List[Dict]] = {}
+            for server_id, server_status in collected.items():
+                if server_status.get('data_source') == 'cache':
+                    # Last good data from an earlier cycle - nothing new to act on
+                    continue
                 server_config = SERVERS[server_id]
                 server_name = server_config.get('name_cn', server_config['name'])
-                os_type = server_config.get('os', 'windows')
+                stopped = [p for p in server_status.get('processes', []) if p.get('status') == 'stopped']
 
-                # Get processes
-                if os_type == 'windows':
-                    processes = monitor_service.check_windows_processes(server_id)
-                else:
-                    processes = monitor_service.check_linux_processes(server_id)
-
-                # Check for stopped processes
-                for process in processes:
-                    if process.get('status') == 'stopped':
-                        # Broadcast stopped event
-                        broadcast_process_stopped(server_id, process['name'])
-
-                        # Add system log for stopped process
-                        log_entry = log_service.add_system_log(
-                            'critical',
-                            server_id,
-                            f"{server_name}: Process {process['name']} stopped"
-                        )
-                        broadcast_system_log(log_entry)
+                for process in stopped:
+                    # Broadcast stopped event
+                    broadcast_process_stopped(server_id, process['name'])
 
-                        # Create alert
-                        alert = Alert(
-                            server_id=server_id,
-                            level='critical',
-                            source='process',
-                            message=f"Process {process['name']} stopped on server {server_id}"
-                        )
-                        db.session.add(alert)
+                    # Add system log for stopped process
+                    log_entry = log_service.add_system_log(
+                        'critical',
+                        server_id,
+                        f"{server_name}: Process {process['name']} stopped"
+                    )
+                    broadcast_system_log(log_entry)
 
-                        # Auto restart if enabled
-                        if Config.AUTO_RESTART_ENABLED:
-                            result = restart_service.restart_process(
-                                server_id,
-                                process['name'],
-                                reason="Auto restart - process stopped"
-                            )
-                            broadcast_process_restarted(
-                                server_id,
-                                process['name'],
-                                result['success']
-                            )
-
-                            # Add system log for restart attempt
-                            restart_level = 'info' if result['success'] else 'warning'
-                            restart_msg = f"{server_name}: Process {process['name']} restarted successfully" if result['success'] else f"{server_name}: Failed to restart {process['name']}"
-                            log_entry = log_service.add_system_log(restart_level, server_id, restart_msg)
-                            broadcast_system_log(log_entry)
+                    # Create alert
+                    db.session.add(Alert(
+                        server_id=server_id,
+                        level='critical',
+                        source='process',
+                        message=f"Process {process['name']} stopped on server {server_id}"
+                    ))
 
                 # If no stopped processes, log a health check pass (every 3rd check per server)
-                stopped_processes = [p for p in processes if p.get('status') == 'stopped']
-                if not stopped_processes:
+                if not stopped:
                     self._health_check_counter[server_id] = self._health_check_counter.get(server_id, 0) + 1
                     if self._health_check_counter[server_id] >= 3:
                         self._health_check_counter[server_id] = 0
@@ -200,19 +371,87 @@ class MonitorScheduler:
                 else:
                     # Reset counter when there are issues
                     self._health_check_counter[server_id] = 0
+                    stopped_by_server[server_id] = stopped
+
+            # Auto restart if enabled - servers restart concurrently
+            if Config.AUTO_RESTART_ENABLED and stopped_by_server:
+                restart_tasks = {
+                    server_id: executor.submit(self._restart_stopped, restart_service, server_id, stopped)
+                    for server_id, stopped in stopped_by_server.items()
+                }
+                done, _ = wait(list(restart_tasks.values()), timeout=Config.PROCESS_RESTART_DEADLINE)
+                for server_id, future in restart_tasks.items():
+                    server_config = SERVERS[server_id]
+                    server_name = server_config.get('name_cn', server_config['name'])
+                    if future not in done:
+                        logger.warning(f"[Scheduler] Restart on {server_id} still running after "
+                                       f"{Config.PROCESS_RESTART_DEADLINE}s")
+                        continue
+                    try:
+                        restart_results = future.result()
+                    except Exception as e:
+                        logger.error(f"[Scheduler] Restart failed for {server_id}: {e}")
+                        continue
+
+                    for process_name, result in restart_results:
+                        broadcast_process_restarted(server_id, process_name, result['success'])
+
+                        # Add system log for restart attempt
+                        restart_level = 'info' if result['success'] else 'warning'
+                        restart_msg = f"{server_name}: Process {process_name} restarted successfully" if result['success'] else f"{server_name}: Failed to restart {process_name}"
+                        log_entry = log_service.add_system_log(restart_level, server_id, restart_msg)
+                        broadcast_system_log(log_entry)
 
+            # ---- Stage 3: persistence + status snapshot ----
+            try:
                 db.session.commit()
+            except Exception as e:
+                logger.error(f"[Scheduler] Failed to persist process-check alerts: {e}")
+                db.session.rollback()
 
-                # Broadcast updated status
-                status = {
-                    'id': server_id,
-                    'name': server_config['name'],
-                    'ip': server_config['ip'],
-                    'status': monitor_service.get_server_status(server_id),
-                    'processes': processes,
-                    'last_check': datetime.utcnow().isoformat()
-                }
-                broadcast_server_status(status)
+            # Servers that missed the deadline keep their last snapshot entry;
+            # servers no longer configured drop out (clients get removed_servers)
+            servers = []
+            for server_id, server_config in SERVERS.items():
+                server_status = collected.get(server_id) or status_cache.get_server(server_id)
+                if server_status is None:
+                    server_status = monitor_service._create_offline_result(
+                        server_id, server_config, server_config.get('os', 'windows'),
+                        reason='awaiting_first_check'
+                    )
+                servers.append(server_status)
+            status_cache.replace_all(servers)
+
+            cycle_duration = time.time() - cycle_start
+            self._last_cycle_stats = {
+                'started_at': datetime.utcfromtimestamp(cycle_start).isoformat(),
+                'duration_seconds': round(cycle_duration, 2),
+                'collect_seconds': round(collect_duration, 2),
+                'servers_total': len(SERVERS),
+                'servers_collected': len(collected),
+                'servers_missed_deadline': len(missed),
+                'missed_servers': missed,
+                'deadline_seconds': deadline,
+                'workers': Config.PROCESS_CHECK_WORKERS,
+                'ssh_backend': 'asyncssh' if monitor_service.async_ssh is not None else 'paramiko'
+            }
+            logger.info(
+                f"[Scheduler] Process check cycle: {cycle_duration:.1f}s "
+                f"({len(collected)}/{len(SERVERS)} collected, {len(missed)} missed deadline)"
+            )
+
+    def _seed_status_snapshot(self):
+        """Give every configured server an offline placeholder until its first check"""
+        from app.services.monitor_service import monitor_service
+        from app.services.status_cache import status_cache
+
+        status_cache.seed([
+            monitor_service._create_offline_result(
+                server_id, server_config, server_config.get('os', 'windows'),
+                reason='awaiting_first_check'
+            )
+            for server_id, server_config in SERVERS.items()
+        ])
 
     def _collect_local_metrics(self):
         """
@@ -255,22 +494,28 @@ class MonitorScheduler:
                     )
 
     def _check_databases(self):
-        """Check all database status"""
+        """
+        Check all database status.
+        Every database is queried concurrently with a per-database deadline;
+        the results refresh DatabaseService's cache for API/WebSocket readers.
+        """
         with self.app.app_context():
             from app.services.database_service import DatabaseService
             from app.services.log_service import LogService
             from app.api.websocket import broadcast_tablespace_warning, broadcast_system_log
             from app.models import Alert
             from app import db
-            from config.settings import ORACLE_CONFIGS
 
             database_service = DatabaseService()
             log_service = LogService()
 
-            for server_id in ORACLE_CONFIGS.keys():
+            for db_status in database_service.get_all_databases_status(max_age=0):
+                server_id = db_status['server_id']
+                if db_status.get('stale'):
+                    # Missed the deadline - already alerted on its last known usage
+                    continue
                 server_config = SERVERS.get(server_id, {})
                 server_name = server_config.get('name_cn', server_config.get('name', server_id))
-                db_status = database_service.get_database_status(server_id)
 
                 # Check tablespace usage
                 for ts in db_status.get('tablespaces', []):
@@ -311,46 +556,34 @@ class MonitorScheduler:
         The real log level is extracted from the message content.
         """
         with self.app.app_context():
-            import re
             from app.services.log_service import LogService
+            from app.services.log_index import log_index
             from app.api.websocket import broadcast_log_alert, broadcast_system_log
             from app.models import Alert
             from app import db
+            from app.utils.log_classifier import is_today, level_from_tag
 
             log_service = LogService()
             today_str = datetime.now().strftime('%Y-%m-%d')
-            date_pattern = re.compile(r'\d{4}-\d{2}-\d{2}')
-            # Pattern to extract real log level from EAI format
-            level_tag_pattern = re.compile(r'\[(INFO|WARN|WARNING|ERRO|ERROR|FATAL|CRITICAL)\]', re.IGNORECASE)
 
             for server_id in SERVERS.keys():
                 server_config = SERVERS.get(server_id, {})
                 server_name = server_config.get('name_cn', server_config.get('name', server_id))
-                alerts = log_service.scan_for_alerts(server_id)
+                # One read feeds both the search index and the alert scan
+                content = log_service.get_recent_logs(server_id)
+                log_index.add_tail(server_id, 'scan', content.splitlines())
+                alerts = log_service.scan_for_alerts(server_id, content)
 
                 for alert_data in alerts:
                     msg = alert_data.get('message', '')
 
                     # Date filter: only today's log lines
-                    date_match = date_pattern.search(msg)
-                    if date_match and date_match.group(0) != today_str:
+                    if not is_today(msg, today_str):
                         continue
 
-                    # Extract real log level from message content
-                    level_match = level_tag_pattern.search(msg)
-                    if level_match:
-                        raw_level = level_match.group(1).upper()
-                        if raw_level in ('ERRO', 'ERROR'):
-                            log_level = 'error'
-                        elif raw_level in ('WARN', 'WARNING'):
-                            log_level = 'warning'
-                        elif raw_level in ('FATAL', 'CRITICAL'):
-                            log_level = 'critical'
-                        else:
-                            log_level = 'info'
-                    else:
-                        # Unstructured logs: use the level from scan_for_alerts
-                        log_level = alert_data.get('level', 'info')
+                    # Real log level from the [ERRO]/[WARN]/... tag; unstructured
+                    # logs keep the keyword level from scan_for_alerts
+                    log_level = level_from_tag(msg) or alert_data.get('level', 'info')
 
                     # Broadcast alert
                     broadcast_log_alert(
@@ -392,12 +625,11 @@ class MonitorScheduler:
         the recovered server and broadcast the real status.
         """
         with self.app.app_context():
-            from app.services.monitor_service import MonitorService
+            from app.services.monitor_service import monitor_service
             from app.services.log_service import LogService
             from app.services.agent_data_service import agent_data_service
             from app.api.websocket import broadcast_system_log
 
-            monitor_service = MonitorService()
             log_service = LogService()
 
             # Get list of offline servers (no Agent data AND not in last-good cache)
@@ -454,6 +686,61 @@ class MonitorScheduler:
                     logger.error(f"[Scheduler] Error probing {server_id}: {e}")
 
 
+    def _maintain_ssh_pool(self):
+        """Prune idle or dead connections from the shared SSH pool"""
+        from app.services.monitor_service import monitor_service
+        try:
+            monitor_service.maintain_ssh_pool()
+            stats = monitor_service.get_ssh_pool_stats()
+            logger.debug(
+                f"[Scheduler] SSH pool: {stats['open_connections']} open, "
+                f"hits={stats['hits']} misses={stats['misses']} reconnects={stats['reconnects']}"
+            )
+        except Exception as e:
+            logger.error(f"[Scheduler] Error maintaining SSH pool: {e}")
+
+    def _flush_metrics(self):
+        """Write dirty resource history chunks to the database"""
+        with self.app.app_context():
+            from app.services.metrics_store import metrics_store
+            try:
+                written = metrics_store.flush()
+                if written:
+                    logger.debug(f"[Scheduler] Flushed {written} metric chunks")
+            except Exception as e:
+                logger.error(f"[Scheduler] Error flushing metrics: {e}")
+
+    def _prune_metrics(self):
+        """Delete resource history past its retention"""
+        with self.app.app_context():
+            from app.services.metrics_store import metrics_store
+            try:
+                deleted = metrics_store.prune()
+                if deleted:
+                    logger.info(f"[Scheduler] Pruned {deleted} expired metric chunks")
+            except Exception as e:
+                logger.error(f"[Scheduler] Error pruning metrics: {e}")
+
+    def _index_logs(self):
+        """Write buffered log lines and new system log entries to the search index"""
+        from app.services.log_index import log_index
+        from app.services.log_service import LOG_DIR
+        try:
+            log_index.index_system_logs(LOG_DIR)
+            log_index.flush()
+        except Exception as e:
+            logger.error(f"[Scheduler] Error writing log index: {e}")
+
+    def _prune_log_index(self):
+        """Delete indexed log lines past their retention"""
+        from app.services.log_index import log_index
+        try:
+            deleted = log_index.prune()
+            if deleted:
+                logger.info(f"[Scheduler] Pruned {deleted} expired log index lines")
+        except Exception as e:
+            logger.error(f"[Scheduler] Error pruning log index: {e}")
+
     def _compress_old_logs(self):
         """
         Compress previous day's log files.
@@ -474,12 +761,11 @@ class MonitorScheduler:
         This provides visual feedback that monitoring is active
         """
         with self.app.app_context():
-            from app.services.monitor_service import MonitorService
+            from app.services.monitor_service import monitor_service
             from app.services.log_service import LogService
             from app.services.agent_data_service import agent_data_service
             from app.api.websocket import broadcast_system_log
 
-            monitor_service = MonitorService()
             log_service = LogService()
 
             # Count online/offline servers
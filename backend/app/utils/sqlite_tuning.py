@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - SQLite Tuning Layer
+Applied from create_app when the database is SQLite:
+- Per-connection pragmas: WAL journal, synchronous, cache_size, mmap_size, busy_timeout
+- A process-wide writer lock so only one session holds a write transaction
+  at a time. Scheduler jobs, request threads and SocketIO handlers then queue
+  in-process instead of racing for SQLite's file lock ("database is locked").
+"""
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.sql.elements import TextClause
+
+from config.settings import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Raw SQL passed to session.execute(text(...)) that writes
+WRITE_SQL_PATTERN = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+# session.info key marking that the session holds the writer lock
+_LOCK_FLAG = 'sqlite_write_lock'
+
+
+class SQLiteTuning:
+    """Connection pragmas and serialized writes for the SQLite backend"""
+
+    def __init__(self):
+        self.enabled = False
+        self._write_lock = threading.Lock()
+        self._waits = deque(maxlen=1000)  # recent writer-lock wait times (seconds)
+        self._stats = {
+            'write_transactions': 0,
+            'lock_timeouts': 0,
+            'max_hold_ms': 0.0,
+        }
+        self._stats_lock = threading.Lock()
+        self.journal_mode = None
+
+    def init_app(self, app, db) -> None:
+        """Install pragmas and the writer lock (call inside an app context)"""
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        if not uri.startswith('sqlite') or not Config.SQLITE_TUNING:
+            return
+
+        event.listen(db.engine, 'connect', self._on_connect)
+        # Pool may already hold a connection opened before we were installed
+        db.engine.dispose()
+
+        if Config.SQLITE_SERIALIZE_WRITES:
+            event.listen(db.session, 'before_flush', self._before_flush)
+            event.listen(db.session, 'do_orm_execute', self._on_orm_execute)
+            event.listen(db.session, 'after_transaction_end', self._after_transaction_end)
+
+        self.enabled = True
+        with db.engine.connect() as conn:
+            self.journal_mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+        logger.info(f"[SQLite] Tuning enabled (journal_mode={self.journal_mode}, "
+                    f"serialized writes={Config.SQLITE_SERIALIZE_WRITES})")
+
+    # ---- connection pragmas ----
+
+    @staticmethod
+    def _on_connect(dbapi_conn, connection_record) -> None:
+        cursor = dbapi_conn.cursor()
+        try:
+            # WAL lets readers run alongside the writer; the mode persists in the file
+            cursor.execute(f'PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}')
+            # NORMAL is durable across app crashes in WAL mode (fsync at checkpoint only)
+            cursor.execute(f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}')
+            # Negative cache_size is in KiB
+            cursor.execute(f'PRAGMA cache_size=-{int(Config.SQLITE_CACHE_SIZE_KB)}')
+            cursor.execute(f'PRAGMA mmap_size={int(Config.SQLITE_MMAP_SIZE)}')
+            cursor.execute(f'PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+        finally:
+            cursor.close()
+
+    # ---- serialized writes ----
+
+    def _acquire(self, session) -> None:
+        if session.info.get(_LOCK_FLAG):
+            return
+        started = time.time()
+        acquired = self._write_lock.acquire(timeout=Config.SQLITE_WRITE_LOCK_TIMEOUT)
+        waited = time.time() - started
+        with self._stats_lock:
+            self._waits.append(waited)
+            if not acquired:
+                self._stats['lock_timeouts'] += 1
+        if not acquired:
+            # Fall back to SQLite's own busy handling rather than failing the write
+            logger.warning(f"[SQLite] Writer lock not acquired after {waited:.1f}s, writing unserialized")
+            return
+        session.info[_LOCK_FLAG] = time.time()
+
+    def _before_flush(self, session, flush_context, instances) -> None:
+        self._acquire(session)
+
+    def _on_orm_execute(self, orm_execute_state) -> None:
+        """Bulk query.update()/delete() and text() DML don't flush"""
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            self._acquire(orm_execute_state.session)
+        elif isinstance(orm_execute_state.statement, TextClause) and \
+                WRITE_SQL_PATTERN.match(orm_execute_state.statement.text):
+            self._acquire(orm_execute_state.session)
+
+    def _after_transaction_end(self, session, transaction) -> None:
+        # Only the outermost transaction ends the SQLite write transaction
+        if transaction.parent is not None:
+            return
+        acquired_at = session.info.pop(_LOCK_FLAG, None)
+        if acquired_at is None:
+            return
+        self._write_lock.release()
+        held_ms = (time.time() - acquired_at) * 1000
+        with self._stats_lock:
+            self._stats['write_transactions'] += 1
+            if held_ms > self._stats['max_hold_ms']:
+                self._stats['max_hold_ms'] = round(held_ms, 2)
+
+    def get_stats(self) -> Dict:
+        """Writer lock wait times for the health endpoint"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            waits = sorted(self._waits)
+        stats['enabled'] = self.enabled
+        stats['journal_mode'] = self.journal_mode
+        if waits:
+            stats['lock_wait_ms_avg'] = round(sum(waits) / len(waits) * 1000, 2)
+            stats['lock_wait_ms_p99'] = round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 2)
+        return stats
+
+
+# Global instance
+sqlite_tuning = SQLiteTuning()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - EAI record insertion benchmark
+Compares the row-by-row MERGE path with the executemany/batcherrors path of
+eai_ingest_service against a local stand-in for ACC_ERP_REPORT_SUCCESS:
+an SQLite table with the same upsert semantics (insert when SCHB_NUMBER is
+new, otherwise nothing) behind a cx_Oracle-style connection/cursor adapter.
+Each round trip to the "database" costs --rtt milliseconds, like the LAN hop
+to 165.
+
+    python benchmarks/bench_eai_insert.py --records 5000 --rtt 1.0
+
+The upload mixes in rows that already exist, repeated SCHB_NUMBERs and rows
+the table rejects, so both paths must agree on per-row outcomes.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ORA codes the adapter reports for SQLite constraint failures
+ORA_UNIQUE = 1       # ORA-00001 unique constraint violated
+ORA_CHECK = 2290     # ORA-02290 check constraint violated
+
+
+def _load_module(name, *parts):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, *parts))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_service():
+    """Load eai_ingest_service (and the pool module it imports) by path - no Flask app needed"""
+    sys.path.insert(0, BACKEND_DIR)
+    _load_module('app.services.oracle_pool', 'app', 'services', 'oracle_pool.py')
+    return _load_module('eai_ingest_service', 'app', 'services', 'eai_ingest_service.py')
+
+
+eai = _load_service()
+
+
+# ============ SQLite stand-in with a cx_Oracle-style API ============
+
+SCHEMA_SQL = """
+CREATE TABLE ACC_ERP_REPORT_SUCCESS (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    WONO TEXT, PACKID TEXT, PARTNO TEXT,
+    CNT INTEGER CHECK (CNT >= 0),
+    LINE TEXT,
+    SCHB_NUMBER TEXT NOT NULL UNIQUE,
+    SOURCE_BILL_NO TEXT, REPORT_TIME TEXT, IS_SUCCESS INTEGER, ERROR_MESSAGE TEXT
+)
+"""
+
+# Same semantics as the MERGE: insert when SCHB_NUMBER is new, else no-op (rowcount 0)
+UPSERT_SQL = """
+INSERT INTO ACC_ERP_REPORT_SUCCESS (WONO, PACKID, PARTNO, CNT, LINE, SCHB_NUMBER,
+                                    SOURCE_BILL_NO, REPORT_TIME, IS_SUCCESS, ERROR_MESSAGE)
+VALUES (:wono, :packid, :partno, :cnt, :line, :schb_number,
+        :source_bill_no, :report_time, :is_success, :error_message)
+ON CONFLICT(SCHB_NUMBER) DO NOTHING
+"""
+
+
+class BatchError:
+    def __init__(self, offset, code, message):
+        self.offset = offset
+        self.code = code
+        self.message = message
+
+
+class StandInError(Exception):
+    """Raised like cx_Oracle.DatabaseError: args[0] carries .code/.message"""
+
+    def __str__(self):
+        return self.args[0].message
+
+
+class StandInCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self.rowcount = 0
+        self._batch_errors = []
+        self._row_counts = []
+
+    def _run(self, params):
+        params = dict(params)
+        if isinstance(params.get('report_time'), datetime):
+            params['report_time'] = params['report_time'].isoformat()
+        try:
+            return self._conn.db.execute(UPSERT_SQL, params).rowcount
+        except sqlite3.IntegrityError as e:
+            code = ORA_UNIQUE if 'UNIQUE' in str(e) else ORA_CHECK
+            raise StandInError(BatchError(None, code, f'ORA-{code:05d}: {e}'))
+
+    def execute(self, sql, params):
+        self._conn.round_trip()
+        self.rowcount = self._run(params)
+
+    def executemany(self, sql, rows, batcherrors=False, arraydmlrowcounts=False):
+        self._conn.round_trip()
+        self._batch_errors, self._row_counts = [], []
+        for offset, params in enumerate(rows):
+            try:
+                self._row_counts.append(self._run(params))
+            except StandInError as e:
+                if not batcherrors:
+                    raise
+                error = e.args[0]
+                self._batch_errors.append(BatchError(offset, error.code, error.message))
+                self._row_counts.append(0)
+        self.rowcount = sum(self._row_counts)
+
+    def getbatcherrors(self):
+        return self._batch_errors
+
+    def getarraydmlrowcounts(self):
+        return self._row_counts
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    """cx_Oracle-like connection over SQLite; every call costs one simulated round trip"""
+
+    def __init__(self, path, rtt):
+        self.db = sqlite3.connect(path)
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        self.round_trip()
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+# ============ Workload ============
+
+def make_records(count, existing, seed=42):
+    """Upload payload with pre-existing, repeated and invalid rows mixed in"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    records = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.05 and existing:
+            schb = rng.choice(existing)                 # already in the table
+        elif roll < 0.06 and records:
+            schb = rng.choice(records)['schb_number']   # repeated within the upload
+        else:
+            schb = f'SCHB{i:08d}'
+        records.append({
+            'schb_number': schb,
+            'source_bill_no': f'WO{i % 300:05d}',
+            'lot_number': f'LOT{i:06d}',
+            'product_code': f'P{i % 40:03d}',
+            'qty': -1 if roll > 0.995 else rng.randint(1, 500),  # CNT < 0 is rejected
+            'line': 'L1',
+            'report_time': (base + timedelta(seconds=i)).isoformat(),
+            'is_success': roll > 0.1,
+            'error_message': '' if roll > 0.1 else 'ERP timeout'
+        })
+    return records
+
+
+def fresh_database(directory, name, existing):
+    path = os.path.join(directory, f'{name}.db')
+    db = sqlite3.connect(path)
+    db.execute(SCHEMA_SQL)
+    db.executemany("INSERT INTO ACC_ERP_REPORT_SUCCESS (SCHB_NUMBER, CNT) VALUES (?, 1)",
+                   [(s,) for s in existing])
+    db.commit()
+    db.close()
+    return path
+
+
+def run_mode(name, fn, path, rtt, records):
+    conn = StandInConnection(path, rtt)
+    started = time.perf_counter()
+    result = fn(conn, records)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    print(f'  {name:<26} {elapsed:8.3f}s  {len(records) / elapsed:10.0f} rows/s  '
+          f'round trips={conn.round_trips:<6} inserted={result["inserted"]} '
+          f'duplicates={result["duplicates"]} failed={result["failed"]} skipped={result["skipped"]}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--rtt', type=float, default=1.0, help='simulated round trip in milliseconds')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rtt = args.rtt / 1000.0
+    existing = [f'OLD{i:06d}' for i in range(2000)]
+    records = make_records(args.records, existing)
+    service = eai.EAIIngestService(batch_size=args.batch_size)
+    directory = tempfile.mkdtemp(prefix='acc-eai-bench-')
+
+    print(f'{args.records} records, simulated round trip {args.rtt}ms, batch size {args.batch_size}')
+    row = run_mode('row-by-row MERGE', service.merge_rowwise,
+                   fresh_database(directory, 'row', existing), rtt, records)
+    bulk = run_mode('executemany + batcherrors', service.merge_bulk,
+                    fresh_database(directory, 'bulk', existing), rtt, records)
+
+    same = all(row[k] == bulk[k] for k in ('inserted', 'duplicates', 'failed', 'skipped')) and \
+        [(r['index'], r['status']) for r in row['rows']] == [(r['index'], r['status']) for r in bulk['rows']]
+    print(f'\nper-row outcomes identical: {same}')
+    print(f'sample failures: {bulk["errors"][:2]}')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
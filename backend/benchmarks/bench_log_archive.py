@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - system log archive benchmark
+Writes one synthetic day of system logs (JSON Lines, the SystemLogBuffer
+format) and archives it two ways:
+
+  old    - gzip of the whole file; every read inflates and parses the day,
+           reverses it and slices the page (the previous get_logs_by_date)
+  blocks - app/services/log_archive.py: independent gzip members of
+           SYSTEM_LOG_BLOCK_LINES lines plus a .idx sidecar
+
+then times the reads the log viewer makes: the newest page, a deep page, a
+level-filtered page, a page before a point in time, and per-level counts
+(for the whole day and up to a point in time).
+Every result is checked against the old path, and the block archive is
+checked to decompress to the original bytes.
+
+    python benchmarks/bench_log_archive.py --lines 500000
+"""
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name, *parts):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, *parts))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_archive():
+    """Load log_archive by path - no Flask app needed"""
+    sys.path.insert(0, BACKEND_DIR)
+    return _load_module('log_archive', 'app', 'services', 'log_archive.py')
+
+
+log_archive = _load_archive()
+
+SERVERS = ['153', '160', '163', '164', '165', '168', '193', '194']
+LEVELS = ['info'] * 90 + ['warning'] * 7 + ['error'] * 3
+MESSAGES = [
+    'Agent report received, {n} processes',
+    'Process ACC.Server restarted by auto-restart (attempt {n})',
+    'Tablespace USERS at {n}% used',
+    '数据库连接超时, 重试 {n}',
+    'Log scan found {n} new alert lines',
+]
+
+
+def write_day(path, lines, seed=5):
+    rng = random.Random(seed)
+    start = time.mktime(time.strptime('2026-01-15', '%Y-%m-%d'))
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            ts = start + i * 86400 / lines
+            local = time.localtime(ts)
+            entry = {
+                'time': time.strftime('%H:%M:%S', local),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', local) + f'.{i % 1000:03d}000',
+                'level': rng.choice(LEVELS),
+                'server_id': rng.choice(SERVERS),
+                'message': rng.choice(MESSAGES).format(n=rng.randint(1, 9999)),
+            }
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def old_read(gz_path, offset, limit, level=None, until=None):
+    logs = []
+    with gzip.open(gz_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                logs.append(json.loads(line))
+    logs.reverse()
+    if level:
+        logs = [e for e in logs if e.get('level', 'info') == level]
+    if until:
+        logs = [e for e in logs if e.get('timestamp', '') <= until]
+    return logs[offset:offset + limit] if limit is not None else logs[offset:]
+
+
+def timed(repeat, func, *args, **kwargs):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=500000, help='log lines in the day')
+    parser.add_argument('--block-lines', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='acc-log-archive-')
+    try:
+        plain = os.path.join(work, 'system_2026-01-15.log')
+        write_day(plain, args.lines)
+        with open(plain, 'rb') as f:
+            original = f.read()
+
+        old_gz = os.path.join(work, 'old', 'system_2026-01-15.log.gz')
+        os.makedirs(os.path.dirname(old_gz))
+        started = time.perf_counter()
+        with open(plain, 'rb') as f_in, gzip.open(old_gz, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        old_write = time.perf_counter() - started
+
+        new_gz = plain + '.gz'
+        started = time.perf_counter()
+        with open(plain, 'rb') as src:
+            log_archive.write_archive(src, new_gz, args.block_lines)
+        new_write = time.perf_counter() - started
+        archive = log_archive.LogArchive(new_gz)
+
+        with gzip.open(new_gz, 'rb') as f:
+            identical = f.read() == original
+        idx_size = os.path.getsize(log_archive.index_path(new_gz))
+        print(f'{args.lines} lines, {len(original) / 1048576:.1f} MB raw, '
+              f'{len(archive.blocks)} blocks, decompresses identically: {identical}')
+        print(f'  old    gzip {os.path.getsize(old_gz) / 1048576:6.2f} MB, written in {old_write:.2f}s')
+        print(f'  blocks gzip {os.path.getsize(new_gz) / 1048576:6.2f} MB + {idx_size / 1024:.0f} KB index, '
+              f'written in {new_write:.2f}s')
+
+        size = args.page_size
+        middle = archive.blocks[len(archive.blocks) // 2]['last']
+        cases = [
+            ('newest page', dict(offset=0, limit=size)),
+            ('page at 50% depth', dict(offset=args.lines // 2, limit=size)),
+            ('last page', dict(offset=args.lines - size, limit=size)),
+            ('level=error, page 10', dict(offset=9 * size, limit=size, level='error')),
+            ('until midday', dict(offset=0, limit=size, until=middle)),
+        ]
+        print(f'\n  {"read (" + str(size) + " per page)":<24} {"old ms":>9} {"blocks ms":>10} {"same":>5}')
+        for name, kwargs in cases:
+            old, old_ms = timed(args.repeat, old_read, old_gz, **kwargs)
+            new, new_ms = timed(args.repeat, archive.read, **kwargs)
+            print(f'  {name:<24} {old_ms:9.1f} {new_ms:10.2f} {str(old == new):>5}')
+
+        old, old_ms = timed(args.repeat, lambda: len(old_read(old_gz, 0, None, level='warning')))
+        new, new_ms = timed(args.repeat, archive.count, 'warning')
+        print(f'  {"count level=warning":<24} {old_ms:9.1f} {new_ms:10.2f} {str(old == new):>5}')
+
+        # A point inside a block: only that block is inflated
+        inside = archive.blocks[len(archive.blocks) // 2]['first']
+        old, old_ms = timed(args.repeat, lambda: len(old_read(old_gz, 0, None, level='warning', until=inside)))
+        new, new_ms = timed(args.repeat, archive.count, 'warning', inside)
+        print(f'  {"count warning, until":<24} {old_ms:9.1f} {new_ms:10.2f} {str(old == new):>5}')
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - log level classifier benchmark
+Compares the old keyword loops with app.utils.log_classifier on a synthetic
+log of --lines lines (EAI format, a few percent of them carrying alert
+keywords, some with several keywords of different levels):
+
+  scan_for_alerts   one '.*keyword.*' findall over the whole text per keyword
+                    vs. KeywordClassifier.scan (one pass)
+  classify          nested 'keyword.lower() in message_lower' loops per line
+                    vs. KeywordClassifier.classify (pre-lowered keywords, rank order)
+
+    python benchmarks/bench_log_classifier.py --lines 100000
+
+The old scan backtracks through every line once per keyword; at 100k lines
+it takes minutes, so use --lines 20000 for a quick run.
+
+Both sides must agree: the same level for every line, and the same set of
+alert lines (the old scan reported a line once per keyword it contained).
+EDGE_CASES are checked the same way first - lines whose lowercase form
+changes length or whose characters case-fold onto a keyword's letters.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_classifier():
+    """Load log_classifier by path - the app package (and its scheduler) is not needed"""
+    sys.path.insert(0, BACKEND_DIR)
+    spec = importlib.util.spec_from_file_location(
+        'log_classifier', os.path.join(BACKEND_DIR, 'app', 'utils', 'log_classifier.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+log_classifier = _load_classifier()
+from config.settings import LOG_ALERT_KEYWORDS  # noqa: E402
+
+
+# ============ Old implementations ============
+
+def legacy_scan(content):
+    alerts = []
+    for level, keywords in LOG_ALERT_KEYWORDS.items():
+        for keyword in keywords:
+            pattern = re.compile(rf'.*{re.escape(keyword)}.*', re.IGNORECASE)
+            for match in pattern.findall(content):
+                alerts.append((match.strip()[:500], level, keyword))
+    return alerts
+
+
+def legacy_classify(message):
+    message_lower = message.lower()
+    for level in ('critical', 'error', 'warning'):
+        for keyword in LOG_ALERT_KEYWORDS[level]:
+            if keyword.lower() in message_lower:
+                return level
+    return 'info'
+
+
+# ============ Workload ============
+
+TEMPLATES = [
+    '[INFO][{ts}][eai-engine][worker-3] heartbeat ok, queue=0, elapsed=12ms',
+    '[INFO][{ts}][eai-engine][flow] exec sql: SELECT WONO, PACKID, PARTNO, CNT FROM ACC_PACK_INFO WHERE STATUS = 0',
+    '[DEBUG][{ts}][http][client] POST http://172.17.10.20/K3Cloud/api response 200 in 341ms',
+    '[INFO][{ts}][flow][MES报工接口] 报工任务开始执行, 批次数量: 12, 产线: SMT-2',
+    '[INFO][{ts}][flow][step] data transform result: {{"rows": [{{"ID": 1, "QTY": 5, "REMARK": "{pad}"}}]}}',
+]
+ALERT_TEMPLATES = [
+    '[WARN][{ts}][redis][pool] connection idle timeout, Retry in 5s',
+    '[ERRO][{ts}][flow][step] step failed: dial tcp 172.17.10.20:80: Connection refused',
+    '[ERRO][{ts}][db] ORA-12541: TNS:no listener',
+    '[ERRO][{ts}][db] ORA-00600: internal error code, arguments: [kdsgrp1]',
+    '[ERRO][{ts}][clr] Unhandled Exception: System.OutOfMemoryException at ACC.Server.Pack()',
+    '[ERRO][{ts}][flow][lua] run error: call lua error: nil value',
+]
+
+
+# Lowercasing changes the length ('İ' -> 'i̇') or only case-folding matches ('ſ', 'K')
+EDGE_CASES = [
+    'İstanbul link: Connection refuſed',
+    'İstanbul link: Connection refused',
+    'İSTANBUL ORA-12541: TNS:no listener',
+    'heartbeat ok, \u212aB used: 12',
+    'ok\nİstanbul link: Connection refuſed\n[ERRO] İzmir: Connection refused\nfine',
+]
+
+
+def check_edge_cases(classifier):
+    """Edge cases must not raise and must give legacy_classify's answer"""
+    failures = []
+    for text in EDGE_CASES:
+        try:
+            levels = [classifier.classify(line) for line in text.split('\n')]
+            alerts = [(line, level) for line, level, _ in classifier.scan(text)]
+        except Exception as e:
+            failures.append(f'{text!r}: {e!r}')
+            continue
+        expected_levels = [legacy_classify(line) for line in text.split('\n')]
+        expected_alerts = [(line, legacy_classify(line)) for line in text.split('\n')
+                           if legacy_classify(line) != 'info']
+        if levels != expected_levels or alerts != expected_alerts:
+            failures.append(f'{text!r}: classify {levels}, scan {alerts}')
+    return failures
+
+
+def make_log(lines, alert_ratio, seed=3):
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        ts = f'2026-10-17 08:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d}'
+        templates = ALERT_TEMPLATES if rng.random() < alert_ratio else TEMPLATES
+        out.append(rng.choice(templates).format(ts=ts, pad='x' * rng.randint(0, 200)) + f' #{i}')
+    return '\n'.join(out) + '\n'
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--alert-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    content = make_log(args.lines, args.alert_ratio)
+    lines = content.splitlines()
+    classifier = log_classifier.alert_classifier
+    print(f'{args.lines} lines ({len(content) / 1048576:.1f} MB), alert ratio {args.alert_ratio}')
+
+    failures = check_edge_cases(classifier)
+    print(f'  edge cases: {len(EDGE_CASES) - len(failures)}/{len(EDGE_CASES)} agree with the nested loops')
+    for failure in failures:
+        print(f'    MISMATCH {failure}')
+
+    old_alerts, old_scan = timed(legacy_scan, content)
+    new_alerts, new_scan = timed(lambda text: [(line.strip()[:500], level, keyword)
+                                               for line, level, keyword in classifier.scan(text)], content)
+    print(f'  scan_for_alerts  per-keyword findall {old_scan * 1000:8.1f} ms  alerts={len(old_alerts)}')
+    print(f'                   one-pass scan       {new_scan * 1000:8.1f} ms  alerts={len(new_alerts)}'
+          f'  speedup {old_scan / new_scan:5.1f}x')
+
+    old_levels, old_classify = timed(lambda: [legacy_classify(line) for line in lines])
+    new_levels, new_classify = timed(lambda: [classifier.classify(line) for line in lines])
+    print(f'  classify         nested loops        {old_classify * 1000:8.1f} ms')
+    print(f'                   lowered keywords    {new_classify * 1000:8.1f} ms'
+          f'  speedup {old_classify / new_classify:5.1f}x')
+
+    same_levels = old_levels == new_levels
+    # Old scan: one entry per (keyword, line); its first level for a line is the winning one
+    old_lines = {message for message, _, _ in old_alerts}
+    new_lines = {message for message, _, _ in new_alerts}
+    same_alerts = old_lines == new_lines and len(new_lines) == len(new_alerts) and all(
+        level == legacy_classify(message) for message, level, _ in new_alerts)
+    print(f'\nidentical levels: {same_levels}, identical alert lines: {same_alerts} '
+          f'(old scan reported {len(old_alerts) - len(old_lines)} duplicate entries)')
+    return 0 if same_levels and same_alerts and not failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
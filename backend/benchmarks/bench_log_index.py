@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - log search index benchmark
+Fills app/services/log_index.py with --days of synthetic logs from 8 servers
+(EAI format, mixed levels, some Chinese text), written the way the scheduler
+does it (add() then flush() every few thousand lines), then times searches:
+rare and common keywords, deep cursor pages, server and time-range filters,
+and a keyword shorter than a trigram (LIKE fallback).
+
+For reference it also runs the old search_logs approach locally: a
+'.*keyword.*' regex over the last 1000 lines of each server. That path also
+paid one SSH round trip per server and could not see anything older.
+
+    python benchmarks/bench_log_index.py --days 7 --lines-per-day 200000
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name, *parts):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, *parts))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_index():
+    """Load log_index (and the classifier it imports) by path - no Flask app needed"""
+    sys.path.insert(0, BACKEND_DIR)
+    _load_module('app.utils.log_classifier', 'app', 'utils', 'log_classifier.py')
+    return _load_module('log_index', 'app', 'services', 'log_index.py')
+
+
+log_index = _load_index()
+
+SERVERS = ['153', '160', '163', '164', '165', '168', '193', '194']
+TEMPLATES = [
+    '[INFO][{ts}][eai-engine][worker-3] heartbeat ok, queue=0, elapsed={n}ms',
+    '[INFO][{ts}][eai-engine][flow] exec sql: SELECT WONO, PACKID FROM ACC_PACK_INFO WHERE ID = {n}',
+    '[DEBUG][{ts}][http][client] POST http://172.17.10.20/K3Cloud/api response 200 in {n}ms',
+    '[INFO][{ts}][flow][MES报工接口] 报工任务开始执行, 批次数量: {n}, 产线: SMT-2',
+    '[WARN][{ts}][redis][pool] connection idle timeout, reconnecting ({n})',
+    '[ERRO][{ts}][flow][step] step failed, will retry in 30s: dial tcp 172.17.10.20:80: i/o timeout',
+    '[ERRO][{ts}][db] query error: ORA-12541: TNS:no listener (attempt {n})',
+]
+RARE = '[ERRO][{ts}][db] ORA-00600: internal error code, arguments: [kdsgrp1] pack {n}'
+
+
+def generate(days, lines_per_day, seed=11):
+    """(server_id, message, ts) in time order, ending now"""
+    rng = random.Random(seed)
+    end = int(time.time())
+    start = end - days * 86400
+    total = days * lines_per_day
+    step = (end - start) / total
+    for i in range(total):
+        ts = int(start + i * step)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+        template = RARE if rng.random() < 0.0002 else rng.choice(TEMPLATES)
+        yield rng.choice(SERVERS), template.format(ts=stamp, n=rng.randint(1, 99999)), ts
+
+
+def fill(index, days, lines_per_day, batch):
+    tails = {server: [] for server in SERVERS}
+    started = time.perf_counter()
+    pending = {}
+    count = 0
+    for server_id, message, ts in generate(days, lines_per_day):
+        pending.setdefault(server_id, []).append((message, ts))
+        tails[server_id].append(message)
+        if len(tails[server_id]) > 1000:
+            del tails[server_id][:-1000]
+        count += 1
+        if count % batch == 0:
+            for sid, lines in pending.items():
+                index.add(sid, 'agent', lines)
+            pending = {}
+            index.flush()
+    for sid, lines in pending.items():
+        index.add(sid, 'agent', lines)
+    index.flush()
+    return count, time.perf_counter() - started, tails
+
+
+def timed_search(index, repeat, **kwargs):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = index.search(**kwargs)
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings) * 1000
+
+
+def old_search(tails, keyword):
+    pattern = re.compile(rf'.*{re.escape(keyword)}.*', re.IGNORECASE)
+    return [m for lines in tails.values() for m in pattern.findall('\n'.join(lines))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--lines-per-day', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=5000, help='lines per flush')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    index = log_index.LogIndex()
+    index.path = os.path.join(tempfile.mkdtemp(prefix='acc-log-index-'), 'log_index.db')
+
+    count, elapsed, tails = fill(index, args.days, args.lines_per_day, args.batch)
+    size = sum(os.path.getsize(index.path + suffix) for suffix in ('', '-wal')
+               if os.path.exists(index.path + suffix))
+    print(f'indexed {count} lines over {args.days} days in {elapsed:.1f}s '
+          f'({count / elapsed:.0f} lines/s, tokenizer={index.tokenizer}, {size / 1048576:.0f} MB)')
+
+    now = time.time()
+    cases = [
+        ('rare keyword', dict(keyword='ORA-00600')),
+        ('common keyword', dict(keyword='timeout')),
+        ('chinese keyword', dict(keyword='报工任务')),
+        ('common + 1 server', dict(keyword='timeout', server_ids=['163'])),
+        ('common + 1h, 3 days ago', dict(keyword='timeout', start=now - 3 * 86400 - 3600, end=now - 3 * 86400)),
+        ('rare + last 24h', dict(keyword='ORA-00600', start=now - 86400)),
+        ('level=error, no keyword', dict(levels=['error'])),
+        ('2-char keyword (LIKE)', dict(keyword='OK')),
+    ]
+    print(f'\n  {"search (50 per page)":<26} {"median ms":>10} {"hits":>6}')
+    for name, kwargs in cases:
+        result, ms = timed_search(index, args.repeat, limit=50, **kwargs)
+        print(f'  {name:<26} {ms:10.2f} {len(result["logs"]):6d}')
+
+    # Page 20 of a common keyword through the cursor
+    started = time.perf_counter()
+    cursor = None
+    for _ in range(20):
+        cursor = index.search(keyword='timeout', limit=50, cursor=cursor)['next_cursor']
+    print(f'  {"common, 20 cursor pages":<26} {(time.perf_counter() - started) * 1000 / 20:10.2f} {"(per page)":>6}')
+
+    started = time.perf_counter()
+    old = old_search(tails, 'ORA-00600')
+    old_ms = (time.perf_counter() - started) * 1000
+    full = index.search(keyword='ORA-00600', limit=1000)['logs']
+    print(f'\nold search_logs (regex over last 1000 lines per server, SSH not counted): '
+          f'{old_ms:.1f} ms, ORA-00600 hits {len(old)} vs {len(full)} in the index')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - SQLite write load test
+Replays concurrent agent reports against a scratch database while other
+threads commit the way scheduler jobs and request handlers do, and reports
+p50/p95/p99 write latency plus "database is locked" failures.
+
+Before/after comparison (driver defaults vs. WAL + pragmas + serialized writes):
+
+    SQLITE_TUNING=false python benchmarks/bench_sqlite_writes.py
+    SQLITE_TUNING=true  python benchmarks/bench_sqlite_writes.py
+
+Options: --agents 40 --writers 8 --readers 4 --duration 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(name, latencies, errors):
+    ms = [v * 1000 for v in latencies]
+    if not ms:
+        print(f'  {name:<18} no samples  errors={errors}')
+        return
+    print(f'  {name:<18} n={len(ms):<6} p50={statistics.median(ms):8.2f}ms '
+          f'p95={percentile(ms, 95):8.2f}ms p99={percentile(ms, 99):8.2f}ms '
+          f'max={max(ms):8.2f}ms errors={errors}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=40, help='concurrent agents posting reports')
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between reports per agent')
+    parser.add_argument('--writers', type=int, default=8, help='threads committing like scheduler jobs')
+    parser.add_argument('--readers', type=int, default=4, help='threads running dashboard queries')
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    # Scratch database; must be set before the app (and Config) is imported
+    db_file = os.path.join(tempfile.mkdtemp(prefix='acc-sqlite-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file}'
+    sys.path.insert(0, BACKEND_DIR)
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    from app import create_app, db
+    from app.models import Alert, RestartLog
+    from app.services.report_writer import report_writer
+    from app.utils.sqlite_tuning import sqlite_tuning
+    from config.settings import Config
+
+    app = create_app()
+    print(f'database: {db_file}')
+    print(f'tuning: {Config.SQLITE_TUNING}  journal_mode: {sqlite_tuning.journal_mode or "driver default"}')
+    print(f'{args.agents} agents every {args.interval}s, {args.writers} writers, '
+          f'{args.readers} readers, {args.duration}s')
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {'report_post': [], 'direct_commit': [], 'dashboard_read': []}
+    errors = {'report_post': 0, 'direct_commit': 0, 'dashboard_read': 0}
+    locked_errors = [0]
+
+    def record(kind, latency=None, error=None):
+        with lock:
+            if error is None:
+                results[kind].append(latency)
+            else:
+                errors[kind] += 1
+                if 'locked' in str(error):
+                    locked_errors[0] += 1
+
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+
+    def agent(idx):
+        client = app.test_client()
+        server_id = f'bench-{idx:03d}'
+        while not stop.is_set():
+            payload = {
+                'server_id': server_id,
+                'resources': {'cpu_usage': random.uniform(5, 95), 'memory_usage': 40, 'disk_usage': 60},
+                'processes': [{'name': f'proc-{n}', 'status': 'running'} for n in range(5)],
+                'alerts': [{'message': f'{today} 10:00:00 [ERROR] bench failure {random.random()}'},
+                           {'message': f'{today} 10:00:01 [INFO] heartbeat'}],
+            }
+            started = time.perf_counter()
+            try:
+                response = client.post('/api/agent/report', json=payload)
+                if response.status_code >= 500:
+                    raise RuntimeError(f'HTTP {response.status_code}')
+                record('report_post', time.perf_counter() - started)
+            except Exception as e:
+                record('report_post', error=e)
+            stop.wait(args.interval)
+
+    def writer(idx):
+        while not stop.is_set():
+            with app.app_context():
+                started = time.perf_counter()
+                try:
+                    db.session.add(Alert(server_id='bench-job', level='warning', source='bench',
+                                         message=f'writer {idx}'))
+                    db.session.add(RestartLog(server_id='bench-job', process_name='bench',
+                                              reason='bench', success=True))
+                    db.session.commit()
+                    record('direct_commit', time.perf_counter() - started)
+                except Exception as e:
+                    db.session.rollback()
+                    record('direct_commit', error=e)
+            stop.wait(random.uniform(0.01, 0.05))
+
+    def reader():
+        while not stop.is_set():
+            with app.app_context():
+                started = time.perf_counter()
+                try:
+                    Alert.query.filter_by(acknowledged=False).order_by(Alert.created_at.desc()).limit(50).all()
+                    record('dashboard_read', time.perf_counter() - started)
+                except Exception as e:
+                    record('dashboard_read', error=e)
+            stop.wait(0.05)
+
+    threads = [threading.Thread(target=agent, args=(i,), daemon=True) for i in range(args.agents)]
+    threads += [threading.Thread(target=writer, args=(i,), daemon=True) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, daemon=True) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+    report_writer._queue.join()
+
+    print('\nlatency')
+    for kind in results:
+        summarize(kind, results[kind], errors[kind])
+    print(f'\n"database is locked" errors: {locked_errors[0]}')
+    writer_stats = report_writer.get_stats()
+    print(f'report writer: batches={writer_stats["batches"]} reports={writer_stats["reports_written"]} '
+          f'commit p99={writer_stats.get("commit_ms_p99", 0)}ms commit_errors={writer_stats["commit_errors"]} '
+          f'rejected={writer_stats["rejected"]}')
+    if sqlite_tuning.enabled:
+        print(f'writer lock: {sqlite_tuning.get_stats()}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+ACC Monitor - SSH backend benchmark
+Compares the paramiko pool (one thread per host) with the asyncssh collector
+(all hosts on one event loop), first for a single command per host, then for
+a full status sweep: MonitorService.get_all_servers_status over --hosts
+Windows servers (tasklist, services, 3x wmic, findstr per process), once on
+the paramiko pool with STATUS_WORKERS threads and once on the asyncssh
+backend, which sends the whole sweep through one run_many call.
+
+By default an in-process asyncssh server stands in for the monitored hosts,
+so no real SSH daemon is needed:
+
+    python benchmarks/bench_ssh_backends.py --hosts 50 --rounds 5 --delay 0.2
+
+Point it at a real sshd instead with --target host:port --user root --key ~/.ssh/id_rsa
+(the sweep is skipped then - its commands are Windows commands).
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES_DIR = os.path.join(BACKEND_DIR, 'app', 'services')
+
+
+def _load(name):
+    """Load a service module by path so the benchmark doesn't need the Flask app"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SERVICES_DIR, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+ssh_pool = _load('ssh_pool')
+async_ssh_collector = _load('async_ssh_collector')
+logging.getLogger('paramiko').setLevel(logging.WARNING)
+
+
+# ============ In-process SSH server stand-in ============
+
+def start_local_server(delay: float):
+    """Start an asyncssh server on 127.0.0.1 in a background loop. Returns (port, key_file)."""
+    import asyncssh
+
+    tmpdir = tempfile.mkdtemp(prefix='acc-bench-')
+    client_key = paramiko.RSAKey.generate(2048)
+    key_file = os.path.join(tmpdir, 'id_rsa')
+    client_key.write_private_key_file(key_file)
+    authorized = asyncssh.import_authorized_keys(f'{client_key.get_name()} {client_key.get_base64()}\n')
+    host_key = asyncssh.generate_private_key('ssh-rsa')
+
+    async def handle(process):
+        command = process.command or ''
+        if command.startswith('sleep '):
+            await asyncio.sleep(float(command.split()[1]))
+        else:
+            await asyncio.sleep(delay)
+        process.stdout.write(f'OK {command}\n')
+        process.exit(0)
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def _start():
+        server = await asyncssh.create_server(
+            lambda: asyncssh.SSHServer(), '127.0.0.1', 0,
+            server_host_keys=[host_key],
+            authorized_client_keys=authorized,
+            process_factory=handle
+        )
+        state['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(_start())
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True).start()
+    ready.wait(timeout=30)
+    return state['port'], key_file
+
+
+# ============ Backends ============
+
+def paramiko_connect(params):
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=params['host'], port=params['port'], username=params['username'],
+        pkey=paramiko.RSAKey.from_private_key_file(params['key_file']),
+        timeout=10, banner_timeout=15, auth_timeout=10,
+        allow_agent=False, look_for_keys=False
+    )
+    return client
+
+
+def paramiko_round(pool, hosts, params, command, timeout):
+    def one(server_id):
+        client = pool.acquire(server_id, lambda: paramiko_connect(params))
+        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+        stdout.channel.settimeout(timeout + 5)
+        return stdout.read().decode('utf-8', errors='ignore').strip()
+
+    # Mirrors the old get_all_servers_status: one worker per host
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        results = list(executor.map(one, hosts))
+        peak_threads = threading.active_count()
+    return results, peak_threads
+
+
+def asyncssh_round(collector, hosts, params, command, timeout):
+    results = collector.run_many([(h, params, command, timeout) for h in hosts])
+    return [None if isinstance(r, BaseException) else r for r in results], threading.active_count()
+
+
+def run_backend(name, round_fn, backend, hosts, params, args):
+    timings = []
+    peak = 0
+    failures = 0
+    for i in range(args.rounds):
+        started = time.perf_counter()
+        results, threads = round_fn(backend, hosts, params, args.command, args.timeout)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, threads)
+        failures += sum(1 for r in results if not r)
+
+    cold, warm = timings[0], timings[1:] or timings
+    print(f'\n[{name}]')
+    print(f'  first round (handshakes): {cold:.3f}s')
+    print(f'  warm rounds: median {statistics.median(warm):.3f}s  max {max(warm):.3f}s')
+    print(f'  peak threads: {peak}  failed commands: {failures}')
+    stats = backend.get_stats()
+    stats.pop('connections', None)
+    print(f'  stats: {stats}')
+
+
+def sweep_benchmark(args, params):
+    """Time MonitorService.get_all_servers_status on both backends against the stand-in"""
+    os.environ['SSH_BACKEND'] = 'asyncssh'
+    sys.path.insert(0, BACKEND_DIR)
+    from config import settings
+    settings.Config.SSH_BACKEND = 'asyncssh'
+    from app.services.monitor_service import monitor_service
+
+    settings.SERVERS.clear()
+    for i in range(args.hosts):
+        server_id = f'sweep-{i:03d}'
+        settings.SERVERS[server_id] = {
+            'name': server_id, 'ip': params['host'], 'os': 'windows', 'sort_order': i,
+            'processes': ['ACC.Server', 'ACC.MQ', 'Pack.Server'],
+            'services': [{'service_name': 'AccSvc', 'display_name': 'ACC Service'}],
+            'log_path': 'D:\\ACC\\logs',
+        }
+        settings.SSH_PORTS[server_id] = params['port']
+    settings.SSH_CREDENTIALS['windows']['key_file'] = params['key_file']
+    settings.SSH_CREDENTIALS['windows']['username'] = params['username']
+    # Every stand-in host is 127.0.0.1; don't treat them as this machine
+    monitor_service._local_ips = set()
+    collector = monitor_service.async_ssh
+
+    def sweep(backend):
+        monitor_service.async_ssh = backend
+        timings = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            servers = monitor_service.get_all_servers_status(auto_restart=False)
+            timings.append(time.perf_counter() - started)
+        return timings, {s['data_source'] for s in servers}
+
+    print(f'\n[status sweep: get_all_servers_status, {args.hosts} Windows hosts]')
+    plan = monitor_service._status_ssh_commands('sweep-000')
+    print(f'  SSH commands per host: {len(plan)}')
+    for name, backend in (('paramiko pool + STATUS_WORKERS threads', None), ('asyncssh run_many', collector)):
+        before = collector.get_stats()['commands']
+        timings, sources = sweep(backend)
+        cold, warm = timings[0], timings[1:] or timings
+        issued = (collector.get_stats()['commands'] - before) / args.rounds if backend else len(plan) * args.hosts
+        print(f'  [{name}] first {cold:.2f}s, warm median {statistics.median(warm):.2f}s, '
+              f'commands/sweep {issued:.0f}, data_source {sorted(sources)}')
+        # Drop the paramiko transports (one reader thread each) before the next run
+        monitor_service.ssh_pool.close_all()
+
+
+def measure_cancellation(name, fn):
+    """Time how long a timed-out command takes to give control back"""
+    started = time.perf_counter()
+    try:
+        fn()
+        outcome = 'completed'
+    except Exception as e:
+        outcome = type(e).__name__
+    print(f'  [{name}] sleep 30 with 1s timeout -> {outcome} after {time.perf_counter() - started:.2f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hosts', type=int, default=50, help='simulated hosts (distinct pool keys)')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--delay', type=float, default=0.2, help='stand-in server command latency')
+    parser.add_argument('--command', default='echo OK')
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--target', help='host:port of a real sshd (skips the stand-in server)')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--key', default=os.path.expanduser('~/.ssh/id_rsa'))
+    args = parser.parse_args()
+
+    if not async_ssh_collector.HAS_ASYNCSSH:
+        print('asyncssh is not installed: pip install asyncssh')
+        return 1
+
+    if args.target:
+        host, _, port = args.target.partition(':')
+        params = {'host': host, 'ip': host, 'port': int(port or 22),
+                  'username': args.user, 'key_file': args.key}
+    else:
+        port, key_file = start_local_server(args.delay)
+        params = {'host': '127.0.0.1', 'ip': '127.0.0.1', 'port': port,
+                  'username': args.user, 'key_file': key_file}
+        print(f'Stand-in SSH server on 127.0.0.1:{port} (command delay {args.delay}s)')
+
+    hosts = [f'bench-{i:03d}' for i in range(args.hosts)]
+    print(f'{args.hosts} hosts x {args.rounds} rounds, command={args.command!r}')
+
+    pool = ssh_pool.SSHConnectionPool()
+    collector = async_ssh_collector.AsyncSSHCollector(max_concurrency=max(64, args.hosts))
+
+    run_backend('paramiko pool + threads', paramiko_round, pool, hosts, params, args)
+    # Each pooled paramiko connection keeps a transport thread; close them so the
+    # asyncssh thread count isn't inflated
+    pool.close_all()
+    time.sleep(0.5)
+    run_backend('asyncssh single loop', asyncssh_round, collector, hosts, params, args)
+
+    print('\n[cancellation]')
+
+    def paramiko_sleep():
+        client = pool.acquire(hosts[0], lambda: paramiko_connect(params))
+        stdin, stdout, stderr = client.exec_command('sleep 30', timeout=1)
+        stdout.channel.settimeout(1)
+        return stdout.read()
+
+    measure_cancellation('paramiko', paramiko_sleep)
+    measure_cancellation('asyncssh', lambda: collector.run(hosts[0], params, 'sleep 30', timeout=1))
+
+    pool.close_all()
+    collector.shutdown()
+
+    if not args.target:
+        sweep_benchmark(args, params)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
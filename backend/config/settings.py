@@ -63,14 +63,79 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite tuning (app/utils/sqlite_tuning.py); SQLITE_TUNING=false restores driver defaults
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_CACHE_SIZE_KB = 20000  # page cache per connection
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS = 15000
+    SQLITE_SERIALIZE_WRITES = True  # one write transaction at a time in this process
+    SQLITE_WRITE_LOCK_TIMEOUT = 15  # seconds before writing without the lock
+
     # WebSocket
     SOCKETIO_ASYNC_MODE = 'eventlet'
 
     # Monitoring intervals (seconds)
     PROCESS_CHECK_INTERVAL = 30
+    PROCESS_CHECK_WORKERS = 8  # concurrent server collections per cycle
+    PROCESS_CHECK_SERVER_DEADLINE = 40  # seconds one server's full status collection may take
+    PROCESS_RESTART_DEADLINE = 90  # seconds to wait for auto-restarts in a cycle
+    STATUS_DELTA_INTERVAL = 1.0  # seconds between coalesced status_delta frames
     DATABASE_CHECK_INTERVAL = 300  # 5 minutes
+    DATABASE_CHECK_WORKERS = 8  # concurrent database queries per sweep
+    DATABASE_CHECK_DEADLINE = 15  # seconds to wait for one database before using its last status
+    DATABASE_CALL_TIMEOUT_MS = 60000  # Oracle call timeout for monitoring queries
+    DATABASE_STATUS_CACHE_TTL = DATABASE_CHECK_INTERVAL + 60  # readers reuse the scheduler's results
     LOG_SCAN_INTERVAL = 60
 
+    # Agent report persistence (background group-commit writer)
+    REPORT_QUEUE_MAX = 1000  # queued reports before /agent/report answers 503
+    REPORT_BATCH_SIZE = 100  # max reports per commit
+    REPORT_BATCH_LINGER = 0.2  # seconds to gather more reports into a batch
+    REPORT_RETRY_AFTER = 5  # Retry-After seconds sent with 503
+
+    # Resource history (app/services/metrics_store.py)
+    METRICS_FLUSH_INTERVAL = 60  # seconds between chunk writes
+    METRICS_RAW_STEP = 30  # typical seconds between raw samples (agent report interval)
+    METRICS_RETENTION = {  # seconds kept per resolution
+        'raw': 24 * 3600,
+        '1m': 7 * 86400,
+        '5m': 90 * 86400,
+        '1h': 2 * 365 * 86400,
+    }
+
+    # Full-text log index (app/services/log_index.py) - separate SQLite file with FTS5
+    LOG_INDEX_PATH = os.environ.get('LOG_INDEX_PATH', os.path.join(BASE_DIR, 'data', 'log_index.db'))
+    LOG_INDEX_FLUSH_INTERVAL = 5  # seconds between index writes (system log files + buffered lines)
+    LOG_INDEX_MAX_PENDING = 50000  # buffered lines before the oldest are dropped
+    LOG_INDEX_RETENTION_DAYS = 30
+    LOG_INDEX_MESSAGE_MAX = 2000  # characters stored per line
+
+    # System log archives (app/services/log_archive.py)
+    SYSTEM_LOG_BLOCK_LINES = 1000  # lines per independently compressed block
+
+    # EAI record upload (/api/agent/eai-logs -> Oracle on 165)
+    EAI_INSERT_MODE = os.environ.get('EAI_INSERT_MODE', 'bulk').lower()  # bulk (executemany) or row
+    EAI_BATCH_SIZE = 500  # records per executemany round trip
+    EAI_POOL_MAX = 4  # sessions per EAI schema pool (concurrent agent uploads)
+    EAI_MAX_UPLOAD_BYTES = 64 * 1024 * 1024  # decompressed size limit for gzip agent uploads
+
+    # Oracle session pools (app/services/oracle_pool.py)
+    ORACLE_POOL_MIN = 1  # sessions kept open per pool
+    ORACLE_POOL_MAX = 4  # per monitored database
+    ORACLE_POOL_INCREMENT = 1
+    ORACLE_POOL_WAIT_TIMEOUT_MS = 5000  # max wait for a free session when the pool is full
+    ORACLE_POOL_PING_INTERVAL = 60  # ping sessions idle longer than this on checkout
+    ORACLE_POOL_IDLE_TIMEOUT = 300  # close sessions above min idle this long
+    ORACLE_STMT_CACHE_SIZE = 20  # prepared statements cached per session
+
+    # Tablespace trend buckets (ops_tablespace_trends)
+    TABLESPACE_TREND_POINTS = 200  # max points per tablespace returned to the chart
+    TABLESPACE_TREND_HOURLY_DAYS = 7  # ranges up to this use hourly buckets, longer use daily
+    TABLESPACE_TREND_HOURLY_RETENTION_DAYS = 90
+    TABLESPACE_TREND_DAILY_RETENTION_DAYS = 730
+
     # Alert thresholds
     TABLESPACE_WARNING_THRESHOLD = 85
     TABLESPACE_CRITICAL_THRESHOLD = 95
@@ -87,6 +152,19 @@ class Config:
     PROBE_RETRY_BACKOFF = True  # enable exponential backoff for probe failures
     MAX_PROBE_BACKOFF = 240  # max backoff interval in seconds (4 minutes)
 
+    # SSH connection pool settings
+    SSH_KEEPALIVE_INTERVAL = 30  # seconds between transport keepalive packets
+    SSH_POOL_IDLE_TIMEOUT = 600  # close pooled connections unused for 10 minutes
+    SSH_POOL_VALIDATE_AFTER = 60  # ping idle connections older than this on checkout
+    SSH_POOL_MAINTENANCE_INTERVAL = 120  # seconds between pool prune passes
+
+    # SSH backend for exec_ssh_command: 'paramiko' (thread per call, pooled)
+    # or 'asyncssh' (all sessions multiplexed on one event loop thread)
+    SSH_BACKEND = os.environ.get('SSH_BACKEND', 'paramiko').lower()
+    ASYNC_SSH_MAX_CONCURRENCY = 64  # max in-flight commands on the event loop
+    ASYNC_SSH_SESSIONS_PER_HOST = 4  # concurrent channels per connection (sshd MaxSessions is 10)
+    STATUS_WORKERS = 8  # workers for get_all_servers_status
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -76,11 +76,19 @@ export function useWebSocket() {
       })
     )
 
-    // 服务器状态更新（用于重连后的状态刷新）
+    // 服务器状态快照（加入status房间/重新同步时）
     unsubscribers.push(
-      wsService.on('serverStatusUpdate', (data) => {
-        if (data.server) {
-          monitorStore.updateFullServerStatus(data.server)
+      wsService.on('statusSnapshot', (data) => {
+        monitorStore.applyStatusSnapshot(data)
+      })
+    )
+
+    // 服务器状态增量，序号不连续时请求重新同步
+    unsubscribers.push(
+      wsService.on('statusDelta', (data) => {
+        if (!monitorStore.applyStatusDelta(data)) {
+          console.warn('[WS] Status delta gap, requesting resync')
+          wsService.requestResync()
         }
       })
     )
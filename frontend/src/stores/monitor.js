@@ -17,6 +17,38 @@ const SERVER_CONFIG = {
   '165': { name: 'SHARED', fullName: 'Common Services', ip: '172.17.10.165', serverType: 'shared', sortOrder: 8 }
 }
 
+// 后端字段 -> 前端字段（增量更新使用）
+const SERVER_FIELD_MAP = {
+  name: 'fullName',
+  ip: 'ip',
+  status: 'status',
+  disk_usage: 'tablespaceUsage',
+  cpu_usage: 'cpuUsage',
+  memory_usage: 'memoryUsage',
+  data_source: 'dataSource',
+  connection_info: 'connectionInfo'
+}
+
+const PROCESS_FIELD_MAP = {
+  name: 'name',
+  status: 'status',
+  pid: 'pid',
+  memory: 'memory',
+  type: 'type',
+  data_source: 'dataSource'
+}
+
+function mapProcess(p) {
+  return {
+    name: p.name,
+    status: p.status,
+    pid: p.pid,
+    memory: p.memory,
+    type: p.type || 'process',
+    dataSource: p.data_source
+  }
+}
+
 // 根据配置生成初始服务器列表（显示失联状态）
 function createInitialServers() {
   return Object.entries(SERVER_CONFIG)
@@ -53,6 +85,9 @@ export const useMonitorStore = defineStore('monitor', () => {
   // WebSocket连接状态
   const wsConnected = ref(false)
 
+  // 状态增量流序号（-1 表示尚未收到快照）
+  const statusSeq = ref(-1)
+
   // 计算属性
   const totalServers = computed(() => servers.value.length)
   const onlineServers = computed(() => servers.value.filter(s => s.status === 'normal').length)
@@ -81,14 +116,7 @@ export const useMonitorStore = defineStore('monitor', () => {
         ip: serverData.ip,
         status: serverData.status,
         serverType: serverData.os_type === 'linux' ? 'docker' : 'production',
-        processes: (serverData.processes || []).map(p => ({
-          name: p.name,
-          status: p.status,
-          pid: p.pid,
-          memory: p.memory,
-          type: p.type || 'process',
-          dataSource: p.data_source
-        })),
+        processes: (serverData.processes || []).map(mapProcess),
         tablespaceUsage: serverData.disk_usage || 0,
         cpuUsage: serverData.cpu_usage || 0,
         memoryUsage: serverData.memory_usage || 0,
@@ -100,6 +128,72 @@ export const useMonitorStore = defineStore('monitor', () => {
     }
   }
 
+  // 应用状态快照（status_snapshot）
+  function applyStatusSnapshot(snapshot) {
+    (snapshot.servers || []).forEach(server => updateFullServerStatus(server))
+    statusSeq.value = snapshot.seq
+    lastUpdate.value = new Date().toISOString()
+  }
+
+  // 应用状态增量（status_delta），只修改变化的字段；序号断档时返回false
+  function applyStatusDelta(frame) {
+    if (statusSeq.value < 0 || frame.seq <= statusSeq.value) {
+      return true  // 尚未同步或重复帧，忽略
+    }
+    if (frame.seq !== statusSeq.value + 1) {
+      return false
+    }
+
+    Object.entries(frame.servers || {}).forEach(([serverId, patch]) => {
+      if (patch.full) {
+        updateFullServerStatus(patch.full)
+        return
+      }
+      const server = servers.value.find(s => s.id === serverId)
+      if (!server) return
+
+      const fields = patch.set || {}
+      Object.entries(fields).forEach(([key, value]) => {
+        if (SERVER_FIELD_MAP[key]) {
+          server[SERVER_FIELD_MAP[key]] = value
+        }
+      })
+      if (fields.name_cn) server.name = fields.name_cn
+      if (fields.os_type) server.serverType = fields.os_type === 'linux' ? 'docker' : 'production'
+      ;(patch.unset || []).forEach(key => {
+        if (SERVER_FIELD_MAP[key]) {
+          server[SERVER_FIELD_MAP[key]] = undefined
+        }
+      })
+
+      Object.entries(patch.processes || {}).forEach(([name, procPatch]) => {
+        const proc = server.processes.find(p => p.name === name)
+        if (!proc) {
+          server.processes.push(mapProcess({ name, ...procPatch }))
+          return
+        }
+        Object.entries(procPatch).forEach(([key, value]) => {
+          if (PROCESS_FIELD_MAP[key]) {
+            proc[PROCESS_FIELD_MAP[key]] = value
+          }
+        })
+      })
+
+      if (patch.removed_processes?.length) {
+        server.processes = server.processes.filter(p => !patch.removed_processes.includes(p.name))
+      }
+    })
+
+    // 已从配置中移除的服务器
+    if (frame.removed_servers?.length) {
+      servers.value = servers.value.filter(s => !frame.removed_servers.includes(s.id))
+    }
+
+    statusSeq.value = frame.seq
+    lastUpdate.value = new Date().toISOString()
+    return true
+  }
+
   // 处理服务器恢复事件
   function handleServerRecovered(serverId, offlineDuration) {
     console.log(`[Store] Server ${serverId} recovered after ${offlineDuration}s`)
@@ -201,7 +295,8 @@ export const useMonitorStore = defineStore('monitor', () => {
   async function fetchServers() {
     loading.value = true
     try {
-      const response = await axios.get(`${API_BASE}/servers`, { timeout: 60000 })
+      // Served from the backend status snapshot (no SSH on read), so a short timeout is enough
+      const response = await axios.get(`${API_BASE}/servers`, { timeout: 10000 })
       if (response.data && response.data.data) {
         // 转换API数据格式，保持配置的排序顺序
         const apiServers = response.data.data.map(server => {
@@ -276,6 +371,8 @@ export const useMonitorStore = defineStore('monitor', () => {
     alertCount,
     updateServerStatus,
     updateFullServerStatus,
+    applyStatusSnapshot,
+    applyStatusDelta,
     handleServerRecovered,
     handleServerOffline,
     handleConnectionStateChange,
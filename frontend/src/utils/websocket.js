@@ -27,6 +27,8 @@ class WebSocketService {
           console.log('[WS] Connected to server')
           this.reconnectAttempts = 0
           this.emit('connection', { status: 'connected' })
+          // 加入status房间，服务端先推送快照，之后只推送增量
+          this.socket.emit('join', { room: 'status' })
           resolve(this.socket)
         })
 
@@ -83,9 +85,14 @@ class WebSocketService {
           this.emit('allServersStatus', data)
         })
 
-        // Server status update (for reconnection broadcasts)
-        this.socket.on('server_status_update', (data) => {
-          this.emit('serverStatusUpdate', data)
+        // Status stream: full snapshot on join/resync, then seq-numbered deltas
+        this.socket.on('status_snapshot', (data) => {
+          console.log('[WS] Status snapshot: seq', data.seq, data.servers?.length, 'servers')
+          this.emit('statusSnapshot', data)
+        })
+
+        this.socket.on('status_delta', (data) => {
+          this.emit('statusDelta', data)
         })
 
         // System log events
@@ -167,6 +174,11 @@ class WebSocketService {
     this.send('alert:ack', { alertId })
   }
 
+  // 增量序号不连续时请求完整快照
+  requestResync() {
+    this.send('request_resync', {})
+  }
+
   // 请求系统日志
   requestSystemLogs(count = 50) {
     this.send('request_system_logs', { count })